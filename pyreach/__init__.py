@@ -12,41 +12,119 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Initialize PyReach."""
-from pyreach.arm import ActionInput
-from pyreach.arm import Arm
-from pyreach.arm import ArmState
-from pyreach.arm import IKLibType
-from pyreach.calibration import Calibration
-from pyreach.client_annotation import ClientAnnotation
-from pyreach.color_camera import ColorCamera
-from pyreach.color_camera import ColorFrame
-from pyreach.core import AxisAngle
-from pyreach.core import Pose
-from pyreach.core import PyReachError
-from pyreach.core import PyReachStatus
-from pyreach.core import Quaternion
-from pyreach.core import Rotation
-from pyreach.core import Translation
-from pyreach.depth_camera import DepthCamera
-from pyreach.depth_camera import DepthFrame
-from pyreach.force_torque_sensor import ForceTorqueSensor
-from pyreach.force_torque_sensor import ForceTorqueSensorState
-from pyreach.host import Host
-from pyreach.logger import Logger
-from pyreach.metrics import Metric
-from pyreach.metrics import Metrics
-from pyreach.oracle import Oracle
-from pyreach.oracle import Prediction
-from pyreach.oracle import PredictionPickPlacePoint
-from pyreach.oracle import PredictionPoint
-from pyreach.run_script import RunScript
-from pyreach.sim import Sim
-from pyreach.text_instruction import TextInstruction
-from pyreach.text_instruction import TextInstructions
-from pyreach.vacuum import Vacuum
-from pyreach.vacuum import VacuumGauge
-from pyreach.vacuum import VacuumPressure
-from pyreach.vacuum import VacuumState
-from pyreach.vnc import PointerEventType
-from pyreach.vnc import VNC
+"""Initialize PyReach.
+
+The public names and the submodules are loaded on first access (PEP 562), so
+importing pyreach or one of its submodules does not import every device
+interface.
+"""
+
+import importlib
+import pkgutil
+from typing import Any, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+  from pyreach.arm import ActionInput
+  from pyreach.arm import Arm
+  from pyreach.arm import ArmState
+  from pyreach.arm import IKLibType
+  from pyreach.calibration import Calibration
+  from pyreach.client_annotation import ClientAnnotation
+  from pyreach.color_camera import ColorCamera
+  from pyreach.color_camera import ColorFrame
+  from pyreach.core import AxisAngle
+  from pyreach.core import Pose
+  from pyreach.core import PyReachError
+  from pyreach.core import PyReachStatus
+  from pyreach.core import Quaternion
+  from pyreach.core import Rotation
+  from pyreach.core import Translation
+  from pyreach.depth_camera import DepthCamera
+  from pyreach.depth_camera import DepthFrame
+  from pyreach.force_torque_sensor import ForceTorqueSensor
+  from pyreach.force_torque_sensor import ForceTorqueSensorState
+  from pyreach.host import Host
+  from pyreach.logger import Logger
+  from pyreach.metrics import Metric
+  from pyreach.metrics import Metrics
+  from pyreach.oracle import Oracle
+  from pyreach.oracle import Prediction
+  from pyreach.oracle import PredictionPickPlacePoint
+  from pyreach.oracle import PredictionPoint
+  from pyreach.pose_array import PoseArray
+  from pyreach.run_script import RunScript
+  from pyreach.sim import Sim
+  from pyreach.text_instruction import TextInstruction
+  from pyreach.text_instruction import TextInstructions
+  from pyreach.vacuum import Vacuum
+  from pyreach.vacuum import VacuumGauge
+  from pyreach.vacuum import VacuumPressure
+  from pyreach.vacuum import VacuumState
+  from pyreach.vnc import PointerEventType
+  from pyreach.vnc import VNC
+
+# The module defining each public name.
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    "ActionInput": "pyreach.arm",
+    "Arm": "pyreach.arm",
+    "ArmState": "pyreach.arm",
+    "IKLibType": "pyreach.arm",
+    "Calibration": "pyreach.calibration",
+    "ClientAnnotation": "pyreach.client_annotation",
+    "ColorCamera": "pyreach.color_camera",
+    "ColorFrame": "pyreach.color_camera",
+    "AxisAngle": "pyreach.core",
+    "Pose": "pyreach.core",
+    "PyReachError": "pyreach.core",
+    "PyReachStatus": "pyreach.core",
+    "Quaternion": "pyreach.core",
+    "Rotation": "pyreach.core",
+    "Translation": "pyreach.core",
+    "DepthCamera": "pyreach.depth_camera",
+    "DepthFrame": "pyreach.depth_camera",
+    "ForceTorqueSensor": "pyreach.force_torque_sensor",
+    "ForceTorqueSensorState": "pyreach.force_torque_sensor",
+    "Host": "pyreach.host",
+    "Logger": "pyreach.logger",
+    "Metric": "pyreach.metrics",
+    "Metrics": "pyreach.metrics",
+    "Oracle": "pyreach.oracle",
+    "Prediction": "pyreach.oracle",
+    "PredictionPickPlacePoint": "pyreach.oracle",
+    "PredictionPoint": "pyreach.oracle",
+    "PoseArray": "pyreach.pose_array",
+    "RunScript": "pyreach.run_script",
+    "Sim": "pyreach.sim",
+    "TextInstruction": "pyreach.text_instruction",
+    "TextInstructions": "pyreach.text_instruction",
+    "Vacuum": "pyreach.vacuum",
+    "VacuumGauge": "pyreach.vacuum",
+    "VacuumPressure": "pyreach.vacuum",
+    "VacuumState": "pyreach.vacuum",
+    "PointerEventType": "pyreach.vnc",
+    "VNC": "pyreach.vnc",
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def _submodules() -> List[str]:
+  """Return the names of the submodules and subpackages of pyreach."""
+  return [module.name for module in pkgutil.iter_modules(__path__)]
+
+
+def __getattr__(name: str) -> Any:
+  """Import a public name or a submodule on first access."""
+  module_name = _LAZY_ATTRIBUTES.get(name)
+  if module_name is not None:
+    value = getattr(importlib.import_module(module_name), name)
+  elif name in _submodules():
+    value = importlib.import_module("pyreach." + name)
+  else:
+    raise AttributeError("module 'pyreach' has no attribute '%s'" % name)
+  globals()[name] = value
+  return value
+
+
+def __dir__() -> List[str]:
+  return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_submodules()))
@@ -0,0 +1,299 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Asyncio interface to the devices of a host.
+
+The awaitables of this module are resolved directly by the host when the
+responses of their requests arrive, so any number of operations can be
+awaited concurrently without a thread each:
+
+  async def main(host: pyreach.Host) -> None:
+    ahost = aio.wrap(host)
+    frame, status = await asyncio.gather(
+        ahost.color_camera.fetch_image(),
+        ahost.arm.to_joints([0.0, -1.57, 1.57, 0.0, 1.57, 0.0]))
+
+Cancelling an awaitable, e.g. with asyncio.wait_for, terminates its request
+as if it had timed out.
+"""
+
+import importlib
+from typing import List, Optional, Tuple, TypeVar, Union
+
+import numpy as np
+
+from pyreach import color_camera
+from pyreach import core
+from pyreach import depth_camera
+from pyreach import oracle
+from pyreach.host import Host
+
+
+T = TypeVar("T")
+
+
+def _only(devices: core.ImmutableDictionary[T]) -> Optional[T]:
+  """Return the only device of a dictionary, or None."""
+  values = list(devices.values())
+  if len(values) != 1:
+    return None
+  return values[0]
+
+
+class AsyncColorCamera(object):
+  """Asyncio interface of a color camera."""
+
+  async def fetch_image(
+      self, timeout: float = 15.0) -> Optional[color_camera.ColorFrame]:
+    """Fetch a new image.
+
+    Args:
+      timeout: The number of seconds to wait for the image.
+
+    Returns:
+      The image, or None if the request failed or timed out.
+    """
+    raise NotImplementedError
+
+
+class AsyncDepthCamera(object):
+  """Asyncio interface of a depth camera."""
+
+  async def fetch_image(
+      self, timeout: float = 15.0) -> Optional[depth_camera.DepthFrame]:
+    """Fetch a new image.
+
+    Args:
+      timeout: The number of seconds to wait for the image.
+
+    Returns:
+      The image, or None if the request failed or timed out.
+    """
+    raise NotImplementedError
+
+
+class AsyncArm(object):
+  """Asyncio interface of an arm."""
+
+  async def to_joints(self,
+                      joints: Union[Tuple[float, ...], List[float],
+                                    np.ndarray],
+                      use_linear: bool = False,
+                      intent: str = "",
+                      pick_id: str = "",
+                      success_type: str = "",
+                      velocity: float = 0.0,
+                      acceleration: float = 0.0,
+                      allow_uncalibrated: bool = False,
+                      preemptive: bool = False,
+                      controller_name: str = "",
+                      timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Move the arm to joint angles.
+
+    Args:
+      joints: The list of joint angles in radians.
+      use_linear: Whether to move in linear space.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      allow_uncalibrated: Allow motion when uncalibrated (unsafe, should only be
+        set in calibration code).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the command to.
+      timeout: The amount time to wait before giving up.
+
+    Returns:
+      The final status of the move.
+    """
+    raise NotImplementedError
+
+  async def to_pose(self,
+                    pose: core.Pose,
+                    use_linear: bool = False,
+                    intent: str = "",
+                    pick_id: str = "",
+                    success_type: str = "",
+                    velocity: float = 0.0,
+                    acceleration: float = 0.0,
+                    apply_tip_adjust_transform: bool = False,
+                    allow_uncalibrated: bool = False,
+                    preemptive: bool = False,
+                    controller_name: str = "",
+                    pose_in_world_coordinates: bool = False,
+                    timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Move the arm to a pose.
+
+    Args:
+      pose: The desired pose.
+      use_linear: True if a linear translation is required.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      apply_tip_adjust_transform: Apply the transform of the tip adjust.
+      allow_uncalibrated: Allow motion when uncalibrated (unsafe, should only be
+        set in calibration code).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the command to.
+      pose_in_world_coordinates: If true, pose is in world coordinates,
+        otherwise if false, pose is in arm base coordinates.
+      timeout: The amount of time to wait until giving up.
+
+    Returns:
+      The final status of the move.
+    """
+    raise NotImplementedError
+
+
+class AsyncVacuum(object):
+  """Asyncio interface of a vacuum."""
+
+  async def on(self,
+               intent: str = "",
+               pick_id: str = "",
+               success_type: str = "",
+               timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Turn the vacuum suction on.
+
+    Args:
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      timeout: The optional timeout of the command in seconds.
+
+    Returns:
+      The final status of the command.
+    """
+    raise NotImplementedError
+
+  async def off(self,
+                intent: str = "",
+                pick_id: str = "",
+                success_type: str = "",
+                timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Turn the vacuum suction off.
+
+    Args:
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      timeout: The optional timeout of the command in seconds.
+
+    Returns:
+      The final status of the command.
+    """
+    raise NotImplementedError
+
+
+class AsyncOracle(object):
+  """Asyncio interface of an oracle."""
+
+  async def fetch_prediction(self,
+                             intent: str,
+                             prediction_type: str,
+                             request_type: str,
+                             task_code: str,
+                             label: str,
+                             timeout: float = 15.0) -> oracle.Prediction:
+    """Fetch a new prediction.
+
+    Args:
+      intent: The intent for the oracle.
+      prediction_type: The prediction_type for the oracle.
+      request_type: The request_type for the oracle.
+      task_code: The task_code for the oracle.
+      label: The label for the oracle.
+      timeout: The maximum time to wait for the prediction.
+
+    Raises:
+      PyReachError: if the request failed or timed out.
+
+    Returns:
+      A new prediction.
+    """
+    raise NotImplementedError
+
+
+class AsyncHost(object):
+  """Asyncio interface of the devices of a host."""
+
+  @property
+  def host(self) -> Host:
+    """Return the wrapped host."""
+    raise NotImplementedError
+
+  @property
+  def color_cameras(self) -> core.ImmutableDictionary[AsyncColorCamera]:
+    """Return the color cameras by name."""
+    raise NotImplementedError
+
+  @property
+  def color_camera(self) -> Optional[AsyncColorCamera]:
+    """Return the color camera if there is just one, None otherwise."""
+    return _only(self.color_cameras)
+
+  @property
+  def depth_cameras(self) -> core.ImmutableDictionary[AsyncDepthCamera]:
+    """Return the depth cameras by name."""
+    raise NotImplementedError
+
+  @property
+  def depth_camera(self) -> Optional[AsyncDepthCamera]:
+    """Return the depth camera if there is just one, None otherwise."""
+    return _only(self.depth_cameras)
+
+  @property
+  def arms(self) -> core.ImmutableDictionary[AsyncArm]:
+    """Return the arms by name."""
+    raise NotImplementedError
+
+  @property
+  def arm(self) -> Optional[AsyncArm]:
+    """Return the arm if there is just one, None otherwise."""
+    return _only(self.arms)
+
+  @property
+  def vacuums(self) -> core.ImmutableDictionary[AsyncVacuum]:
+    """Return the vacuums by name."""
+    raise NotImplementedError
+
+  @property
+  def vacuum(self) -> Optional[AsyncVacuum]:
+    """Return the vacuum if there is just one, None otherwise."""
+    return _only(self.vacuums)
+
+  @property
+  def oracles(self) -> core.ImmutableDictionary[AsyncOracle]:
+    """Return the oracles by name."""
+    raise NotImplementedError
+
+  @property
+  def oracle(self) -> Optional[AsyncOracle]:
+    """Return the oracle if there is just one, None otherwise."""
+    return _only(self.oracles)
+
+
+def wrap(host: Host) -> AsyncHost:
+  """Return the asyncio interface of the devices of a host.
+
+  Args:
+    host: A host connected by a pyreach factory.
+
+  Returns:
+    The asyncio interface. Devices that do not support it are omitted.
+  """
+  mod = importlib.import_module("pyreach.impl.aio_impl")
+  return mod.AsyncHostImpl(host)
@@ -22,7 +22,7 @@ Supported features
 """
 import dataclasses
 import enum
-from typing import Callable, List, Optional, Tuple, Union
+from typing import Any, Callable, List, Optional, Tuple, Union
 
 import numpy as np
 
@@ -150,6 +150,74 @@ class ArmState:
   tip_adjust_t_origin: Optional[core.Pose] = None
 
 
+@dataclasses.dataclass(frozen=True)
+class ServoStreamStats:
+  """Statistics of a servo stream.
+
+  Attributes:
+    targets: The number of targets set.
+    commands_sent: The number of servo commands sent to the robot.
+    targets_replaced: The number of targets replaced by a newer target before
+      being sent.
+    errors: The number of targets that could not be converted to a command,
+      e.g. because IK failed.
+    command_rate: The number of commands sent during the last second.
+    latency_p50: The median time in seconds from setting a target until the
+      robot reports the completion of its command.
+    latency_p99: The 99th percentile of the latency in seconds.
+  """
+
+  targets: int
+  commands_sent: int
+  targets_replaced: int
+  errors: int
+  command_rate: float
+  latency_p50: float
+  latency_p99: float
+
+
+class ServoStream(object):
+  """A persistent servo target that is streamed to the arm at a fixed rate.
+
+  Only the newest target is sent: a target that was not sent yet is
+  replaced by the next one, so stale targets never queue up.
+  """
+
+  def set_target_pose(self, pose: core.Pose) -> None:
+    """Set the target pose of the arm.
+
+    Args:
+      pose: The target pose.
+    """
+    raise NotImplementedError
+
+  def set_target_joints(
+      self, joints: Union[Tuple[float, ...], List[float], np.ndarray]) -> None:
+    """Set the target joint angles of the arm.
+
+    Args:
+      joints: The target joint angles in radians.
+    """
+    raise NotImplementedError
+
+  @property
+  def stats(self) -> ServoStreamStats:
+    """Return the statistics of the stream."""
+    raise NotImplementedError
+
+  def close(self) -> None:
+    """Stop streaming."""
+    raise NotImplementedError
+
+  def __enter__(self) -> "ServoStream":
+    """With statement entry."""
+    return self
+
+  def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+    """With statement exit."""
+    self.close()
+
+
 class Arm(object):
   """Interface of a multi-joint Arm."""
 
@@ -162,6 +230,35 @@ class Arm(object):
     """Return the latest state of the arm."""
     raise NotImplementedError
 
+  def state_at(self, t: float) -> Optional[ArmState]:
+    """Return the state of the arm at a time.
+
+    The state is interpolated from a bounded history of the states received,
+    e.g. to get the arm pose at the time of a camera frame. Joint angles,
+    forces and positions are interpolated linearly, rotations with SLERP.
+    Other attributes are the ones of the preceding state.
+
+    Args:
+      t: The time.
+
+    Returns:
+      The interpolated state, or None if the time is outside of the history.
+    """
+    raise NotImplementedError
+
+  def states_between(self, start_time: float,
+                     end_time: float) -> List[ArmState]:
+    """Return the received arm states between two times.
+
+    Args:
+      start_time: The start time, inclusive.
+      end_time: The end time, inclusive.
+
+    Returns:
+      The states in the history ordered by time.
+    """
+    raise NotImplementedError
+
   @property
   def arm_type(self) -> ArmType:
     """Return the arm type of the arm."""
@@ -575,6 +672,43 @@ class Arm(object):
     """
     raise NotImplementedError
 
+  def start_servo_stream(self,
+                         rate: float = 50.0,
+                         velocity: float = 0.0,
+                         acceleration: float = 0.0,
+                         apply_tip_adjust_transform: bool = False,
+                         pose_in_world_coordinates: bool = False,
+                         servo_time_seconds: float = 0.0,
+                         servo_lookahead_time_seconds: float = 0.0,
+                         servo_gain: float = 0.0,
+                         preemptive: bool = False,
+                         controller_name: str = "") -> ServoStream:
+    """Start streaming servo targets, e.g. for continuous teleoperation.
+
+    Unlike calling async_to_pose(servo=True) for every input, the stream
+    keeps one target and sends only the newest one at the given rate.
+
+    Args:
+      rate: The maximum number of commands sent per second.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      apply_tip_adjust_transform: Apply the transform of the tip adjust to
+        target poses.
+      pose_in_world_coordinates: If true, target poses are in world
+        coordinates, otherwise if false, in arm base coordinates.
+      servo_time_seconds: Time to block the robot for (servo + UR only).
+      servo_lookahead_time_seconds: Lookahead time for trajectory smoothing
+        (servo + UR only).
+      servo_gain: Gain for the servoing - if zero, defaults to 300 (servo + UR
+        only).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the commands to.
+
+    Returns:
+      The servo stream. It must be closed to stop streaming.
+    """
+    raise NotImplementedError
+
   def fk(self,
          joints: Union[Tuple[float, ...], List[float], np.ndarray],
          apply_tip_adjust_transform: bool = False,
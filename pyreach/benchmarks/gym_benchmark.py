@@ -0,0 +1,101 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the gym environment."""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from pyreach.benchmarks import harness
+from pyreach.gyms import arm_element
+from pyreach.gyms import color_camera_element
+from pyreach.gyms import reach_env
+from pyreach.impl import local_tcp_client
+from pyreach.impl import reach_serve_standin
+from pyreach.mock import host_mock
+
+
+def _config(camera_name: str, arm_name: str,
+            shape: Tuple[int, int]) -> Dict[str, reach_env.ReachElement]:
+  """Return the gym config of an arm and a color camera."""
+  return {
+      "color_camera":
+          color_camera_element.ReachColorCamera(
+              reach_name=camera_name, shape=shape, is_synchronous=False),
+      "arm":
+          arm_element.ReachArm(
+              reach_name=arm_name,
+              low_joint_angles=(-6.283,) * 6,
+              high_joint_angles=(6.283,) * 6,
+              is_synchronous=False),
+  }
+
+
+def _time_steps(env: reach_env.ReachEnv,
+                options: harness.Options) -> harness.Result:
+  """Time ReachEnv.step moving the arm of an environment."""
+  env.reset()
+  action_id = [0]
+
+  def step() -> None:
+    action_id[0] += 1
+    env.step({
+        "arm": {
+            "command": 1,
+            "id": action_id[0],
+            "joint_angles": np.zeros(6)
+        }
+    })
+
+  return harness.time_calls(step, options)
+
+
+@harness.register("gym.step")
+def benchmark_step(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time ReachEnv.step of an arm and a color camera on the mock host."""
+  config = _config("ColorCamera", "robot", (3, 5))
+  env = reach_env.ReachEnv(
+      pyreach_config=config,
+      host=host_mock.HostMock(config),
+      gym_env_id="benchmark-v0")
+  try:
+    return {"": _time_steps(env, options)}
+  finally:
+    env.close()
+
+
+@harness.register("gym.step_standin")
+def benchmark_step_standin(
+    options: harness.Options) -> Dict[str, harness.Result]:
+  """Time ReachEnv.step on a host connected to the reach serve stand-in.
+
+  Unlike gym.step, the observations go through the wire protocol, the
+  client and the devices of a host, with the camera publishing frames.
+  """
+  standin_config = reach_serve_standin.StandinConfig(
+      robot_state_rate=100.0,
+      color_rate=30.0,
+      image_width=320,
+      image_height=240)
+  with reach_serve_standin.ReachServeStandin(standin_config) as server:
+    host = local_tcp_client.connect_local_tcp("localhost", server.port, {},
+                                              "selector")
+    env = reach_env.ReachEnv(
+        pyreach_config=_config("", "", (240, 320)),
+        host=host,
+        gym_env_id="benchmark-v0")
+    try:
+      return {"": _time_steps(env, options)}
+    finally:
+      env.close()
@@ -0,0 +1,187 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Registry, timing and reporting of the benchmarks.
+
+A benchmark is a function registered under a name. It receives the Options
+and returns its results by sub-name; each result is a flat dictionary of
+numbers. The report of a run maps "<name>.<sub-name>" to the results, so
+reports of successive runs can be compared key by key.
+"""
+
+import dataclasses
+import logging
+import platform
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Version of the report format.
+REPORT_VERSION = 1
+
+# A benchmark result: measurements by name.
+Result = Dict[str, float]
+
+# A benchmark: returns its results by sub-name.
+BenchmarkFunction = Callable[["Options"], Dict[str, Result]]
+
+_BENCHMARKS: Dict[str, BenchmarkFunction] = {}
+
+
+@dataclasses.dataclass(frozen=True)
+class Options:
+  """Options of a benchmark run.
+
+  Attributes:
+    min_time: the minimum time in seconds spent on each measurement.
+    min_iterations: the minimum number of iterations of each measurement.
+  """
+  min_time: float = 1.0
+  min_iterations: int = 3
+
+
+def register(name: str) -> Callable[[BenchmarkFunction], BenchmarkFunction]:
+  """Return a decorator registering a benchmark.
+
+  Args:
+    name: the name of the benchmark.
+
+  Returns:
+    The decorator.
+  """
+
+  def decorator(fn: BenchmarkFunction) -> BenchmarkFunction:
+    if name in _BENCHMARKS:
+      raise ValueError("Benchmark registered twice: " + name)
+    _BENCHMARKS[name] = fn
+    return fn
+
+  return decorator
+
+
+def benchmarks() -> Dict[str, BenchmarkFunction]:
+  """Return the registered benchmarks by name."""
+  return dict(_BENCHMARKS)
+
+
+def summarize(latencies: List[float], items: int = 1) -> Result:
+  """Summarize the latencies of calls.
+
+  Args:
+    latencies: the duration of each call in seconds.
+    items: the number of items processed by each call.
+
+  Returns:
+    The number of calls, their total time, the items per second, and the
+    mean, median, 99th percentile and minimum latency in microseconds.
+  """
+  ordered = sorted(latencies)
+  total = sum(ordered)
+  count = len(ordered)
+  if not count:
+    return {"iterations": 0, "seconds": 0.0}
+  return {
+      "iterations": count,
+      "seconds": total,
+      "per_second": count * items / total if total > 0 else 0.0,
+      "mean_us": total / count * 1e6,
+      "p50_us": ordered[count // 2] * 1e6,
+      "p99_us": ordered[min(count - 1, (count * 99) // 100)] * 1e6,
+      "min_us": ordered[0] * 1e6,
+  }
+
+
+def time_calls(fn: Callable[[], Any],
+               options: Options,
+               items: int = 1,
+               setup: Optional[Callable[[], Any]] = None) -> Result:
+  """Time repeated calls of a function.
+
+  Args:
+    fn: the function.
+    options: the run options.
+    items: the number of items processed by each call.
+    setup: an optional function called, untimed, before each call.
+
+  Returns:
+    The summary of the latencies of the calls.
+  """
+  latencies: List[float] = []
+  deadline = time.perf_counter() + options.min_time
+  while True:
+    if setup is not None:
+      setup()
+    start = time.perf_counter()
+    fn()
+    end = time.perf_counter()
+    latencies.append(end - start)
+    if len(latencies) >= options.min_iterations and end >= deadline:
+      break
+  return summarize(latencies, items)
+
+
+def time_batch(fn: Callable[[], int]) -> Result:
+  """Time one call of a function processing a batch of items.
+
+  Args:
+    fn: the function, returns the number of items processed.
+
+  Returns:
+    The number of items, the time taken, and the items per second.
+  """
+  start = time.perf_counter()
+  items = fn()
+  seconds = time.perf_counter() - start
+  return {
+      "items": items,
+      "seconds": seconds,
+      "per_second": items / seconds if seconds > 0 else 0.0,
+  }
+
+
+def run(options: Options, pattern: str = "") -> Dict[str, Any]:
+  """Run the registered benchmarks.
+
+  A benchmark that raises an exception, e.g. because an optional dependency is
+  missing, is reported in the errors and does not stop the run.
+
+  Args:
+    options: the run options.
+    pattern: if not empty, only run the benchmarks whose name matches this
+      regular expression.
+
+  Returns:
+    The report, serializable as JSON.
+  """
+  results: Dict[str, Result] = {}
+  errors: Dict[str, str] = {}
+  regex = re.compile(pattern) if pattern else None
+  for name, fn in sorted(_BENCHMARKS.items()):
+    if regex is not None and not regex.search(name):
+      continue
+    logging.info("running benchmark %s", name)
+    try:
+      for key, result in fn(options).items():
+        results[name + "." + key if key else name] = result
+    except Exception as e:  # pylint: disable=broad-except
+      logging.exception("benchmark %s failed", name)
+      errors[name] = "%s: %s" % (type(e).__name__, e)
+  return {
+      "version": REPORT_VERSION,
+      "time": time.time(),
+      "python": platform.python_version(),
+      "platform": platform.platform(),
+      "options": dataclasses.asdict(options),
+      "results": results,
+      "errors": errors,
+  }
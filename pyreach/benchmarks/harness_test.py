@@ -0,0 +1,61 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the benchmark harness."""
+
+import json
+from typing import Dict
+import unittest
+
+from pyreach.benchmarks import harness
+from pyreach.benchmarks import messages_benchmark  # pylint: disable=unused-import
+
+
+@harness.register("harness_test.ok")
+def _benchmark_ok(options: harness.Options) -> Dict[str, harness.Result]:
+  return {"sum": harness.time_calls(lambda: sum(range(100)), options, 100)}
+
+
+@harness.register("harness_test.fails")
+def _benchmark_fails(options: harness.Options) -> Dict[str, harness.Result]:
+  raise ValueError("missing dependency")
+
+
+class HarnessTest(unittest.TestCase):
+
+  def test_summarize(self) -> None:
+    result = harness.summarize([0.003, 0.001, 0.002], 10)
+    self.assertEqual(result["iterations"], 3)
+    self.assertAlmostEqual(result["seconds"], 0.006)
+    self.assertAlmostEqual(result["per_second"], 5000.0)
+    self.assertAlmostEqual(result["p50_us"], 2000.0)
+    self.assertAlmostEqual(result["min_us"], 1000.0)
+
+  def test_register_twice(self) -> None:
+    with self.assertRaises(ValueError):
+      harness.register("harness_test.ok")(_benchmark_ok)
+
+  def test_run(self) -> None:
+    options = harness.Options(min_time=0.0, min_iterations=2)
+    report = harness.run(options, "^(harness_test|messages)")
+    json.dumps(report)
+    self.assertEqual(report["version"], harness.REPORT_VERSION)
+    self.assertEqual(report["results"]["harness_test.ok.sum"]["iterations"], 2)
+    self.assertIn("messages.robot_state.decode", report["results"])
+    self.assertEqual(report["errors"],
+                     {"harness_test.fails": "ValueError: missing dependency"})
+
+
+if __name__ == "__main__":
+  unittest.main()
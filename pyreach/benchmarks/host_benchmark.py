@@ -0,0 +1,137 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the host message dispatch."""
+
+import queue
+import threading
+from typing import Dict, Optional
+
+from pyreach.benchmarks import harness
+from pyreach.benchmarks import samples
+from pyreach.common.python import types_gen
+from pyreach.impl import client as cli
+from pyreach.impl import device_base
+from pyreach.impl import reach_host
+from pyreach.impl import reach_serve_standin
+
+# The number of messages dispatched by each measurement.
+_MESSAGES = 20000
+
+# The device counts of the dispatch measurements.
+_DEVICE_COUNTS = (1, 4, 16)
+
+
+class _QueueClient(cli.Client):
+  """A client whose device data is put in its queue by the benchmark."""
+
+  _queue: "queue.Queue[Optional[types_gen.DeviceData]]"
+
+  def __init__(self) -> None:
+    self._queue = queue.Queue()
+
+  def get_queue(self) -> "queue.Queue[Optional[types_gen.DeviceData]]":
+    return self._queue
+
+  def send_cmd(self, cmd: types_gen.CommandData) -> None:
+    pass
+
+  def close(self) -> None:
+    self._queue.put(None)
+
+
+class _CountingDevice(device_base.DeviceBase):
+  """A device signaling when it has received a number of robot-states."""
+
+  _expected: int
+  _received: int
+  _done: threading.Event
+
+  def __init__(self) -> None:
+    super().__init__()
+    self._expected = 0
+    self._received = 0
+    self._done = threading.Event()
+
+  def expect(self, count: int) -> threading.Event:
+    """Set the number of robot-states to expect, return the done event."""
+    self._expected = count
+    self._received = 0
+    self._done.clear()
+    return self._done
+
+  def on_device_data(self, msg: types_gen.DeviceData) -> None:
+    if msg.data_type != "robot-state":
+      return
+    self._received += 1
+    if self._received == self._expected:
+      self._done.set()
+
+
+def _dispatch(devices: int, options: harness.Options) -> harness.Result:
+  """Time the dispatch of robot-states to a number of devices."""
+  client = _QueueClient()
+  counters = [_CountingDevice() for _ in range(devices)]
+  host = reach_host.ReachHost(client, list(counters), False)
+  for key in ("robot-name", "display-name"):
+    client.get_queue().put(
+        types_gen.DeviceData(
+            device_type="settings-engine",
+            data_type="key-value",
+            ts=samples.START_TS,
+            key=key,
+            value="benchmark"))
+  host.start()
+  messages = [samples.robot_state(seq) for seq in range(_MESSAGES)]
+  try:
+    events = []
+
+    def setup() -> None:
+      events.clear()
+      events.extend(counter.expect(_MESSAGES) for counter in counters)
+
+    def dispatch() -> None:
+      q = client.get_queue()
+      for msg in messages:
+        q.put(msg)
+      for event in events:
+        event.wait()
+
+    result = harness.time_calls(dispatch, options, _MESSAGES, setup)
+  finally:
+    host.close()
+  result["devices"] = devices
+  result["deliveries_per_second"] = result["per_second"] * devices
+  return result
+
+
+@harness.register("host.dispatch")
+def benchmark_dispatch(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the host dispatch of robot-states versus the device count."""
+  return {
+      "devices_%d" % devices: _dispatch(devices, options)
+      for devices in _DEVICE_COUNTS
+  }
+
+
+@harness.register("host.standin")
+def benchmark_standin(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time a host connected to the reach serve stand-in, for each engine."""
+  config = reach_serve_standin.StandinConfig(
+      robot_state_rate=100.0, vacuum_rate=0.0)
+  results: Dict[str, harness.Result] = {}
+  for engine in ("multiprocess", "selector"):
+    with reach_serve_standin.ReachServeStandin(config) as server:
+      results[engine] = reach_serve_standin.run_load(
+          "localhost", server.port, duration=options.min_time, engine=engine)
+  return results
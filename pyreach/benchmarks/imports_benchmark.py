@@ -0,0 +1,107 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the import time of the packages.
+
+Each import is measured in a new interpreter with python -X importtime. Apart
+from the time, each entry is checked against a budget and a list of modules
+that must be imported on first use only, which is what tools and agents
+launched per task depend on.
+"""
+
+import dataclasses
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from pyreach.benchmarks import harness
+
+# The number of interpreters started for each import, the fastest is reported.
+_REPEATS = 3
+
+
+@dataclasses.dataclass(frozen=True)
+class ImportBudget:
+  """The budget of an import.
+
+  Attributes:
+    module: the module imported.
+    budget_ms: the maximum cumulative import time in milliseconds.
+    deferred: modules that the import must not load.
+  """
+  module: str
+  budget_ms: float
+  deferred: Tuple[str, ...]
+
+
+BUDGETS: Tuple[ImportBudget, ...] = (
+    ImportBudget("pyreach", 50.0,
+                 ("numpy", "pyreach.host", "pyreach.common.proto_gen.logs_pb2")),
+    ImportBudget("pyreach.core", 100.0, ("pyreach.host", "cv2")),
+    ImportBudget("pyreach.impl.utils", 500.0, ("cv2", "PIL", "scipy")),
+    ImportBudget("pyreach.factory", 600.0, ("cv2", "PIL", "scipy", "shapely")),
+    ImportBudget("pyreach.impl.host_impl", 800.0, ("PIL", "scipy", "shapely")),
+    ImportBudget("pyreach.gyms.reach_env", 1000.0, ("scipy", "shapely")),
+)
+
+
+def import_time(module: str) -> Tuple[float, List[str]]:
+  """Import a module in a new interpreter.
+
+  Args:
+    module: the module to import.
+
+  Returns:
+    The cumulative import time in milliseconds, and the loaded modules.
+  """
+  code = "import sys, %s; print('\\n'.join(sorted(sys.modules)))" % module
+  proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        universal_newlines=True,
+                        check=True)
+  cumulative_us = 0
+  for line in proc.stderr.splitlines():
+    fields = line.split("|")
+    if len(fields) == 3 and fields[2].strip() == module:
+      cumulative_us = int(fields[1])
+  return cumulative_us / 1e3, proc.stdout.split()
+
+
+def loaded_deferred(budget: ImportBudget, modules: List[str]) -> List[str]:
+  """Return the deferred modules of a budget loaded by its import."""
+  return [
+      name for name in budget.deferred
+      if any(m == name or m.startswith(name + ".") for m in modules)
+  ]
+
+
+@harness.register("imports")
+def benchmark_imports(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the import of the packages against their budgets."""
+  del options  # Unused, each import is measured _REPEATS times.
+  results: Dict[str, harness.Result] = {}
+  for budget in BUDGETS:
+    times: List[float] = []
+    loaded: List[str] = []
+    for _ in range(_REPEATS):
+      elapsed_ms, modules = import_time(budget.module)
+      times.append(elapsed_ms)
+      loaded = loaded_deferred(budget, modules)
+    results[budget.module] = {
+        "import_ms": min(times),
+        "budget_ms": budget.budget_ms,
+        "over_budget": float(min(times) > budget.budget_ms),
+        "deferred_loaded": float(len(loaded)),
+    }
+  return results
@@ -0,0 +1,54 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for imports_benchmark."""
+
+import subprocess
+import sys
+import unittest
+
+from pyreach.benchmarks import imports_benchmark
+
+
+class ImportsBenchmarkTest(unittest.TestCase):
+
+  def test_deferred_modules(self) -> None:
+    for budget in imports_benchmark.BUDGETS:
+      _, modules = imports_benchmark.import_time(budget.module)
+      self.assertIn(budget.module, modules)
+      self.assertEqual(
+          imports_benchmark.loaded_deferred(budget, modules), [],
+          "importing %s loaded deferred modules" % budget.module)
+
+  def test_lazy_attributes(self) -> None:
+    import pyreach  # pylint: disable=g-import-not-at-top
+    self.assertIs(pyreach.PyReachError, pyreach.core.PyReachError)
+    self.assertIn("Host", dir(pyreach))
+    self.assertIn("core", dir(pyreach))
+    with self.assertRaises(AttributeError):
+      _ = pyreach.NotAnAttribute  # type: ignore
+
+  def test_lazy_submodules(self) -> None:
+    # In a new interpreter, where no other import loaded the submodules.
+    code = ("import pyreach; print(pyreach.core.Pose.__name__, "
+            "pyreach.arm.IKLibType.__name__)")
+    proc = subprocess.run([sys.executable, "-c", code],
+                          stdout=subprocess.PIPE,
+                          universal_newlines=True,
+                          check=True)
+    self.assertEqual(proc.stdout.split(), ["Pose", "IKLibType"])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,92 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the kinematics solvers and pose transforms."""
+
+from typing import Dict
+
+import numpy as np
+
+from pyreach import core
+from pyreach.benchmarks import harness
+from pyreach.common.base import transform_util
+
+# A reachable UR3e pose and the joints of one of its solutions.
+_UR3E_POSE = np.array([0.441, -0.069, 0.296, 3.07915249, 0.17924206, 0.07207276])
+_UR3E_JOINTS = np.array(
+    [0.15575925, -2.9682486, 0.93033262, -2.6334274, 1.5101384, -1.53257425])
+
+
+@harness.register("kinematics.ikfast")
+def benchmark_ikfast(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the IKFast solver of a UR3e."""
+  from pyreach.ikfast import ikfast  # pylint: disable=g-import-not-at-top
+  resolver = ikfast.IKFast("ur3e.urdf")
+  if resolver.fk(_UR3E_JOINTS) is None:
+    raise core.PyReachError("The IKFast library of ur3e.urdf is not loaded")
+  hints = {0: list(_UR3E_JOINTS)}
+  return {
+      "ik": harness.time_calls(lambda: resolver.ik(_UR3E_POSE), options),
+      "ik_search":
+          harness.time_calls(
+              lambda: resolver.ik_search(_UR3E_POSE, hints), options),
+      "fk": harness.time_calls(lambda: resolver.fk(_UR3E_JOINTS), options),
+  }
+
+
+@harness.register("kinematics.pybullet")
+def benchmark_pybullet(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the pybullet solver of an xArm."""
+  from pyreach.ik_pybullet import ik_pybullet  # pylint: disable=g-import-not-at-top
+  resolver = ik_pybullet.IKPybullet()
+  joints = np.array([0.0, -0.5, 0.5, 0.0, 0.5, 0.0])
+  pose = resolver.fk(joints)
+  return {
+      "ik_search":
+          harness.time_calls(lambda: resolver.ik_search(pose, joints),
+                             options),
+      "fk": harness.time_calls(lambda: resolver.fk(joints), options),
+  }
+
+
+@harness.register("kinematics.poses")
+def benchmark_poses(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time composing and inverting poses one by one and as a batch."""
+  rng = np.random.RandomState(0)
+  poses = np.concatenate(
+      (rng.uniform(-1, 1, (500, 3)), rng.uniform(-2, 2, (500, 3))), axis=1)
+
+  def compose_loop() -> None:
+    for pose in poses:
+      transform_util.multiply_pose(_UR3E_POSE, pose)
+
+  def inverse_loop() -> None:
+    for pose in poses:
+      transform_util.inverse_pose(pose)
+
+  return {
+      "compose_loop":
+          harness.time_calls(compose_loop, options, items=len(poses)),
+      "compose_batch":
+          harness.time_calls(
+              lambda: transform_util.multiply_pose(_UR3E_POSE, poses),
+              options,
+              items=len(poses)),
+      "inverse_loop":
+          harness.time_calls(inverse_loop, options, items=len(poses)),
+      "inverse_batch":
+          harness.time_calls(
+              lambda: transform_util.inverse_pose(poses),
+              options,
+              items=len(poses)),
+  }
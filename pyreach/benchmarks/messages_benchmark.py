@@ -0,0 +1,77 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the JSON decoding and encoding of messages."""
+
+import json
+from typing import Dict
+
+from pyreach.benchmarks import harness
+from pyreach.benchmarks import samples
+from pyreach.common.python import types_gen
+from pyreach.impl import logger_impl
+
+
+def _codec(msg: types_gen.DeviceData,
+           options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the decoding and encoding of one message."""
+  text = json.dumps(msg.to_json())
+  results = {
+      "decode":
+          harness.time_calls(
+              lambda: types_gen.DeviceData.from_json(json.loads(text)),
+              options),
+      "encode":
+          harness.time_calls(lambda: json.dumps(msg.to_json()), options),
+  }
+  for result in results.values():
+    result["bytes"] = len(text)
+  return results
+
+
+@harness.register("messages")
+def benchmark_messages(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the JSON codec of robot-state and test data key-value messages."""
+  messages = {"robot_state": samples.robot_state(1)}
+  for key, msg in samples.key_values().items():
+    messages[key.replace(".json", "")] = msg
+  results: Dict[str, harness.Result] = {}
+  for name, msg in messages.items():
+    for sub, result in _codec(msg, options).items():
+      results[name + "." + sub] = result
+  return results
+
+
+@harness.register("messages.snapshot")
+def benchmark_snapshot(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time send_snapshot of a gym step, in the caller and in the background."""
+  results: Dict[str, harness.Result] = {}
+  for name, async_snapshots in (("sync", False), ("async", True)):
+    device = logger_impl.LoggerDevice(async_snapshots=async_snapshots)
+    # Encode the commands, as the local TCP client does on send.
+    device.set_send_cmd(lambda cmd: json.dumps(cmd.to_json()))
+    device.start()
+    step = [0]
+
+    def send() -> None:
+      step[0] += 1
+      device.send_snapshot(samples.snapshot(step[0]))  # pylint: disable=cell-var-from-loop
+
+    try:
+      # Flushing between the calls leaves the background thread idle, as it is
+      # between the steps of a gym.
+      results[name] = harness.time_calls(
+          send, options, setup=device.flush_snapshots)
+    finally:
+      device.close()
+  return results
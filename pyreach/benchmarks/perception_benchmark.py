@@ -0,0 +1,81 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the camera frame decoding and depth geometry."""
+
+import tempfile
+from typing import Dict
+
+import numpy as np
+
+from pyreach.benchmarks import harness
+from pyreach.benchmarks import samples
+from pyreach.common.base import transform_util
+from pyreach.common.python import types_gen
+from pyreach.impl import color_camera_impl
+from pyreach.impl import depth_camera_impl
+
+
+@harness.register("perception.decode")
+def benchmark_decode(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the conversion of color and color-depth messages to frames."""
+  results: Dict[str, harness.Result] = {}
+  with tempfile.TemporaryDirectory() as tempdir:
+    color_file, depth_file = samples.write_images(tempdir)
+    color = color_camera_impl.ColorCameraDevice("color-camera")
+    color_msg = types_gen.DeviceData(
+        device_type="color-camera",
+        data_type="color",
+        ts=samples.START_TS,
+        seq=1,
+        color=color_file)
+    results["color"] = harness.time_calls(
+        lambda: color.get_message_supplement(color_msg), options)
+    depth = depth_camera_impl.DepthCameraDevice("depth-camera")
+    depth_msg = types_gen.DeviceData(
+        device_type="depth-camera",
+        data_type="color-depth",
+        ts=samples.START_TS,
+        seq=1,
+        color=color_file,
+        depth=depth_file)
+    results["color_depth"] = harness.time_calls(
+        lambda: depth.get_message_supplement(depth_msg), options)
+  return results
+
+
+@harness.register("perception.depth")
+def benchmark_depth(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time a raycast into a depth image and its point cloud generation."""
+  depth = samples.depth_image()
+  intrinsics = transform_util.intrinsics_to_matrix(samples.DEPTH_INTRINSICS)
+  distortion = np.array(samples.DEPTH_DISTORTION)
+  distortion_depth = np.array(samples.DEPTH_DISTORTION_DEPTH)
+  extrinsics = np.array(samples.DEPTH_EXTRINSICS)
+  origin = np.array([0.0, -1.0, 1.0])
+  direction = np.array([0.0, 0.0, -1.0])
+  depth_float = depth.astype(np.float64)
+  results = {
+      "raycast":
+          harness.time_calls(
+              lambda: transform_util.raycast_into_depth_image(
+                  origin, direction, depth, intrinsics, distortion,
+                  distortion_depth, extrinsics), options),
+      "point_cloud":
+          harness.time_calls(
+              lambda: transform_util.unproject_depth_vectorized(
+                  depth_float, distortion_depth, intrinsics, distortion),
+              options, depth.size),
+  }
+  results["point_cloud"]["points"] = depth.size
+  return results
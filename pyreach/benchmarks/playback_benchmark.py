@@ -0,0 +1,345 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks of the logs directory playback."""
+
+import json
+import os
+import queue
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pyreach.benchmarks import harness
+from pyreach.benchmarks import samples
+from pyreach.common.proto_gen import logs_pb2
+from pyreach.common.python import types_gen
+from pyreach.impl import batch_replay
+from pyreach.impl import client as cli
+from pyreach.impl import internal_impl
+from pyreach.impl import local_tcp_client
+from pyreach.impl import log_columns
+from pyreach.impl import logs_directory_client
+from pyreach.impl import playback_impl
+from pyreach.impl import reach_host
+from pyreach.impl import reach_serve_standin
+from pyreach.impl import utils
+from pyreach.internal import InternalPlayback
+from pyreach.snapshot import Snapshot
+from pyreach.snapshot import SnapshotReference
+from pyreach.snapshot import SnapshotResponse
+
+# The number of robot-states of the logs directory.
+_MESSAGES = 10000
+
+# The number of seeks of the seek latency measurement.
+_SEEKS = 20
+
+# The number of steps of the snapshot replay measurement.
+_STEPS = 100
+
+
+def _write_logs(directory: str) -> None:
+  """Write a logs directory of robot-states at 100 Hz."""
+  for subdirectory in ("device-data", "command-data"):
+    os.mkdir(os.path.join(directory, subdirectory))
+  with open(os.path.join(directory, "device-data", "00000.json"), "w") as f:
+    for seq in range(1, _MESSAGES + 1):
+      f.write(json.dumps(samples.robot_state(seq).to_json()) + "\n")
+  with open(os.path.join(directory, "command-data", "00000.json"), "w"):
+    pass
+
+
+def _client(directory: str) -> logs_directory_client.LogsDirectoryClient:
+  return logs_directory_client.LogsDirectoryClient("benchmark", directory,
+                                                   None, False, None, False)
+
+
+@harness.register("playback")
+def benchmark_playback(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the reading, seeking and columnar export of a logs directory."""
+  with tempfile.TemporaryDirectory() as tempdir:
+    _write_logs(tempdir)
+
+    client = _client(tempdir)
+    try:
+
+      def read() -> int:
+        count = 0
+        while client.next_device_data() is not None:
+          count += 1
+        return count
+
+      results = {"read": harness.time_batch(read)}
+    finally:
+      client.close()
+
+    rng = random.Random(0)
+    sequences = [rng.randint(1, _MESSAGES) for _ in range(_SEEKS)]
+    client = _client(tempdir)
+    try:
+      latencies = []
+      for seq in sequences:
+        start = time.perf_counter()
+        msg = client.seek_device_data(None, seq)
+        latencies.append(time.perf_counter() - start)
+        if msg is None or msg.seq != seq:
+          raise ValueError("Seek to sequence %d failed" % seq)
+      results["seek_sequence"] = harness.summarize(latencies)
+
+      latencies = []
+      for seq in sequences:
+        seek_time = (samples.START_TS + 10 * seq) / 1e3
+        start = time.perf_counter()
+        client.seek_device_data(seek_time, None)
+        latencies.append(time.perf_counter() - start)
+      results["seek_time"] = harness.summarize(latencies)
+    finally:
+      client.close()
+
+    columns_dir = os.path.join(tempdir, "columns")
+
+    def export() -> int:
+      return log_columns.export(tempdir, columns_dir).group(
+          "robot", "robot-state").rows
+
+    results["columns_export"] = harness.time_batch(export)
+
+    # A tenth of the log, as a trajectory query of a long log would select.
+    states = log_columns.LogColumns(columns_dir).group("robot", "robot-state")
+    start_time = samples.START_TS / 1e3 + 0.01 * _MESSAGES / 2
+    end_time = start_time + 0.01 * _MESSAGES / 10
+
+    def query() -> None:
+      rows = states.select(["ts", "joints"], start_time, end_time)
+      rows["joints"].mean(axis=0)
+
+    results["columns_query"] = harness.time_calls(
+        query, options, items=_MESSAGES // 10)
+  return results
+
+
+class _InlineImageClient(cli.PlaybackClient):
+  """A playback client of in-memory device data with inline images."""
+
+  _messages: Dict[Tuple[float, int], types_gen.DeviceData]
+  _queue: "queue.Queue[Optional[types_gen.DeviceData]]"
+
+  def __init__(self, messages: List[types_gen.DeviceData]) -> None:
+    self._messages = {
+        (utils.time_at_timestamp(msg.ts), msg.seq): msg for msg in messages
+    }
+    self._queue = queue.Queue()
+
+  def get_queue(self) -> "queue.Queue[Optional[types_gen.DeviceData]]":
+    return self._queue
+
+  def seek_device_data(
+      self, time: Optional[float],
+      sequence: Optional[int]) -> Optional[types_gen.DeviceData]:
+    assert time is not None and sequence is not None
+    return self._messages.get((time, sequence))
+
+  def close(self) -> None:
+    self._queue.put(None)
+
+
+class _ProtoPlayback(InternalPlayback):
+  """Exposes only the proto API of an internal playback."""
+
+  _playback: internal_impl.PlaybackImpl
+
+  def __init__(self, playback: internal_impl.PlaybackImpl) -> None:
+    self._playback = playback
+
+  def seek_device_data(
+      self, timestamp: Optional[float],
+      sequence: Optional[int]) -> Optional[logs_pb2.DeviceData]:
+    return self._playback.seek_device_data(timestamp, sequence)
+
+
+def _replay_steps(
+    color_image: bytes, depth_image: bytes
+) -> Tuple[List[types_gen.DeviceData], List[Snapshot]]:
+  """Create the device data and snapshots of the replay measurement."""
+  messages: List[types_gen.DeviceData] = []
+  snapshots: List[Snapshot] = []
+  for step in range(_STEPS):
+    seq = 4 * step + 1
+    ts = samples.START_TS + 100 * step
+    frame = types_gen.DeviceData(
+        device_type="depth-camera",
+        data_type="color-depth",
+        ts=ts,
+        seq=seq,
+        color="color/%d.jpg" % step,
+        depth="depth/%d.png" % step)
+    messages.append(
+        utils.ImagedDeviceData.with_images(frame, color_image, depth_image))
+    state = samples.robot_state(seq + 1)
+    state.ts = ts
+    messages.append(state)
+    messages.append(
+        types_gen.DeviceData(
+            device_type="robot",
+            data_type="cmd-status",
+            ts=ts + 1,
+            seq=seq + 2,
+            status="done"))
+    snapshots.append(
+        Snapshot(
+            source="benchmark",
+            device_data_refs=(
+                SnapshotReference(utils.time_at_timestamp(ts), seq),
+                SnapshotReference(utils.time_at_timestamp(ts), seq + 1)),
+            responses=(SnapshotResponse(
+                cid=step,
+                gym_element_type="arm",
+                gym_config_name="arm",
+                reference=SnapshotReference(
+                    utils.time_at_timestamp(ts + 1), seq + 2)),),
+            gym_server_time=utils.time_at_timestamp(ts),
+            gym_env_id="benchmark-v0",
+            gym_run_id="run",
+            gym_episode=1,
+            gym_agent_id=None,
+            gym_step=step,
+            gym_reward=0.0,
+            gym_done=False,
+            gym_actions=()))
+  return messages, snapshots
+
+
+@harness.register("playback.replay")
+def benchmark_replay(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the snapshot replay of steps referencing inline images."""
+  with tempfile.TemporaryDirectory() as tempdir:
+    color_file, depth_file = samples.write_images(tempdir)
+    with open(color_file, "rb") as f:
+      color_image = f.read()
+    with open(depth_file, "rb") as f:
+      depth_image = f.read()
+  messages, snapshots = _replay_steps(color_image, depth_image)
+  client = _InlineImageClient(messages)
+  internal = internal_impl.PlaybackImpl(lambda: None, client)
+  host = reach_host.ReachHost(client, [], False)
+  results: Dict[str, harness.Result] = {}
+  for name, playback in (("typed", internal), ("proto",
+                                               _ProtoPlayback(internal))):
+    device = playback_impl.PlaybackDevice(playback, host, client)
+
+    def replay() -> None:
+      for snap in snapshots:  # pylint: disable=cell-var-from-loop
+        device.replay_snapshot(snap)  # pylint: disable=cell-var-from-loop
+
+    results[name] = harness.time_calls(replay, options, _STEPS)
+    results[name]["image_bytes"] = len(color_image) + len(depth_image)
+  return results
+
+
+def _record_session(directory: str) -> str:
+  """Record a session of _STEPS steps against the stand-in.
+
+  Each step fetches a color frame and an arm state, and logs a snapshot
+  referencing them, as a gym environment does.
+
+  Args:
+    directory: the recording directory.
+
+  Returns:
+    The session directory.
+  """
+  config = reach_serve_standin.StandinConfig(
+      robot_state_rate=100.0, image_width=320, image_height=240)
+  with reach_serve_standin.ReachServeStandin(config) as server:
+    host = local_tcp_client.connect_local_tcp("localhost", server.port,
+                                              {"record_dir": directory},
+                                              "selector")
+    try:
+      assert host.color_camera is not None
+      for step in range(_STEPS):
+        frame = host.color_camera.fetch_image()
+        state = host.arm.fetch_state()
+        assert frame is not None and state is not None
+        host.logger.send_snapshot(
+            Snapshot(
+                source="benchmark",
+                device_data_refs=(SnapshotReference(frame.time,
+                                                    frame.sequence),
+                                  SnapshotReference(state.time,
+                                                    state.sequence)),
+                responses=(),
+                gym_server_time=frame.time,
+                gym_env_id="benchmark-v0",
+                gym_run_id="run",
+                gym_episode=step // 10,
+                gym_agent_id=None,
+                gym_step=step % 10,
+                gym_reward=0.0,
+                gym_done=step % 10 == 9,
+                gym_actions=()))
+      host.logger.flush_snapshots()
+    finally:
+      host.close()
+  (session,) = os.listdir(directory)
+  return os.path.join(directory, session)
+
+
+@harness.register("playback.batch")
+def benchmark_batch(options: harness.Options) -> Dict[str, harness.Result]:
+  """Time the replay of the snapshots of a log, decoding the color images."""
+  del options  # Unused, the measurements process a fixed workload.
+  with tempfile.TemporaryDirectory() as tempdir:
+    session = _record_session(tempdir)
+
+    def host_replay() -> int:
+      host = logs_directory_client.connect_logs_directory(
+          "benchmark", session, None, False, None, False, {})
+      try:
+        assert host.playback is not None and host.color_camera is not None
+        count = 0
+        snap = host.playback.next_snapshot()
+        while snap is not None:
+          host.playback.replay_snapshot(snap)
+          frame = host.color_camera.image()
+          assert frame is not None and frame.color_image.size
+          count += 1
+          snap = host.playback.next_snapshot()
+        return count
+      finally:
+        host.close()
+
+    def batch(decode_images: bool) -> int:
+      with batch_replay.BatchReplay(
+          session, decode_images=decode_images) as replay:
+        count = 0
+        for episode in replay.episodes():
+          for step in episode.steps:
+            assert step.color_images or not decode_images
+            count += 1
+        return count
+
+    results = {
+        "host": harness.time_batch(host_replay),
+        "batch": harness.time_batch(lambda: batch(True)),
+        # Without decoding the images, which bounds both replays.
+        "batch_references": harness.time_batch(lambda: batch(False)),
+    }
+  for name in ("batch", "batch_references"):
+    if results[name]["items"] != results["host"]["items"]:
+      raise ValueError("Replayed %d steps with the host, %d in %s" %
+                       (results["host"]["items"], results[name]["items"], name))
+    results[name]["speedup"] = (
+        results[name]["per_second"] / results["host"]["per_second"])
+  return results
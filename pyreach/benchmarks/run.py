@@ -0,0 +1,69 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Run the benchmarks and write their results as JSON.
+
+Run all benchmarks:
+  python3 -m pyreach.benchmarks.run --output=benchmarks.json
+
+Run the host benchmarks only, with shorter measurements:
+  python3 -m pyreach.benchmarks.run --filter=^host --min_time=0.2
+"""
+
+import json
+import sys
+from typing import List
+
+from absl import app  # type: ignore
+from absl import flags  # type: ignore
+
+from pyreach.benchmarks import gym_benchmark  # pylint: disable=unused-import
+from pyreach.benchmarks import harness
+from pyreach.benchmarks import host_benchmark  # pylint: disable=unused-import
+from pyreach.benchmarks import imports_benchmark  # pylint: disable=unused-import
+from pyreach.benchmarks import kinematics_benchmark  # pylint: disable=unused-import
+from pyreach.benchmarks import messages_benchmark  # pylint: disable=unused-import
+from pyreach.benchmarks import perception_benchmark  # pylint: disable=unused-import
+from pyreach.benchmarks import playback_benchmark  # pylint: disable=unused-import
+
+flags.DEFINE_string("output", "",
+                    "The JSON file to write the results to, stdout if empty.")
+flags.DEFINE_string(
+    "filter", "",
+    "If set, only run the benchmarks matching this regular expression.")
+flags.DEFINE_float("min_time", 1.0,
+                   "The minimum time in seconds of each measurement.")
+flags.DEFINE_integer("min_iterations", 3,
+                     "The minimum number of iterations of each measurement.")
+
+
+def _main(argv: List[str]) -> None:
+  """Run the main for the benchmarks."""
+  if len(argv) > 1:
+    raise app.UsageError("Too many command-line arguments.")
+  options = harness.Options(
+      min_time=flags.FLAGS.min_time,
+      min_iterations=flags.FLAGS.min_iterations)
+  report = harness.run(options, flags.FLAGS.filter)
+  text = json.dumps(report, indent=2, sort_keys=True)
+  if flags.FLAGS.output:
+    with open(flags.FLAGS.output, "w") as f:
+      f.write(text + "\n")
+  else:
+    print(text)
+  for name, error in sorted(report["errors"].items()):
+    print("benchmark %s failed: %s" % (name, error), file=sys.stderr)
+
+
+if __name__ == "__main__":
+  app.run(_main)
@@ -0,0 +1,156 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Sample messages and images of the benchmarks."""
+
+import os
+from typing import Dict, Tuple
+
+import cv2  # type: ignore
+import numpy as np
+from PIL import Image  # type: ignore
+
+from pyreach import snapshot as lib_snapshot
+from pyreach.common.python import types_gen
+from pyreach.impl import test_data
+
+# The timestamp of the first sample message, in milliseconds.
+START_TS = 1600000000000
+
+# Calibration of the sample depth camera: a wall 1 meter in front of it.
+DEPTH_INTRINSICS = (615.0, 613.0, 638.0, 369.0)
+DEPTH_DISTORTION = (0.0, 0.0, 0.0, 0.0, 0.0)
+DEPTH_DISTORTION_DEPTH = (0.0, 0.0001, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+DEPTH_EXTRINSICS = (0.20, -0.73, 0.55, -2.91, 0.0, 0.0)
+DEPTH_WALL = 10000
+
+
+def robot_state(seq: int, device_name: str = "") -> types_gen.DeviceData:
+  """Return a robot-state message.
+
+  Args:
+    seq: the sequence number, also the number of 10 ms after START_TS.
+    device_name: the device name of the robot.
+
+  Returns:
+    The message.
+  """
+  return types_gen.DeviceData(
+      device_type="robot",
+      device_name=device_name,
+      data_type="robot-state",
+      ts=START_TS + 10 * seq,
+      seq=seq,
+      pose=[0.19, -0.71, 0.16, 0.12, -3.08, -0.02],
+      joints=[1.67, -0.80, 1.34, -2.12, 4.66, 0.01],
+      force=[-6.51, 5.27, -3.66, -0.16, -0.24, 0.14],
+      base_t_origin=[0.1, 0.0, 0.0, 0.0, 0.0, 0.0],
+      tip_adjust_t_base=[0.19, -0.77, 0.0, 0.12, -3.08, -0.02],
+      is_robot_power_on=True,
+      safety_message="NORMAL",
+      robot_mode="remote",
+      digital_in=[False] * 32,
+      digital_out=[False] * 32)
+
+
+def snapshot(step: int) -> lib_snapshot.Snapshot:
+  """Return the snapshot of a gym step of an arm, a camera and a vacuum.
+
+  Args:
+    step: the gym step, also the number of 100 ms after START_TS.
+
+  Returns:
+    The snapshot.
+  """
+  time = START_TS / 1e3 + 0.1 * step
+  return lib_snapshot.Snapshot(
+      source="pyreach_gym",
+      device_data_refs=(lib_snapshot.SnapshotReference(time, step),
+                        lib_snapshot.SnapshotReference(time - 0.03, step)),
+      responses=(lib_snapshot.SnapshotResponse(
+          1, "arm", "arm", lib_snapshot.SnapshotReference(time - 0.01,
+                                                          step)),),
+      gym_server_time=time,
+      gym_env_id="benchmark-v0",
+      gym_run_id="benchmark-run",
+      gym_agent_id=None,
+      gym_episode=1,
+      gym_step=step,
+      gym_reward=0.0,
+      gym_done=False,
+      gym_actions=(
+          lib_snapshot.SnapshotGymArmAction(
+              "arm", "robot", True, 1, step,
+              (1.67, -0.80, 1.34, -2.12, 4.66, 0.01),
+              (0.19, -0.71, 0.16, 0.12, -3.08, -0.02), False, 1.0, 1.0, 0.0,
+              "", False, "", "", "", False, False, 0.0, 0.0, 0.0, False, ""),
+          lib_snapshot.SnapshotGymVacuumAction("vacuum", "", True, 1),
+      ))
+
+
+def key_values() -> Dict[str, types_gen.DeviceData]:
+  """Return the key-value messages of the test data, by key."""
+  values = {
+      "calibration.json": test_data.get_calibration_json(),
+      "workcell_constraints.json": test_data.get_workcell_constraints_json(),
+      "workcell_io.json": test_data.get_workcell_io_json(),
+      "actionsets.json": test_data.get_actionsets_json(),
+  }
+  messages = {
+      key: types_gen.DeviceData(
+          device_type="settings-engine",
+          data_type="key-value",
+          ts=START_TS,
+          key=key,
+          value=value) for key, value in values.items()
+  }
+  messages["robot_constraints.json"] = types_gen.DeviceData(
+      device_type="robot",
+      data_type="key-value",
+      ts=START_TS,
+      key="robot_constraints.json",
+      value=test_data.get_robot_constraints_json())
+  return messages
+
+
+def depth_image(width: int = 1280, height: int = 720) -> np.ndarray:
+  """Return the raw depth image of the sample depth camera."""
+  return np.full((height, width), DEPTH_WALL, dtype=np.uint16)
+
+
+def write_images(directory: str,
+                 width: int = 1280,
+                 height: int = 720) -> Tuple[str, str]:
+  """Write a color image and a depth image.
+
+  Args:
+    directory: the directory to write to.
+    width: the width of the images.
+    height: the height of the images.
+
+  Returns:
+    The color JPEG file and the 16-bit depth PNG file.
+  """
+  x = np.linspace(0, 255, width, dtype=np.uint8)
+  y = np.linspace(0, 255, height, dtype=np.uint8)
+  color = np.stack(
+      np.broadcast_arrays(x[None, :], y[:, None],
+                          x[None, :] // 2 + y[:, None] // 2),
+      axis=-1)
+  color_file = os.path.join(directory, "color.jpg")
+  Image.fromarray(color).save(color_file, quality=90)
+  depth = depth_image(width, height)
+  depth += (np.arange(width, dtype=np.uint16) % 256)[None, :]
+  depth_file = os.path.join(directory, "depth.png")
+  cv2.imwrite(depth_file, depth)
+  return color_file, depth_file
@@ -20,7 +20,6 @@ import sys
 from typing import List, Tuple, Union, Optional
 
 import numpy as np
-from scipy.spatial.transform.rotation import Rotation  # type: ignore
 import cv2  # type: ignore
 
 ZERO_VECTOR3 = np.array([0.0, 0.0, 0.0]).reshape(3, 1)
@@ -42,6 +41,103 @@ ArrayOrList8 = Union[List[_FloatOrInt],
                            _FloatOrInt, _FloatOrInt, _FloatOrInt, _FloatOrInt],
                      np.ndarray]
 
+# Below this angle, the rotation conversions use Taylor series.
+_SMALL_ANGLE = 1e-3
+
+
+def axis_angles_to_matrices(rotations: np.ndarray) -> np.ndarray:
+  """Converts a batch of Rodrigues axis-angle rotations to rotation matrices.
+
+  Args:
+    rotations: axis-angle rotations of shape (N, 3).
+
+  Returns:
+    rotation matrices of shape (N, 3, 3).
+  """
+  r = np.asarray(rotations, dtype=np.float64).reshape(-1, 3)
+  angle = np.linalg.norm(r, axis=1)
+  angle2 = angle * angle
+  small = angle < _SMALL_ANGLE
+  safe_angle = np.where(small, 1.0, angle)
+  # R = I + a * [r]x + b * [r]x^2 (Rodrigues' formula).
+  a = np.where(small, 1.0 - angle2 / 6.0, np.sin(safe_angle) / safe_angle)
+  b = np.where(small, 0.5 - angle2 / 24.0,
+               (1.0 - np.cos(safe_angle)) / (safe_angle * safe_angle))
+  cross = np.zeros((len(r), 3, 3), dtype=np.float64)
+  cross[:, 0, 1] = -r[:, 2]
+  cross[:, 0, 2] = r[:, 1]
+  cross[:, 1, 0] = r[:, 2]
+  cross[:, 1, 2] = -r[:, 0]
+  cross[:, 2, 0] = -r[:, 1]
+  cross[:, 2, 1] = r[:, 0]
+  return (np.identity(3) + a[:, None, None] * cross +
+          b[:, None, None] * np.matmul(cross, cross))
+
+
+def matrices_to_quaternions(matrices: np.ndarray) -> np.ndarray:
+  """Converts a batch of rotation matrices to quaternions.
+
+  Args:
+    matrices: rotation matrices of shape (N, 3, 3).
+
+  Returns:
+    unit quaternions in (x, y, z, w) of shape (N, 4), with w >= 0.
+  """
+  m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+  m00, m01, m02 = m[:, 0, 0], m[:, 0, 1], m[:, 0, 2]
+  m10, m11, m12 = m[:, 1, 0], m[:, 1, 1], m[:, 1, 2]
+  m20, m21, m22 = m[:, 2, 0], m[:, 2, 1], m[:, 2, 2]
+  trace = m00 + m11 + m22
+  # The quaternion scaled by four times each of its components: compute it
+  # from its largest component, for numerical stability.
+  scaled = np.stack([
+      np.stack([1.0 + m00 - m11 - m22, m01 + m10, m02 + m20, m21 - m12],
+               axis=1),
+      np.stack([m01 + m10, 1.0 - m00 + m11 - m22, m12 + m21, m02 - m20],
+               axis=1),
+      np.stack([m02 + m20, m12 + m21, 1.0 - m00 - m11 + m22, m10 - m01],
+               axis=1),
+      np.stack([m21 - m12, m02 - m20, m10 - m01, 1.0 + trace], axis=1),
+  ],
+                    axis=1)
+  largest = np.argmax(np.stack([m00, m11, m22, trace], axis=1), axis=1)
+  quats = scaled[np.arange(len(m)), largest]
+  quats /= np.linalg.norm(quats, axis=1)[:, None]
+  quats *= np.where(quats[:, 3] < 0, -1.0, 1.0)[:, None]
+  return quats
+
+
+def quaternions_to_axis_angles(quaternions: np.ndarray) -> np.ndarray:
+  """Converts a batch of quaternions to Rodrigues axis-angle rotations.
+
+  Args:
+    quaternions: quaternions in (x, y, z, w) of shape (N, 4).
+
+  Returns:
+    axis-angle rotations of shape (N, 3), with angles in [0, pi].
+  """
+  q = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+  q = q / np.linalg.norm(q, axis=1)[:, None]
+  q = q * np.where(q[:, 3] < 0, -1.0, 1.0)[:, None]
+  angle = 2.0 * np.arctan2(np.linalg.norm(q[:, :3], axis=1), q[:, 3])
+  small = angle < _SMALL_ANGLE
+  safe_angle = np.where(small, 1.0, angle)
+  scale = np.where(small, 2.0 + angle**2 / 12.0 + 7.0 * angle**4 / 2880.0,
+                   safe_angle / np.sin(safe_angle / 2.0))
+  return q[:, :3] * scale[:, None]
+
+
+def matrices_to_axis_angles(matrices: np.ndarray) -> np.ndarray:
+  """Converts a batch of rotation matrices to Rodrigues axis-angle rotations.
+
+  Args:
+    matrices: rotation matrices of shape (N, 3, 3).
+
+  Returns:
+    axis-angle rotations of shape (N, 3), with angles in [0, pi].
+  """
+  return quaternions_to_axis_angles(matrices_to_quaternions(matrices))
+
 
 def transform(v: np.ndarray, translation: Optional[np.ndarray],
               rotation: Optional[np.ndarray]) -> np.ndarray:
@@ -322,7 +418,7 @@ def pose_to_matrix(pose: np.ndarray) -> np.ndarray:
   representation.
 
   Args:
-    pose: convert from pose.
+    pose: convert from pose, or a batch of poses of shape (N, 6).
 
   Returns:
     two dimensional numpy array of a homogeneous transformation matrix.
@@ -330,7 +426,15 @@ def pose_to_matrix(pose: np.ndarray) -> np.ndarray:
            [R10, R11, R12, T1],
            [R20, R21, R22, T2],
            [0.,  0.,  0.,  1.]])
+    For a batch of poses, the matrices of shape (N, 4, 4).
   """
+  if np.ndim(pose) == 2:
+    poses = np.asarray(pose, dtype=np.float64)
+    matrices = np.zeros((len(poses), 4, 4), dtype=np.float64)
+    matrices[:, :3, :3] = axis_angles_to_matrices(poses[:, 3:6])
+    matrices[:, :3, 3] = poses[:, 0:3]
+    matrices[:, 3, 3] = 1.0
+    return matrices
   return convert_to_matrix(pose[0:3], pose[3:6])
 
 
@@ -365,13 +469,20 @@ def multiply_pose(a: np.ndarray, b: np.ndarray) -> np.ndarray:
   post, next three elements are the rotation of the pose in the axis-angle
   representation.
 
+  Either pose can be a batch of poses of shape (N, 6), the other is then
+  either a single pose or a batch of the same size.
+
   Args:
     a: relative pose on top of the base pose.
     b: base pose
 
   Returns:
-    combined pose.
+    combined pose, or the batch of combined poses of shape (N, 6).
   """
+  if np.ndim(a) == 2 or np.ndim(b) == 2:
+    ma = pose_to_matrix(np.asarray(a, dtype=np.float64).reshape(-1, 6))
+    mb = pose_to_matrix(np.asarray(b, dtype=np.float64).reshape(-1, 6))
+    return matrix_to_pose(np.matmul(ma, mb))
   ma = pose_to_matrix(a)
   mb = pose_to_matrix(b)
   return matrix_to_pose(np.matmul(ma, mb))
@@ -385,11 +496,20 @@ def inverse_pose(pose: np.ndarray) -> np.ndarray:
   representation.
 
   Args:
-    pose: relative pose on top of the base pose.
+    pose: relative pose on top of the base pose, or a batch of poses of shape
+      (N, 6).
 
   Returns:
-    inverted pose.
+    inverted pose, or the batch of inverted poses of shape (N, 6).
   """
+  if np.ndim(pose) == 2:
+    poses = np.asarray(pose, dtype=np.float64)
+    # The inverse rotates by the opposite axis-angle, after translating back.
+    rotations = axis_angles_to_matrices(poses[:, 3:6])
+    inverse = np.empty_like(poses)
+    inverse[:, 0:3] = -np.einsum("nji,nj->ni", rotations, poses[:, 0:3])
+    inverse[:, 3:6] = -poses[:, 3:6]
+    return inverse
   transformation_matrix = pose_to_matrix(pose)
 
   inverse_translation = np.identity(4, dtype=np.float64)
@@ -412,12 +532,17 @@ def matrix_to_pose(matrix: np.ndarray) -> np.ndarray:
 
   Args:
     matrix: a two dimension ndarray representation of a homogeneous
-      transformation matrix
+      transformation matrix, or a batch of matrices of shape (N, 4, 4).
 
   Returns:
-    equivalent pose.
+    equivalent pose, or the batch of poses of shape (N, 6).
 
   """
+  if np.ndim(matrix) == 3:
+    matrices = np.asarray(matrix, dtype=np.float64)
+    return np.concatenate(
+        (matrices[:, :3, 3], matrices_to_axis_angles(matrices[:, :3, :3])),
+        axis=1)
   matrix_float = np.array(matrix, dtype=np.float64, copy=False)
   translation = matrix[:3, 3]
   rotation_matrix = matrix_float[:3, :3]
@@ -474,11 +599,17 @@ def transform_by_pose(point: np.ndarray, pose: np.ndarray) -> np.ndarray:
 
   Args:
     point: array containing (x, y, z) coords or numpy array of shape (3, N).
-    pose: pose for the transformation.
+    pose: pose for the transformation, or a batch of poses of shape (M, 6).
 
   Returns:
-    array containing (x, y, z) points of shape (3, N).
+    array containing (x, y, z) points of shape (3, N). For a batch of poses,
+    the points transformed by each pose, of shape (M, 3, N).
   """
+  if np.ndim(pose) == 2:
+    poses = np.asarray(pose, dtype=np.float64)
+    points = np.asarray(point, dtype=np.float64).reshape(3, -1)
+    return (np.matmul(axis_angles_to_matrices(poses[:, 3:6]), points) +
+            poses[:, 0:3, None])
   return transform(point, pose[0:3], pose[3:6])
 
 
@@ -874,6 +1005,8 @@ def axis_angle_to_quaternion(rotation: ArrayOrList3) -> np.ndarray:
   Returns:
     equivalent quaternion in [x,y,z,w]
   """
+  # pylint: disable=g-import-not-at-top
+  from scipy.spatial.transform import Rotation  # type: ignore
   r = Rotation.from_rotvec(rotation)
   return r.as_quat()
 
@@ -888,6 +1021,8 @@ def quaternion_to_axis_angle(rotation: ArrayOrList4) -> np.ndarray:
     [x,y,z]. Angles are in radians.
 
   """
+  # pylint: disable=g-import-not-at-top
+  from scipy.spatial.transform import Rotation  # type: ignore
   r = Rotation.from_quat(rotation)
   return r.as_rotvec()
 
@@ -920,12 +1055,19 @@ def ik_diff_angle(hint_angle: float,
 def angular_distance(
     joints1: ArrayOrList,
     joints2: ArrayOrList,
-    cyclic: bool = False) -> Union[float, Tuple[float, List[float]]]:
+    cyclic: bool = False
+) -> Union[float, np.ndarray, Tuple[float, List[float]], Tuple[np.ndarray,
+                                                                np.ndarray]]:
   """Computes the angular distance between two joint configurations.
 
   If cyclic is enabled, it will also search integer +/- 2*pi offsets of joint2
   joints, and returns it.
 
+  Either joint configuration can be a batch of shape (N, J), the other is then
+  either a single configuration or a batch of the same size. The distances
+  are then an array of shape (N,) and the closest joints2 configurations an
+  array of shape (N, J).
+
   Args:
     joints1: first joint configuration.
     joints2: second joint configuration.
@@ -934,6 +1076,20 @@ def angular_distance(
   Returns:
     Angular distance and closest joints2 configuration when cyclic is enabled.
   """
+  if np.ndim(joints1) == 2 or np.ndim(joints2) == 2:
+    j1 = np.asarray(joints1, dtype=np.float64)
+    j2 = np.asarray(joints2, dtype=np.float64)
+    raw_dist = j1 - j2
+    if not cyclic:
+      return np.abs(raw_dist).sum(axis=-1)
+    # The number of 2*pi offsets of joints2 that bring the distance of each
+    # joint within [-pi, pi].
+    turns = np.where(
+        raw_dist > math.pi, np.ceil((raw_dist - math.pi) / math.tau),
+        np.where(raw_dist < -math.pi, np.floor((raw_dist + math.pi) / math.tau),
+                 0.0))
+    return (np.abs(raw_dist - turns * math.tau).sum(axis=-1),
+            np.broadcast_to(j2, raw_dist.shape) + turns * math.tau)
   distance = 0.0
   if cyclic:
     new_j2: List[_FloatOrInt] = list(joints2)
@@ -965,6 +1121,8 @@ def euler_to_axis_angle(roll: float, pitch: float, yaw: float) -> np.ndarray:
   Returns:
     Equivalent Axis-angle format.
   """
+  # pylint: disable=g-import-not-at-top
+  from scipy.spatial.transform import Rotation  # type: ignore
   r = Rotation.from_euler('xyz', [roll, pitch, yaw])
   return r.as_rotvec()
 
@@ -350,6 +350,74 @@ class ConversionTest(unittest.TestCase):
     self.assertTrue(np.allclose([0, 0, 0], axis_angle))
 
 
+class BatchTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    rng = np.random.RandomState(5)
+    self.poses = np.concatenate(
+        (rng.uniform(-1, 1, (50, 3)), rng.uniform(-2, 2, (50, 3))), axis=1)
+    self.others = np.concatenate(
+        (rng.uniform(-1, 1, (50, 3)), rng.uniform(-2, 2, (50, 3))), axis=1)
+    self.poses[0, 3:] = 0.0
+    self.poses[1, 3:] = [0.0, 1e-5, 0.0]
+
+  def test_pose_to_matrix(self) -> None:
+    matrices = transform_util.pose_to_matrix(self.poses)
+    self.assertEqual(matrices.shape, (50, 4, 4))
+    for pose, matrix in zip(self.poses, matrices):
+      np.testing.assert_allclose(
+          matrix, transform_util.pose_to_matrix(pose), atol=1e-12)
+    np.testing.assert_allclose(
+        transform_util.pose_to_matrix(transform_util.matrix_to_pose(matrices)),
+        matrices,
+        atol=1e-12)
+
+  def test_multiply_pose(self) -> None:
+    products = transform_util.multiply_pose(self.poses, self.others)
+    single = transform_util.multiply_pose(self.poses, self.others[0])
+    for i in range(len(self.poses)):
+      np.testing.assert_allclose(
+          transform_util.pose_to_matrix(products[i]),
+          transform_util.pose_to_matrix(
+              transform_util.multiply_pose(self.poses[i], self.others[i])),
+          atol=1e-9)
+      np.testing.assert_allclose(
+          transform_util.pose_to_matrix(single[i]),
+          transform_util.pose_to_matrix(
+              transform_util.multiply_pose(self.poses[i], self.others[0])),
+          atol=1e-9)
+
+  def test_inverse_pose(self) -> None:
+    inverses = transform_util.inverse_pose(self.poses)
+    np.testing.assert_allclose(
+        transform_util.multiply_pose(self.poses, inverses),
+        np.zeros((50, 6)),
+        atol=1e-9)
+
+  def test_transform_by_pose(self) -> None:
+    points = np.array([[0.0, 1.0, 2.0], [0.5, -1.0, 0.0], [3.0, 0.0, 1.0]])
+    transformed = transform_util.transform_by_pose(points, self.poses)
+    self.assertEqual(transformed.shape, (50, 3, 3))
+    for pose, result in zip(self.poses, transformed):
+      np.testing.assert_allclose(
+          result, transform_util.transform_by_pose(points, pose), atol=1e-12)
+
+  def test_angular_distance(self) -> None:
+    joints1 = np.array([[0.0, 1.0, 2.0], [0.0, 7.0, -7.0]])
+    joints2 = [1.0, 2.0, 3.0]
+    distances = transform_util.angular_distance(joints1, joints2)
+    assert isinstance(distances, np.ndarray)
+    np.testing.assert_allclose(distances, [3.0, 16.0])
+    result = transform_util.angular_distance(joints1, joints2, cyclic=True)
+    assert isinstance(result, tuple)
+    for i, joints in enumerate(joints1):
+      distance, closest = transform_util.angular_distance(
+          joints, joints2, cyclic=True)
+      self.assertAlmostEqual(result[0][i], distance)
+      np.testing.assert_allclose(result[1][i], closest)
+
+
 class UtilTest(unittest.TestCase):
 
   def test_angular_distance(self) -> None:
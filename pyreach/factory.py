@@ -37,15 +37,27 @@ class LocalTCPHostFactory(HostFactory):
 
   _host: str
   _port: int
+  _engine: str
   _kwargs: Dict[str, Any]
 
   def __init__(self,
                hostname: str = 'localhost',
                port: int = 50008,
+               engine: str = 'multiprocess',
                **kwargs: Any):
-    """Construct a LocalTCPHostFactory object."""
+    """Construct a LocalTCPHostFactory object.
+
+    Args:
+      hostname: the host name or IP address to connect to.
+      port: the TCP port to connect to.
+      engine: the I/O engine of the client. "multiprocess" reads and writes
+        the socket in helper processes, "selector" multiplexes the socket I/O
+        in one thread of the current process.
+      **kwargs: the optional kwargs to the connect host.
+    """
     self._host = hostname
     self._port = port
+    self._engine = engine
     if kwargs is None:
       self._kwargs = {}
     else:
@@ -64,7 +76,7 @@ class LocalTCPHostFactory(HostFactory):
       raise pyreach.PyReachError()
 
     fn = getattr(mod, 'connect_local_tcp')
-    return fn(self._host, self._port, self._kwargs)
+    return fn(self._host, self._port, self._kwargs, self._engine)
 
 
 class WebRTCHostFactory(HostFactory):
@@ -280,6 +292,7 @@ class ConnectionFactory(HostFactory):
       self._factory = LocalTCPHostFactory(
           hostname=key_values.get('hostname', ['localhost'])[0],
           port=int(key_values.get('port', ['50008'])[0]),
+          engine=key_values.get('engine', ['multiprocess'])[0],
           **kwargs)
     elif key_values['connection-type'][0] == 'remote-tcp':
       if 'robot-id' not in key_values:
@@ -15,7 +15,9 @@
 """Interface for interacting with the force torque sensor."""
 
 import dataclasses
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
+
+import numpy as np
 
 from pyreach import core
 
@@ -39,6 +41,31 @@ class ForceTorqueSensorState:
   torque: core.Torque
 
 
+@dataclasses.dataclass(frozen=True)
+class ForceTorqueWindowStats:
+  """Statistics of the force torque samples in a time window.
+
+  Each statistic is a six-element (fx, fy, fz, tx, ty, tz) tuple.
+
+  Attributes:
+    start_time: The time of the first sample in the window.
+    end_time: The time of the last sample in the window.
+    count: The number of samples in the window.
+    mean: The mean of the samples.
+    min: The minimum of the samples.
+    max: The maximum of the samples.
+    derivative: The least-squares rate of change of the samples, per second.
+  """
+
+  start_time: float
+  end_time: float
+  count: int
+  mean: Tuple[float, ...]
+  min: Tuple[float, ...]
+  max: Tuple[float, ...]
+  derivative: Tuple[float, ...]
+
+
 class ForceTorqueSensor(object):
   """Interface for interacting with a force torque sensor device."""
 
@@ -114,3 +141,55 @@ class ForceTorqueSensor(object):
   def stop_streaming(self) -> None:
     """Stop streaming force torque sensor states."""
     raise NotImplementedError
+
+  def history(self, duration: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the recent force torque samples.
+
+    The samples are kept in a bounded buffer while streaming.
+
+    Args:
+      duration: The duration of the window in seconds, ending at the newest
+        sample.
+
+    Returns:
+      An (N,) array of times and an (N, 6) float32 array of the
+      (fx, fy, fz, tx, ty, tz) values, ordered by time.
+    """
+    raise NotImplementedError
+
+  def window_stats(self, duration: float) -> Optional[ForceTorqueWindowStats]:
+    """Return the statistics of the recent force torque samples.
+
+    Args:
+      duration: The duration of the window in seconds, ending at the newest
+        sample.
+
+    Returns:
+      The statistics, or None if no sample was received.
+    """
+    raise NotImplementedError
+
+  def add_threshold_callback(
+      self,
+      callback: Callable[[ForceTorqueSensorState], bool],
+      threshold: float,
+      use_torque: bool = False,
+      finished_callback: Optional[Callable[[],
+                                           None]] = None) -> Callable[[], None]:
+    """Add a callback for when the force or torque exceeds a threshold.
+
+    The callback is only called for the samples where the force (or torque)
+    magnitude rises above the threshold, not for every sample.
+
+    Args:
+      callback: Callback called with the sensor state when the magnitude
+        rises above the threshold. When the callback function returns True,
+        it will stop receiving future updates.
+      threshold: The magnitude threshold, in Newtons (or Newton-meters).
+      use_torque: If True, use the torque magnitude instead of the force.
+      finished_callback: Optional callback, called when the callback is stopped.
+
+    Returns:
+      A function that when called stops the callback.
+    """
+    raise NotImplementedError
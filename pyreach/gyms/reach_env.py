@@ -199,6 +199,13 @@ class ReachEnv(gym.Env):  # type: ignore
         "host.depth",
         "host.force_torque_sensor",
         "host.oracle",
+        "host.startup.actionsets",
+        "host.startup.arm_constraints",
+        "host.startup.calibration",
+        "host.startup.constraints",
+        "host.startup.controllers",
+        "host.startup.session",
+        "host.startup.streams",
         "host.text",
         "host.vacuum",
     })
@@ -512,6 +519,9 @@ class ReachEnv(gym.Env):  # type: ignore
       if not self._is_playback:
         assert snapshot is not None
         self._host.logger.send_snapshot(snapshot)
+        if done:
+          # Snapshots are sent in the background, have the episode sent.
+          self._host.logger.flush_snapshots()
 
       return observation, reward, done, {}
 
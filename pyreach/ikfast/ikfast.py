@@ -14,6 +14,7 @@
 """Utilities for IKFast."""
 
 import ctypes
+import itertools
 import logging
 import math
 import os
@@ -29,6 +30,12 @@ _is_running_on_google3 = False
 _FloatOrInt = Union[float, int]
 ArrayOrList = Union[List[_FloatOrInt], Tuple[_FloatOrInt], np.ndarray]
 
+# The +/- 2*pi offsets searched on the last three joints, ordered as the
+# nested loops they replace.
+_JOINT_OFFSETS = np.array(
+    list(itertools.product((-1, 0, 1), repeat=3)),
+    dtype=np.float64) * 2 * math.pi
+
 
 def _find_reach_path(cur_dir: str) -> str:
   if os.path.exists(os.path.join(cur_dir, ".reach")):
@@ -220,60 +227,29 @@ class IKFast:
     if not self._libik:
       return None
 
-    solution_list = []
-    poses = [pose]
+    res = self.ik(pose)
+    if res is None:
+      return None
+    # ik fast never provide a solution beyond -pi/+pi
+    # UR supports +/- 2*pi on j3,j4,j5
     pi2 = 2 * math.pi
+    candidates = np.repeat(res, _JOINT_OFFSETS.shape[0], axis=0)
+    candidates[:, 3:] += np.tile(_JOINT_OFFSETS, (res.shape[0], 1))
+    candidates = candidates[np.all(
+        (candidates[:, 3:] < pi2) & (candidates[:, 3:] > -pi2), axis=1)]
 
-    for p in poses:
-      res = self.ik(p)
-      if res is None:
-        continue
-
-      for s in res:
-        # ik fast never provide a solution beyond -pi/+pi
-        # UR supports +/- 2*pi on j3,j4,j5
-        #                solution_list.append(s)
-        for j in [-1, 0, 1]:
-          for k in [-1, 0, 1]:
-            for l in [-1, 0, 1]:  # noqa: E741
-              s2 = np.copy(s)
-              s2[3] += j * pi2
-              s2[4] += k * pi2
-              s2[5] += l * pi2
-
-              if s2[3] >= pi2:
-                continue
-              if s2[3] <= -pi2:
-                continue
-              if s2[4] >= pi2:
-                continue
-              if s2[4] <= -pi2:
-                continue
-              if s2[5] >= pi2:
-                continue
-              if s2[5] <= -pi2:
-                continue
-              solution_list.append(s2)
-
-    if not solution_list:
+    if not candidates.shape[0]:
       return None
     if not ik_hints:
       debug.debug("IKHints are empty, not safe to search for IK solution")
       return None
 
-    # find solution the is closest to an IK hint
-    scored_results = []
-    for s in solution_list:
-      # check distance to every hint, and store the distance
-      for h in ik_hints.values():
-        dist = transform_util.angular_distance(np.array(h), s)
-        scored_results.append((dist, s))
-
-    if not scored_results:
-      return None
-
-    scored_results.sort(key=lambda x: x[0])
-    return scored_results[0][1]
+    # find solution the is closest to an IK hint, the distance of every
+    # solution to every hint is computed at once.
+    hints = np.array(list(ik_hints.values()), dtype=np.float64)
+    distances = np.sum(
+        np.abs(hints[np.newaxis, :, :] - candidates[:, np.newaxis, :]), axis=2)
+    return candidates[int(np.argmin(distances)) // hints.shape[0]]
 
   def unity_ik_solve_search(
       self, target_pose: List[float], current_joints: List[float],
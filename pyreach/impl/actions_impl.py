@@ -929,11 +929,13 @@ class ActionDevice(device_base.DeviceBase):
   _actions: Optional[ActionsImpl]
   _actions_lock: threading.Lock
   _actions_loaded: threading.Event
+  _actions_value: Optional[str]
 
   def __init__(self) -> None:
     """Construct an ActionDevice."""
     super().__init__()
     self._actions = None
+    self._actions_value = None
     self._actions_lock = threading.Lock()
     self._actions_loaded = threading.Event()
 
@@ -973,6 +975,10 @@ class ActionDevice(device_base.DeviceBase):
       return
     if key.key != "actionsets.json":
       return
+    if value == self._actions_value:
+      self._actions_loaded.set()
+      return
+    self._actions_value = value
     if not value:
       with self._actions_lock:
         self._actions = None
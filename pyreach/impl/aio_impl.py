@@ -0,0 +1,430 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Implementation of the PyReach asyncio interface."""
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar, Union
+
+import numpy as np
+
+from pyreach import aio
+from pyreach import color_camera
+from pyreach import core
+from pyreach import depth_camera
+from pyreach import oracle
+from pyreach.host import Host
+from pyreach.impl import arm_impl
+from pyreach.impl import color_camera_impl
+from pyreach.impl import depth_camera_impl
+from pyreach.impl import oracle_impl
+from pyreach.impl import utils
+from pyreach.impl import vacuum_impl
+
+T = TypeVar("T")
+
+# Starts a request: called with the function resolving the request, returns a
+# function cancelling it.
+StartFunction = Callable[[Callable[[T], None]], Callable[[], None]]
+
+
+async def await_request(start: StartFunction[T]) -> T:
+  """Start a request and wait for its result.
+
+  The result is passed to the event loop with call_soon_threadsafe by the
+  thread completing the request, so no thread waits for the request. If the
+  awaiting task is cancelled, the request is cancelled.
+
+  Args:
+    start: the function starting the request.
+
+  Returns:
+    The result of the request.
+  """
+  loop = asyncio.get_running_loop()
+  future: "asyncio.Future[T]" = loop.create_future()
+
+  def resolve(result: T) -> None:
+    if not future.done():
+      future.set_result(result)
+
+  def callback(result: T) -> None:
+    try:
+      loop.call_soon_threadsafe(resolve, result)
+    except RuntimeError:
+      # The event loop is closed.
+      pass
+
+  cancel = start(callback)
+  try:
+    return await future
+  except asyncio.CancelledError:
+    cancel()
+    raise
+
+
+async def _await_command(
+    start: StartFunction[core.PyReachStatus]) -> core.PyReachStatus:
+  """Start an arm command and wait for its final status.
+
+  Args:
+    start: the function starting the command.
+
+  Returns:
+    The final status, or a rejected status if the command cannot be compiled.
+  """
+  try:
+    return await await_request(start)
+  except core.PyReachError as e:
+    return core.PyReachStatus(
+        utils.timestamp_now(),
+        status="rejected",
+        error="killed",
+        message=str(e))
+
+
+class AsyncColorCameraImpl(aio.AsyncColorCamera):
+  """Asyncio interface of a color camera."""
+
+  _camera: color_camera_impl.ColorCameraImpl
+
+  def __init__(self, camera: color_camera_impl.ColorCameraImpl) -> None:
+    """Init an AsyncColorCameraImpl.
+
+    Args:
+      camera: the camera.
+    """
+    self._camera = camera
+
+  async def fetch_image(
+      self, timeout: float = 15.0) -> Optional[color_camera.ColorFrame]:
+    """Fetch a new image.
+
+    Args:
+      timeout: The number of seconds to wait for the image.
+
+    Returns:
+      The image, or None if the request failed or timed out.
+    """
+    return await await_request(
+        lambda callback: self._camera.request_image(timeout, callback))
+
+
+class AsyncDepthCameraImpl(aio.AsyncDepthCamera):
+  """Asyncio interface of a depth camera."""
+
+  _camera: depth_camera_impl.DepthCameraImpl
+
+  def __init__(self, camera: depth_camera_impl.DepthCameraImpl) -> None:
+    """Init an AsyncDepthCameraImpl.
+
+    Args:
+      camera: the camera.
+    """
+    self._camera = camera
+
+  async def fetch_image(
+      self, timeout: float = 15.0) -> Optional[depth_camera.DepthFrame]:
+    """Fetch a new image.
+
+    Args:
+      timeout: The number of seconds to wait for the image.
+
+    Returns:
+      The image, or None if the request failed or timed out.
+    """
+    return await await_request(
+        lambda callback: self._camera.request_image(timeout, callback))
+
+
+class AsyncArmImpl(aio.AsyncArm):
+  """Asyncio interface of an arm."""
+
+  _arm: arm_impl.ArmImpl
+
+  def __init__(self, arm: arm_impl.ArmImpl) -> None:
+    """Init an AsyncArmImpl.
+
+    Args:
+      arm: the arm.
+    """
+    self._arm = arm
+
+  async def to_joints(self,
+                      joints: Union[Tuple[float, ...], List[float],
+                                    np.ndarray],
+                      use_linear: bool = False,
+                      intent: str = "",
+                      pick_id: str = "",
+                      success_type: str = "",
+                      velocity: float = 0.0,
+                      acceleration: float = 0.0,
+                      allow_uncalibrated: bool = False,
+                      preemptive: bool = False,
+                      controller_name: str = "",
+                      timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Move the arm to joint angles.
+
+    Args:
+      joints: The list of joint angles in radians.
+      use_linear: Whether to move in linear space.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      allow_uncalibrated: Allow motion when uncalibrated (unsafe, should only be
+        set in calibration code).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the command to.
+      timeout: The amount time to wait before giving up.
+
+    Returns:
+      The final status of the move.
+    """
+    return await _await_command(lambda callback: self._arm.request_to_joints(
+        joints,
+        callback,
+        use_linear=use_linear,
+        intent=intent,
+        pick_id=pick_id,
+        success_type=success_type,
+        velocity=velocity,
+        acceleration=acceleration,
+        allow_uncalibrated=allow_uncalibrated,
+        preemptive=preemptive,
+        controller_name=controller_name,
+        timeout=timeout))
+
+  async def to_pose(self,
+                    pose: core.Pose,
+                    use_linear: bool = False,
+                    intent: str = "",
+                    pick_id: str = "",
+                    success_type: str = "",
+                    velocity: float = 0.0,
+                    acceleration: float = 0.0,
+                    apply_tip_adjust_transform: bool = False,
+                    allow_uncalibrated: bool = False,
+                    preemptive: bool = False,
+                    controller_name: str = "",
+                    pose_in_world_coordinates: bool = False,
+                    timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Move the arm to a pose.
+
+    Args:
+      pose: The desired pose.
+      use_linear: True if a linear translation is required.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      apply_tip_adjust_transform: Apply the transform of the tip adjust.
+      allow_uncalibrated: Allow motion when uncalibrated (unsafe, should only be
+        set in calibration code).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the command to.
+      pose_in_world_coordinates: If true, pose is in world coordinates,
+        otherwise if false, pose is in arm base coordinates.
+      timeout: The amount of time to wait until giving up.
+
+    Returns:
+      The final status of the move.
+    """
+    return await _await_command(lambda callback: self._arm.request_to_pose(
+        pose,
+        callback,
+        use_linear=use_linear,
+        intent=intent,
+        pick_id=pick_id,
+        success_type=success_type,
+        velocity=velocity,
+        acceleration=acceleration,
+        apply_tip_adjust_transform=apply_tip_adjust_transform,
+        allow_uncalibrated=allow_uncalibrated,
+        preemptive=preemptive,
+        controller_name=controller_name,
+        pose_in_world_coordinates=pose_in_world_coordinates,
+        timeout=timeout))
+
+
+class AsyncVacuumImpl(aio.AsyncVacuum):
+  """Asyncio interface of a vacuum."""
+
+  _vacuum: vacuum_impl.VacuumImpl
+
+  def __init__(self, vacuum: vacuum_impl.VacuumImpl) -> None:
+    """Init an AsyncVacuumImpl.
+
+    Args:
+      vacuum: the vacuum.
+    """
+    self._vacuum = vacuum
+
+  async def on(self,
+               intent: str = "",
+               pick_id: str = "",
+               success_type: str = "",
+               timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Turn the vacuum suction on.
+
+    Args:
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      timeout: The optional timeout of the command in seconds.
+
+    Returns:
+      The final status of the command.
+    """
+    return await _await_command(lambda callback: self._vacuum.request_state(
+        True, callback, intent, pick_id, success_type, timeout))
+
+  async def off(self,
+                intent: str = "",
+                pick_id: str = "",
+                success_type: str = "",
+                timeout: Optional[float] = None) -> core.PyReachStatus:
+    """Turn the vacuum suction off.
+
+    Args:
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      timeout: The optional timeout of the command in seconds.
+
+    Returns:
+      The final status of the command.
+    """
+    return await _await_command(lambda callback: self._vacuum.request_state(
+        False, callback, intent, pick_id, success_type, timeout))
+
+
+class AsyncOracleImpl(aio.AsyncOracle):
+  """Asyncio interface of an oracle."""
+
+  _oracle: oracle_impl.OracleImpl
+
+  def __init__(self, oracle_device: oracle_impl.OracleImpl) -> None:
+    """Init an AsyncOracleImpl.
+
+    Args:
+      oracle_device: the oracle.
+    """
+    self._oracle = oracle_device
+
+  async def fetch_prediction(self,
+                             intent: str,
+                             prediction_type: str,
+                             request_type: str,
+                             task_code: str,
+                             label: str,
+                             timeout: float = 15.0) -> oracle.Prediction:
+    """Fetch a new prediction.
+
+    Args:
+      intent: The intent for the oracle.
+      prediction_type: The prediction_type for the oracle.
+      request_type: The request_type for the oracle.
+      task_code: The task_code for the oracle.
+      label: The label for the oracle.
+      timeout: The maximum time to wait for the prediction.
+
+    Raises:
+      PyReachError: if the request failed or timed out.
+
+    Returns:
+      A new prediction.
+    """
+    result = await await_request(
+        lambda callback: self._oracle.request_prediction(
+            intent, prediction_type, request_type, task_code, label, timeout,
+            callback))
+    if result is None:
+      raise core.PyReachError("Timeout")
+    return result
+
+
+class AsyncHostImpl(aio.AsyncHost):
+  """Asyncio interface of the devices of a host."""
+
+  _host: Host
+  _color_cameras: core.ImmutableDictionary[aio.AsyncColorCamera]
+  _depth_cameras: core.ImmutableDictionary[aio.AsyncDepthCamera]
+  _arms: core.ImmutableDictionary[aio.AsyncArm]
+  _vacuums: core.ImmutableDictionary[aio.AsyncVacuum]
+  _oracles: core.ImmutableDictionary[aio.AsyncOracle]
+
+  def __init__(self, host: Host) -> None:
+    """Init an AsyncHostImpl.
+
+    Args:
+      host: the host.
+    """
+    self._host = host
+    color_cameras: Dict[str, aio.AsyncColorCamera] = {}
+    for name, camera in host.color_cameras.items():
+      if isinstance(camera, color_camera_impl.ColorCameraImpl):
+        color_cameras[name] = AsyncColorCameraImpl(camera)
+    self._color_cameras = core.ImmutableDictionary(color_cameras)
+    depth_cameras: Dict[str, aio.AsyncDepthCamera] = {}
+    for name, depth in host.depth_cameras.items():
+      if isinstance(depth, depth_camera_impl.DepthCameraImpl):
+        depth_cameras[name] = AsyncDepthCameraImpl(depth)
+    self._depth_cameras = core.ImmutableDictionary(depth_cameras)
+    arms: Dict[str, aio.AsyncArm] = {}
+    for name, arm in host.arms.items():
+      if isinstance(arm, arm_impl.ArmImpl):
+        arms[name] = AsyncArmImpl(arm)
+    self._arms = core.ImmutableDictionary(arms)
+    vacuums: Dict[str, aio.AsyncVacuum] = {}
+    for name, vacuum in host.vacuums.items():
+      if isinstance(vacuum, vacuum_impl.VacuumImpl):
+        vacuums[name] = AsyncVacuumImpl(vacuum)
+    self._vacuums = core.ImmutableDictionary(vacuums)
+    oracles: Dict[str, aio.AsyncOracle] = {}
+    for name, oracle_device in host.oracles.items():
+      if isinstance(oracle_device, oracle_impl.OracleImpl):
+        oracles[name] = AsyncOracleImpl(oracle_device)
+    self._oracles = core.ImmutableDictionary(oracles)
+
+  @property
+  def host(self) -> Host:
+    """Return the wrapped host."""
+    return self._host
+
+  @property
+  def color_cameras(self) -> core.ImmutableDictionary[aio.AsyncColorCamera]:
+    """Return the color cameras by name."""
+    return self._color_cameras
+
+  @property
+  def depth_cameras(self) -> core.ImmutableDictionary[aio.AsyncDepthCamera]:
+    """Return the depth cameras by name."""
+    return self._depth_cameras
+
+  @property
+  def arms(self) -> core.ImmutableDictionary[aio.AsyncArm]:
+    """Return the arms by name."""
+    return self._arms
+
+  @property
+  def vacuums(self) -> core.ImmutableDictionary[aio.AsyncVacuum]:
+    """Return the vacuums by name."""
+    return self._vacuums
+
+  @property
+  def oracles(self) -> core.ImmutableDictionary[aio.AsyncOracle]:
+    """Return the oracles by name."""
+    return self._oracles
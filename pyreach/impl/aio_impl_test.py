@@ -0,0 +1,102 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for aio_impl."""
+
+import asyncio
+import threading
+from typing import List
+import unittest
+
+from pyreach import arm
+from pyreach import core
+from pyreach.common.python import types_gen
+from pyreach.impl import aio_impl
+from pyreach.impl import arm_impl
+
+
+class AioImplTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    self._respond = True
+    self._scripts: List[types_gen.CommandData] = []
+    device, extra_devices, arm_wrapper = arm_impl.ArmDevice(
+        arm_impl.ArmTypeImpl.from_urdf_file("ur5e.urdf")).get_wrapper()
+    for extra_device in extra_devices:
+      extra_device.close()
+    self._device = device
+    self._arm = aio_impl.AsyncArmImpl(arm_wrapper)
+    device.set_send_cmd(self._send_cmd)
+    device.start()
+    device.set_cached(
+        arm.ArmState(joint_angles=(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)))
+
+  def tearDown(self) -> None:
+    self._device.close()
+    super().tearDown()
+
+  def _send_cmd(self, cmd: types_gen.CommandData) -> None:
+    if cmd.data_type != "reach-script":
+      return
+    self._scripts.append(cmd)
+    if self._respond:
+      self._device.enqueue_device_data(
+          types_gen.DeviceData(
+              device_type=cmd.device_type,
+              device_name=cmd.device_name,
+              data_type="cmd-status",
+              tag=cmd.tag,
+              status="done"))
+
+  def test_concurrent_awaits(self) -> None:
+
+    async def run() -> List[core.PyReachStatus]:
+      return await asyncio.gather(*[
+          self._arm.to_joints([0.001 * n, 0.0, 0.0, 0.0, 0.0, 0.0])
+          for n in range(1000)
+      ])
+
+    threads = threading.active_count()
+    statuses = asyncio.run(run())
+    self.assertEqual(len(statuses), 1000)
+    self.assertEqual({status.status for status in statuses}, {"done"})
+    self.assertEqual(len({cmd.tag for cmd in self._scripts}), 1000)
+    # No thread is started to wait for the requests.
+    self.assertLessEqual(threading.active_count(), threads)
+
+  def test_cancel(self) -> None:
+    self._respond = False
+
+    async def run() -> None:
+      with self.assertRaises(asyncio.TimeoutError):
+        await asyncio.wait_for(
+            self._arm.to_joints([0.0, 0.0, 0.0, 0.0, 0.0, 0.0]), 0.05)
+
+    asyncio.run(run())
+    self.assertEqual(len(self._scripts), 1)
+    # The request is terminated on cancellation.
+    self.assertEqual(self._device._requests, [])
+
+  def test_rejected(self) -> None:
+
+    async def run() -> core.PyReachStatus:
+      return await self._arm.to_joints([0.0, 0.0])
+
+    status = asyncio.run(run())
+    self.assertEqual(status.status, "rejected")
+    self.assertEqual(self._scripts, [])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -13,11 +13,16 @@
 # limitations under the License.
 """Implementation of the PyReach Arm interface."""
 
+import collections
+import copy
+import dataclasses
 import enum
+import itertools
 import logging  # type: ignore
 import math
 import threading
-from typing import Callable, Dict, List, Optional, Tuple, Union
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
@@ -30,6 +35,7 @@ from pyreach import internal
 from pyreach.common.base import transform_util
 from pyreach.common.python import types_gen
 from pyreach.impl import actions_impl
+from pyreach.impl import arm_state_history
 from pyreach.impl import constraints_impl
 from pyreach.impl import device_base
 from pyreach.impl import digital_output_impl
@@ -68,6 +74,47 @@ class IKLib:
     """
     raise NotImplementedError
 
+  def ik_search_batch(self, poses: np.ndarray, current_joints: List[float],
+                      ik_hints: Dict[int, List[float]],
+                      use_unity_ik: bool) -> List[Optional[List[float]]]:
+    """Perform IK search for the consecutive waypoints of a trajectory.
+
+    Each waypoint is searched with the solution of the previous waypoint as
+    current joints, so that the solutions stay continuous along the path. The
+    search stops at the first waypoint without a solution.
+
+    Args:
+      poses: The poses of the waypoints, as an (N, 6) array.
+      current_joints: the current joint state.
+      ik_hints: The ik hints for the search.
+      use_unity_ik: If true, use Unity IK.
+
+    Returns:
+      The joint positions, None for waypoints without a solution.
+    """
+    solutions: List[Optional[List[float]]] = [None] * len(poses)
+    joints = list(current_joints)
+    for index, pose in enumerate(poses):
+      solution = self.ik_search(pose.tolist(), joints, ik_hints, use_unity_ik)
+      if solution is None:
+        break
+      solutions[index] = solution
+      joints = solution
+    return solutions
+
+  def uses_current_joints(self, ik_hints: Dict[int, List[float]],
+                          use_unity_ik: bool) -> bool:
+    """Return if the IK search result depends on the current joints.
+
+    Args:
+      ik_hints: The ik hints for the search.
+      use_unity_ik: If true, use Unity IK.
+
+    Returns:
+      True unless the IK library is known to only depend on the ik hints.
+    """
+    return True
+
   def require_ikhints(self) -> bool:
     """Return if IKHints are required for this IK library."""
     raise NotImplementedError
@@ -119,6 +166,51 @@ class IKLibIKFast(IKLib):
       return joints.tolist()
     return None
 
+  def ik_search_batch(self, poses: np.ndarray, current_joints: List[float],
+                      ik_hints: Dict[int, List[float]],
+                      use_unity_ik: bool) -> List[Optional[List[float]]]:
+    """Perform IK search for the consecutive waypoints of a trajectory.
+
+    IKFast ignores the current joints when ik hints are set, so only the
+    first waypoint is searched with the ik hints. Every later waypoint is
+    searched with the solution of the previous waypoint as its only ik hint,
+    which picks the solution closest in joint space to the previous one. The
+    search stops at the first waypoint without a solution.
+
+    Args:
+      poses: The poses of the waypoints, as an (N, 6) array.
+      current_joints: the current joint state.
+      ik_hints: The ik hints for the search.
+      use_unity_ik: If true, use Unity IK.
+
+    Returns:
+      The joint positions, None for waypoints without a solution.
+    """
+    solutions: List[Optional[List[float]]] = [None] * len(poses)
+    joints = list(current_joints)
+    hints = ik_hints
+    for index, pose in enumerate(poses):
+      solution = self.ik_search(pose.tolist(), joints, hints, use_unity_ik)
+      if solution is None:
+        break
+      solutions[index] = solution
+      joints = solution
+      hints = {0: solution}
+    return solutions
+
+  def uses_current_joints(self, ik_hints: Dict[int, List[float]],
+                          use_unity_ik: bool) -> bool:
+    """Return if the IK search result depends on the current joints.
+
+    Args:
+      ik_hints: The ik hints for the search.
+      use_unity_ik: If true, use Unity IK.
+
+    Returns:
+      True if the current joints are used as a hint.
+    """
+    return use_unity_ik and not ik_hints
+
   def require_ikhints(self) -> bool:
     """Return if IKHints are required for this IK library."""
     return True
@@ -524,6 +616,48 @@ class _MovePose(_Command):
     Returns:
       A list Reach Commands to perform the translation.
     """
+    pose = self.target_pose(arm_origin, tip_adjust_transform)
+    if ik_lib is not None:
+      if ik_lib.require_ikhints() and not ik_hints:
+        raise core.PyReachError("IKhints have not been loaded")
+
+      joints = ik_lib.ik_search(pose.tolist(), list(state.joint_angles),
+                                ik_hints, self._use_unity_ik)
+      if joints is None:
+        raise core.PyReachError("IK failed to find solution")
+      return self.joints_to_reach_script(joints, arm_type, support_vacuum,
+                                         support_blowoff, ik_lib, ik_hints,
+                                         state, arm_origin,
+                                         tip_adjust_transform)
+    else:
+      return [
+          types_gen.ReachScriptCommand(
+              controller_name=self.controller_name,
+              move_pose_path=types_gen.MovePosePathArgs(waypoints=[
+                  types_gen.MovePoseWaypointArgs(
+                      translation=types_gen.Vec3d(pose[0], pose[1], pose[2]),
+                      rotation=types_gen.Vec3d(pose[3], pose[4], pose[5]),
+                      velocity=self._velocity,
+                      acceleration=self._acceleration)
+              ]))
+      ]
+
+  @property
+  def use_unity_ik(self) -> bool:
+    """True to use Unity IK format."""
+    return self._use_unity_ik
+
+  def target_pose(self, arm_origin: Optional[np.ndarray],
+                  tip_adjust_transform: Optional[np.ndarray]) -> np.ndarray:
+    """Return the pose to solve IK for, in arm base coordinates.
+
+    Args:
+      arm_origin: The arm origin transform.
+      tip_adjust_transform: The transform of the adjusted tip.
+
+    Returns:
+      The pose of the flange.
+    """
     pose = np.array([
         self._translation.x, self._translation.y, self._translation.z,
         self._rotation.x, self._rotation.y, self._rotation.z
@@ -579,46 +713,49 @@ class _MovePose(_Command):
           pose = transform_util.multiply_pose(pose, tip_adjust_transform)
       else:
         raise core.PyReachError("tip adjust transform was not loaded")
-    if ik_lib is not None:
-      if ik_lib.require_ikhints() and not ik_hints:
-        raise core.PyReachError("IKhints have not been loaded")
+    return pose
 
-      joints = ik_lib.ik_search(pose.tolist(), list(state.joint_angles),
-                                ik_hints, self._use_unity_ik)
-      if joints is None:
-        raise core.PyReachError("IK failed to find solution")
-      if self._use_linear:
-        return _MoveLinear(self.controller_name, joints, self._velocity,
-                           self._acceleration, self._servo,
-                           self._blend_radius).to_reach_script(
-                               arm_type, support_vacuum, support_blowoff,
-                               ik_lib, ik_hints, state, arm_origin,
-                               tip_adjust_transform)
-      else:
-        return _MoveJoints(
-            self.controller_name,
-            joints,
-            self._velocity,
-            self._acceleration,
-            self._servo,
-            servo_time_seconds=self._servo_time_seconds,
-            servo_lookahead_time_seconds=self._servo_lookahead_time_seconds,
-            servo_gain=self._servo_gain,
-            blend_radius=self._blend_radius).to_reach_script(
-                arm_type, support_vacuum, support_blowoff, ik_lib, ik_hints,
-                state, arm_origin, tip_adjust_transform)
-    else:
-      return [
-          types_gen.ReachScriptCommand(
-              controller_name=self.controller_name,
-              move_pose_path=types_gen.MovePosePathArgs(waypoints=[
-                  types_gen.MovePoseWaypointArgs(
-                      translation=types_gen.Vec3d(pose[0], pose[1], pose[2]),
-                      rotation=types_gen.Vec3d(pose[3], pose[4], pose[5]),
-                      velocity=self._velocity,
-                      acceleration=self._acceleration)
-              ]))
-      ]
+  def joints_to_reach_script(
+      self, joints: List[float], arm_type: arm.ArmType, support_vacuum: bool,
+      support_blowoff: bool, ik_lib: Optional[IKLib],
+      ik_hints: Dict[int, List[float]], state: arm.ArmState,
+      arm_origin: Optional[np.ndarray],
+      tip_adjust_transform: Optional[np.ndarray]
+  ) -> List[types_gen.ReachScriptCommand]:
+    """Convert the move to Reach Script commands, once IK is solved.
+
+    Args:
+      joints: The joints solved for the target pose.
+      arm_type: The type of arm to use.
+      support_vacuum: True if vacuum is supported.
+      support_blowoff: True if blowoff is supported.
+      ik_lib: An optional inverse kinimatics object.
+      ik_hints: The ik hints.
+      state: The arm state.
+      arm_origin: The arm origin transform.
+      tip_adjust_transform: The transform of the adjusted tip.
+
+    Returns:
+      A list Reach Commands to perform the translation.
+    """
+    if self._use_linear:
+      return _MoveLinear(self.controller_name, joints, self._velocity,
+                         self._acceleration, self._servo,
+                         self._blend_radius).to_reach_script(
+                             arm_type, support_vacuum, support_blowoff, ik_lib,
+                             ik_hints, state, arm_origin, tip_adjust_transform)
+    return _MoveJoints(
+        self.controller_name,
+        joints,
+        self._velocity,
+        self._acceleration,
+        self._servo,
+        servo_time_seconds=self._servo_time_seconds,
+        servo_lookahead_time_seconds=self._servo_lookahead_time_seconds,
+        servo_gain=self._servo_gain,
+        blend_radius=self._blend_radius).to_reach_script(
+            arm_type, support_vacuum, support_blowoff, ik_lib, ik_hints, state,
+            arm_origin, tip_adjust_transform)
 
 
 class _SetVacuumState(_Command):
@@ -1083,8 +1220,32 @@ class _Sleep(_Command):
     ]
 
 
+def _freeze(value: Any) -> Any:
+  """Convert a command attribute to a hashable value.
+
+  Args:
+    value: The attribute value.
+
+  Returns:
+    A hashable value comparing equal for equal attributes.
+  """
+  if value is None or isinstance(value, (bool, int, float, str, enum.Enum)):
+    return value
+  if isinstance(value, np.ndarray):
+    return tuple(value.tolist())
+  if isinstance(value, (list, tuple)):
+    return tuple(_freeze(v) for v in value)
+  return (type(value).__name__,
+          tuple(sorted((k, _freeze(v)) for k, v in vars(value).items())))
+
+
 class _Commands:
-  """A sequence of Commands."""
+  """A sequence of Commands, compiled as a single trajectory.
+
+  The IK of all the MovePose waypoints is solved in one batch, each waypoint
+  seeded with the solution of the previous one, and the joint waypoints of
+  the resulting script are validated against the joint limits at once.
+  """
 
   _commands: List[_Command]
 
@@ -1092,6 +1253,155 @@ class _Commands:
     """Construct the Commands."""
     self._commands = commands
 
+  def uses_ik(self, ik_lib: Optional[IKLib]) -> bool:
+    """Return if compiling the commands requires IK.
+
+    Args:
+      ik_lib: An optional inverse kinematics object.
+
+    Returns:
+      True if there is an IK library and a MovePose command.
+    """
+    return ik_lib is not None and any(
+        isinstance(command, _MovePose) for command in self._commands)
+
+  def cache_key(self, ik_lib: Optional[IKLib], ik_hints: Dict[int, List[float]],
+                state: arm.ArmState, arm_origin: Optional[np.ndarray],
+                tip_adjust_transform: Optional[np.ndarray]) -> Any:
+    """Return a key identifying the compiled commands.
+
+    The key does not include the IK library, the ik hints or the joint
+    limits: compiled commands must be dropped when those change.
+
+    Args:
+      ik_lib: An optional inverse kinematics object.
+      ik_hints: The ik hints.
+      state: The arm state.
+      arm_origin: The origin of the arm.
+      tip_adjust_transform: The transform of the adjusted tip.
+
+    Returns:
+      The hashable key.
+    """
+    joints: Optional[Tuple[float, ...]] = None
+    if ik_lib is not None and any(
+        isinstance(command, _MovePose) and
+        ik_lib.uses_current_joints(ik_hints, command.use_unity_ik)
+        for command in self._commands):
+      joints = tuple(state.joint_angles)
+    return (_freeze(self._commands), joints, _freeze(arm_origin),
+            _freeze(tip_adjust_transform))
+
+  def _solve_ik(
+      self, ik_lib: Optional[IKLib], ik_hints: Dict[int, List[float]],
+      state: arm.ArmState, arm_origin: Optional[np.ndarray],
+      tip_adjust_transform: Optional[np.ndarray]) -> Dict[int, List[float]]:
+    """Solve the IK of all MovePose commands.
+
+    Args:
+      ik_lib: An optional inverse kinematics object.
+      ik_hints: The ik hints.
+      state: The arm state.
+      arm_origin: The origin of the arm.
+      tip_adjust_transform: The transform of the adjusted tip.
+
+    Returns:
+      The joints by index of the MovePose command.
+    """
+    indices: List[int] = []
+    moves: List[_MovePose] = []
+    for index, command in enumerate(self._commands):
+      if isinstance(command, _MovePose):
+        indices.append(index)
+        moves.append(command)
+    if ik_lib is None or not moves:
+      return {}
+    if ik_lib.require_ikhints() and not ik_hints:
+      raise core.PyReachError("IKhints have not been loaded")
+    poses = np.array(
+        [move.target_pose(arm_origin, tip_adjust_transform) for move in moves])
+    solved: Dict[int, List[float]] = {}
+    current_joints = list(state.joint_angles)
+    start = 0
+    # Waypoints are solved in batches of the same IK format.
+    while start < len(moves):
+      end = start + 1
+      while (end < len(moves) and
+             moves[end].use_unity_ik == moves[start].use_unity_ik):
+        end += 1
+      solutions = ik_lib.ik_search_batch(poses[start:end], current_joints,
+                                         ik_hints, moves[start].use_unity_ik)
+      for index, solution in zip(indices[start:end], solutions):
+        if solution is None:
+          raise core.PyReachError("IK failed to find solution")
+        solved[index] = solution
+      current_joints = solved[indices[end - 1]]
+      start = end
+    return solved
+
+  def compile(
+      self,
+      arm_type: arm.ArmType,
+      support_vacuum: bool,
+      support_blowoff: bool,
+      ik_lib: Optional[IKLib],
+      ik_hints: Dict[int, List[float]],
+      state: arm.ArmState,
+      arm_origin: Optional[np.ndarray],
+      tip_adjust_transform: Optional[np.ndarray],
+      joint_limits: Optional[np.ndarray] = None,
+  ) -> List[types_gen.ReachScriptCommand]:
+    """Convert Commands into merged Reach Script commands.
+
+    Args:
+      arm_type: The type of arm to use.
+      support_vacuum: True for supporting vacuum.
+      support_blowoff: True for supporting blowoff.
+      ik_lib: An optional inverse kinematics object.
+      ik_hints: The ik hints.
+      state: The arm state.
+      arm_origin: The origin of the arm.
+      tip_adjust_transform: The transform of the adjusted tip.
+      joint_limits: The optional (min, max) limits of each joint, as a (J, 2)
+        array.
+
+    Returns:
+      The Reach Script commands.
+    """
+    solved = self._solve_ik(ik_lib, ik_hints, state, arm_origin,
+                            tip_adjust_transform)
+    cmds: List[types_gen.ReachScriptCommand] = []
+    for index, x in enumerate(self._commands):
+      if index in solved:
+        assert isinstance(x, _MovePose)
+        cmds.extend(
+            x.joints_to_reach_script(solved[index], arm_type, support_vacuum,
+                                     support_blowoff, ik_lib, ik_hints, state,
+                                     arm_origin, tip_adjust_transform))
+      else:
+        cmds.extend(
+            x.to_reach_script(arm_type, support_vacuum, support_blowoff, ik_lib,
+                              ik_hints, state, arm_origin,
+                              tip_adjust_transform))
+    if len(cmds) > 1:
+      optimized_cmds = [cmds[0]]
+      for cmd in cmds[1:]:
+        prev_cname = optimized_cmds[len(optimized_cmds) - 1].controller_name
+        prev_move_j = optimized_cmds[len(optimized_cmds) - 1].move_j_path
+        prev_move_l = optimized_cmds[len(optimized_cmds) - 1].move_l_path
+        if (prev_move_j and cmd.move_j_path and
+            prev_cname == cmd.controller_name):
+          prev_move_j.waypoints.extend(cmd.move_j_path.waypoints)
+        elif (prev_move_l and cmd.move_l_path and
+              prev_cname == cmd.controller_name):
+          prev_move_l.waypoints.extend(cmd.move_l_path.waypoints)
+        else:
+          optimized_cmds.append(cmd)
+      cmds = optimized_cmds
+    if joint_limits is not None:
+      _check_joint_limits(cmds, joint_limits)
+    return cmds
+
   def to_reach_script(
       self,
       device_name: str,
@@ -1133,41 +1443,95 @@ class _Commands:
     Returns:
       A single Reach CommandData to send to the robot.
     """
-    cmds = []
-    for x in self._commands:
-      cmds.extend(
-          x.to_reach_script(arm_type, support_vacuum, support_blowoff, ik_lib,
-                            ik_hints, state, arm_origin, tip_adjust_transform))
-    if len(cmds) > 1:
-      optimized_cmds = [cmds[0]]
-      for cmd in cmds[1:]:
-        prev_cname = optimized_cmds[len(optimized_cmds) - 1].controller_name
-        prev_move_j = optimized_cmds[len(optimized_cmds) - 1].move_j_path
-        prev_move_l = optimized_cmds[len(optimized_cmds) - 1].move_l_path
-        if (prev_move_j and cmd.move_j_path and
-            prev_cname == cmd.controller_name):
-          prev_move_j.waypoints.extend(cmd.move_j_path.waypoints)
-        elif (prev_move_l and cmd.move_l_path and
-              prev_cname == cmd.controller_name):
-          prev_move_l.waypoints.extend(cmd.move_l_path.waypoints)
-        else:
-          optimized_cmds.append(cmd)
-      cmds = optimized_cmds
-    return types_gen.CommandData(
-        ts=utils.timestamp_now(),
-        device_type="robot",
-        device_name=device_name,
-        data_type="reach-script",
-        pick_id=pick_id,
-        intent=intent,
-        success_type=success_type,
-        tag=tag,
-        reach_script=types_gen.ReachScript(
-            preemptive=preemptive,
-            version=0,
-            commands=cmds,
-            calibration_requirement=types_gen.ReachScriptCalibrationRequirement(
-                allow_uncalibrated=allow_uncalibrated)))
+    return _script_command_data(
+        device_name, tag, intent, pick_id, success_type, allow_uncalibrated,
+        preemptive,
+        self.compile(arm_type, support_vacuum, support_blowoff, ik_lib,
+                     ik_hints, state, arm_origin, tip_adjust_transform))
+
+
+def _script_command_data(
+    device_name: str, tag: str, intent: str, pick_id: str, success_type: str,
+    allow_uncalibrated: bool, preemptive: bool,
+    cmds: List[types_gen.ReachScriptCommand]) -> types_gen.CommandData:
+  """Wrap Reach Script commands into a CommandData.
+
+  Args:
+    device_name: The device name for the Arm.
+    tag: The tag to use for the Reach Script.
+    intent: The intent of the command.
+    pick_id: The pick_id of the command.
+    success_type: The success_type of the command.
+    allow_uncalibrated: Allow motion when uncalibrated.
+    preemptive: True to preempt existing scripts.
+    cmds: The Reach Script commands.
+
+  Returns:
+    A single Reach CommandData to send to the robot.
+  """
+  return types_gen.CommandData(
+      ts=utils.timestamp_now(),
+      device_type="robot",
+      device_name=device_name,
+      data_type="reach-script",
+      pick_id=pick_id,
+      intent=intent,
+      success_type=success_type,
+      tag=tag,
+      reach_script=types_gen.ReachScript(
+          preemptive=preemptive,
+          version=0,
+          commands=cmds,
+          calibration_requirement=types_gen.ReachScriptCalibrationRequirement(
+              allow_uncalibrated=allow_uncalibrated)))
+
+
+def _check_joint_limits(cmds: List[types_gen.ReachScriptCommand],
+                        joint_limits: np.ndarray) -> None:
+  """Validate the joint waypoints of Reach Script commands.
+
+  Args:
+    cmds: The Reach Script commands.
+    joint_limits: The (min, max) limits of each joint, as a (J, 2) array.
+
+  Raises:
+    PyReachError: if a waypoint exceeds the joint limits.
+  """
+  rotations = []
+  for cmd in cmds:
+    path = cmd.move_j_path or cmd.move_l_path
+    if path:
+      rotations.extend(waypoint.rotation for waypoint in path.waypoints)
+  rotations = [
+      rotation for rotation in rotations
+      if len(rotation) == joint_limits.shape[0]
+  ]
+  if not rotations:
+    return
+  joints = np.array(rotations, dtype=np.float64)
+  outside = (joints < joint_limits[:, 0]) | (joints > joint_limits[:, 1])
+  if outside.any():
+    waypoint, joint = np.argwhere(outside)[0]
+    raise core.PyReachError(
+        f"Waypoint {waypoint} exceeds the limits of joint {joint}: "
+        f"{joints[waypoint, joint]} not in [{joint_limits[joint, 0]}, "
+        f"{joint_limits[joint, 1]}]")
+
+
+# Maximum number of compiled trajectories kept by an arm device.
+_SCRIPT_CACHE_SIZE = 256
+
+# The Reach Script commands of a compiled trajectory.
+_CompiledScript = List[types_gen.ReachScriptCommand]
+
+# Prefix of the tags of the commands sent by servo streams.
+_SERVO_TAG_PREFIX = "servo-"
+
+# Maximum number of servo commands waiting for a status, per stream.
+_SERVO_MAX_PENDING = 1000
+
+# Counter used to generate unique servo stream ids.
+_servo_stream_ids = itertools.count()
 
 
 class ArmDevice(requester.Requester[arm.ArmState]):
@@ -1178,6 +1542,8 @@ class ArmDevice(requester.Requester[arm.ArmState]):
   _ik_lib_lock: threading.Lock
   _cached_constraints: Optional[constraints.Constraints]
   _constraints_ik_hints: Optional[Dict[int, List[float]]]
+  _constraints_joint_limits: Optional[np.ndarray]
+  _script_cache: "collections.OrderedDict[Any, _CompiledScript]"
   _ik_lib: Optional[IKLib]
   _ik_lib_type: arm.IKLibType
   _constraints_device: constraints_impl.ConstraintsDevice
@@ -1189,6 +1555,9 @@ class ArmDevice(requester.Requester[arm.ArmState]):
   _support_blowoff: bool
   _supported_controllers: Optional[Tuple[arm.ArmControllerDescription, ...]]
   _timers: internal.Timers
+  _state_history: arm_state_history.ArmStateHistory
+  _servo_streams_lock: threading.Lock
+  _servo_streams: Dict[str, "_ServoStream"]
 
   def __init__(
       self,
@@ -1198,7 +1567,8 @@ class ArmDevice(requester.Requester[arm.ArmState]):
       device_name: str = "",
       ik_lib: Optional[IKLib] = None,
       support_controllers: bool = False,
-      default_ik_lib_type: arm.IKLibType = arm.IKLibType.IKFAST) -> None:
+      default_ik_lib_type: arm.IKLibType = arm.IKLibType.IKFAST,
+      state_history_size: int = 1024) -> None:
     """Construct the Arm Device.
 
     Args:
@@ -1209,6 +1579,7 @@ class ArmDevice(requester.Requester[arm.ArmState]):
       ik_lib: Override creation of ikfast.
       support_controllers: Robot supports controllers
       default_ik_lib_type: The default ik library.
+      state_history_size: The number of arm states kept for state_at().
     """
     requester.Requester.__init__(self)
     self._arm_type = arm_type
@@ -1216,6 +1587,8 @@ class ArmDevice(requester.Requester[arm.ArmState]):
     self._ik_lib_lock = threading.Lock()
     self._cached_constraints = None
     self._constraints_ik_hints = None
+    self._constraints_joint_limits = None
+    self._script_cache = collections.OrderedDict()
     self._ik_lib = ik_lib
     self._ik_lib_type = default_ik_lib_type
     if not ik_lib:
@@ -1227,6 +1600,9 @@ class ArmDevice(requester.Requester[arm.ArmState]):
     self._support_blowoff = False
     self._supported_controllers = None if support_controllers else ()
     self._timers = internal.Timers(set())
+    self._state_history = arm_state_history.ArmStateHistory(state_history_size)
+    self._servo_streams_lock = threading.Lock()
+    self._servo_streams = {}
     self._digital_outputs = core.ImmutableDictionary({})
     if workcell_io_config is None:
       return
@@ -1307,16 +1683,19 @@ class ArmDevice(requester.Requester[arm.ArmState]):
   def set_ik_lib(self, ik_lib: arm.IKLibType) -> None:
     """Set the IK library to be used."""
     if self._arm_type.joint_count == 0:
-      self._ik_lib = None
+      lib: Optional[IKLib] = None
     elif ik_lib == arm.IKLibType.IKFAST:
-      self._ik_lib = IKLibIKFast(self._arm_type.urdf_file)
+      lib = IKLibIKFast(self._arm_type.urdf_file)
     elif ik_lib == arm.IKLibType.IKPYBULLET:
       if self._arm_type.urdf_file != "XArm6.urdf":
         raise core.PyReachError("PyBullet is only supported on xarm, not: " +
                                 self._arm_type.urdf_file)
-      self._ik_lib = IKLibPyBullet()
+      lib = IKLibPyBullet()
     else:
       raise core.PyReachError("IK name not recognized.")
+    with self._ik_lib_lock:
+      self._ik_lib = lib
+      self._script_cache.clear()
 
   def get_message_supplement(
       self, msg: types_gen.DeviceData) -> Optional[arm.ArmState]:
@@ -1339,9 +1718,16 @@ class ArmDevice(requester.Requester[arm.ArmState]):
       self._supported_controllers = tuple(descs)
     if (self._device_name == msg.device_name and msg.device_type == "robot" and
         msg.data_type == "robot-state"):
-      return self._arm_state_from_message(self._arm_type, msg)
+      state = self._arm_state_from_message(self._arm_type, msg)
+      self._state_history.add(state)
+      return state
     return None
 
+  @property
+  def state_history(self) -> arm_state_history.ArmStateHistory:
+    """Return the history of arm states."""
+    return self._state_history
+
   @property
   def device_name(self) -> str:
     """Return the device name."""
@@ -1424,10 +1810,17 @@ class ArmDevice(requester.Requester[arm.ArmState]):
     wc = self._constraints_device.get()
     if wc != self._cached_constraints:
       self._cached_constraints = wc
+      self._script_cache.clear()
+      self._constraints_joint_limits = None
       if not wc:
         self._constraints_ik_hints = None
       else:
         self._constraints_ik_hints = None
+        joint_limits = wc.get_joint_limits(self._device_name)
+        if joint_limits:
+          self._constraints_joint_limits = np.array(
+              [[limit.min, limit.max] for limit in joint_limits],
+              dtype=np.float64)
         reference_poses = wc.get_reference_poses(self._device_name)
         if reference_poses:
           self._constraints_ik_hints = {}
@@ -1472,22 +1865,9 @@ class ArmDevice(requester.Requester[arm.ArmState]):
     Returns:
       Status of the command.
     """
-    tag = utils.generate_tag()
     try:
-      state = self.get_cached()
-      if not state:
-        raise core.PyReachError("State has not yet been loaded")
-
-      with self._ik_lib_lock:
-        script = commands.to_reach_script(
-            self._device_name, tag, intent, pick_id, success_type,
-            self._arm_type, self._support_vacuum,
-            self._support_blowoff, allow_uncalibrated, preemptive, self._ik_lib,
-            self._update_ikhints(), state,
-            np.array(state.base_t_origin.as_list(), dtype=np.float64)
-            if state.base_t_origin else None,
-            np.array(state.tip_adjust_t_flange.as_list(), dtype=np.float64)
-            if state.tip_adjust_t_flange else None)
+      script = self._command_script(commands, intent, pick_id, success_type,
+                                    allow_uncalibrated, preemptive)
     except core.PyReachError as e:
       status = core.PyReachStatus(
           utils.timestamp_now(),
@@ -1527,7 +1907,85 @@ class ArmDevice(requester.Requester[arm.ArmState]):
       return core.PyReachStatus(
           utils.timestamp_now(), status="rejected", error="timeout")
 
-    for msg in thread_util.extract_all_from_queue(q):
+    return self._status_from_messages(thread_util.extract_all_from_queue(q))
+
+  def request_command(
+      self,
+      commands: _Commands,
+      callback: Callable[[core.PyReachStatus], None],
+      intent: str = "",
+      pick_id: str = "",
+      success_type: str = "",
+      allow_uncalibrated: bool = False,
+      preemptive: bool = False,
+      timeout: Optional[float] = None) -> Callable[[], None]:
+    """Run some commands on the device without waiting for them.
+
+    Args:
+      commands: The sequence of Command's to run.
+      callback: Called with the final status of the commands. It is called by
+        the device thread with the device lock held, so it must not block.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      allow_uncalibrated: Allow motion when uncalibrated (unsafe, should only be
+        set in calibration code).
+      preemptive: True to preempt existing scripts.
+      timeout: The maximum amount of time allowed to run the commands.
+
+    Raises:
+      PyReachError: if the commands cannot be compiled.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    script = self._command_script(commands, intent, pick_id, success_type,
+                                  allow_uncalibrated, preemptive)
+    q = self.send_tagged_request(script, timeout=timeout)
+    return self.queue_to_done_callback(
+        q, lambda msgs: callback(self._status_from_messages(msgs)))
+
+  def _command_script(self, commands: _Commands, intent: str, pick_id: str,
+                      success_type: str, allow_uncalibrated: bool,
+                      preemptive: bool) -> types_gen.CommandData:
+    """Compile commands to a tagged Reach Script command.
+
+    Args:
+      commands: The sequence of Command's to run.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      allow_uncalibrated: Allow motion when uncalibrated.
+      preemptive: True to preempt existing scripts.
+
+    Raises:
+      PyReachError: if the state is not loaded or the commands cannot be
+        compiled.
+
+    Returns:
+      The command data of the script.
+    """
+    state = self.get_cached()
+    if not state:
+      raise core.PyReachError("State has not yet been loaded")
+    with self._ik_lib_lock:
+      cmds = self._compile_commands(commands, state)
+    return _script_command_data(self._device_name, utils.generate_tag(),
+                                intent, pick_id, success_type,
+                                allow_uncalibrated, preemptive, cmds)
+
+  def _status_from_messages(
+      self, msgs: List[Tuple[types_gen.DeviceData, Optional[arm.ArmState]]]
+  ) -> core.PyReachStatus:
+    """Return the final status from the messages of a script request.
+
+    Args:
+      msgs: The messages of the request.
+
+    Returns:
+      The final status, or a timeout status if there is none.
+    """
+    for msg in msgs:
       if msg[0].data_type == "cmd-status":
         status = utils.pyreach_status_from_message(msg[0])
         if status.is_last_status():
@@ -1535,6 +1993,98 @@ class ArmDevice(requester.Requester[arm.ArmState]):
     return core.PyReachStatus(
         utils.timestamp_now(), status="rejected", error="timeout")
 
+  def _compile_commands(
+      self, commands: _Commands,
+      state: arm.ArmState) -> List[types_gen.ReachScriptCommand]:
+    """Compile commands to Reach Script, reusing previously compiled paths.
+
+    Needs to be called in the ik lib lock.
+
+    Args:
+      commands: The sequence of Command's to compile.
+      state: The arm state.
+
+    Returns:
+      The Reach Script commands.
+    """
+    ik_hints = self._update_ikhints()
+    arm_origin = (
+        np.array(state.base_t_origin.as_list(), dtype=np.float64)
+        if state.base_t_origin else None)
+    tip_adjust_transform = (
+        np.array(state.tip_adjust_t_flange.as_list(), dtype=np.float64)
+        if state.tip_adjust_t_flange else None)
+    key = None
+    if commands.uses_ik(self._ik_lib):
+      key = commands.cache_key(self._ik_lib, ik_hints, state, arm_origin,
+                               tip_adjust_transform)
+      cmds = self._script_cache.get(key)
+      if cmds is not None:
+        self._script_cache.move_to_end(key)
+        # The caller may modify the commands, e.g. when tagging them.
+        return copy.deepcopy(cmds)
+    cmds = commands.compile(self._arm_type, self._support_vacuum,
+                            self._support_blowoff, self._ik_lib, ik_hints,
+                            state, arm_origin, tip_adjust_transform,
+                            self._constraints_joint_limits)
+    if key is not None:
+      self._script_cache[key] = copy.deepcopy(cmds)
+      if len(self._script_cache) > _SCRIPT_CACHE_SIZE:
+        self._script_cache.popitem(last=False)
+    return cmds
+
+  def command_to_reach_script(
+      self, command: _Command,
+      state: arm.ArmState) -> List[types_gen.ReachScriptCommand]:
+    """Convert a single command to Reach Script.
+
+    Args:
+      command: The command.
+      state: The arm state, its joint angles are used as IK hint.
+
+    Returns:
+      The Reach Script commands.
+    """
+    with self._ik_lib_lock:
+      return command.to_reach_script(
+          self._arm_type, self._support_vacuum, self._support_blowoff,
+          self._ik_lib, self._update_ikhints(), state,
+          np.array(state.base_t_origin.as_list(), dtype=np.float64)
+          if state.base_t_origin else None,
+          np.array(state.tip_adjust_t_flange.as_list(), dtype=np.float64)
+          if state.tip_adjust_t_flange else None)
+
+  def add_servo_stream(self, stream: "_ServoStream") -> None:
+    """Register a servo stream to receive the status of its commands.
+
+    Args:
+      stream: The servo stream.
+    """
+    with self._servo_streams_lock:
+      self._servo_streams[stream.tag_prefix] = stream
+
+  def remove_servo_stream(self, stream: "_ServoStream") -> None:
+    """Unregister a servo stream.
+
+    Args:
+      stream: The servo stream.
+    """
+    with self._servo_streams_lock:
+      self._servo_streams.pop(stream.tag_prefix, None)
+
+  def on_message(self, msg: types_gen.DeviceData) -> None:
+    """Route the status of servo commands to their stream.
+
+    Args:
+      msg: The DeviceData message that is received.
+    """
+    if (msg.data_type == "cmd-status" and
+        msg.tag.startswith(_SERVO_TAG_PREFIX)):
+      with self._servo_streams_lock:
+        stream = self._servo_streams.get(msg.tag[:msg.tag.rfind("-") + 1])
+      if stream is not None:
+        stream.on_status(msg)
+
   def get_wrapper(
       self
   ) -> Tuple["ArmDevice", Tuple[device_base.DeviceBase, ...], "ArmImpl"]:
@@ -1625,6 +2175,259 @@ class ArmDevice(requester.Requester[arm.ArmState]):
     return self._arm_type
 
 
+class _ServoStream(arm.ServoStream):
+  """Streams the newest servo target of an arm at a fixed rate."""
+
+  _device: ArmDevice
+  _tag_prefix: str
+  _lock: threading.Lock
+  _closed: bool
+  _target_joints: Optional[List[float]]
+  _target_pose: Optional[core.Pose]
+  _target_time: float
+  _last_joints: Optional[List[float]]
+  _sequence: int
+  _targets: int
+  _commands_sent: int
+  _targets_replaced: int
+  _errors: int
+  _send_times: Deque[float]
+  _pending: "collections.OrderedDict[str, float]"
+  _latencies: internal.LatencyHistogram
+
+  def __init__(self, device: ArmDevice, rate: float, velocity: float,
+               acceleration: float, apply_tip_adjust_transform: bool,
+               pose_in_world_coordinates: bool, servo_time_seconds: float,
+               servo_lookahead_time_seconds: float, servo_gain: float,
+               preemptive: bool, controller_name: str) -> None:
+    """Init and start a servo stream.
+
+    Args:
+      device: The arm device.
+      rate: The maximum number of commands sent per second.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      apply_tip_adjust_transform: Apply the transform of the tip adjust.
+      pose_in_world_coordinates: If true, target poses are in world
+        coordinates.
+      servo_time_seconds: Time to block the robot for (servo + UR only).
+      servo_lookahead_time_seconds: Lookahead time for trajectory smoothing
+        (servo + UR only).
+      servo_gain: Gain for the servoing.
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller.
+
+    Raises:
+      PyReachError: if the rate is not positive.
+    """
+    if rate <= 0:
+      raise core.PyReachError("Servo stream rate must be positive")
+    self._device = device
+    self._tag_prefix = f"{_SERVO_TAG_PREFIX}{next(_servo_stream_ids)}-"
+    self._lock = threading.Lock()
+    self._closed = False
+    self._target_joints = None
+    self._target_pose = None
+    self._target_time = 0.0
+    self._last_joints = None
+    self._sequence = 0
+    self._targets = 0
+    self._commands_sent = 0
+    self._targets_replaced = 0
+    self._errors = 0
+    self._send_times = collections.deque()
+    self._pending = collections.OrderedDict()
+    self._latencies = internal.LatencyHistogram()
+    self._velocity = velocity
+    self._acceleration = acceleration
+    self._apply_tip_adjust_transform = apply_tip_adjust_transform
+    self._pose_in_world_coordinates = pose_in_world_coordinates
+    self._controller_name = controller_name
+    # Template of the servo waypoints, only the joints change per command.
+    self._waypoint_template = dict(
+        velocity=velocity,
+        acceleration=acceleration,
+        servo=True,
+        servo_t_secs=servo_time_seconds,
+        servo_lookahead_time_secs=servo_lookahead_time_seconds,
+        servo_gain=servo_gain)
+    self._script_template = dict(
+        preemptive=preemptive,
+        version=0,
+        calibration_requirement=types_gen.ReachScriptCalibrationRequirement(
+            allow_uncalibrated=False))
+    device.add_servo_stream(self)
+    device.poll(1.0 / rate, self._send)
+
+  @property
+  def tag_prefix(self) -> str:
+    """The prefix of the tags of the commands of the stream."""
+    return self._tag_prefix
+
+  def set_target_pose(self, pose: core.Pose) -> None:
+    """Set the target pose of the arm.
+
+    Args:
+      pose: The target pose.
+    """
+    with self._lock:
+      self._set_target_locked()
+      self._target_pose = pose
+
+  def set_target_joints(
+      self, joints: Union[Tuple[float, ...], List[float], np.ndarray]) -> None:
+    """Set the target joint angles of the arm.
+
+    Args:
+      joints: The target joint angles in radians.
+
+    Raises:
+      PyReachError: if the number of joints does not match the arm.
+    """
+    if len(joints) != self._device.arm_type.joint_count:
+      raise core.PyReachError("Invalid joint count in servo target")
+    with self._lock:
+      self._set_target_locked()
+      self._target_joints = [float(joint) for joint in joints]
+
+  def _set_target_locked(self) -> None:
+    """Replace the current target, must be called with the lock held."""
+    if self._closed:
+      raise core.PyReachError("Servo stream is closed")
+    if self._target_pose is not None or self._target_joints is not None:
+      self._targets_replaced += 1
+    self._target_pose = None
+    self._target_joints = None
+    self._target_time = time.time()
+    self._targets += 1
+
+  @property
+  def stats(self) -> arm.ServoStreamStats:
+    """Return the statistics of the stream."""
+    with self._lock:
+      now = time.time()
+      while self._send_times and self._send_times[0] < now - 1.0:
+        self._send_times.popleft()
+      p50, p99 = self._latencies.percentiles((50.0, 99.0))
+      return arm.ServoStreamStats(
+          targets=self._targets,
+          commands_sent=self._commands_sent,
+          targets_replaced=self._targets_replaced,
+          errors=self._errors,
+          command_rate=float(len(self._send_times)),
+          latency_p50=p50,
+          latency_p99=p99)
+
+  def close(self) -> None:
+    """Stop streaming."""
+    with self._lock:
+      self._closed = True
+    self._device.remove_servo_stream(self)
+
+  def on_status(self, msg: types_gen.DeviceData) -> None:
+    """Record the latency of a command on its final status.
+
+    Args:
+      msg: The cmd-status message.
+    """
+    if not utils.pyreach_status_from_message(msg).is_last_status():
+      return
+    with self._lock:
+      target_time = self._pending.pop(msg.tag, None)
+      if target_time is not None:
+        self._latencies.record(time.time() - target_time)
+
+  def _send(self) -> bool:
+    """Send the newest target, if any.
+
+    Returns:
+      True if the stream is closed, to stop polling.
+    """
+    # Keep the target until the state of the arm is loaded.
+    state = self._device.get_cached()
+    with self._lock:
+      if self._closed:
+        return True
+      if state is None:
+        return False
+      pose = self._target_pose
+      joints = self._target_joints
+      target_time = self._target_time
+      self._target_pose = None
+      self._target_joints = None
+    if pose is None and joints is None:
+      return False
+    try:
+      command = self._to_command(state, pose, joints)
+    except core.PyReachError as e:
+      logging.warning("servo target rejected: %s", e)
+      with self._lock:
+        self._errors += 1
+      return False
+    with self._lock:
+      self._sequence += 1
+      tag = f"{self._tag_prefix}{self._sequence}"
+      self._pending[tag] = target_time
+      if len(self._pending) > _SERVO_MAX_PENDING:
+        self._pending.popitem(last=False)
+      self._commands_sent += 1
+      self._send_times.append(time.time())
+    self._device.send_cmd(
+        types_gen.CommandData(
+            ts=utils.timestamp_now(),
+            device_type="robot",
+            device_name=self._device.device_name,
+            data_type="reach-script",
+            tag=tag,
+            reach_script=types_gen.ReachScript(
+                commands=[command], **self._script_template)))
+    return False
+
+  def _to_command(
+      self, state: arm.ArmState, pose: Optional[core.Pose],
+      joints: Optional[List[float]]) -> types_gen.ReachScriptCommand:
+    """Convert a target to a servo Reach Script command.
+
+    Args:
+      state: The arm state.
+      pose: The target pose, if the target is a pose.
+      joints: The target joints, if the target is joints.
+
+    Returns:
+      The Reach Script command.
+    """
+    if pose is not None:
+      # The previous solution is the best IK hint for continuous motion.
+      if self._last_joints is not None:
+        state = dataclasses.replace(
+            state, joint_angles=tuple(self._last_joints))
+      position = pose.position
+      rotation = pose.orientation.axis_angle
+      commands = self._device.command_to_reach_script(
+          _MovePose(
+              self._controller_name,
+              types_gen.Vec3d(position.x, position.y, position.z),
+              types_gen.Vec3d(rotation.rx, rotation.ry, rotation.rz),
+              velocity=self._velocity,
+              acceleration=self._acceleration,
+              servo=True,
+              apply_tip_adjust_transform=self._apply_tip_adjust_transform,
+              pose_in_world_coordinates=self._pose_in_world_coordinates),
+          state)
+      if not commands[0].move_j_path:
+        # Without IK library, the robot solves the pose.
+        return commands[0]
+      joints = list(commands[0].move_j_path.waypoints[0].rotation)
+    assert joints is not None
+    self._last_joints = joints
+    return types_gen.ReachScriptCommand(
+        controller_name=self._controller_name,
+        move_j_path=types_gen.MoveJPathArgs(waypoints=[
+            types_gen.MoveJWaypointArgs(
+                rotation=joints, **self._waypoint_template)
+        ]))
+
+
 class ArmImpl(arm.Arm):
   """Represents a multi-joint Arm."""
 
@@ -1666,6 +2469,30 @@ class ArmImpl(arm.Arm):
     """Return the cached state."""
     return self._device.get_cached()
 
+  def state_at(self, t: float) -> Optional[arm.ArmState]:
+    """Return the state of the arm at a time, interpolated from the history.
+
+    Args:
+      t: The time.
+
+    Returns:
+      The interpolated state, or None if the time is outside of the history.
+    """
+    return self._device.state_history.state_at(t)
+
+  def states_between(self, start_time: float,
+                     end_time: float) -> List[arm.ArmState]:
+    """Return the received arm states between two times.
+
+    Args:
+      start_time: The start time, inclusive.
+      end_time: The end time, inclusive.
+
+    Returns:
+      The states ordered by time.
+    """
+    return self._device.state_history.states_between(start_time, end_time)
+
   @property
   def support_blowoff(self) -> bool:
     """Return true if blowoff is supported."""
@@ -1913,6 +2740,133 @@ class ArmImpl(arm.Arm):
         callback=callback,
         finished_callback=finished_callback)
 
+  def request_to_joints(
+      self,
+      joints: Union[Tuple[float, ...], List[float], np.ndarray],
+      callback: Callable[[core.PyReachStatus], None],
+      use_linear: bool = False,
+      intent: str = "",
+      pick_id: str = "",
+      success_type: str = "",
+      velocity: float = 0.0,
+      acceleration: float = 0.0,
+      allow_uncalibrated: bool = False,
+      preemptive: bool = False,
+      controller_name: str = "",
+      timeout: Optional[float] = None) -> Callable[[], None]:
+    """Move the arm to joints without waiting for the move.
+
+    Unlike async_to_joints, no thread waits for the move.
+
+    Args:
+      joints: The list of joint angles in radians.
+      callback: Called with the final status of the move. It is called by the
+        device thread with the device lock held, so it must not block.
+      use_linear: Whether to move in linear space.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      allow_uncalibrated: Allow motion when uncalibrated (unsafe, should only be
+        set in calibration code).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the command to.
+      timeout: The amount time to wait before giving up.
+
+    Raises:
+      PyReachError: if the move cannot be compiled.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    move_command: Union[_MoveLinear, _MoveJoints]
+    if use_linear:
+      move_command = _MoveLinear(
+          controller_name,
+          list(joints),
+          acceleration=acceleration,
+          velocity=velocity)
+    else:
+      move_command = _MoveJoints(
+          controller_name,
+          list(joints),
+          acceleration=acceleration,
+          velocity=velocity)
+    return self._device.request_command(
+        _Commands([move_command]),
+        callback,
+        intent=intent,
+        pick_id=pick_id,
+        success_type=success_type,
+        allow_uncalibrated=allow_uncalibrated,
+        preemptive=preemptive,
+        timeout=timeout)
+
+  def request_to_pose(self,
+                      pose: core.Pose,
+                      callback: Callable[[core.PyReachStatus], None],
+                      use_linear: bool = False,
+                      intent: str = "",
+                      pick_id: str = "",
+                      success_type: str = "",
+                      velocity: float = 0.0,
+                      acceleration: float = 0.0,
+                      apply_tip_adjust_transform: bool = False,
+                      allow_uncalibrated: bool = False,
+                      preemptive: bool = False,
+                      controller_name: str = "",
+                      pose_in_world_coordinates: bool = False,
+                      timeout: Optional[float] = None) -> Callable[[], None]:
+    """Move the arm to a pose without waiting for the move.
+
+    Unlike async_to_pose, no thread waits for the move.
+
+    Args:
+      pose: The desired pose.
+      callback: Called with the final status of the move. It is called by the
+        device thread with the device lock held, so it must not block.
+      use_linear: True if a linear translation is required.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      apply_tip_adjust_transform: Apply the transform of the tip adjust.
+      allow_uncalibrated: Allow motion when uncalibrated (unsafe, should only be
+        set in calibration code).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the command to.
+      pose_in_world_coordinates: If true, pose is in world coordinates,
+        otherwise if false, pose is in arm base coordinates.
+      timeout: The amount of time to wait until giving up.
+
+    Raises:
+      PyReachError: if the move cannot be compiled, e.g. on IK failure.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    return self._device.request_command(
+        _Commands([
+            _MovePose(
+                controller_name,
+                types_gen.Vec3d(*pose.position.as_list()),
+                types_gen.Vec3d(*pose.orientation.axis_angle.as_list()),
+                use_linear=use_linear,
+                acceleration=acceleration,
+                velocity=velocity,
+                apply_tip_adjust_transform=apply_tip_adjust_transform,
+                pose_in_world_coordinates=pose_in_world_coordinates)
+        ]),
+        callback,
+        intent=intent,
+        pick_id=pick_id,
+        success_type=success_type,
+        allow_uncalibrated=allow_uncalibrated,
+        preemptive=preemptive,
+        timeout=timeout)
+
   def to_pose(self,
               pose: core.Pose,
               use_linear: bool = False,
@@ -2091,6 +3045,41 @@ class ArmImpl(arm.Arm):
         success_type=success_type,
         timeout=timeout)
 
+  def request_vacuum_state(
+      self,
+      vacuum_state: ActionVacuumState,
+      callback: Callable[[core.PyReachStatus], None],
+      intent: str = "",
+      pick_id: str = "",
+      success_type: str = "",
+      controller_name: str = "",
+      timeout: Optional[float] = None) -> Callable[[], None]:
+    """Set the vacuum state without waiting for it.
+
+    Args:
+      vacuum_state: The VacuumState to set.
+      callback: Called with the final status of the command. It is called by
+        the device thread with the device lock held, so it must not block.
+      intent: The intent string (or empty) for the request.
+      pick_id: The pick id (or empty) for the request.
+      success_type: The success type to return on success.
+      controller_name: The name of the controller to send the command to.
+      timeout: An optional timeout measured in seconds.
+
+    Raises:
+      PyReachError: if the command cannot be compiled.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    return self._device.request_command(
+        _Commands([_SetVacuumState(controller_name, vacuum_state)]),
+        callback,
+        intent=intent,
+        pick_id=pick_id,
+        success_type=success_type,
+        timeout=timeout)
+
   def async_set_vacuum_state(
       self,
       vacuum_state: ActionVacuumState,
@@ -2588,3 +3577,40 @@ class ArmImpl(arm.Arm):
       True if the constraints loaded, otherwise false.
     """
     return self._device.wait_constraints(timeout)
+
+  def start_servo_stream(self,
+                         rate: float = 50.0,
+                         velocity: float = 0.0,
+                         acceleration: float = 0.0,
+                         apply_tip_adjust_transform: bool = False,
+                         pose_in_world_coordinates: bool = False,
+                         servo_time_seconds: float = 0.0,
+                         servo_lookahead_time_seconds: float = 0.0,
+                         servo_gain: float = 0.0,
+                         preemptive: bool = False,
+                         controller_name: str = "") -> arm.ServoStream:
+    """Start streaming servo targets, e.g. for continuous teleoperation.
+
+    Args:
+      rate: The maximum number of commands sent per second.
+      velocity: Max velocity.
+      acceleration: Max acceleration.
+      apply_tip_adjust_transform: Apply the transform of the tip adjust to
+        target poses.
+      pose_in_world_coordinates: If true, target poses are in world
+        coordinates, otherwise if false, in arm base coordinates.
+      servo_time_seconds: Time to block the robot for (servo + UR only).
+      servo_lookahead_time_seconds: Lookahead time for trajectory smoothing
+        (servo + UR only).
+      servo_gain: Gain for the servoing - if zero, defaults to 300 (servo + UR
+        only).
+      preemptive: True to preempt existing scripts.
+      controller_name: The name of the controller to send the commands to.
+
+    Returns:
+      The servo stream. It must be closed to stop streaming.
+    """
+    return _ServoStream(self._device, rate, velocity, acceleration,
+                        apply_tip_adjust_transform, pose_in_world_coordinates,
+                        servo_time_seconds, servo_lookahead_time_seconds,
+                        servo_gain, preemptive, controller_name)
@@ -14,6 +14,7 @@
 
 import json
 import math
+import time
 from typing import Dict, List, Optional, Tuple, Union
 import unittest
 
@@ -957,6 +958,148 @@ class TestPyreachArmImpl(unittest.TestCase):
                   ]))
       ])
 
+  def test_servo_stream(self) -> None:
+    rdev, dev = self._init_arm("ur5e.urdf", [])
+    with test_utils.TestDevice(rdev) as test_device:
+      test_device.set_responder(TestArm(""))
+      with dev.start_servo_stream(
+          rate=20.0, velocity=1.0, acceleration=2.0) as stream:
+        # Targets are held until the arm state is loaded, so only the newest
+        # one is sent.
+        stream.set_target_joints([0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
+        stream.set_target_joints([0.2, 0.3, 0.4, 0.5, 0.6, 0.7])
+        self.assertIsNotNone(dev.fetch_state())
+        deadline = time.time() + 5.0
+        while stream.stats.commands_sent < 1 and time.time() < deadline:
+          time.sleep(0.01)
+        self.assertRaises(core.PyReachError, stream.set_target_joints, [0.0])
+      self.assertRaises(core.PyReachError, stream.set_target_joints,
+                        [0.0] * 6)
+      stats = stream.stats
+      self.assertEqual(stats.targets, 2)
+      self.assertEqual(stats.targets_replaced, 1)
+      self.assertEqual(stats.commands_sent, 1)
+      self.assertEqual(stats.errors, 0)
+      self.assertEqual(stats.command_rate, 1.0)
+      self.assertGreater(stats.latency_p50, 0.0)
+      test_device.expect_command_data([
+          types_gen.CommandData(device_type="robot", data_type="frame-request"),
+          types_gen.CommandData(
+              data_type="reach-script",
+              device_type="robot",
+              tag="tag-1",
+              reach_script=types_gen.ReachScript(
+                  preemptive=False,
+                  version=0,
+                  calibration_requirement=types_gen
+                  .ReachScriptCalibrationRequirement(allow_uncalibrated=False),
+                  commands=[
+                      types_gen.ReachScriptCommand(
+                          move_j_path=types_gen.MoveJPathArgs(waypoints=[
+                              types_gen.MoveJWaypointArgs(
+                                  acceleration=2.0,
+                                  servo=True,
+                                  rotation=[0.2, 0.3, 0.4, 0.5, 0.6, 0.7],
+                                  velocity=1.0)
+                          ]))
+                  ])),
+      ])
+
+  def test_compile_trajectory(self) -> None:
+    ik_lib = TestIKLib()
+    rdev, extra_devs, _ = arm_impl.ArmDevice(
+        arm_impl.ArmTypeImpl.from_urdf_file("ur5e.urdf"),
+        ik_lib=ik_lib).get_wrapper()
+    for extra_dev in extra_devs:
+      extra_dev.on_set_key_value(
+          device_base.KeyValueKey(
+              device_type="robot", device_name="",
+              key="robot_constraints.json"),
+          test_data.get_robot_constraints_json())
+      extra_dev.on_set_key_value(
+          device_base.KeyValueKey(
+              device_type="settings-engine",
+              device_name="",
+              key="workcell_constraints.json"),
+          test_data.get_workcell_constraints_json())
+      extra_dev.close()
+    assert isinstance(rdev, arm_impl.ArmDevice)
+    state = arm.ArmState(joint_angles=(0.0, 0.0, 0.0, 0.0, 0.0, 0.0))
+
+    def move_pose(x: float, use_unity_ik: bool = False) -> arm_impl._MovePose:
+      return arm_impl._MovePose(
+          "",
+          types_gen.Vec3d(x, 0.2, 0.3),
+          types_gen.Vec3d(0.0, 0.0, 0.0),
+          use_unity_ik=use_unity_ik)
+
+    commands = arm_impl._Commands([
+        move_pose(0.1),
+        move_pose(0.2),
+        arm_impl._MoveJoints("", [0.5, 0.0, 0.0, 0.0, 0.0, 0.0]),
+        move_pose(0.3, use_unity_ik=True),
+    ])
+    cmds = rdev._compile_commands(commands, state)
+    self.assertEqual(len(cmds), 1)
+    self.assertEqual(
+        [waypoint.rotation for waypoint in cmds[0].move_j_path.waypoints],
+        [[0.1, 0.2, 0.3, 0.0, 0.0, 0.0], [0.2, 0.2, 0.3, 0.0, 0.0, 0.0],
+         [0.5, 0.0, 0.0, 0.0, 0.0, 0.0], [0.3, 0.2, 0.3, 0.0, 0.0, 0.0]])
+    # Each waypoint is seeded with the previous solution.
+    self.assertEqual(ik_lib.current_joints, [
+        [0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        [0.1, 0.2, 0.3, 0.0, 0.0, 0.0],
+        [0.2, 0.2, 0.3, 0.0, 0.0, 0.0],
+    ])
+    # Repeated paths are compiled once.
+    cmds2 = rdev._compile_commands(
+        arm_impl._Commands([
+            move_pose(0.1),
+            move_pose(0.2),
+            arm_impl._MoveJoints("", [0.5, 0.0, 0.0, 0.0, 0.0, 0.0]),
+            move_pose(0.3, use_unity_ik=True),
+        ]), state)
+    self.assertEqual([cmd.to_json() for cmd in cmds2],
+                     [cmd.to_json() for cmd in cmds])
+    self.assertEqual(len(ik_lib.current_joints), 3)
+    # Modifying the returned commands leaves the cached commands unchanged.
+    cmds2[0].move_j_path.waypoints[0].rotation[0] = 9.0
+    cmds3 = rdev._compile_commands(
+        arm_impl._Commands([
+            move_pose(0.1),
+            move_pose(0.2),
+            arm_impl._MoveJoints("", [0.5, 0.0, 0.0, 0.0, 0.0, 0.0]),
+            move_pose(0.3, use_unity_ik=True),
+        ]), state)
+    self.assertEqual([cmd.to_json() for cmd in cmds3],
+                     [cmd.to_json() for cmd in cmds])
+    # Joint limits of the robot constraints are enforced.
+    with self.assertRaisesRegex(core.PyReachError, "joint 0"):
+      rdev._compile_commands(
+          arm_impl._Commands([move_pose(0.1),
+                              move_pose(7.0)]), state)
+    with self.assertRaisesRegex(core.PyReachError, "IK failed"):
+      rdev._compile_commands(
+          arm_impl._Commands([move_pose(0.1),
+                              move_pose(-1.0)]), state)
+
+  def test_ikfast_search_batch(self) -> None:
+    ik_lib = arm_impl.IKLibIKFast("ur5e.urdf")
+    # A smooth joint path, away from the joint limits.
+    path = np.array([[1.6, -1.0 - 0.01 * i, 1.5, -2.1, 1.6 + 0.02 * i, 0.1]
+                     for i in range(20)])
+    poses = [ik_lib.fk(joints.tolist()) for joints in path]
+    if poses[0] is None:
+      self.skipTest("the ikfast library is not available")
+    ik_hints = {0: path[0].tolist(), 1: (-path[0]).tolist()}
+    for use_unity_ik in (False, True):
+      solutions = ik_lib.ik_search_batch(
+          np.array(poses), path[0].tolist(), ik_hints, use_unity_ik)
+      # Each waypoint picks the solution next to the previous one.
+      for solution, joints in zip(solutions, path):
+        assert solution is not None
+        np.testing.assert_allclose(solution, joints, atol=1e-4)
+
   def test_stop(self) -> None:
     rdev, dev = self._init_arm("ur5e.urdf", [
         np.array([
@@ -1395,6 +1538,30 @@ class TestArm(test_utils.TestResponder):
     return []
 
 
+class TestIKLib(arm_impl.IKLib):
+  """An IK library returning the translation of the pose as joints."""
+
+  current_joints: List[List[float]]
+
+  def __init__(self) -> None:
+    self.current_joints = []
+
+  def ik_search(self, pose: List[float], current_joints: List[float],
+                ik_hints: Dict[int, List[float]],
+                use_unity_ik: bool) -> Optional[List[float]]:
+    self.current_joints.append(list(current_joints))
+    if pose[0] < 0.0:
+      return None
+    return list(pose[:3]) + [0.0, 0.0, 0.0]
+
+  def uses_current_joints(self, ik_hints: Dict[int, List[float]],
+                          use_unity_ik: bool) -> bool:
+    return False
+
+  def require_ikhints(self) -> bool:
+    return False
+
+
 class TestIKFast(arm_impl.IKLibIKFast):
 
   def __init__(self, urdf_file: str,
@@ -0,0 +1,260 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time-indexed history of arm states with interpolation."""
+
+import dataclasses
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from pyreach import arm
+from pyreach import core
+
+# The pose attributes of ArmState that are interpolated.
+_POSE_FIELDS = ("flange_t_base", "tip_adjust_t_base", "flange_t_origin",
+                "tip_adjust_t_origin")
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+  """Spherical linear interpolation between arrays of quaternions.
+
+  Args:
+    q0: the start quaternions as an (N, 4) array in [x, y, z, w] order.
+    q1: the end quaternions as an (N, 4) array in [x, y, z, w] order.
+    alpha: the interpolation factors in [0, 1], as an (N,) array.
+
+  Returns:
+    The interpolated unit quaternions as an (N, 4) array.
+  """
+  dot = np.sum(q0 * q1, axis=1)
+  # Interpolate along the shortest arc.
+  q1 = np.where((dot < 0.0)[:, np.newaxis], -q1, q1)
+  dot = np.abs(dot)
+  theta = np.arccos(np.clip(dot, -1.0, 1.0))
+  sin_theta = np.sin(theta)
+  # Fall back to linear interpolation for nearly identical rotations.
+  linear = sin_theta < 1e-6
+  safe_sin_theta = np.where(linear, 1.0, sin_theta)
+  w0 = np.where(linear, 1.0 - alpha,
+                np.sin((1.0 - alpha) * theta) / safe_sin_theta)
+  w1 = np.where(linear, alpha, np.sin(alpha * theta) / safe_sin_theta)
+  q = w0[:, np.newaxis] * q0 + w1[:, np.newaxis] * q1
+  return q / np.linalg.norm(q, axis=1)[:, np.newaxis]
+
+
+class ArmStateHistory:
+  """A bounded ring buffer of arm states, indexed by time.
+
+  The joint angles, forces and poses of the states are kept in numpy arrays
+  so that the states at arbitrary times are interpolated in a vectorized way:
+  linearly for joints, forces and positions, and with SLERP for rotations.
+  """
+
+  _lock: threading.Lock
+  _capacity: int
+  _start: int
+  _count: int
+  _states: List[Optional[arm.ArmState]]
+  _times: np.ndarray
+  _joints: Optional[np.ndarray]
+  _forces: np.ndarray
+  _poses: Dict[str, np.ndarray]
+  _valid: Dict[str, np.ndarray]
+
+  def __init__(self, capacity: int = 1024) -> None:
+    """Init an ArmStateHistory.
+
+    Args:
+      capacity: the maximum number of states kept.
+
+    Raises:
+      PyReachError: if the capacity is not positive.
+    """
+    if capacity <= 0:
+      raise core.PyReachError("Arm state history capacity must be positive")
+    self._lock = threading.Lock()
+    self._capacity = capacity
+    self._start = 0
+    self._count = 0
+    self._states = [None] * capacity
+    self._times = np.zeros(capacity, dtype=np.float64)
+    self._joints = None
+    self._forces = np.zeros((capacity, 6), dtype=np.float64)
+    self._poses = {
+        name: np.zeros((capacity, 6), dtype=np.float64)
+        for name in _POSE_FIELDS
+    }
+    self._valid = {
+        name: np.zeros(capacity, dtype=bool) for name in _POSE_FIELDS
+    }
+
+  @property
+  def capacity(self) -> int:
+    """The maximum number of states kept."""
+    return self._capacity
+
+  def __len__(self) -> int:
+    """Return the number of states kept."""
+    return self._count
+
+  def clear(self) -> None:
+    """Remove all states."""
+    with self._lock:
+      self._start = 0
+      self._count = 0
+      self._states = [None] * self._capacity
+
+  def add(self, state: arm.ArmState) -> None:
+    """Add a state to the history, evicting the oldest state if full.
+
+    If the state is older than the newest state (e.g. after a seek in
+    playback), the history is cleared first.
+
+    Args:
+      state: the arm state.
+    """
+    with self._lock:
+      if self._count > 0:
+        last = (self._start + self._count - 1) % self._capacity
+        if state.time < self._times[last]:
+          self._start = 0
+          self._count = 0
+          self._states = [None] * self._capacity
+      if (self._joints is None or
+          self._joints.shape[1] != len(state.joint_angles)):
+        self._joints = np.zeros((self._capacity, len(state.joint_angles)),
+                                dtype=np.float64)
+        self._start = 0
+        self._count = 0
+      if self._count < self._capacity:
+        index = (self._start + self._count) % self._capacity
+        self._count += 1
+      else:
+        index = self._start
+        self._start = (self._start + 1) % self._capacity
+      self._states[index] = state
+      self._times[index] = state.time
+      self._joints[index] = state.joint_angles
+      self._forces[index] = state.force
+      for name in _POSE_FIELDS:
+        pose: Optional[core.Pose] = getattr(state, name)
+        if pose is None:
+          self._valid[name][index] = False
+          continue
+        self._valid[name][index] = True
+        self._poses[name][index] = pose.as_tuple()
+
+  def _order(self) -> np.ndarray:
+    """Return the buffer indices from the oldest to the newest state."""
+    return (self._start + np.arange(self._count)) % self._capacity
+
+  def states_between(self, start_time: float,
+                     end_time: float) -> List[arm.ArmState]:
+    """Return the recorded states between two times.
+
+    Args:
+      start_time: the start time, inclusive.
+      end_time: the end time, inclusive.
+
+    Returns:
+      The states ordered by time.
+    """
+    with self._lock:
+      order = self._order()
+      times = self._times[order]
+      lo = np.searchsorted(times, start_time, side="left")
+      hi = np.searchsorted(times, end_time, side="right")
+      states = [self._states[index] for index in order[lo:hi]]
+    return [state for state in states if state is not None]
+
+  def state_at(self, t: float) -> Optional[arm.ArmState]:
+    """Return the state of the arm at a time.
+
+    Args:
+      t: the time.
+
+    Returns:
+      The interpolated state, or None if the time is outside of the history.
+    """
+    return self.states_at([t])[0]
+
+  def states_at(self,
+                times: Sequence[float]) -> List[Optional[arm.ArmState]]:
+    """Return the states of the arm at multiple times.
+
+    The joint angles, forces and poses are interpolated between the recorded
+    states surrounding each time. All other attributes are the ones of the
+    recorded state preceding the time.
+
+    Args:
+      times: the times.
+
+    Returns:
+      The interpolated states, None for times outside of the history.
+    """
+    # pylint: disable=g-import-not-at-top
+    from scipy.spatial.transform import Rotation  # type: ignore
+    query = np.asarray(times, dtype=np.float64).reshape(-1)
+    results: List[Optional[arm.ArmState]] = [None] * query.shape[0]
+    with self._lock:
+      if self._count == 0 or self._joints is None:
+        return results
+      order = self._order()
+      recorded = self._times[order]
+      inside = np.nonzero((query >= recorded[0]) & (query <= recorded[-1]))[0]
+      if inside.shape[0] == 0:
+        return results
+      t = query[inside]
+      hi = np.clip(
+          np.searchsorted(recorded, t, side="right"), 1, self._count - 1)
+      if self._count == 1:
+        hi = np.zeros_like(hi)
+      lo = np.where(recorded[hi] <= t, hi, np.maximum(hi - 1, 0))
+      dt = recorded[hi] - recorded[lo]
+      alpha = np.where(dt > 0, (t - recorded[lo]) / np.where(dt > 0, dt, 1.0),
+                       0.0)
+      i0 = order[lo]
+      i1 = order[hi]
+      a = alpha[:, np.newaxis]
+      joints = self._joints[i0] * (1.0 - a) + self._joints[i1] * a
+      forces = self._forces[i0] * (1.0 - a) + self._forces[i1] * a
+      poses: Dict[str, np.ndarray] = {}
+      valid: Dict[str, np.ndarray] = {}
+      for name in _POSE_FIELDS:
+        p0 = self._poses[name][i0]
+        p1 = self._poses[name][i1]
+        rotvecs = Rotation.from_quat(
+            slerp(
+                Rotation.from_rotvec(p0[:, 3:]).as_quat(),
+                Rotation.from_rotvec(p1[:, 3:]).as_quat(), alpha)).as_rotvec()
+        poses[name] = np.hstack([p0[:, :3] * (1.0 - a) + p1[:, :3] * a, rotvecs])
+        valid[name] = self._valid[name][i0] & self._valid[name][i1]
+      previous = [self._states[index] for index in i0]
+    for n, index in enumerate(inside):
+      state = previous[n]
+      if state is None:
+        continue
+      updates = {
+          "time": float(t[n]),
+          "joint_angles": tuple(joints[n].tolist()),
+          "force": tuple(forces[n].tolist()),
+      }
+      for name in _POSE_FIELDS:
+        updates[name] = (
+            core.Pose.from_list(poses[name][n].tolist())
+            if valid[name][n] else getattr(state, name))
+      updates["pose"] = updates["flange_t_base"]
+      results[index] = dataclasses.replace(state, **updates)
+    return results
@@ -0,0 +1,97 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for arm_state_history."""
+
+import math
+import unittest
+
+import numpy as np
+
+from pyreach import arm
+from pyreach import core
+from pyreach.impl import arm_state_history
+
+
+def _state(t: float, angle: float, seq: int = 0) -> arm.ArmState:
+  pose = core.Pose.from_list([t, 2.0 * t, 0.0, 0.0, 0.0, angle])
+  return arm.ArmState(
+      time=t,
+      sequence=seq,
+      joint_angles=(t, -t, 0.0, 0.0, 0.0, 1.0),
+      pose=pose,
+      flange_t_base=pose,
+      force=(10.0 * t, 0.0, 0.0, 0.0, 0.0, 0.0),
+      is_program_running=seq % 2 == 1)
+
+
+class ArmStateHistoryTest(unittest.TestCase):
+
+  def test_slerp(self) -> None:
+    q0 = np.array([[0.0, 0.0, 0.0, 1.0], [0.0, 0.0, 0.0, 1.0]])
+    q1 = np.array([[0.0, 0.0, math.sin(math.pi / 4), math.cos(math.pi / 4)],
+                   [0.0, 0.0, 0.0, -1.0]])
+    q = arm_state_history.slerp(q0, q1, np.array([0.5, 0.5]))
+    np.testing.assert_allclose(
+        q[0], [0.0, 0.0, math.sin(math.pi / 8),
+               math.cos(math.pi / 8)])
+    np.testing.assert_allclose(q[1], [0.0, 0.0, 0.0, 1.0])
+
+  def test_state_at(self) -> None:
+    history = arm_state_history.ArmStateHistory(capacity=3)
+    self.assertIsNone(history.state_at(1.0))
+    history.add(_state(1.0, 0.0, seq=1))
+    state = history.state_at(1.0)
+    assert state
+    self.assertEqual(state.sequence, 1)
+    history.add(_state(2.0, math.pi / 2, seq=2))
+    state = history.state_at(1.25)
+    assert state
+    self.assertEqual(state.time, 1.25)
+    self.assertEqual(state.sequence, 1)
+    self.assertTrue(state.is_program_running)
+    np.testing.assert_allclose(state.joint_angles,
+                               (1.25, -1.25, 0.0, 0.0, 0.0, 1.0))
+    np.testing.assert_allclose(state.force, (12.5, 0.0, 0.0, 0.0, 0.0, 0.0))
+    np.testing.assert_allclose(
+        state.pose.as_list(), [1.25, 2.5, 0.0, 0.0, 0.0, math.pi / 8],
+        atol=1e-9)
+    self.assertIs(state.pose, state.flange_t_base)
+    self.assertIsNone(state.tip_adjust_t_base)
+    self.assertIsNone(history.state_at(0.5))
+    self.assertIsNone(history.state_at(2.5))
+    states = history.states_at([0.0, 2.0, 1.5])
+    self.assertIsNone(states[0])
+    assert states[1] and states[2]
+    self.assertEqual(states[1].sequence, 2)
+    self.assertAlmostEqual(states[2].joint_angles[0], 1.5)
+
+  def test_ring_buffer(self) -> None:
+    history = arm_state_history.ArmStateHistory(capacity=3)
+    for seq in range(5):
+      history.add(_state(float(seq), 0.0, seq=seq))
+    self.assertEqual(len(history), 3)
+    self.assertEqual([s.sequence for s in history.states_between(0.0, 10.0)],
+                     [2, 3, 4])
+    self.assertEqual([s.sequence for s in history.states_between(2.5, 3.0)],
+                     [3])
+    self.assertIsNone(history.state_at(1.5))
+    # Going back in time, e.g. on a playback seek, restarts the history.
+    history.add(_state(0.5, 0.0, seq=9))
+    self.assertEqual([s.sequence for s in history.states_between(0.0, 10.0)],
+                     [9])
+    self.assertRaises(core.PyReachError, arm_state_history.ArmStateHistory, 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
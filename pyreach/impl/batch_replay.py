@@ -0,0 +1,452 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Headless, unpaced batch replay of a logs directory.
+
+LocalPlaybackHostFactory replays a logs directory through the full host stack,
+one DeviceData at a time, fanning each message out to the device threads. That
+is required to simulate a live session, but it is slow for offline evaluation
+and dataset extraction, where only the snapshots and the DeviceData they
+reference are needed.
+
+BatchReplay instead builds an index of the device-data directory in a single
+pass over the line headers, mapping each (ts, seq) to the file and byte offset
+of the logged line.
+Snapshot references are then resolved directly into DeviceData without starting
+a host, and episodes can be processed in parallel over a process pool with
+map_episodes().
+
+Example:
+
+  replay = batch_replay.BatchReplay("/path/to/logs", gym_run_id="run-1")
+  for episode in replay.episodes():
+    for step in episode.steps:
+      color = step.color_images.get(("realsense", ""))
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import logging
+import os
+from typing import (Any, BinaryIO, Callable, Dict, Iterator, List, Optional,
+                    Sequence, Tuple, TypeVar, cast)
+
+import numpy as np  # type: ignore
+
+from pyreach import core
+from pyreach.common.python import types_gen
+from pyreach.impl import logs_directory_client
+from pyreach.impl import playback_client
+from pyreach.impl import snapshot_impl
+from pyreach.impl import utils
+from pyreach.snapshot import Snapshot
+from pyreach.snapshot import SnapshotReference
+from pyreach.snapshot import SnapshotResponse
+
+T = TypeVar("T")
+
+# Key of a device-data message within a log: (timestamp in ms, sequence).
+_DataKey = Tuple[int, int]
+# Location of a device-data message within a log: (file index, byte offset).
+_DataLocation = Tuple[int, int]
+# Key of a camera device: (device_type, device_name).
+_CameraKey = Tuple[str, str]
+
+
+def _reference_key(reference: SnapshotReference) -> _DataKey:
+  """Convert a snapshot reference to an index key.
+
+  Args:
+    reference: the snapshot reference.
+
+  Returns:
+    The index key. The time is rounded, since the float time of a reference
+    does not always convert back to the exact millisecond timestamp.
+  """
+  return int(round(reference.time * 1000.0)), reference.sequence
+
+
+class DeviceDataIndex:
+  """Index from (ts, seq) to the location of a device-data log line.
+
+  The index is the playback_client.SeekIndex the logs directory client seeks
+  with, built from the line headers without parsing the lines that have no
+  nested objects. It is picklable, so it can be built once and shared with
+  worker processes.
+  """
+
+  _working_directory: str
+  _files: Tuple[str, ...]
+  _index: playback_client.SeekIndex
+
+  def __init__(self, working_directory: str) -> None:
+    """Build the index of a logs directory.
+
+    Args:
+      working_directory: the logs directory, containing device-data.
+    """
+    self._working_directory = os.path.abspath(working_directory)
+    device_data_directory = os.path.join(self._working_directory, "device-data")
+    self._index = playback_client.SeekIndex(
+        logs_directory_client.index_entries(device_data_directory))
+    files: List[str] = []
+    while True:
+      filename = os.path.join(device_data_directory, "%05d.json" % len(files))
+      if not os.path.isfile(filename):
+        break
+      files.append(filename)
+    self._files = tuple(files)
+
+  @property
+  def working_directory(self) -> str:
+    """Get the absolute path of the logs directory."""
+    return self._working_directory
+
+  @property
+  def files(self) -> Tuple[str, ...]:
+    """Get the device-data files, in order."""
+    return self._files
+
+  def __len__(self) -> int:
+    return len(self._index)
+
+  def get(self, ts: int, seq: int) -> Optional[_DataLocation]:
+    """Get the location of a device-data message.
+
+    Args:
+      ts: the timestamp of the message in milliseconds.
+      seq: the sequence number of the message.
+
+    Returns:
+      The (file index, byte offset) of the message, or None if not logged.
+    """
+    return cast(Optional[_DataLocation],
+                self._index.find(utils.time_at_timestamp(ts), seq, None))
+
+
+@dataclasses.dataclass(frozen=True)
+class ReplayStep:
+  """A single gym step, with all references resolved.
+
+  Attributes:
+    snapshot: the snapshot, with responses resolved to PyReachStatus where the
+      referenced device data was found.
+    device_data: the device data referenced by the snapshot, in reference
+      order. References that could not be resolved are skipped.
+    color_images: decoded color images, keyed by (device_type, device_name).
+      Only filled in if image decoding was requested.
+    depth_images: decoded depth images, keyed by (device_type, device_name).
+      Only filled in if image decoding was requested.
+  """
+  snapshot: Snapshot
+  device_data: Tuple[types_gen.DeviceData, ...]
+  color_images: Dict[_CameraKey, np.ndarray]
+  depth_images: Dict[_CameraKey, np.ndarray]
+
+  def get_device_data(self, device_type: str, device_name: str,
+                      data_type: str) -> Optional[types_gen.DeviceData]:
+    """Get the referenced device data for a device.
+
+    Args:
+      device_type: the device type.
+      device_name: the device name.
+      data_type: the data type.
+
+    Returns:
+      The last matching device data, or None if not referenced.
+    """
+    for data in reversed(self.device_data):
+      if (data.device_type == device_type and
+          data.device_name == device_name and data.data_type == data_type):
+        return data
+    return None
+
+
+@dataclasses.dataclass(frozen=True)
+class ReplayEpisode:
+  """A gym episode of a logs directory.
+
+  Attributes:
+    gym_run_id: the gym run ID.
+    gym_episode: the gym episode number.
+    steps: the steps of the episode, in log order.
+  """
+  gym_run_id: str
+  gym_episode: int
+  steps: Tuple[ReplayStep, ...]
+
+
+class BatchReplay:
+  """Replays snapshots and referenced device data of a logs directory."""
+
+  _index: DeviceDataIndex
+  _gym_run_id: Optional[str]
+  _client_id: Optional[str]
+  _decode_images: bool
+  _reader: logs_directory_client._DeviceDataReader
+  _files: Dict[int, BinaryIO]
+  _snapshots: Optional[List[Snapshot]]
+
+  def __init__(self,
+               working_directory: str,
+               gym_run_id: Optional[str] = None,
+               client_id: Optional[str] = None,
+               decode_images: bool = False,
+               index: Optional[DeviceDataIndex] = None) -> None:
+    """Open a logs directory for batch replay.
+
+    Args:
+      working_directory: the logs directory.
+      gym_run_id: if specified, only replay snapshots of the gym run.
+      client_id: if specified, only replay snapshots sent by the client.
+      decode_images: if True, decode the color and depth images of each step.
+      index: optional prebuilt index of the logs directory.
+    """
+    if index is None:
+      index = DeviceDataIndex(working_directory)
+    self._index = index
+    self._gym_run_id = gym_run_id
+    self._client_id = client_id
+    self._decode_images = decode_images
+    self._reader = logs_directory_client._DeviceDataReader(
+        os.path.join(index.working_directory, "device-data"),
+        index.working_directory)
+    self._files = {}
+    self._snapshots = None
+
+  @property
+  def index(self) -> DeviceDataIndex:
+    """Get the device-data index."""
+    return self._index
+
+  def __enter__(self) -> "BatchReplay":
+    return self
+
+  def __exit__(self, typ: Any, value: Any, traceback: Any) -> None:
+    self.close()
+
+  def close(self) -> None:
+    """Close all open files."""
+    for f in self._files.values():
+      f.close()
+    self._files = {}
+
+  def snapshots(self) -> List[Snapshot]:
+    """Get all matching snapshots, in log order.
+
+    Returns:
+      The snapshots. The command-data directory is only read once.
+    """
+    if self._snapshots is None:
+      reader = logs_directory_client._CommandDataReader(
+          os.path.join(self._index.working_directory, "command-data"))
+      snapshots: List[Snapshot] = []
+      try:
+        reader.start()
+        while reader.valid():
+          step = reader.value()
+          assert step
+          cmd = step[0]
+          if (cmd.snapshot and
+              (self._client_id is None or not cmd.origin_client or
+               cmd.origin_client == self._client_id) and
+              (self._gym_run_id is None or
+               cmd.snapshot.gym_run_id == self._gym_run_id)):
+            snap = snapshot_impl.reverse_snapshot(cmd.snapshot)
+            if snap:
+              snapshots.append(snap)
+          reader.step()
+      finally:
+        reader.close()
+      self._snapshots = snapshots
+    return self._snapshots
+
+  def episode_keys(self) -> List[Tuple[str, int]]:
+    """Get the (gym_run_id, gym_episode) of each episode, in log order."""
+    keys: Dict[Tuple[str, int], None] = collections.OrderedDict()
+    for snap in self.snapshots():
+      keys[(snap.gym_run_id, snap.gym_episode)] = None
+    return list(keys)
+
+  def episodes(
+      self,
+      episode_keys: Optional[Sequence[Tuple[str, int]]] = None
+  ) -> Iterator[ReplayEpisode]:
+    """Iterate over episodes, resolving every step.
+
+    Args:
+      episode_keys: if specified, only replay the given (gym_run_id,
+        gym_episode) keys, in the given order.
+
+    Yields:
+      The replayed episodes.
+    """
+    grouped: Dict[Tuple[str, int],
+                  List[Snapshot]] = collections.OrderedDict()
+    for snap in self.snapshots():
+      grouped.setdefault((snap.gym_run_id, snap.gym_episode), []).append(snap)
+    keys = list(grouped) if episode_keys is None else list(episode_keys)
+    for key in keys:
+      yield ReplayEpisode(
+          gym_run_id=key[0],
+          gym_episode=key[1],
+          steps=tuple(self.replay_snapshot(snap) for snap in grouped.get(key, [])))
+
+  def get_device_data(
+      self, reference: SnapshotReference) -> Optional[types_gen.DeviceData]:
+    """Load the device data for a snapshot reference.
+
+    Args:
+      reference: the reference to resolve.
+
+    Returns:
+      The device data, with image paths rewritten, or None if not logged.
+    """
+    key = _reference_key(reference)
+    location = self._index.get(key[0], key[1])
+    if location is None:
+      return None
+    f = self._files.get(location[0])
+    if f is None:
+      f = open(self._index.files[location[0]], "rb")
+      self._files[location[0]] = f
+    f.seek(location[1])
+    data = self._reader.transform(f.readline().decode("utf-8"))
+    return data[0] if data else None
+
+  def replay_snapshot(self, snapshot: Snapshot) -> ReplayStep:
+    """Resolve all device data references of a snapshot.
+
+    Args:
+      snapshot: the snapshot to resolve.
+
+    Returns:
+      The replayed step.
+    """
+    device_data: List[types_gen.DeviceData] = []
+    for reference in snapshot.device_data_refs:
+      data = self.get_device_data(reference)
+      if data is None:
+        logging.warning("DeviceData missing for snapshot reference: %s",
+                        str(reference))
+        continue
+      device_data.append(data)
+    responses: List[SnapshotResponse] = []
+    for response in snapshot.responses:
+      if isinstance(response.reference, SnapshotReference):
+        data = self.get_device_data(response.reference)
+        if data is None or data.status is None:
+          logging.warning("DeviceData missing for snapshot response: %s",
+                          str(response))
+          continue
+        response = dataclasses.replace(
+            response, reference=utils.pyreach_status_from_message(data))
+      responses.append(response)
+    color_images: Dict[_CameraKey, np.ndarray] = {}
+    depth_images: Dict[_CameraKey, np.ndarray] = {}
+    if self._decode_images:
+      for data in device_data:
+        camera_key = (data.device_type, data.device_name)
+        try:
+          if data.color:
+            color_images[camera_key] = utils.load_color_image_from_data(data)
+          if data.depth:
+            depth_images[camera_key] = utils.load_depth_image_from_data(data)
+        except FileNotFoundError:
+          logging.warning("Image missing for snapshot reference: %s %d %d",
+                          str(camera_key), data.ts, data.seq)
+    return ReplayStep(
+        snapshot=dataclasses.replace(snapshot, responses=tuple(responses)),
+        device_data=tuple(device_data),
+        color_images=color_images,
+        depth_images=depth_images)
+
+
+# Per-process state for map_episodes() workers.
+_worker_replay: Optional[BatchReplay] = None
+
+
+def _init_worker(index: DeviceDataIndex, gym_run_id: Optional[str],
+                 client_id: Optional[str], decode_images: bool) -> None:
+  global _worker_replay
+  _worker_replay = BatchReplay(
+      index.working_directory,
+      gym_run_id=gym_run_id,
+      client_id=client_id,
+      decode_images=decode_images,
+      index=index)
+
+
+def _run_worker(fn: Callable[[ReplayEpisode], T],
+                episode_keys: List[Tuple[str, int]]) -> List[T]:
+  assert _worker_replay is not None
+  return [fn(episode) for episode in _worker_replay.episodes(episode_keys)]
+
+
+def map_episodes(fn: Callable[[ReplayEpisode], T],
+                 working_directory: str,
+                 gym_run_id: Optional[str] = None,
+                 client_id: Optional[str] = None,
+                 decode_images: bool = False,
+                 processes: Optional[int] = None,
+                 chunk_size: int = 1) -> List[T]:
+  """Apply a function to every episode of a logs directory.
+
+  Args:
+    fn: the function to apply. If processes is not 1, it must be picklable
+      (e.g. a module level function).
+    working_directory: the logs directory.
+    gym_run_id: if specified, only replay episodes of the gym run.
+    client_id: if specified, only replay snapshots sent by the client.
+    decode_images: if True, decode the color and depth images of each step.
+    processes: the number of worker processes. If 1, the episodes are replayed
+      in the calling process. If None, uses os.cpu_count().
+    chunk_size: the number of episodes sent to a worker at a time.
+
+  Raises:
+    PyReachError: if the arguments are invalid.
+
+  Returns:
+    The results of fn, in episode order.
+  """
+  if chunk_size <= 0:
+    raise core.PyReachError("chunk_size must be greater than zero")
+  if processes is not None and processes <= 0:
+    raise core.PyReachError("processes must be greater than zero")
+  replay = BatchReplay(
+      working_directory,
+      gym_run_id=gym_run_id,
+      client_id=client_id,
+      decode_images=decode_images)
+  try:
+    episode_keys = replay.episode_keys()
+    if processes == 1 or len(episode_keys) <= 1:
+      return [fn(episode) for episode in replay.episodes(episode_keys)]
+    chunks = [
+        episode_keys[i:i + chunk_size]
+        for i in range(0, len(episode_keys), chunk_size)
+    ]
+    results: List[T] = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(replay.index, gym_run_id, client_id,
+                  decode_images)) as executor:
+      for chunk_results in executor.map(_run_worker, [fn] * len(chunks),
+                                        chunks):
+        results.extend(chunk_results)
+    return results
+  finally:
+    replay.close()
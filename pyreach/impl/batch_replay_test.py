@@ -0,0 +1,165 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for batch_replay."""
+
+import json
+import os
+import tempfile
+from typing import List, Tuple
+import unittest
+
+import numpy as np
+from PIL import Image  # type: ignore
+
+from pyreach import core
+from pyreach.common.python import types_gen
+from pyreach.impl import batch_replay
+from pyreach.snapshot import SnapshotReference
+
+
+def _count_steps(episode: batch_replay.ReplayEpisode) -> Tuple[int, int]:
+  return episode.gym_episode, len(episode.steps)
+
+
+class BatchReplayTest(unittest.TestCase):
+
+  def _write_log(self, tempdir: str) -> None:
+    os.mkdir(os.path.join(tempdir, "device-data"))
+    os.mkdir(os.path.join(tempdir, "command-data"))
+    os.mkdir(os.path.join(tempdir, "color-camera"))
+    image = np.zeros((4, 6, 3), dtype=np.uint8)
+    image[1, 2] = (255, 128, 0)
+    Image.fromarray(image).save(
+        os.path.join(tempdir, "color-camera", "color-1001.png"))
+    device_data = [
+        types_gen.DeviceData(
+            device_type="robot", data_type="robot-state", ts=1000, seq=1),
+        types_gen.DeviceData(
+            device_type="color-camera",
+            data_type="color",
+            ts=1001,
+            seq=2,
+            color="/remote/color-camera/color-1001.png"),
+        types_gen.DeviceData(
+            device_type="robot",
+            data_type="cmd-status",
+            ts=1002,
+            seq=3,
+            tag="tag-1",
+            status="done"),
+        types_gen.DeviceData(
+            device_type="robot", data_type="robot-state", ts=2000, seq=4),
+    ]
+    with open(os.path.join(tempdir, "device-data", "00000.json"), "w") as f:
+      for data in device_data[:2]:
+        f.write(json.dumps(data.to_json()) + "\n")
+    with open(os.path.join(tempdir, "device-data", "00001.json"), "w") as f:
+      f.write("not json\n")
+      for data in device_data[2:]:
+        f.write(json.dumps(data.to_json()) + "\n")
+
+    def snapshot(episode: int, step: int, refs: List[Tuple[int, int]],
+                 responses: List[Tuple[int, int]],
+                 run: str = "run-1") -> types_gen.CommandData:
+      return types_gen.CommandData(
+          ts=1000 + episode * 10 + step,
+          device_type="client-annotation",
+          data_type="snapshot",
+          origin_client="client-1",
+          snapshot=types_gen.Snapshot(
+              gym_run_id=run,
+              gym_episode=episode,
+              gym_step=step,
+              device_data_refs=[
+                  types_gen.DeviceDataRef(ts=ts, seq=seq) for ts, seq in refs
+              ],
+              responses=[
+                  types_gen.SnapshotResponse(
+                      cid=1,
+                      gym_element_type="arm",
+                      gym_config_name="arm",
+                      device_data_ref=types_gen.DeviceDataRef(ts=ts, seq=seq))
+                  for ts, seq in responses
+              ]))
+
+    cmd_data = [
+        snapshot(1, 0, [(1000, 1), (1001, 2)], []),
+        snapshot(1, 1, [(2000, 4), (9999, 9)], [(1002, 3)]),
+        snapshot(2, 0, [(2000, 4)], []),
+        snapshot(1, 0, [(1000, 1)], [], run="run-2"),
+    ]
+    with open(os.path.join(tempdir, "command-data", "00000.json"), "w") as f:
+      for cmd in cmd_data:
+        f.write(json.dumps(cmd.to_json()) + "\n")
+
+  def test_index(self) -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+      self._write_log(tempdir)
+      index = batch_replay.DeviceDataIndex(tempdir)
+      self.assertEqual(len(index), 4)
+      self.assertEqual(index.get(1000, 1), (0, 0))
+      self.assertEqual(index.get(1002, 3), (1, len("not json\n")))
+      self.assertIsNone(index.get(1002, 4))
+
+  def test_episodes(self) -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+      self._write_log(tempdir)
+      with batch_replay.BatchReplay(
+          tempdir, gym_run_id="run-1", decode_images=True) as replay:
+        self.assertEqual(replay.episode_keys(), [("run-1", 1), ("run-1", 2)])
+        episodes = list(replay.episodes())
+        self.assertEqual(len(episodes), 2)
+        self.assertEqual([len(e.steps) for e in episodes], [2, 1])
+        step = episodes[0].steps[0]
+        self.assertEqual([d.seq for d in step.device_data], [1, 2])
+        color = step.get_device_data("color-camera", "", "color")
+        assert color
+        self.assertEqual(
+            color.color,
+            os.path.join(tempdir, "color-camera", "color-1001.png"))
+        self.assertEqual(step.color_images[("color-camera", "")].shape,
+                         (4, 6, 3))
+        self.assertEqual(
+            tuple(step.color_images[("color-camera", "")][1, 2]),
+            (255, 128, 0))
+        step = episodes[0].steps[1]
+        self.assertEqual([d.seq for d in step.device_data], [4])
+        self.assertEqual(len(step.snapshot.responses), 1)
+        status = step.snapshot.responses[0].reference
+        assert isinstance(status, core.PyReachStatus)
+        self.assertEqual(status.status, "done")
+        self.assertEqual(status.sequence, 3)
+        self.assertIsNone(
+            replay.get_device_data(SnapshotReference(time=1.5, sequence=1)))
+        self.assertEqual(
+            [e.gym_episode for e in replay.episodes([("run-1", 2)])], [2])
+
+  def test_map_episodes(self) -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+      self._write_log(tempdir)
+      for processes in (1, 2):
+        self.assertEqual(
+            batch_replay.map_episodes(
+                _count_steps, tempdir, processes=processes),
+            [(1, 2), (2, 1), (1, 1)])
+      self.assertEqual(
+          batch_replay.map_episodes(
+              _count_steps, tempdir, gym_run_id="run-2", processes=2), [(1, 1)])
+      self.assertRaises(core.PyReachError, batch_replay.map_episodes,
+                        _count_steps, tempdir, processes=0)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -12,12 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Calibration implementation."""
+import dataclasses
+import functools
 import json
 import logging
 import threading
 from typing import List, Optional, Set, Tuple, Dict, Any
 
+import numpy as np
+
 from pyreach import calibration
+from pyreach.common.base import transform_util
 from pyreach.impl import device_base
 
 
@@ -27,11 +32,13 @@ class CalDevice(device_base.DeviceBase):
   _calibration: Optional[calibration.Calibration]
   _calibration_loaded: threading.Event
   _calibration_lock: threading.Lock
+  _calibration_value: Optional[str]
 
   def __init__(self) -> None:
     """Construct a calibration device."""
     super().__init__()
     self._calibration = None
+    self._calibration_value = None
     self._calibration_lock = threading.Lock()
     self._calibration_loaded = threading.Event()
 
@@ -77,7 +84,11 @@ class CalDevice(device_base.DeviceBase):
       return None
     if key.key != "calibration.json":
       return None
-    self._on_calibration_value(value)
+    # The same calibration is often received more than once, e.g. when it was
+    # loaded from the key-value cache.
+    if value != self._calibration_value:
+      self._calibration_value = value
+      self._on_calibration_value(value)
     self._calibration_loaded.set()
 
   def _on_calibration_value(self, value: str) -> None:
@@ -479,6 +490,13 @@ class CalibrationImpl(calibration.Calibration):
       devices: A list of calibration devices.
     """
     self._devices = tuple(devices)
+    # The first device of each type/name pair.
+    devices_by_key: Dict[Tuple[str, str],
+                         calibration.CalibrationDevice] = {}
+    for device in self._devices:
+      devices_by_key.setdefault((device.device_type, device.device_name),
+                                device)
+    self._devices_by_key = devices_by_key
 
   def get_device(self, device_type: str,
                  device_name: str) -> Optional[calibration.CalibrationDevice]:
@@ -492,11 +510,7 @@ class CalibrationImpl(calibration.Calibration):
       The device on success and None otherwise
 
     """
-    for device in self._devices:
-      if (device.device_type == device_type and
-          device.device_name == device_name):
-        return device
-    return None
+    return self._devices_by_key.get((device_type, device_name))
 
   def get_all_devices(self) -> Tuple[calibration.CalibrationDevice, ...]:
     """Get all devices in the calibration.
@@ -505,3 +519,62 @@ class CalibrationImpl(calibration.Calibration):
       The a tuple of all devices in the calibration.
     """
     return self._devices
+
+
+@dataclasses.dataclass(frozen=True)
+class CameraMatrices:
+  """The calibration of a camera as read-only numpy arrays.
+
+  Attributes:
+    intrinsics: the 3x3 intrinsics matrix.
+    distortion: the distortion, [k1, k2, p1, p2, k3].
+    distortion_depth: the depth distortion, if any.
+    extrinsics: the 6-DOF extrinsics pose.
+    inverse_extrinsics: the inverse of the extrinsics pose.
+  """
+  intrinsics: np.ndarray
+  distortion: np.ndarray
+  distortion_depth: Optional[np.ndarray]
+  extrinsics: np.ndarray
+  inverse_extrinsics: np.ndarray
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+  array.flags.writeable = False
+  return array
+
+
+def _camera_matrices(camera: calibration.CalibrationCamera) -> CameraMatrices:
+  extrinsics = np.array(camera.extrinsics, dtype=np.float64)
+  return CameraMatrices(
+      intrinsics=_read_only(
+          transform_util.intrinsics_to_matrix(list(camera.intrinsics))),
+      distortion=_read_only(np.array(camera.distortion, dtype=np.float64)),
+      distortion_depth=(None if camera.distortion_depth is None else
+                        _read_only(
+                            np.array(camera.distortion_depth,
+                                     dtype=np.float64))),
+      extrinsics=_read_only(extrinsics),
+      inverse_extrinsics=_read_only(transform_util.inverse_pose(extrinsics)))
+
+
+_cached_camera_matrices = functools.lru_cache(maxsize=64)(_camera_matrices)
+
+
+def camera_matrices(camera: calibration.CalibrationCamera) -> CameraMatrices:
+  """Return the numpy forms of a camera calibration.
+
+  They are computed once per distinct calibration: the frames of a camera
+  share equal calibrations.
+
+  Args:
+    camera: the camera calibration.
+
+  Returns:
+    The read-only arrays of the calibration.
+  """
+  try:
+    return _cached_camera_matrices(camera)
+  except TypeError:
+    # The calibration is not hashable, e.g. it was built with lists.
+    return _camera_matrices(camera)
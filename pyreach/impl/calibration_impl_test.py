@@ -17,7 +17,10 @@
 from typing import Optional
 import unittest
 
+import numpy as np
+
 from pyreach import calibration
+from pyreach.common.base import transform_util
 from pyreach.impl import calibration_impl as cal
 from pyreach.impl import device_base
 from pyreach.impl import test_data
@@ -38,6 +41,28 @@ class TestActionsImpl(unittest.TestCase):
     self.assertIsNotNone(cal_object.get_device("uvc", ""))
     self.assertIsNotNone(cal_object.get_device("ur", ""))
     self.assertIsNotNone(cal_object.get_device("object", "bodyTag"))
+    self.assertIsNone(cal_object.get_device("object", "missing"))
+    calibration_device.close()
+
+  def test_camera_matrices(self) -> None:
+    calibration_device = cal.CalDevice()
+    key = device_base.KeyValueKey(
+        device_type="settings-engine", device_name="", key="calibration.json")
+    calibration_device.on_set_key_value(key, test_data.get_calibration_json())
+    cal_object = calibration_device.get()
+    assert cal_object is not None
+    camera = cal_object.get_device("photoneo", "")
+    assert isinstance(camera, calibration.CalibrationCamera)
+    matrices = cal.camera_matrices(camera)
+    self.assertIs(cal.camera_matrices(camera), matrices)
+    self.assertEqual(matrices.intrinsics.shape, (3, 3))
+    self.assertEqual(matrices.intrinsics[0, 0], camera.intrinsics[0])
+    self.assertEqual(matrices.intrinsics[1, 2], camera.intrinsics[3])
+    self.assertEqual(list(matrices.distortion), list(camera.distortion))
+    self.assertFalse(matrices.intrinsics.flags.writeable)
+    identity = transform_util.multiply_pose(matrices.extrinsics,
+                                            matrices.inverse_extrinsics)
+    np.testing.assert_allclose(identity, np.zeros(6), atol=1e-9)
     calibration_device.close()
 
 
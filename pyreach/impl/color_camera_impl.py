@@ -13,7 +13,8 @@
 # limitations under the License.
 """Implementation of the PyReach ColorCamera interface."""
 import logging
-from typing import Callable, Optional, Tuple
+import queue  # pylint: disable=unused-import
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
 
@@ -206,26 +207,74 @@ class ColorCameraImpl(color_camera.ColorCamera):
     Returns:
       Newly fetched image.
     """
-    if not self.supports_tagged_request():
-      q = self._device.request_untagged(
+    tagged = self.supports_tagged_request()
+    q = self._request_image(tagged, timeout)
+    return self._image_from_messages(tagged,
+                                     thread_util.extract_all_from_queue(q))
+
+  def request_image(
+      self, timeout: float,
+      callback: Callable[[Optional[color_camera.ColorFrame]], None]
+  ) -> Callable[[], None]:
+    """Request an image without waiting for it.
+
+    Args:
+      timeout: The amount of time to wait for a camera frame.
+      callback: Called with the image, or None if the request failed. It is
+        called by the device thread with the device lock held, so it must not
+        block.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    tagged = self.supports_tagged_request()
+    q = self._request_image(tagged, timeout)
+    return self._device.queue_to_done_callback(
+        q, lambda msgs: callback(self._image_from_messages(tagged, msgs)))
+
+  def _request_image(
+      self, tagged: bool, timeout: float
+  ) -> "queue.Queue[Optional[Tuple[types_gen.DeviceData, Optional[color_camera.ColorFrame]]]]":  # pylint: disable=line-too-long
+    """Send an image request.
+
+    Args:
+      tagged: True to send a tagged request.
+      timeout: The amount of time to wait for a camera frame.
+
+    Returns:
+      The queue of the request messages.
+    """
+    if not tagged:
+      return self._device.request_untagged(
           self._device.device_type,
           self._device.device_name,
           data_type="color",
           timeout=timeout)
-      msgs = thread_util.extract_all_from_queue(q)
-      if not msgs:
-        return None
-      if len(msgs) != 1:
-        logging.warning("expected a single message: %s", msgs)
-      return msgs[0][1]
-    q = self._device.request_tagged(
+    return self._device.request_tagged(
         self._device.device_type,
         self._device.device_name,
         timeout=timeout,
         expect_messages=1)
-    msgs = thread_util.extract_all_from_queue(q)
+
+  def _image_from_messages(
+      self, tagged: bool,
+      msgs: List[Tuple[types_gen.DeviceData, Optional[color_camera.ColorFrame]]]
+  ) -> Optional[color_camera.ColorFrame]:
+    """Return the image from the messages of an image request.
+
+    Args:
+      tagged: True if the request was tagged.
+      msgs: The messages of the request.
+
+    Returns:
+      The image, or None if the request failed.
+    """
     if not msgs:
       return None
+    if not tagged:
+      if len(msgs) != 1:
+        logging.warning("expected a single message: %s", msgs)
+      return msgs[0][1]
     if (len(msgs) == 1 and msgs[0][0].data_type == "cmd-status" and
         (msgs[0][0].status in {"rejected", "aborted"} or msgs[0][0].error)):
       return None
@@ -247,19 +296,7 @@ class ColorCameraImpl(color_camera.ColorCamera):
       error_callback: optional callback called if there is an error.
       timeout: timeout for the process, defaults to 30 seconds.
     """
-    if not self.supports_tagged_request():
-      q = self._device.request_untagged(
-          self._device.device_type,
-          self._device.device_name,
-          data_type="color",
-          timeout=timeout)
-    else:
-      q = self._device.request_tagged(
-          self._device.device_type,
-          self._device.device_name,
-          timeout=timeout,
-          expect_messages=1)
-
+    q = self._request_image(self.supports_tagged_request(), timeout)
     self._device.queue_to_error_callback(q, callback, error_callback)
 
   @property
@@ -17,17 +17,20 @@ import json
 import logging  # type: ignore
 import math
 import threading
-from typing import Any, Dict, List, Optional, Set, Sequence, Tuple, Union
+from typing import (Any, Dict, List, Optional, Set, Sequence, Tuple,
+                    TYPE_CHECKING, Union)
 
 import numpy as np
-from scipy.spatial import transform  # type: ignore
-import shapely.geometry  # type: ignore
 
 from pyreach import constraints
 from pyreach import core
 from pyreach.common.base import transform_util
 from pyreach.impl import device_base
 
+if TYPE_CHECKING:
+  # shapely is imported on first use, it is slow to import.
+  import shapely.geometry  # type: ignore
+
 
 class ConstraintDevice:
   """A container for the device name and type."""
@@ -77,6 +80,8 @@ class BoxImpl(constraints.Box):
 
   def get_vertices(self) -> List[np.ndarray]:
     """Return the vertices of the box."""
+    # pylint: disable=g-import-not-at-top
+    from scipy.spatial import transform  # type: ignore
     self._vertices = []
     self._vertices.append(
         np.array([-self.scale.x / 2, -self.scale.y / 2, -self.scale.z / 2],
@@ -586,7 +591,8 @@ class ConstraintsImpl(constraints.Constraints):
   """A set of constraints returned by the robot."""
 
   _devices: List[ConstraintDevice]
-  _bins: Dict[str, shapely.geometry.Polygon]
+  _devices_by_key: Dict[Tuple[str, str], Tuple[ConstraintDevice, ...]]
+  _bins: Dict[str, "shapely.geometry.Polygon"]
 
   def __init__(self, devices: List[ConstraintDevice]):
     """Init a Constraints.
@@ -595,6 +601,13 @@ class ConstraintsImpl(constraints.Constraints):
       devices: A list of devices.
     """
     self._devices = devices
+    devices_by_key: Dict[Tuple[str, str], List[ConstraintDevice]] = {}
+    for device in devices:
+      devices_by_key.setdefault((device.device_type, device.device_name),
+                                []).append(device)
+    self._devices_by_key = {
+        key: tuple(value) for key, value in devices_by_key.items()
+    }
     self._bins = {}
     for name, bin_name in [("LeftBin", "left"), ("RightBin", "right")]:
       self._bins[bin_name] = self._construct_bin(name)
@@ -617,13 +630,13 @@ class ConstraintsImpl(constraints.Constraints):
       The device is returned if successfully found and None otherwise.
 
     """
-    return tuple([
-        device for device in self._devices if
-        device.device_type == device_type and device.device_name == device_name
-    ])
+    return self._devices_by_key.get((device_type, device_name), ())
 
   def _construct_bin(self,
-                     device_name: str) -> Optional[shapely.geometry.Polygon]:
+                     device_name: str) -> Optional["shapely.geometry.Polygon"]:
+    # pylint: disable=g-import-not-at-top
+    from scipy.spatial import transform  # type: ignore
+    import shapely.geometry  # type: ignore
     object_constraints = self._get_devices("object", device_name)
     if not object_constraints:
       logging.warning(
@@ -686,6 +699,8 @@ class ConstraintsImpl(constraints.Constraints):
       True if the point is inside the object.
 
     """
+    # pylint: disable=g-import-not-at-top
+    import shapely.geometry  # type: ignore
     if device_name not in self._bins:
       return False
     pt = shapely.geometry.Point(point[0], point[1])
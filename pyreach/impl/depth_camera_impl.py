@@ -15,7 +15,7 @@
 
 import dataclasses
 import logging  # type: ignore
-from typing import Callable, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
 
@@ -24,6 +24,7 @@ from pyreach import depth_camera
 from pyreach.calibration import CalibrationCamera
 from pyreach.common.base import transform_util
 from pyreach.common.python import types_gen
+from pyreach.impl import calibration_impl
 from pyreach.impl import requester
 from pyreach.impl import thread_util
 from pyreach.impl import utils
@@ -54,16 +55,14 @@ class DepthFrameImpl(depth_camera.DepthFrame):
     if self.calibration is None:
       return None
 
-    intrinsics = transform_util.intrinsics_to_matrix(
-        list(self.calibration.intrinsics))
-    distortion = np.array(self.calibration.distortion, np.float64)
-    distortion_depth = np.array(self.calibration.distortion_depth, np.float64)
+    matrices = calibration_impl.camera_matrices(self.calibration)
+    intrinsics = matrices.intrinsics
+    distortion = matrices.distortion
+    distortion_depth = matrices.distortion_depth
     camera_transform = self.pose()
     if not camera_transform:
       return None
-    pose = transform_util.inverse_pose(
-        np.array(camera_transform.as_list(), dtype=float))
-    inv_pose = transform_util.inverse_pose(pose)
+    inv_pose = np.array(camera_transform.as_list(), dtype=float)
 
     ray = transform_util.unproject(
         np.array([x, y], dtype=np.float64), 1, intrinsics, distortion)
@@ -254,7 +253,43 @@ class DepthCameraImpl(depth_camera.DepthCamera):
         self._device.device_name(),
         timeout=timeout,
         expect_messages=1)
-    msgs = thread_util.extract_all_from_queue(q)
+    return self._image_from_messages(thread_util.extract_all_from_queue(q))
+
+  def request_image(
+      self, timeout: float,
+      callback: Callable[[Optional[depth_camera.DepthFrame]], None]
+  ) -> Callable[[], None]:
+    """Request an image without waiting for it.
+
+    Args:
+      timeout: The number of seconds to wait before timing out.
+      callback: Called with the image, or None if the request failed. It is
+        called by the device thread with the device lock held, so it must not
+        block.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    q = self._device.request_tagged(
+        self._device.device_type(),
+        self._device.device_name(),
+        timeout=timeout,
+        expect_messages=1)
+    return self._device.queue_to_done_callback(
+        q, lambda msgs: callback(self._image_from_messages(msgs)))
+
+  def _image_from_messages(
+      self, msgs: List[Tuple[types_gen.DeviceData,
+                             Optional[depth_camera.DepthFrame]]]
+  ) -> Optional[depth_camera.DepthFrame]:
+    """Return the image from the messages of an image request.
+
+    Args:
+      msgs: The messages of the request.
+
+    Returns:
+      The image, or None if the request failed.
+    """
     if not msgs:
       return None
     if (len(msgs) == 1 and msgs[0][0].data_type == "cmd-status" and
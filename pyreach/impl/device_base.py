@@ -24,11 +24,14 @@ messages.
 import dataclasses
 import queue
 import threading
+import time
 from typing import Any, Callable, Dict, Optional, Set, Tuple
 
 from pyreach import core
 from pyreach.common.python import types_gen
 from pyreach.impl import machine_interfaces
+from pyreach.impl import message_trace
+from pyreach.impl import stream_scheduler
 from pyreach.impl import thread_util
 
 
@@ -62,6 +65,7 @@ class DeviceBase:
   _send_cmd: Tuple[Optional[Callable[[types_gen.CommandData], None]]]
   _queue: "queue.Queue[Optional[types_gen.DeviceData]]"
   _closed: bool
+  _stream_scheduler: Optional[stream_scheduler.StreamScheduler]
 
   def __init__(self) -> None:
     """Construct a Device instance.
@@ -72,6 +76,7 @@ class DeviceBase:
     self._key_values = {}
     self._key_value_lock = threading.Lock()
     self._send_cmd = (None,)
+    self._stream_scheduler = None
     self._closed = False
     self._queue = queue.Queue()
     self._thread_collection = thread_util.ThreadCollection("Device")
@@ -85,7 +90,13 @@ class DeviceBase:
         if msg is None:
           active = False
         else:
-          self.sync_device_data(msg)
+          tracer = message_trace.get_tracer()
+          if tracer is None:
+            self.sync_device_data(msg)
+          else:
+            dequeue_time = time.time()
+            self.sync_device_data(msg)
+            tracer.on_device_data(msg, dequeue_time)
       finally:
         self._queue.task_done()
 
@@ -216,6 +227,20 @@ class DeviceBase:
     """
     self._send_cmd = (cmd,)
 
+  def set_stream_scheduler(
+      self, scheduler: Optional[stream_scheduler.StreamScheduler]) -> None:
+    """Set the host scheduler of periodic frame requests.
+
+    Args:
+      scheduler: The scheduler, or None to poll in the device threads.
+    """
+    self._stream_scheduler = scheduler
+
+  @property
+  def stream_scheduler(self) -> Optional[stream_scheduler.StreamScheduler]:
+    """The host scheduler of periodic frame requests, if set."""
+    return self._stream_scheduler
+
   def send_cmd(self, msg: types_gen.CommandData) -> None:
     """Send CommandData to the host.
 
@@ -0,0 +1,236 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Columnar history of force torque samples."""
+
+import threading
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pyreach import core
+from pyreach.force_torque_sensor import ForceTorqueSensorState
+from pyreach.force_torque_sensor import ForceTorqueWindowStats
+
+# Threshold callback type: the callback, the finished callback.
+_ThresholdCallback = Tuple[Callable[[ForceTorqueSensorState], bool],
+                           Callable[[], None]]
+
+
+class ForceTorqueBuffer:
+  """A bounded ring buffer of force torque samples.
+
+  Samples are stored in columns: an (N,) float64 array of times and an
+  (N, 6) float32 array of (fx, fy, fz, tx, ty, tz) values. Threshold
+  callbacks are evaluated together for each new sample, and only called when
+  the force or torque magnitude rises above their threshold.
+  """
+
+  _lock: threading.Lock
+  _capacity: int
+  _start: int
+  _count: int
+  _times: np.ndarray
+  _values: np.ndarray
+  _threshold_lock: threading.Lock
+  _threshold_callbacks: List[_ThresholdCallback]
+  _thresholds: np.ndarray
+  _threshold_columns: np.ndarray
+  _above: np.ndarray
+  _closed: bool
+
+  def __init__(self, capacity: int = 8192) -> None:
+    """Init a ForceTorqueBuffer.
+
+    Args:
+      capacity: the maximum number of samples kept.
+
+    Raises:
+      PyReachError: if the capacity is not positive.
+    """
+    if capacity <= 0:
+      raise core.PyReachError("Force torque buffer capacity must be positive")
+    self._lock = threading.Lock()
+    self._capacity = capacity
+    self._start = 0
+    self._count = 0
+    self._times = np.zeros(capacity, dtype=np.float64)
+    self._values = np.zeros((capacity, 6), dtype=np.float32)
+    self._threshold_lock = threading.Lock()
+    self._threshold_callbacks = []
+    self._thresholds = np.zeros(0, dtype=np.float64)
+    self._threshold_columns = np.zeros(0, dtype=np.int64)
+    self._above = np.zeros(0, dtype=bool)
+    self._closed = False
+
+  @property
+  def capacity(self) -> int:
+    """The maximum number of samples kept."""
+    return self._capacity
+
+  def __len__(self) -> int:
+    """Return the number of samples kept."""
+    return self._count
+
+  def append(self, t: float, values: Sequence[float]) -> None:
+    """Append a sample, evicting the oldest sample if full.
+
+    If the sample is older than the newest sample (e.g. after a seek in
+    playback), the buffer is cleared first.
+
+    Args:
+      t: the time of the sample.
+      values: the (fx, fy, fz, tx, ty, tz) values.
+    """
+    with self._lock:
+      if self._count > 0:
+        last = (self._start + self._count - 1) % self._capacity
+        if t < self._times[last]:
+          self._start = 0
+          self._count = 0
+      if self._count < self._capacity:
+        index = (self._start + self._count) % self._capacity
+        self._count += 1
+      else:
+        index = self._start
+        self._start = (self._start + 1) % self._capacity
+      self._times[index] = t
+      self._values[index] = values
+
+  def window(self, duration: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the samples of the latest time window.
+
+    Args:
+      duration: the duration of the window in seconds, ending at the newest
+        sample.
+
+    Returns:
+      Copies of the (N,) times and the (N, 6) values, ordered by time.
+    """
+    with self._lock:
+      if self._count == 0:
+        return (np.zeros(0, dtype=np.float64), np.zeros((0, 6),
+                                                        dtype=np.float32))
+      order = (self._start + np.arange(self._count)) % self._capacity
+      times = self._times[order]
+      first = np.searchsorted(times, times[-1] - duration, side="left")
+      return times[first:], self._values[order[first:]]
+
+  def stats(self, duration: float) -> Optional[ForceTorqueWindowStats]:
+    """Return statistics of the samples of the latest time window.
+
+    Args:
+      duration: the duration of the window in seconds, ending at the newest
+        sample.
+
+    Returns:
+      The statistics, or None if there are no samples.
+    """
+    times, values = self.window(duration)
+    if times.shape[0] == 0:
+      return None
+    values64 = values.astype(np.float64)
+    derivative = np.zeros(6, dtype=np.float64)
+    if times.shape[0] > 1:
+      # Least-squares slope of each column.
+      dt = times - times.mean()
+      denominator = np.dot(dt, dt)
+      if denominator > 0:
+        derivative = np.dot(dt, values64 - values64.mean(axis=0)) / denominator
+    return ForceTorqueWindowStats(
+        start_time=float(times[0]),
+        end_time=float(times[-1]),
+        count=int(times.shape[0]),
+        mean=tuple(values64.mean(axis=0).tolist()),
+        min=tuple(values64.min(axis=0).tolist()),
+        max=tuple(values64.max(axis=0).tolist()),
+        derivative=tuple(derivative.tolist()))
+
+  def add_threshold_callback(
+      self, callback: Callable[[ForceTorqueSensorState], bool],
+      threshold: float, use_torque: bool,
+      finished_callback: Optional[Callable[[], None]]) -> Callable[[], None]:
+    """Add a callback called when the force or torque exceeds a threshold.
+
+    Args:
+      callback: called with the state when the magnitude rises above the
+        threshold. If it returns True, the callback is removed.
+      threshold: the threshold of the magnitude.
+      use_torque: if True, use the torque magnitude instead of the force.
+      finished_callback: called when the callback is removed.
+
+    Returns:
+      A function that when called removes the callback.
+    """
+    tup: _ThresholdCallback = (callback, finished_callback or (lambda: None))
+    with self._threshold_lock:
+      closed = self._closed
+      if not closed:
+        self._threshold_callbacks.append(tup)
+        self._thresholds = np.append(self._thresholds, threshold)
+        self._threshold_columns = np.append(self._threshold_columns,
+                                            1 if use_torque else 0)
+        self._above = np.append(self._above, False)
+    if closed:
+      tup[1]()
+      return lambda: None
+    return lambda: self._remove_threshold_callback(tup)
+
+  def _remove_threshold_callback(self, tup: _ThresholdCallback) -> None:
+    """Remove a threshold callback.
+
+    Args:
+      tup: the callback and finished callback.
+    """
+    with self._threshold_lock:
+      if tup not in self._threshold_callbacks:
+        return
+      index = self._threshold_callbacks.index(tup)
+      del self._threshold_callbacks[index]
+      self._thresholds = np.delete(self._thresholds, index)
+      self._threshold_columns = np.delete(self._threshold_columns, index)
+      self._above = np.delete(self._above, index)
+    tup[1]()
+
+  def check_thresholds(self, state: ForceTorqueSensorState,
+                       values: Sequence[float]) -> None:
+    """Evaluate all thresholds for a sample and call the crossed callbacks.
+
+    Args:
+      state: the state of the sample, passed to the callbacks.
+      values: the (fx, fy, fz, tx, ty, tz) values of the sample.
+    """
+    with self._threshold_lock:
+      if not self._threshold_callbacks:
+        return
+      sample = np.asarray(values, dtype=np.float64).reshape(2, 3)
+      magnitudes = np.sqrt(np.sum(sample * sample, axis=1))
+      above = magnitudes[self._threshold_columns] > self._thresholds
+      rising = np.nonzero(above & ~self._above)[0]
+      self._above = above
+      crossed = [self._threshold_callbacks[index] for index in rising]
+    for tup in crossed:
+      if tup[0](state):
+        self._remove_threshold_callback(tup)
+
+  def close(self) -> None:
+    """Remove all threshold callbacks."""
+    with self._threshold_lock:
+      self._closed = True
+      callbacks = self._threshold_callbacks
+      self._threshold_callbacks = []
+      self._thresholds = np.zeros(0, dtype=np.float64)
+      self._threshold_columns = np.zeros(0, dtype=np.int64)
+      self._above = np.zeros(0, dtype=bool)
+    for tup in callbacks:
+      tup[1]()
@@ -15,30 +15,60 @@
 """Implementation of PyReach force torque interface."""
 
 import logging  # type: ignore
-from typing import Callable, Dict, Optional, Tuple
+from typing import Callable, List, Optional, Set, Tuple
+
+import numpy as np
 
 from pyreach import core
 from pyreach.common.python import types_gen
 from pyreach.force_torque_sensor import ForceTorqueSensor
 from pyreach.force_torque_sensor import ForceTorqueSensorState
+from pyreach.force_torque_sensor import ForceTorqueWindowStats
+from pyreach.impl import force_torque_buffer
 from pyreach.impl import requester
 from pyreach.impl import thread_util
 from pyreach.impl import utils
 
 
+# The column of each pin in the force torque samples.
+_PIN_COLUMNS = {"fx": 0, "fy": 1, "fz": 2, "tx": 3, "ty": 4, "tz": 5}
+
+
 class ForceTorqueSensorDevice(requester.Requester[ForceTorqueSensorState]):
   """ForceTorqueSensor interacts with force torque sensor."""
 
   _device_name: str
+  _buffer: force_torque_buffer.ForceTorqueBuffer
+  _warned: Set[str]
 
-  def __init__(self, device_name: str) -> None:
+  def __init__(self, device_name: str, buffer_size: int = 8192) -> None:
     """Initialize the device.
 
     Args:
       device_name: The name of the device.
+      buffer_size: The number of samples kept in the history.
     """
     super().__init__()
     self._device_name = device_name
+    self._buffer = force_torque_buffer.ForceTorqueBuffer(buffer_size)
+    self._warned = set()
+
+  @property
+  def buffer(self) -> force_torque_buffer.ForceTorqueBuffer:
+    """Return the buffer of force torque samples."""
+    return self._buffer
+
+  def _warn_once(self, message: str, pin: str) -> None:
+    """Log a warning about a pin once.
+
+    Args:
+      message: the message format, with arguments for the device and pin.
+      pin: the pin.
+    """
+    if message + pin in self._warned:
+      return
+    self._warned.add(message + pin)
+    logging.warning(message, self._device_name, pin)
 
   @property
   def device_name(self) -> str:
@@ -58,27 +88,38 @@ class ForceTorqueSensorDevice(requester.Requester[ForceTorqueSensorState]):
     if (msg.device_type == "force-torque-sensor" and
         self._device_name == msg.device_name and
         msg.data_type == "sensor-state" and msg.state):
-      states: Dict[str, float] = {}
-      expect_states = {"fx", "fy", "fz", "tx", "ty", "tz"}
+      values: List[float] = [0.0] * 6
+      seen = 0
       for state in msg.state:
-        states[state.pin] = state.float_value
-        if state.pin not in expect_states:
-          logging.warning("force-torque-sensor state for %s contains extra: %s",
-                          self._device_name, state)
-      for expect_state in expect_states:
-        if expect_state not in states:
-          logging.warning("force-torque-sensor state for %s is missing %s",
-                          self._device_name, expect_state)
-      return ForceTorqueSensorState(
-          time=utils.time_at_timestamp(msg.ts),
+        column = _PIN_COLUMNS.get(state.pin)
+        if column is None:
+          self._warn_once("force-torque-sensor state for %s contains extra: %s",
+                          state.pin)
+          continue
+        values[column] = state.float_value
+        seen |= 1 << column
+      if seen != 0x3f:
+        for pin, column in _PIN_COLUMNS.items():
+          if not seen & (1 << column):
+            self._warn_once("force-torque-sensor state for %s is missing %s",
+                            pin)
+      t = utils.time_at_timestamp(msg.ts)
+      self._buffer.append(t, values)
+      sensor_state = ForceTorqueSensorState(
+          time=t,
           sequence=msg.seq,
           device_name=self._device_name,
-          force=core.Force(
-              states.get("fx", 0), states.get("fy", 0), states.get("fz", 0)),
-          torque=core.Torque(
-              states.get("tx", 0), states.get("ty", 0), states.get("tz", 0)))
+          force=core.Force(values[0], values[1], values[2]),
+          torque=core.Torque(values[3], values[4], values[5]))
+      self._buffer.check_thresholds(sensor_state, values)
+      return sensor_state
     return None
 
+  def close(self) -> None:
+    """Close the device."""
+    self._buffer.close()
+    super().close()
+
   def get_wrapper(
       self) -> Tuple["ForceTorqueSensorDevice", "ForceTorqueSensor"]:
     """Get the wrapper for the device that should be shown to the user."""
@@ -189,3 +230,52 @@ class ForceTorqueSensorImpl(ForceTorqueSensor):
     self._device.set_untagged_request_period("force-torque-sensor",
                                              self._device.device_name,
                                              "sensor-state", None)
+
+  def history(self, duration: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the recent force torque samples.
+
+    Args:
+      duration: The duration of the window in seconds, ending at the newest
+        sample.
+
+    Returns:
+      An (N,) array of times and an (N, 6) float32 array of the
+      (fx, fy, fz, tx, ty, tz) values, ordered by time.
+    """
+    return self._device.buffer.window(duration)
+
+  def window_stats(self, duration: float) -> Optional[ForceTorqueWindowStats]:
+    """Return the statistics of the recent force torque samples.
+
+    Args:
+      duration: The duration of the window in seconds, ending at the newest
+        sample.
+
+    Returns:
+      The statistics, or None if no sample was received.
+    """
+    return self._device.buffer.stats(duration)
+
+  def add_threshold_callback(
+      self,
+      callback: Callable[[ForceTorqueSensorState], bool],
+      threshold: float,
+      use_torque: bool = False,
+      finished_callback: Optional[Callable[[],
+                                           None]] = None) -> Callable[[], None]:
+    """Add a callback for when the force or torque exceeds a threshold.
+
+    Args:
+      callback: Callback called with the sensor state when the magnitude
+        rises above the threshold. When the callback function returns True,
+        it will stop receiving future updates.
+      threshold: The magnitude threshold, in Newtons (or Newton-meters).
+      use_torque: If True, use the torque magnitude instead of the force.
+      finished_callback: Optional callback, called when the callback is stopped.
+
+    Returns:
+      A function that when called stops the callback.
+    """
+    return self._device.buffer.add_threshold_callback(callback, threshold,
+                                                      use_torque,
+                                                      finished_callback)
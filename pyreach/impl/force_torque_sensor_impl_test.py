@@ -164,6 +164,57 @@ class ForceTorqueSensorImplTest(unittest.TestCase):
       assert global_frames[0] == frame
       assert global_frames[1] == frames[0][0]
 
+  def test_history(self) -> None:
+    rdev, dev = force_torque_sensor_impl.ForceTorqueSensorDevice(
+        "test-name", buffer_size=4).get_wrapper()
+    crossings: List[ForceTorqueSensorState] = []
+    torque_crossings: List[ForceTorqueSensorState] = []
+    finished: List[bool] = []
+    stop = dev.add_threshold_callback(
+        lambda state: crossings.append(state) is not None, 5.0)
+    dev.add_threshold_callback(
+        lambda state: torque_crossings.append(state) is None,
+        1.0,
+        use_torque=True,
+        finished_callback=lambda: finished.append(True))
+    self.assertEqual(dev.history(1.0)[0].shape, (0,))
+    self.assertIsNone(dev.window_stats(1.0))
+    for seq, fz in enumerate((0.0, 6.0, 7.0, 1.0, 8.0, 9.0)):
+      state = rdev.get_message_supplement(
+          types_gen.DeviceData(
+              ts=1000 + seq * 100,
+              seq=seq,
+              device_type="force-torque-sensor",
+              device_name="test-name",
+              data_type="sensor-state",
+              state=[
+                  types_gen.CapabilityState(pin="fz", float_value=fz),
+                  types_gen.CapabilityState(pin="tx", float_value=fz),
+              ]))
+      assert state
+      self.assertEqual(state.force.z, fz)
+      self.assertEqual(state.force.x, 0.0)
+    # Only the rising edges are reported.
+    self.assertEqual([state.sequence for state in crossings], [1, 4])
+    # The torque callback stops after the first crossing.
+    self.assertEqual([state.sequence for state in torque_crossings], [1])
+    self.assertEqual(finished, [True])
+    times, values = dev.history(0.25)
+    self.assertEqual(times.tolist(), [1.3, 1.4, 1.5])
+    self.assertEqual(values.dtype.name, "float32")
+    self.assertEqual(values[:, 2].tolist(), [1.0, 8.0, 9.0])
+    self.assertEqual(dev.history(10.0)[0].shape, (4,))
+    stats = dev.window_stats(0.15)
+    assert stats
+    self.assertEqual(stats.count, 2)
+    self.assertAlmostEqual(stats.mean[2], 8.5)
+    self.assertEqual(stats.min[2], 8.0)
+    self.assertEqual(stats.max[2], 9.0)
+    self.assertAlmostEqual(stats.derivative[2], 10.0)
+    self.assertEqual(stats.derivative[0], 0.0)
+    stop()
+    rdev.close()
+
   def _verify_state(self, state: Optional[ForceTorqueSensorState],
                     name: str) -> None:
     self.assertIsNotNone(state)
@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Implementation of the PyReach Host interface."""
+import functools
 import logging
+import os
 import queue
 import threading
 import time
@@ -42,6 +44,7 @@ from pyreach.impl import depth_camera_impl
 from pyreach.impl import device_base
 from pyreach.impl import force_torque_sensor_impl
 from pyreach.impl import internal_impl
+from pyreach.impl import key_value_cache
 from pyreach.impl import logger_impl
 from pyreach.impl import machine_interfaces
 from pyreach.impl import machine_interfaces_impl
@@ -50,7 +53,9 @@ from pyreach.impl import oracle_impl
 from pyreach.impl import playback_impl
 from pyreach.impl import reach_host
 from pyreach.impl import run_script_impl
+from pyreach.impl import session_recorder
 from pyreach.impl import sim_impl
+from pyreach.impl import startup_tracker
 from pyreach.impl import text_instruction_impl
 from pyreach.impl import utils
 from pyreach.impl import vacuum_impl
@@ -186,6 +191,7 @@ class HostImpl(pyreach.Host):
   _arm_devices: List[arm_impl.ArmDevice]
   _sim: Optional[pyreach.Sim]
   _run_script: Optional[pyreach.RunScript]
+  _startup_timers: internal.Timers
 
   def __init__(
       self,
@@ -196,6 +202,8 @@ class HostImpl(pyreach.Host):
       arm_default_ik_types: Optional[Dict[str, arm.IKLibType]] = None,
       robot_types: Optional[Dict[str, str]] = None,
       user_uid: Optional[str] = None,
+      key_value_cache_dir: Optional[str] = None,
+      record_dir: Optional[str] = None,
   ) -> None:
     """Initialize the Host.
 
@@ -208,12 +216,23 @@ class HostImpl(pyreach.Host):
       arm_default_ik_types: Default ik type for arms.
       robot_types: Overrides for robot types, deviceName to URDF file mapping.
       user_uid: Attempt to authenticate with this user UID.
+      key_value_cache_dir: The directory of the on-disk cache of the
+        calibration, constraints and actionsets. (Default is the
+        PYREACH_KV_CACHE environment variable, the cache is disabled if
+        empty.)
+      record_dir: The directory in which to record the session, in a new
+        logs directory that connect_logs_directory can play back. (Default is
+        the PYREACH_RECORD_DIR environment variable, the session is not
+        recorded if empty.)
 
     Raises:
       Exception: when failed to load config.
 
     """
     is_playback = isinstance(client, cli.PlaybackClient)
+    self._startup_timers = internal.Internal.get_timers()
+    if "host.startup" not in self._startup_timers:
+      self._startup_timers = internal.Timers(startup_tracker.TIMERS)
 
     # Load config
     self._config = ConfigImpl()
@@ -221,6 +240,21 @@ class HostImpl(pyreach.Host):
 
     msgs: List[Optional[types_gen.DeviceData]] = []
     msg: Optional[types_gen.DeviceData] = None
+    if key_value_cache_dir is None:
+      key_value_cache_dir = os.environ.get(key_value_cache.CACHE_DIR_ENV, "")
+    cache: Optional[key_value_cache.KeyValueCache] = None
+    if record_dir is None:
+      record_dir = os.environ.get(session_recorder.RECORD_DIR_ENV, "")
+    recorder: Optional[session_recorder.SessionRecorder] = None
+    if record_dir and not is_playback:
+      recorder = session_recorder.SessionRecorder(
+          session_recorder.new_session_directory(record_dir))
+      logging.info("Recording the session to %s", recorder.directory)
+
+    def send_cmd(cmd: types_gen.CommandData) -> None:
+      if recorder is not None:
+        recorder.record_command_data(cmd)
+      client.send_cmd(cmd)
 
     # Authenticate, if specified
     if user_uid is not None and not is_playback:
@@ -231,7 +265,7 @@ class HostImpl(pyreach.Host):
           tag = utils.generate_tag()
           auth_tags.add(tag)
           send_auth_time = time.time()
-          client.send_cmd(
+          send_cmd(
               types_gen.CommandData(
                   ts=utils.timestamp_now(),
                   tag=tag,
@@ -242,6 +276,8 @@ class HostImpl(pyreach.Host):
         try:
           msg = client.get_queue().get(block=True, timeout=0.1)
           msgs.append(msg)
+          if msg is not None and recorder is not None:
+            recorder.record_device_data(msg)
           if msg is None:
             break
           if msg.device_type == "server" and msg.data_type == "cmd-status" and not msg.device_name and msg.tag in auth_tags:
@@ -279,11 +315,27 @@ class HostImpl(pyreach.Host):
     }
     request_description: Optional[float] = None
     block = False
+    requested: Set[device_base.KeyValueKey] = set(request_kv)
+    if not is_playback:
+      # Also request the remaining configuration in the same burst, so that it
+      # loads while the host starts. The host requests them again if missing.
+      for dev in self._config._devices:
+        for kv in dev.get_key_values():
+          if kv not in requested:
+            requested.add(kv)
+            send_cmd(
+                types_gen.CommandData(
+                    ts=utils.timestamp_now(),
+                    tag=utils.generate_tag(),
+                    device_type=kv.device_type,
+                    device_name=kv.device_name,
+                    data_type="key-value-request",
+                    key=kv.key))
     while request_kv or self._config.machine_interfaces is None:
-      if block and not is_playback:
+      if not is_playback:
         if request_description is None or time.time() > request_description:
           request_description = time.time() + 15
-          client.send_cmd(
+          send_cmd(
               types_gen.CommandData(
                   ts=utils.timestamp_now(),
                   tag=utils.generate_tag(),
@@ -292,7 +344,7 @@ class HostImpl(pyreach.Host):
         for kv, timeout in request_kv.items():
           if timeout is None or time.time() > timeout:
             request_kv[kv] = time.time() + 15
-            client.send_cmd(
+            send_cmd(
                 types_gen.CommandData(
                     ts=utils.timestamp_now(),
                     tag=utils.generate_tag(),
@@ -308,6 +360,8 @@ class HostImpl(pyreach.Host):
       try:
         msg = client.get_queue().get(block=block, timeout=0.1)
         msgs.append(msg)
+        if msg is not None and recorder is not None:
+          recorder.record_device_data(msg)
         if msg is None:
           break
         if msg.data_type == "cmd-status":
@@ -325,6 +379,16 @@ class HostImpl(pyreach.Host):
         self._config._calibration.on_set_key_value(kv, msg.value)
         if kv in request_kv:
           del request_kv[kv]
+        if (kv.key == "robot-name" and key_value_cache_dir and cache is None and
+            not is_playback):
+          # Start with the cached calibration, the live one is still requested.
+          cache = key_value_cache.KeyValueCache(key_value_cache_dir, msg.value)
+          for cached_kv in list(request_kv):
+            cached_value = cache.get(cached_kv)
+            if cached_value is not None:
+              self._config._calibration.on_set_key_value(
+                  cached_kv, cached_value)
+              del request_kv[cached_kv]
       if msg is not None:
         self._config._machine_interfaces._device.on_device_data(msg)
 
@@ -376,6 +440,36 @@ class HostImpl(pyreach.Host):
       devices.append(dev[0])
       return dev[1]
 
+    # Start with the cached key-values that were not received yet, and request
+    # them to validate them against the live values.
+    if cache is not None:
+      received: Set[device_base.KeyValueKey] = {
+          device_base.KeyValueKey(
+              device_type=m.device_type, device_name=m.device_name, key=m.key)
+          for m in msgs
+          if m is not None and m.data_type == "key-value"
+      }
+      cached_msgs: List[Optional[types_gen.DeviceData]] = []
+      for cached_msg in cache.load():
+        kv = device_base.KeyValueKey(
+            device_type=cached_msg.device_type,
+            device_name=cached_msg.device_name,
+            key=cached_msg.key)
+        if kv in received:
+          continue
+        cached_msgs.append(cached_msg)
+        if kv not in requested:
+          send_cmd(
+              types_gen.CommandData(
+                  ts=utils.timestamp_now(),
+                  tag=utils.generate_tag(),
+                  device_type=kv.device_type,
+                  device_name=kv.device_name,
+                  data_type="key-value-request",
+                  key=kv.key))
+      msgs = cached_msgs + msgs
+      devices.append(key_value_cache.KeyValueCacheDevice(cache))
+
     def add_arm_device(
         dev: Tuple[arm_impl.ArmDevice, Tuple[device_base.DeviceBase, ...],
                    host.T]
@@ -579,7 +673,8 @@ class HostImpl(pyreach.Host):
         client,
         devices + self._config._devices,
         initial_messages=msgs,
-        take_control_at_start=take_control_at_start)
+        take_control_at_start=take_control_at_start,
+        recorder=recorder)
     self._playback = None
     if is_playback:
       load_internal = self.internal
@@ -600,118 +695,128 @@ class HostImpl(pyreach.Host):
 
     self._config._machine_interfaces.add_update_callback(machine_callback)
     machine_callback(interfaces)
-    self._host.start()
-    if enable_streaming and not is_playback:
-      self._start_streaming()
     if not is_playback:
-      for t in self._start_arm_read_controller():
-        t.join()
+      self._start(enable_streaming)
     else:
+      self._host.start()
+      # Play back the log until the controllers of every arm are known.
       while True:
         found_all_arms = True
         for test_arm in self._arm_devices:
           if test_arm.supported_controllers is None:
             found_all_arms = False
-        if not found_all_arms:
+        if found_all_arms:
           break
         assert isinstance(client, cli.PlaybackClient)
         playback_client_arm: cli.PlaybackClient = client
         if not playback_client_arm.next_device_data():
-          raise Exception("failed to read messages from the playback client")
+          logging.warning("the log ended before the controllers of every arm "
+                          "were known")
+          break
 
   def get_timers(self) -> internal.Timers:  # pylint: disable=unused-argument
     """Return the global timers object."""
     return internal.Internal.get_timers()
 
-  def _start_arm_read_controller(self) -> List[threading.Thread]:
+  def get_startup_timers(self) -> internal.Timers:
+    """Return the timers of the startup phases of the host.
+
+    These are the global timers if they include the startup_tracker.TIMERS,
+    otherwise timers of this host only.
+    """
+    return self._startup_timers
 
-    def arm_read_controllers(load_arm: arm_impl.ArmDevice) -> None:
-      while (load_arm.fetch_supported_controllers() is None and
-             not self.is_closed()):
-        pass
+  def _start(self, enable_streaming: bool) -> None:
+    """Start the host and wait until it is usable.
 
-    threads: List[threading.Thread] = []
+    All the startup requests are sent at once, and the startup phases wait in
+    parallel. For example, host.arm.state is guaranteed not to be none once
+    this returns with streaming enabled, unless the host was closed.
 
+    Args:
+      enable_streaming: If True, start streaming for all devices.
+    """
+    timers = self._startup_timers
+    tracker = startup_tracker.StartupTracker(timers)
+    self._host.start(wait=False)
+    if enable_streaming:
+      self._start_streaming(tracker)
+    tracker.run("session", self._host.wait_started)
     for arm_dev in self._arm_devices:
-      t = threading.Thread(target=arm_read_controllers, args=(arm_dev,))
-      t.start()
-      threads.append(t)
-
-    return threads
-
-  def _start_streaming(self) -> None:
-    """Start streaming from hosts."""
-    # Create a queue for callbacks. In order to start up, we must have all
-    # callbacks be called at least once, so that all data is loaded. For
-    # example, host.arm.state is guaranteed not to be none if _start_streaming()
-    # completes and the host was not closed.
-    callback_queue: "queue.Queue[bool]" = queue.Queue()
-    request_count = 0
-
-    # Create new callback by first incrementing the callback_count, and then
-    # returning a callback function.
+      tracker.run("controllers",
+                  functools.partial(self._read_arm_controllers, arm_dev))
+    if enable_streaming:
+      tracker.run("calibration", self.config.wait_calibration)
+      tracker.run("constraints", self.config.wait_constraint)
+      tracker.run("actionsets", self.config.wait_actionset)
+      for _, arm_value in self._arms.items():
+        tracker.run("arm_constraints", arm_value.wait_constraints)
+    if tracker.wait(self.is_closed):
+      logging.debug(
+          "Host started: %s", ", ".join(
+              "%s %.3fs" % (name, duration)
+              for name, _, duration in timers.results()
+              if name.startswith("host.startup")))
+
+  def _read_arm_controllers(self, arm_dev: arm_impl.ArmDevice) -> None:
+    """Fetch the supported controllers of an arm until they load."""
+    while (arm_dev.fetch_supported_controllers() is None and
+           not self.is_closed()):
+      pass
+
+  def _start_streaming(self, tracker: startup_tracker.StartupTracker) -> None:
+    """Start streaming from hosts.
+
+    Streaming is ready once all the stream callbacks were called at least
+    once, so that all data is loaded.
+
+    Args:
+      tracker: the startup tracker, the "streams" phase is ready once all
+        devices streamed.
+    """
+
+    # Create a new callback that marks a part of the "streams" phase ready.
     def new_callback() -> Callable[[Optional[Any]], bool]:
-      nonlocal request_count, callback_queue
-      request_count += 1
+      ready = tracker.begin("streams")
 
       # The callback function will wait for a state (e.g. arm state) and then
       # return True, stopping it from getting called again.
       def cb_func(input_state: Optional[Any]) -> bool:
-        nonlocal callback_queue
         if input_state is not None:
-          callback_queue.put(True)
+          ready()
           return True
         return False
 
       return cb_func
 
     for _, v1 in self._arms.items():
-      v1.start_streaming()
       v1.add_update_callback(new_callback())
-
-    threads = self._start_arm_read_controller()
+      v1.start_streaming()
 
     for _, v2 in self._color_cameras.items():
-      v2.start_streaming()
       v2.add_update_callback(new_callback())
+      v2.start_streaming()
 
     for _, v3 in self._depth_cameras.items():
-      v3.start_streaming()
       v3.add_update_callback(new_callback())
+      v3.start_streaming()
 
     for _, v4 in self._force_torque_sensors.items():
-      v4.start_streaming()
       v4.add_update_callback(new_callback())
+      v4.start_streaming()
 
     for _, v5 in self._vacuums.items():
-      v5.start_streaming()
       v5.add_state_callback(new_callback())
+      v5.start_streaming()
       if v5.support_blowoff:
-        v5.start_blowoff_streaming()
         v5.add_blowoff_state_callback(new_callback())
+        v5.start_blowoff_streaming()
       if v5.support_gauge:
-        v5.start_gauge_streaming()
         v5.add_gauge_state_callback(new_callback())
+        v5.start_gauge_streaming()
       if v5.support_pressure:
-        v5.start_pressure_streaming()
         v5.add_pressure_state_callback(new_callback())
-
-    self.config.wait_calibration()
-    self.config.wait_constraint()
-    self.config.wait_actionset()
-    for _, v6 in self._arms.items():
-      v6.wait_constraints()
-
-    # Wait for all the callbacks to respond.
-    callback_count = 0
-    while callback_count < request_count and not self.is_closed():
-      try:
-        if callback_queue.get(block=True, timeout=0.01):
-          callback_count += 1
-      except queue.Empty:
-        pass
-    for t in threads:
-      t.join()
+        v5.start_pressure_streaming()
 
   def __enter__(self) -> "pyreach.Host":
     """With statement entry dunder."""
@@ -723,6 +828,8 @@ class HostImpl(pyreach.Host):
 
   def close(self) -> None:
     """Close the connection to the host."""
+    if not self._logger.flush_snapshots(timeout=10.0):
+      logging.warning("snapshots not sent before closing the host")
     self._host.close()
 
   def wait(self) -> None:
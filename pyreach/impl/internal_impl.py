@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Implementation of the PyReach Internal interface."""
-from typing import Callable, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -22,6 +22,7 @@ from pyreach.common.proto_gen import logs_pb2
 from pyreach import internal
 from pyreach.common.python import types_gen
 from pyreach.impl import client as cli
+from pyreach.impl import message_trace
 from pyreach.impl import requester
 from pyreach.impl import utils
 
@@ -61,6 +62,23 @@ class PlaybackDevice:
       sequence: Optional[int]) -> Optional[logs_pb2.DeviceData]:
     """Seek the given device data and output it, if available.
 
+    Args:
+      time: the timestamp to seek. If sequence number is not specified, will not
+        return any data from before the specified time.
+      sequence: the sequence number to seek. If specified, the exact sequence
+        number, or any data after it will be returned.
+
+    Returns:
+      Returns the DeviceData object loaded, if found.
+    """
+    data = self.seek_typed_device_data(time, sequence)
+    return data.to_proto() if data else None
+
+  def seek_typed_device_data(
+      self, time: Optional[float],
+      sequence: Optional[int]) -> Optional[types_gen.DeviceData]:
+    """Seek the given device data, without conversion to a proto.
+
     Args:
       time: the timestamp to seek. If sequence number is not specified, will not
         return any data from before the specified time.
@@ -72,7 +90,7 @@ class PlaybackDevice:
     """
     data = self._client.seek_device_data(time, sequence)
     self._host_flush[0]()
-    return data.to_proto() if data else None
+    return data
 
 
 class PlaybackImpl(internal.InternalPlayback):
@@ -117,11 +135,31 @@ class PlaybackImpl(internal.InternalPlayback):
     """
     return self._device.seek_device_data(time, sequence)
 
+  def seek_typed_device_data(
+      self, time: Optional[float],
+      sequence: Optional[int]) -> Optional[types_gen.DeviceData]:
+    """Seek the given device data, without conversion to a proto.
+
+    Used by the snapshot replay, which only reads the status of the data.
+
+    Args:
+      time: the timestamp to seek. If sequence number is not specified, will not
+        return any data from before the specified time.
+      sequence: the sequence number to seek. If specified, the exact sequence
+        number, or any data after it will be returned.
+
+    Returns:
+      Returns the DeviceData object loaded, if found.
+    """
+    return self._device.seek_typed_device_data(time, sequence)
+
 
 class InternalDevice(requester.Requester[types_gen.DeviceData]):
   """Device for internal commands."""
 
   _playback: Optional[internal.InternalPlayback]
+  # Every message is its own supplement, so it is not traced as the handler.
+  _trace_decode: bool = False
 
   def __init__(self, host_flush: Callable[[], None],
                client: cli.Client) -> None:
@@ -323,6 +361,28 @@ class InternalImpl(internal.Internal):
         ))
     return tag
 
+  def start_message_trace(self) -> None:
+    """Start tracing the latency of DeviceData through the host pipeline."""
+    message_trace.enable()
+
+  def stop_message_trace(self) -> None:
+    """Stop tracing and discard the collected latencies."""
+    message_trace.disable()
+
+  def message_trace(self) -> List[internal.MessageTraceStage]:
+    """Return the latencies collected since tracing was started."""
+    tracer = message_trace.get_tracer()
+    if tracer is None:
+      return []
+    return tracer.results()
+
+  def request_rates(self) -> Dict[Tuple[str, str], float]:
+    """Return the measured rates of the streaming frame requests of the host."""
+    scheduler = self._device.stream_scheduler
+    if scheduler is None:
+      return {}
+    return scheduler.request_rates()
+
   def add_device_data_callback(
       self,
       callback: Callable[[logs_pb2.DeviceData], bool],
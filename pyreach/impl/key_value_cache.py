@@ -0,0 +1,267 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""On-disk cache of the configuration key-values of robots.
+
+The calibration, constraints and actionsets of a robot rarely change, but
+every connection fetches and parses them. With a cache, a host starts with
+the cached values of the robot right away and still requests the live ones:
+a live value replaces the cached one if it differs, and is stored for the
+next connection.
+
+The cache directory holds one index file per robot id, listing the SHA-256
+content hash of each cached key-value, and the values themselves in files
+named by their content hash. Value files that no index references anymore
+are removed when a value is replaced.
+
+The cached key-value messages a host starts with are marked, so that only
+live key-values resolve the key-value requests of the devices.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from pyreach.common.python import types_gen
+from pyreach.impl import device_base
+from pyreach.impl import utils
+
+# The keys of the key-values that are cached.
+CACHED_KEYS = frozenset({
+    device_base.KeyValueKey("settings-engine", "", "calibration.json"),
+    device_base.KeyValueKey("settings-engine", "",
+                            "workcell_constraints.json"),
+    device_base.KeyValueKey("settings-engine", "", "actionsets.json"),
+})
+
+# The key of the per-robot constraints, cached for any robot device name.
+_ROBOT_CONSTRAINTS_KEY = "robot_constraints.json"
+
+# The environment variable of the default cache directory.
+CACHE_DIR_ENV = "PYREACH_KV_CACHE"
+
+# The attribute marking the key-value messages loaded from the cache.
+CACHED_ATTRIBUTE = "_pyreach_key_value_cached"
+
+# Unreferenced value files younger than this are kept, since another process
+# may have written the value file but not yet its index.
+_REMOVE_AFTER_SECONDS = 60.0
+
+
+def is_cached(key: device_base.KeyValueKey) -> bool:
+  """Return True if the key-value of a key is cached."""
+  if key.device_type == "robot":
+    return key.key == _ROBOT_CONSTRAINTS_KEY
+  return key in CACHED_KEYS
+
+
+def is_from_cache(msg: types_gen.DeviceData) -> bool:
+  """Return True if a key-value message was loaded from the cache."""
+  return bool(getattr(msg, CACHED_ATTRIBUTE, False))
+
+
+def _hash(value: str) -> str:
+  return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: str, data: str) -> None:
+  """Write a file so that readers never see it partially written."""
+  fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+  try:
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+      f.write(data)
+    os.replace(tmp_path, path)
+  except BaseException:
+    os.unlink(tmp_path)
+    raise
+
+
+class KeyValueCache:
+  """The cached key-values of one robot.
+
+  The cache is thread-safe. Errors reading or writing the cache directory are
+  logged, and the cache then behaves as if empty.
+  """
+
+  _directory: str
+  _robot_id: str
+  _index_path: str
+  _lock: threading.Lock
+  _hashes: Dict[device_base.KeyValueKey, str]
+
+  def __init__(self, directory: str, robot_id: str) -> None:
+    """Init a KeyValueCache and read the index of the robot.
+
+    Args:
+      directory: the cache directory, created if missing.
+      robot_id: the robot id, i.e. the value of the robot-name key.
+    """
+    self._directory = directory
+    self._robot_id = robot_id
+    self._index_path = os.path.join(
+        directory, "robot-" + _hash(robot_id)[:32] + ".json")
+    self._lock = threading.Lock()
+    self._hashes = {}
+    try:
+      os.makedirs(directory, exist_ok=True)
+      with open(self._index_path, encoding="utf-8") as f:
+        index = json.load(f)
+      if index.get("robot_id") == robot_id:
+        for entry in index.get("key_values", []):
+          key = device_base.KeyValueKey(entry["device_type"],
+                                        entry["device_name"], entry["key"])
+          self._hashes[key] = entry["sha256"]
+    except FileNotFoundError:
+      pass
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+      logging.warning("key-value cache %s unreadable: %s", self._index_path, e)
+
+  def _value_path(self, content_hash: str) -> str:
+    return os.path.join(self._directory, content_hash + ".value")
+
+  def get(self, key: device_base.KeyValueKey) -> Optional[str]:
+    """Return the cached value of a key, or None if not cached."""
+    with self._lock:
+      content_hash = self._hashes.get(key)
+    if content_hash is None:
+      return None
+    try:
+      with open(self._value_path(content_hash), encoding="utf-8") as f:
+        value = f.read()
+    except OSError as e:
+      logging.warning("key-value cache value of %s unreadable: %s", key, e)
+      return None
+    if _hash(value) != content_hash:
+      logging.warning("key-value cache value of %s is corrupt", key)
+      return None
+    return value
+
+  def load(self) -> List[types_gen.DeviceData]:
+    """Return the cached key-values as key-value messages."""
+    with self._lock:
+      keys = sorted(
+          self._hashes,
+          key=lambda k: (k.device_type, k.device_name, k.key))
+    messages: List[types_gen.DeviceData] = []
+    for key in keys:
+      value = self.get(key)
+      if value is not None:
+        msg = types_gen.DeviceData(
+            ts=utils.timestamp_now(),
+            device_type=key.device_type,
+            device_name=key.device_name,
+            data_type="key-value",
+            key=key.key,
+            value=value)
+        setattr(msg, CACHED_ATTRIBUTE, True)
+        messages.append(msg)
+    return messages
+
+  def update(self, key: device_base.KeyValueKey, value: str) -> bool:
+    """Store the live value of a key, if cached and changed.
+
+    Args:
+      key: the key.
+      value: the live value.
+
+    Returns:
+      True if the value was stored, False if it is not cached or unchanged.
+    """
+    if not is_cached(key):
+      return False
+    content_hash = _hash(value)
+    with self._lock:
+      old_hash = self._hashes.get(key)
+      if old_hash == content_hash:
+        return False
+      self._hashes[key] = content_hash
+      index = {
+          "robot_id":
+              self._robot_id,
+          "key_values": [{
+              "device_type": k.device_type,
+              "device_name": k.device_name,
+              "key": k.key,
+              "sha256": h,
+          } for k, h in sorted(
+              self._hashes.items(),
+              key=lambda item: (item[0].device_type, item[0].device_name,
+                                item[0].key))],
+      }
+      try:
+        value_path = self._value_path(content_hash)
+        if not os.path.exists(value_path):
+          _write_atomic(value_path, value)
+        _write_atomic(self._index_path, json.dumps(index, indent=2))
+        if old_hash is not None:
+          self._remove_unreferenced()
+      except OSError as e:
+        logging.warning("key-value cache %s not writable: %s", self._directory,
+                        e)
+    return True
+
+  def _remove_unreferenced(self) -> None:
+    """Remove the value files that no index of the directory references.
+
+    The indexes of all robots are read, since robots share value files.
+    Nothing is removed if an index is unreadable.
+    """
+    names = os.listdir(self._directory)
+    referenced = set()
+    for name in names:
+      if not (name.startswith("robot-") and name.endswith(".json")):
+        continue
+      try:
+        with open(os.path.join(self._directory, name), encoding="utf-8") as f:
+          index = json.load(f)
+        referenced.update(entry["sha256"] for entry in index["key_values"])
+      except FileNotFoundError:
+        continue
+      except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning("key-value cache index %s unreadable: %s", name, e)
+        return
+    removed_before = time.time() - _REMOVE_AFTER_SECONDS
+    for name in names:
+      if not name.endswith(".value") or name[:-len(".value")] in referenced:
+        continue
+      path = os.path.join(self._directory, name)
+      try:
+        if os.path.getmtime(path) < removed_before:
+          os.unlink(path)
+      except FileNotFoundError:
+        pass
+
+
+class KeyValueCacheDevice(device_base.DeviceBase):
+  """Stores the live cached key-values received by a host."""
+
+  _cache: KeyValueCache
+
+  def __init__(self, cache: KeyValueCache) -> None:
+    """Init a KeyValueCacheDevice.
+
+    Args:
+      cache: the cache of the robot of the host.
+    """
+    super().__init__()
+    self._cache = cache
+
+  def on_set_key_value(self, key: device_base.KeyValueKey, value: str) -> None:
+    """Store a live key-value that changed since it was cached."""
+    if self._cache.update(key, value):
+      logging.debug("key-value cache updated %s", key)
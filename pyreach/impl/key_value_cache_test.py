@@ -0,0 +1,120 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for key_value_cache."""
+
+import os
+import tempfile
+from typing import List
+import unittest
+
+from pyreach.impl import device_base
+from pyreach.impl import key_value_cache
+
+_CALIBRATION = device_base.KeyValueKey("settings-engine", "",
+                                       "calibration.json")
+_ROBOT_CONSTRAINTS = device_base.KeyValueKey("robot", "ur5",
+                                             "robot_constraints.json")
+
+
+class KeyValueCacheTest(unittest.TestCase):
+
+  def test_is_cached(self) -> None:
+    self.assertTrue(key_value_cache.is_cached(_CALIBRATION))
+    self.assertTrue(key_value_cache.is_cached(_ROBOT_CONSTRAINTS))
+    self.assertFalse(
+        key_value_cache.is_cached(
+            device_base.KeyValueKey("settings-engine", "", "robot-name")))
+    self.assertFalse(
+        key_value_cache.is_cached(
+            device_base.KeyValueKey("robot", "ur5", "calibration.json")))
+
+  def test_update_and_load(self) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+      cache = key_value_cache.KeyValueCache(directory, "robot-1")
+      self.assertEqual(cache.load(), [])
+      self.assertTrue(cache.update(_CALIBRATION, '{"devices": []}'))
+      self.assertFalse(cache.update(_CALIBRATION, '{"devices": []}'))
+      self.assertTrue(cache.update(_ROBOT_CONSTRAINTS, "{}"))
+      self.assertFalse(
+          cache.update(
+              device_base.KeyValueKey("settings-engine", "", "robot-name"),
+              "robot-1"))
+
+      cache = key_value_cache.KeyValueCache(directory, "robot-1")
+      self.assertEqual(cache.get(_CALIBRATION), '{"devices": []}')
+      msgs = cache.load()
+      self.assertEqual([(m.device_type, m.device_name, m.key, m.value)
+                        for m in msgs],
+                       [("robot", "ur5", "robot_constraints.json", "{}"),
+                        ("settings-engine", "", "calibration.json",
+                         '{"devices": []}')])
+      self.assertEqual({m.data_type for m in msgs}, {"key-value"})
+      self.assertTrue(all(key_value_cache.is_from_cache(m) for m in msgs))
+
+      self.assertEqual(
+          key_value_cache.KeyValueCache(directory, "robot-2").load(), [])
+
+  def test_remove_unreferenced(self) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+
+      def values() -> List[str]:
+        return sorted(
+            name for name in os.listdir(directory) if name.endswith(".value"))
+
+      def age() -> None:
+        for name in values():
+          os.utime(os.path.join(directory, name), (0.0, 0.0))
+
+      cache = key_value_cache.KeyValueCache(directory, "robot-1")
+      other = key_value_cache.KeyValueCache(directory, "robot-2")
+      cache.update(_CALIBRATION, "first")
+      other.update(_CALIBRATION, "first")
+      cache.update(_ROBOT_CONSTRAINTS, "constraints")
+      self.assertEqual(len(values()), 2)
+      # The value shared with the other robot is kept.
+      age()
+      cache.update(_CALIBRATION, "second")
+      self.assertEqual(len(values()), 3)
+      other.update(_CALIBRATION, "second")
+      self.assertEqual(len(values()), 2)
+      # Recent unreferenced values are kept.
+      cache.update(_CALIBRATION, "third")
+      other.update(_CALIBRATION, "fourth")
+      self.assertEqual(len(values()), 4)
+      age()
+      cache.update(_CALIBRATION, "fifth")
+      self.assertEqual(len(values()), 3)
+      self.assertEqual(cache.get(_CALIBRATION), "fifth")
+      self.assertEqual(other.get(_CALIBRATION), "fourth")
+      self.assertEqual(cache.get(_ROBOT_CONSTRAINTS), "constraints")
+
+  def test_corrupt(self) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+      cache = key_value_cache.KeyValueCache(directory, "robot-1")
+      cache.update(_CALIBRATION, "{}")
+      for name in os.listdir(directory):
+        if name.endswith(".value"):
+          with open(os.path.join(directory, name), "w") as f:
+            f.write("{broken")
+      self.assertIsNone(cache.get(_CALIBRATION))
+      for name in os.listdir(directory):
+        with open(os.path.join(directory, name), "w") as f:
+          f.write("{broken")
+      self.assertEqual(
+          key_value_cache.KeyValueCache(directory, "robot-1").load(), [])
+
+
+if __name__ == "__main__":
+  unittest.main()
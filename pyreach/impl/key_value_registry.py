@@ -0,0 +1,121 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tracking of the key-values requested by the devices of a host."""
+
+import time
+from typing import Dict, Iterable, List, Set
+
+from pyreach.common.python import types_gen
+from pyreach.impl import device_base
+from pyreach.impl import key_value_cache
+
+
+class KeyValueRegistry:
+  """Tracks which registered key-values are still unresolved.
+
+  Devices register the keys they need once. The registry returns each
+  unresolved key as due immediately, then again every retry interval until a
+  key-value message for it is seen. Once every key is resolved, the registry
+  is empty and the host loop skips all key-value work.
+
+  The registry is not thread-safe: it is only used by the host thread.
+  """
+
+  _retry_interval: float
+  _resolved: Set[device_base.KeyValueKey]
+  _unresolved: Dict[device_base.KeyValueKey, float]
+  _next_due: float
+
+  def __init__(self, retry_interval: float = 15.0) -> None:
+    """Init a KeyValueRegistry.
+
+    Args:
+      retry_interval: the time in seconds between requests of an unresolved
+        key.
+    """
+    self._retry_interval = retry_interval
+    self._resolved = set()
+    self._unresolved = {}
+    self._next_due = float("inf")
+
+  def register(self, keys: Iterable[device_base.KeyValueKey]) -> None:
+    """Register keys to resolve.
+
+    Keys that are not resolved yet are due immediately.
+
+    Args:
+      keys: the keys.
+    """
+    for key in keys:
+      if key in self._resolved or key in self._unresolved:
+        continue
+      self._unresolved[key] = 0.0
+      self._next_due = 0.0
+
+  @property
+  def unresolved(self) -> bool:
+    """True if some registered keys are not resolved."""
+    return bool(self._unresolved)
+
+  def unresolved_keys(self) -> Set[device_base.KeyValueKey]:
+    """Return the registered keys that are not resolved."""
+    return set(self._unresolved)
+
+  def resolve(self, messages: Iterable[types_gen.DeviceData]) -> None:
+    """Mark the keys of the key-value messages as resolved.
+
+    Key-values loaded from the key-value cache are skipped: their live values
+    are still requested.
+
+    Args:
+      messages: the device data messages received.
+    """
+    for msg in messages:
+      if msg.data_type != "key-value" or key_value_cache.is_from_cache(msg):
+        continue
+      key = device_base.KeyValueKey(
+          device_type=msg.device_type,
+          device_name=msg.device_name,
+          key=msg.key)
+      if self._unresolved.pop(key, None) is not None:
+        self._resolved.add(key)
+      if not self._unresolved:
+        self._next_due = float("inf")
+        return
+
+  def due(self, now: float = -1.0) -> List[device_base.KeyValueKey]:
+    """Return the unresolved keys to request now.
+
+    The returned keys are due again after the retry interval.
+
+    Args:
+      now: the current time, defaults to time.time().
+
+    Returns:
+      The keys to request.
+    """
+    if now < 0:
+      now = time.time()
+    if now < self._next_due:
+      return []
+    keys: List[device_base.KeyValueKey] = []
+    next_due = float("inf")
+    for key, due in self._unresolved.items():
+      if due <= now:
+        keys.append(key)
+        due = now + self._retry_interval
+        self._unresolved[key] = due
+      next_due = min(next_due, due)
+    self._next_due = next_due
+    return keys
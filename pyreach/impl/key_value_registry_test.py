@@ -0,0 +1,73 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for key_value_registry."""
+
+import unittest
+
+from pyreach.common.python import types_gen
+from pyreach.impl import device_base
+from pyreach.impl import key_value_cache
+from pyreach.impl import key_value_registry
+
+
+class KeyValueRegistryTest(unittest.TestCase):
+
+  def test_registry(self) -> None:
+    calibration = device_base.KeyValueKey("settings-engine", "",
+                                          "calibration.json")
+    robot_name = device_base.KeyValueKey("settings-engine", "", "robot-name")
+    registry = key_value_registry.KeyValueRegistry(retry_interval=15.0)
+    self.assertFalse(registry.unresolved)
+    self.assertEqual(registry.due(100.0), [])
+    registry.register({calibration})
+    registry.register({calibration, robot_name})
+    self.assertTrue(registry.unresolved)
+    self.assertEqual(set(registry.due(100.0)), {calibration, robot_name})
+    self.assertEqual(registry.due(110.0), [])
+    registry.resolve([
+        types_gen.DeviceData(device_type="robot", data_type="robot-state"),
+        types_gen.DeviceData(
+            device_type="settings-engine",
+            data_type="key-value",
+            key="robot-name",
+            value="test"),
+    ])
+    self.assertEqual(registry.unresolved_keys(), {calibration})
+    self.assertEqual(registry.due(115.0), [calibration])
+    self.assertEqual(registry.due(116.0), [])
+    # Cached key-values do not resolve their keys.
+    cached = types_gen.DeviceData(
+        device_type="settings-engine",
+        data_type="key-value",
+        key="calibration.json",
+        value="{}")
+    setattr(cached, key_value_cache.CACHED_ATTRIBUTE, True)
+    registry.resolve([cached])
+    self.assertEqual(registry.unresolved_keys(), {calibration})
+    registry.resolve([
+        types_gen.DeviceData(
+            device_type="settings-engine",
+            data_type="key-value",
+            key="calibration.json",
+            value="{}")
+    ])
+    self.assertFalse(registry.unresolved)
+    self.assertEqual(registry.due(200.0), [])
+    # Resolved keys are not requested again when registered again.
+    registry.register({calibration})
+    self.assertFalse(registry.unresolved)
+
+
+if __name__ == "__main__":
+  unittest.main()
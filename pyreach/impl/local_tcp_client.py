@@ -17,16 +17,18 @@ import json
 import logging
 import multiprocessing
 import queue  # pylint: disable=unused-import
+import selectors
 import socket
 import threading
 import time
-from typing import Any, Dict, Optional  # pylint: disable=unused-import
+from typing import Any, Callable, Dict, List, Optional  # pylint: disable=unused-import
 
 from pyreach import host
 from pyreach.common.python import types_gen
 from pyreach.core import PyReachError
 from pyreach.impl import client as cli
 from pyreach.impl import host_impl
+from pyreach.impl import message_trace
 
 
 class _PingManager:
@@ -100,7 +102,8 @@ def _read_process(hostname: str, port: int,
                   q: "queue.Queue[Optional[types_gen.DeviceData]]",
                   input_queue: "queue.Queue[Optional[bytes]]",
                   started: "queue.Queue[bool]",
-                  ping_queue: "queue.Queue[None]") -> None:
+                  ping_queue: "queue.Queue[None]",
+                  trace: bool = False) -> None:
   """Process for reading from a socket and writing to the socket.
 
   Args:
@@ -111,6 +114,7 @@ def _read_process(hostname: str, port: int,
     started: Queue is sent at startup, True if socket is started successfully,
       False otherwise. If false, no data will be sent to other queues.
     ping_queue: ping queue stores pings from the main process.
+    trace: if True, stamp the receive time on the DeviceData for tracing.
   """
   sender: Optional[threading.Thread] = None
   sock: Optional[socket.socket] = None
@@ -148,8 +152,11 @@ def _read_process(hostname: str, port: int,
         if next_pos < 0:
           break
         try:
+          receive_time = time.time()
           msg = json.loads(pb[0:next_pos])
           data = types_gen.DeviceData.from_json(msg)
+          if trace:
+            setattr(data, message_trace.RECEIVE_TIME_ATTRIBUTE, receive_time)
           q.put(data)
         except json.JSONDecodeError as e:
           logging.warning("packet could not be decoded from JSON: %s", e)
@@ -249,7 +256,8 @@ class LocalTCPClient(cli.Client):
       self._process = multiprocessing.Process(
           target=_read_process,
           args=(hostname, port, self._queue, self._cmd_data_queue,
-                self._started_queue, self._ping_reader_queue))
+                self._started_queue, self._ping_reader_queue,
+                message_trace.get_tracer() is not None))
       self._process.start()
       self._serialize = multiprocessing.Process(
           target=_serialize_process,
@@ -321,19 +329,210 @@ class LocalTCPClient(cli.Client):
         p.join()
 
 
-def connect_local_tcp(hostname: str, port: int, kwargs: Dict[str,
-                                                             Any]) -> host.Host:
+class SelectorTCPClient(cli.Client):
+  """A local TCP client running all socket I/O in one thread.
+
+  Unlike LocalTCPClient, no process is spawned: a single thread multiplexes
+  non-blocking reads and writes of the socket with a selector. Commands are
+  serialized by the caller and device data is decoded by the I/O thread, so
+  nothing is pickled across a process boundary.
+  """
+
+  _lock: threading.Lock
+  _queue: "queue.Queue[Optional[types_gen.DeviceData]]"
+  _sock: socket.socket
+  _wake_reader: socket.socket
+  _wake_writer: socket.socket
+  _selector: selectors.BaseSelector
+  _out: bytearray
+  _closing: bool
+  _trace: bool
+  _thread: threading.Thread
+
+  # The time in seconds given to the pending commands to be sent on close.
+  _CLOSE_TIMEOUT = 1.0
+
+  def __init__(self, hostname: str = "localhost", port: int = 50008):
+    """Init a SelectorTCPClient.
+
+    Args:
+      hostname: The local host to connect to as a string. This argument is
+        optional and defaults to "localhost".
+      port: The port number to connect to.  This argument is optional and
+        defaults to 50008.
+
+    Raises:
+       PyReachError: if connection fails.
+    """
+    super().__init__()
+    self._lock = threading.Lock()
+    self._queue = queue.Queue()
+    self._out = bytearray()
+    self._closing = False
+    self._trace = message_trace.get_tracer() is not None
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+      sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+      sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      sock.settimeout(60.0)  # Seconds
+      sock.connect((hostname, port))
+    except OSError as e:
+      sock.close()
+      raise PyReachError("Failed to connect") from e
+    sock.setblocking(False)
+    self._sock = sock
+    self._wake_reader, self._wake_writer = socket.socketpair()
+    self._wake_reader.setblocking(False)
+    self._wake_writer.setblocking(False)
+    self._selector = selectors.DefaultSelector()
+    self._selector.register(self._sock, selectors.EVENT_READ)
+    self._selector.register(self._wake_reader, selectors.EVENT_READ)
+    self._thread = threading.Thread(
+        name="selector_tcp_client", target=self._run, daemon=True)
+    self._thread.start()
+
+  def get_queue(self) -> "queue.Queue[Optional[types_gen.DeviceData]]":
+    """Get the queue for the SelectorTCPClient."""
+    return self._queue
+
+  def send_cmd(self, cmd: types_gen.CommandData) -> None:
+    """Send a command to the client.
+
+    Args:
+      cmd: The CommandData to send to the client.
+    """
+    data = (json.dumps(cmd.to_json()) + "\n").encode("utf-8")
+    with self._lock:
+      if self._closing:
+        return
+      wake = not self._out
+      self._out += data
+    if wake:
+      self._wake()
+
+  def _wake(self) -> None:
+    """Wake up the I/O thread."""
+    try:
+      self._wake_writer.send(b"\0")
+    except OSError:
+      # The wake-up socket is full, so the thread is already due to wake up.
+      pass
+
+  def _decode(self, lines: List[bytes]) -> None:
+    """Decode framed device data and put them on the queue.
+
+    Args:
+      lines: the JSON lines, without the trailing newline.
+    """
+    receive_time = time.time()
+    for line in lines:
+      try:
+        data = types_gen.DeviceData.from_json(json.loads(line))
+      except ValueError as e:
+        logging.warning("packet could not be decoded from JSON: %s", e)
+        continue
+      if self._trace:
+        setattr(data, message_trace.RECEIVE_TIME_ATTRIBUTE, receive_time)
+      self._queue.put(data)
+
+  def _run(self) -> None:
+    """Run the I/O thread until the socket or the client is closed."""
+    pending = b""
+    close_deadline: Optional[float] = None
+    writing = False
+    try:
+      while True:
+        with self._lock:
+          has_output = bool(self._out)
+          if self._closing and close_deadline is None:
+            close_deadline = time.time() + self._CLOSE_TIMEOUT
+        if close_deadline is not None and (not has_output or
+                                           time.time() > close_deadline):
+          break
+        if has_output != writing:
+          writing = has_output
+          self._selector.modify(
+              self._sock, selectors.EVENT_READ |
+              (selectors.EVENT_WRITE if writing else 0))
+        timeout = None
+        if close_deadline is not None:
+          timeout = max(0.0, close_deadline - time.time())
+        for key, events in self._selector.select(timeout):
+          if key.fileobj is self._wake_reader:
+            try:
+              self._wake_reader.recv(4096)
+            except OSError:
+              pass
+            continue
+          if events & selectors.EVENT_WRITE:
+            with self._lock:
+              try:
+                sent = self._sock.send(self._out)
+              except (BlockingIOError, InterruptedError):
+                sent = 0
+              del self._out[:sent]
+          if events & selectors.EVENT_READ:
+            try:
+              packet = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+              continue
+            if not packet:
+              return
+            lines = (pending + packet).split(b"\n")
+            pending = lines.pop()
+            self._decode(lines)
+    except OSError:
+      pass
+    finally:
+      with self._lock:
+        self._closing = True
+        self._out.clear()
+      self._selector.close()
+      for sock in (self._sock, self._wake_reader, self._wake_writer):
+        try:
+          sock.close()
+        except OSError:
+          pass
+      self._queue.put(None)
+
+  def close(self) -> None:
+    """Close the connection, after sending the pending commands."""
+    with self._lock:
+      self._closing = True
+    self._wake()
+    if self._thread is not threading.current_thread():
+      self._thread.join()
+
+
+# The I/O engines of the local TCP client, by name.
+ENGINES: Dict[str, Callable[[str, int], cli.Client]] = {
+    "multiprocess": LocalTCPClient,
+    "selector": SelectorTCPClient,
+}
+
+
+def connect_local_tcp(hostname: str,
+                      port: int,
+                      kwargs: Dict[str, Any],
+                      engine: str = "multiprocess") -> host.Host:
   """Connect to Reach using TCP on specific host:port.
 
   Args:
     hostname: host name or IP address.
     port: TCP port to connect to.
     kwargs: additional argument.
+    engine: the I/O engine, "multiprocess" or "selector".
+
+  Raises:
+    PyReachError: if the engine is unknown.
 
   Returns:
     Host interface if successful.
   """
-  return host_impl.HostImpl(LocalTCPClient(hostname, port), **kwargs)
+  client_type = ENGINES.get(engine)
+  if client_type is None:
+    raise PyReachError("Unknown local TCP engine: " + engine)
+  return host_impl.HostImpl(client_type(hostname, port), **kwargs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for local_tcp_client."""
+
+import json
+import socket
+import threading
+from typing import List, Optional
+import unittest
+
+from pyreach.common.python import types_gen
+from pyreach.core import PyReachError
+from pyreach.impl import local_tcp_client
+
+
+class _LoopbackServer:
+  """Accepts one connection, sends device data and records the commands."""
+
+  def __init__(self, messages: List[types_gen.DeviceData]) -> None:
+    self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self._listener.bind(("127.0.0.1", 0))
+    self._listener.listen(1)
+    self.port = self._listener.getsockname()[1]
+    self._messages = messages
+    self.commands: List[types_gen.CommandData] = []
+    self.received_all = threading.Event()
+    self._expected_commands = 0
+    self._thread = threading.Thread(target=self._run)
+
+  def start(self, expected_commands: int) -> None:
+    self._expected_commands = expected_commands
+    self._thread.start()
+
+  def _run(self) -> None:
+    conn, _ = self._listener.accept()
+    data = b"".join(
+        (json.dumps(msg.to_json()) + "\n").encode("utf-8")
+        for msg in self._messages)
+    # Split the stream at arbitrary points to exercise the framing.
+    for start in range(0, len(data), 7):
+      conn.sendall(data[start:start + 7])
+    pending = b""
+    while len(self.commands) < self._expected_commands:
+      packet = conn.recv(4096)
+      if not packet:
+        break
+      lines = (pending + packet).split(b"\n")
+      pending = lines.pop()
+      self.commands.extend(
+          types_gen.CommandData.from_json(json.loads(line)) for line in lines)
+    self.received_all.set()
+    conn.close()
+    self._listener.close()
+
+  def join(self) -> None:
+    self._thread.join()
+
+
+class LocalTCPClientTest(unittest.TestCase):
+
+  def _check_engine(self, engine: str) -> None:
+    messages = [
+        types_gen.DeviceData(
+            device_type="robot", data_type="robot-state", seq=seq)
+        for seq in range(50)
+    ]
+    server = _LoopbackServer(messages)
+    server.start(expected_commands=20)
+    client = local_tcp_client.ENGINES[engine]("127.0.0.1", server.port)
+    try:
+      for seq in range(50):
+        msg: Optional[types_gen.DeviceData] = client.get_queue().get(
+            timeout=10.0)
+        assert msg
+        self.assertEqual(msg.seq, seq)
+        self.assertEqual(msg.data_type, "robot-state")
+      for n in range(20):
+        client.send_cmd(
+            types_gen.CommandData(
+                device_type="robot", data_type="frame-request", tag=str(n)))
+      self.assertTrue(server.received_all.wait(10.0))
+    finally:
+      client.close()
+      server.join()
+    self.assertIsNone(client.get_queue().get(timeout=10.0))
+    self.assertEqual([cmd.tag for cmd in server.commands],
+                     [str(n) for n in range(20)])
+
+  def test_multiprocess_engine(self) -> None:
+    self._check_engine("multiprocess")
+
+  def test_selector_engine(self) -> None:
+    self._check_engine("selector")
+
+  def test_selector_connection_failure(self) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    self.assertRaises(PyReachError, local_tcp_client.SelectorTCPClient,
+                      "127.0.0.1", port)
+    self.assertRaises(PyReachError, local_tcp_client.connect_local_tcp,
+                      "127.0.0.1", port, {}, "unknown")
+
+
+if __name__ == "__main__":
+  unittest.main()
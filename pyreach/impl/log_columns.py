@@ -0,0 +1,529 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Columnar export and queries of the device-data of a logs directory.
+
+export() converts the device-data of a logs directory into one group of
+columns per (device_type, device_name, data_type). Each group has the
+timestamp ("ts", in milliseconds) and sequence ("seq") of its messages, and a
+float64 column per numeric field of the JSON messages: nested fields are named
+by their dotted JSON path (e.g. "metricValue.floatValue", "state.0.intValue"),
+booleans are 0 or 1, and lists of numbers or booleans become columns of
+shape (rows, length). As the JSON messages omit fields of default value, a
+scalar field missing from a message is 0, while a list shorter than the column,
+or missing, is padded with NaN. Strings, such as image paths and key-values,
+are not exported.
+
+The columns are .npy files, sorted by time, and memory-mapped when read, so a
+time range query only reads the pages of the rows it selects.
+
+Example:
+
+  columns = log_columns.export("/path/to/logs", "/path/to/columns")
+  states = columns.group("robot", "robot-state")
+  rows = states.select(["ts", "joints"], start_time=t0, end_time=t0 + 60.0)
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Sequence,
+                    Tuple)
+
+import numpy as np
+
+from pyreach import core
+from pyreach.impl import utils
+
+# Version of the manifest format.
+MANIFEST_VERSION = 1
+
+_MANIFEST = "manifest.json"
+
+# The integer columns of every group.
+_TS = "ts"
+_SEQ = "seq"
+
+# Key of a group: (device_type, device_name, data_type).
+_GroupKey = Tuple[str, str, str]
+
+# A flattened message: the numeric fields by column name.
+_Row = Dict[str, Any]
+
+
+# The JSON types of numeric fields.
+_NUMBERS = frozenset((bool, int, float))
+
+
+def _flatten(value: Any, name: str, row: _Row) -> None:
+  """Add the numeric fields of a JSON value to a row.
+
+  Args:
+    value: the JSON value.
+    name: the column name of the value.
+    row: the row to add to.
+  """
+  kind = type(value)
+  if kind in _NUMBERS:
+    row[name] = value
+  elif kind is dict:
+    for key, item in value.items():
+      _flatten(item, name + "." + key if name else key, row)
+  elif kind is list and value:
+    if _NUMBERS.issuperset(map(type, value)):
+      row[name] = value
+    else:
+      for index, item in enumerate(value):
+        _flatten(item, "%s.%d" % (name, index), row)
+
+
+def _messages(logs_directory: str) -> Iterator[Dict[str, Any]]:
+  """Yield the JSON messages of the device-data of a logs directory."""
+  directory = os.path.join(logs_directory, "device-data")
+  index = 0
+  while True:
+    try:
+      f = open(os.path.join(directory, "%05d.json" % index), "rb")
+    except FileNotFoundError:
+      return
+    with f:
+      for line in f:
+        try:
+          data = json.loads(line)
+        except json.JSONDecodeError:
+          continue
+        if isinstance(data, dict):
+          yield data
+    index += 1
+
+
+def _group_key(data: Dict[str, Any]) -> _GroupKey:
+  return (data.get("deviceType", ""), data.get("deviceName", ""),
+          data.get("dataType", ""))
+
+
+def _row(data: Dict[str, Any]) -> _Row:
+  row: _Row = {}
+  for key, value in data.items():
+    if key not in (_TS, _SEQ):
+      _flatten(value, key, row)
+  return row
+
+
+def _file_name(name: str, used: Dict[str, str]) -> str:
+  """Return a unique file name, made of safe characters, for a name."""
+  base = re.sub(r"[^A-Za-z0-9_.-]", "_", name) or "_"
+  candidate = base
+  suffix = 1
+  while candidate.lower() in used:
+    candidate = "%s_%d" % (base, suffix)
+    suffix += 1
+  used[candidate.lower()] = name
+  return candidate
+
+
+class _GroupWriter:
+  """Writes the columns of a group, chunk by chunk."""
+
+  _directory: str
+  _rows: int
+  _widths: Dict[str, int]
+  _files: Dict[str, str]
+  _columns: Dict[str, np.ndarray]
+  _written: int
+  _chunk: List[Tuple[int, int, _Row]]
+  _chunk_rows: int
+
+  def __init__(self, directory: str, rows: int, widths: Dict[str, int],
+               chunk_rows: int) -> None:
+    """Init a _GroupWriter.
+
+    Args:
+      directory: the directory of the column files.
+      rows: the number of rows of the group.
+      widths: the width of each numeric column, 0 for a scalar column.
+      chunk_rows: the number of rows buffered, or sorted, at once.
+    """
+    os.makedirs(directory)
+    self._directory = directory
+    self._rows = rows
+    self._widths = widths
+    self._chunk_rows = chunk_rows
+    self._files = {}
+    self._columns = {}
+    used: Dict[str, str] = {}
+    for name, dtype, shape in ([(_TS, np.int64, (rows,)),
+                                (_SEQ, np.int64, (rows,))] +
+                               [(name, np.float64,
+                                 (rows, width) if width else (rows,))
+                                for name, width in sorted(widths.items())]):
+      filename = _file_name(name, used) + ".npy"
+      column = np.lib.format.open_memmap(
+          os.path.join(directory, filename), mode="w+", dtype=dtype,
+          shape=shape)
+      if len(shape) > 1:
+        column[:] = np.nan
+      self._files[name] = filename
+      self._columns[name] = column
+    self._written = 0
+    self._chunk = []
+
+  def add(self, ts: int, seq: int, row: _Row) -> None:
+    """Add a row, writing the chunk of rows when it is full."""
+    self._chunk.append((ts, seq, row))
+    if len(self._chunk) >= self._chunk_rows:
+      self.flush()
+
+  def flush(self) -> None:
+    """Write the chunk of rows."""
+    chunk = self._chunk
+    if not chunk:
+      return
+    start = self._written
+    end = start + len(chunk)
+    self._columns[_TS][start:end] = [ts for ts, _, _ in chunk]
+    self._columns[_SEQ][start:end] = [seq for _, seq, _ in chunk]
+    for name, width in self._widths.items():
+      if not width:
+        self._columns[name][start:end] = [
+            row.get(name, 0) for _, _, row in chunk
+        ]
+        continue
+      values = np.full((len(chunk), width), np.nan)
+      for offset, (_, _, row) in enumerate(chunk):
+        value = row.get(name)
+        if isinstance(value, list):
+          values[offset, :len(value)] = value
+        elif value is not None:
+          values[offset, 0] = value
+      self._columns[name][start:end] = values
+    self._written = end
+    self._chunk = []
+
+  def finish(self) -> Dict[str, Any]:
+    """Sort the rows by time and return the manifest entry of the group.
+
+    The sort order is computed in memory from the ts and seq columns, i.e. 24
+    bytes per row. Each column is then written in order to a new file, chunk
+    by chunk, so the columns themselves are never loaded whole.
+
+    Returns:
+      The manifest entry.
+    """
+    self.flush()
+    order = np.lexsort((self._columns[_SEQ], self._columns[_TS]))
+    if np.any(order[1:] < order[:-1]):
+      for name, column in list(self._columns.items()):
+        self._columns[name] = self._sort(name, column, order)
+    columns = {}
+    for name, column in self._columns.items():
+      column.flush()
+      columns[name] = {
+          "file": self._files[name],
+          "dtype": column.dtype.str,
+          "shape": list(column.shape),
+      }
+    self._columns = {}
+    return {"rows": self._rows, "columns": columns}
+
+  def _sort(self, name: str, column: np.ndarray,
+            order: np.ndarray) -> np.ndarray:
+    """Rewrite a column in a sort order, chunk by chunk.
+
+    Args:
+      name: the column name.
+      column: the memory-mapped column.
+      order: the row of the column for each sorted row.
+
+    Returns:
+      The memory-mapped sorted column, replacing the column file.
+    """
+    path = os.path.join(self._directory, self._files[name])
+    sorted_column = np.lib.format.open_memmap(
+        path + ".tmp", mode="w+", dtype=column.dtype, shape=column.shape)
+    for start in range(0, self._rows, self._chunk_rows):
+      rows = order[start:start + self._chunk_rows]
+      sorted_column[start:start + len(rows)] = column[rows]
+    sorted_column.flush()
+    os.replace(path + ".tmp", path)
+    return sorted_column
+
+
+def export(logs_directory: str,
+           output_directory: str,
+           chunk_rows: int = 65536) -> "LogColumns":
+  """Export the device-data of a logs directory to columns.
+
+  The log is read twice: once to find the groups and their columns, once to
+  write the columns. Memory use is bounded by the chunk size, plus 24 bytes
+  per row of a group to sort it by time.
+
+  Args:
+    logs_directory: the logs directory, containing device-data.
+    output_directory: the directory of the columns. It must not exist or be
+      empty.
+    chunk_rows: the number of rows of a group buffered before being written.
+
+  Raises:
+    PyReachError: if the output directory is not empty.
+
+  Returns:
+    The exported columns.
+  """
+  if os.path.isdir(output_directory) and os.listdir(output_directory):
+    raise core.PyReachError("Output directory is not empty: " +
+                            output_directory)
+  os.makedirs(output_directory, exist_ok=True)
+
+  rows: Dict[_GroupKey, int] = {}
+  widths: Dict[_GroupKey, Dict[str, int]] = {}
+  for data in _messages(logs_directory):
+    key = _group_key(data)
+    rows[key] = rows.get(key, 0) + 1
+    group_widths = widths.setdefault(key, {})
+    for name, value in _row(data).items():
+      width = len(value) if isinstance(value, list) else 0
+      group_widths[name] = max(width, group_widths.get(name, 0))
+
+  writers: Dict[_GroupKey, _GroupWriter] = {}
+  directories: Dict[_GroupKey, str] = {}
+  used: Dict[str, str] = {}
+  for key in sorted(rows):
+    directories[key] = _file_name("-".join(part for part in key if part),
+                                  used)
+    writers[key] = _GroupWriter(
+        os.path.join(output_directory, directories[key]), rows[key],
+        widths[key], chunk_rows)
+  for data in _messages(logs_directory):
+    key = _group_key(data)
+    writers[key].add(int(data.get(_TS, 0)), int(data.get(_SEQ, 0)), _row(data))
+
+  groups = []
+  for key in sorted(rows):
+    entry = writers[key].finish()
+    entry.update({
+        "device_type": key[0],
+        "device_name": key[1],
+        "data_type": key[2],
+        "directory": directories[key],
+    })
+    groups.append(entry)
+  manifest = {"version": MANIFEST_VERSION, "groups": groups}
+  # Write the manifest last, so an interrupted export is not readable.
+  fd, tmp_path = tempfile.mkstemp(dir=output_directory, suffix=".tmp")
+  with os.fdopen(fd, "w", encoding="utf-8") as f:
+    json.dump(manifest, f, indent=1, sort_keys=True)
+  os.replace(tmp_path, os.path.join(output_directory, _MANIFEST))
+  logging.info("exported %d messages in %d groups to %s", sum(rows.values()),
+               len(groups), output_directory)
+  return LogColumns(output_directory)
+
+
+class ColumnGroup:
+  """The columns of the messages of one (device_type, device_name, data_type).
+
+  The rows are sorted by timestamp and sequence.
+  """
+
+  _directory: str
+  _device_type: str
+  _device_name: str
+  _data_type: str
+  _rows: int
+  _files: Dict[str, str]
+  _columns: Dict[str, np.ndarray]
+
+  def __init__(self, directory: str, entry: Dict[str, Any]) -> None:
+    """Init a ColumnGroup.
+
+    Args:
+      directory: the directory of the exported columns.
+      entry: the manifest entry of the group.
+    """
+    self._directory = os.path.join(directory, entry["directory"])
+    self._device_type = entry["device_type"]
+    self._device_name = entry["device_name"]
+    self._data_type = entry["data_type"]
+    self._rows = entry["rows"]
+    self._files = {
+        name: column["file"] for name, column in entry["columns"].items()
+    }
+    self._columns = {}
+
+  @property
+  def device_type(self) -> str:
+    """The device type of the messages."""
+    return self._device_type
+
+  @property
+  def device_name(self) -> str:
+    """The device name of the messages."""
+    return self._device_name
+
+  @property
+  def data_type(self) -> str:
+    """The data type of the messages."""
+    return self._data_type
+
+  @property
+  def rows(self) -> int:
+    """The number of messages."""
+    return self._rows
+
+  @property
+  def columns(self) -> Tuple[str, ...]:
+    """The column names, including "ts" and "seq"."""
+    return tuple(sorted(self._files))
+
+  def column(self, name: str) -> np.ndarray:
+    """Return a read-only, memory-mapped, column.
+
+    Args:
+      name: the column name.
+
+    Raises:
+      PyReachError: if the group has no such column.
+
+    Returns:
+      The column, of shape (rows,) or (rows, length).
+    """
+    column = self._columns.get(name)
+    if column is None:
+      filename = self._files.get(name)
+      if filename is None:
+        raise core.PyReachError("No column %s in %s" % (name, self))
+      column = np.load(os.path.join(self._directory, filename), mmap_mode="r")
+      self._columns[name] = column
+    return column
+
+  def time_range(self,
+                 start_time: Optional[float] = None,
+                 end_time: Optional[float] = None) -> slice:
+    """Return the slice of the rows within a time range.
+
+    Args:
+      start_time: if set, the first time (in seconds) of the range.
+      end_time: if set, the time (in seconds) after the end of the range.
+
+    Returns:
+      The slice of the rows with start_time <= time < end_time.
+    """
+    ts = self.column(_TS)
+    start = 0 if start_time is None else int(
+        np.searchsorted(ts, utils.timestamp_at_time(start_time), "left"))
+    end = self._rows if end_time is None else int(
+        np.searchsorted(ts, utils.timestamp_at_time(end_time), "left"))
+    return slice(start, max(start, end))
+
+  def select(self,
+             columns: Optional[Sequence[str]] = None,
+             start_time: Optional[float] = None,
+             end_time: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Select columns within a time range.
+
+    Args:
+      columns: the column names, all columns if None.
+      start_time: if set, the first time (in seconds) of the range.
+      end_time: if set, the time (in seconds) after the end of the range.
+
+    Returns:
+      The selected rows of each column, by name. The arrays are read-only
+      views of the memory-mapped columns.
+    """
+    rows = self.time_range(start_time, end_time)
+    return {
+        name: self.column(name)[rows]
+        for name in (self.columns if columns is None else columns)
+    }
+
+  def __repr__(self) -> str:
+    return "ColumnGroup(%s, %s, %s)" % (self._device_type, self._device_name,
+                                        self._data_type)
+
+
+class LogColumns:
+  """The columns exported from a logs directory."""
+
+  _directory: str
+  _groups: Dict[_GroupKey, ColumnGroup]
+
+  def __init__(self, directory: str) -> None:
+    """Open exported columns.
+
+    Args:
+      directory: the directory of the exported columns.
+
+    Raises:
+      PyReachError: if the directory does not hold an export.
+    """
+    try:
+      with open(os.path.join(directory, _MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    except (OSError, ValueError) as e:
+      raise core.PyReachError("No log columns in " + directory) from e
+    if manifest.get("version") != MANIFEST_VERSION:
+      raise core.PyReachError("Unsupported log columns version in " +
+                              directory)
+    self._directory = directory
+    self._groups = {}
+    for entry in manifest["groups"]:
+      group = ColumnGroup(directory, entry)
+      self._groups[(group.device_type, group.device_name,
+                    group.data_type)] = group
+
+  def groups(self) -> List[ColumnGroup]:
+    """Return the groups, sorted by device type, device name and data type."""
+    return [self._groups[key] for key in sorted(self._groups)]
+
+  def group(self,
+            device_type: str,
+            data_type: str,
+            device_name: str = "") -> ColumnGroup:
+    """Return the group of a device and data type.
+
+    Args:
+      device_type: the device type.
+      data_type: the data type.
+      device_name: the device name.
+
+    Raises:
+      PyReachError: if there is no such group.
+
+    Returns:
+      The group.
+    """
+    group = self._groups.get((device_type, device_name, data_type))
+    if group is None:
+      raise core.PyReachError("No messages of %s %s %s in %s" %
+                              (device_type, device_name, data_type,
+                               self._directory))
+    return group
+
+  def find(self,
+           device_type: Optional[str] = None,
+           data_type: Optional[str] = None) -> Iterable[ColumnGroup]:
+    """Yield the groups of a device type and/or data type, of any device name.
+
+    Args:
+      device_type: if set, the device type.
+      data_type: if set, the data type.
+
+    Yields:
+      The matching groups.
+    """
+    for group in self.groups():
+      if ((device_type is None or group.device_type == device_type) and
+          (data_type is None or group.data_type == data_type)):
+        yield group
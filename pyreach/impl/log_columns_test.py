@@ -0,0 +1,156 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for log_columns."""
+
+import json
+import os
+import tempfile
+from typing import List
+import unittest
+
+import numpy as np
+
+from pyreach import core
+from pyreach.common.python import types_gen
+from pyreach.impl import log_columns
+
+_START_TS = 1600000000000
+
+
+def _robot_state(seq: int, device_name: str = "") -> types_gen.DeviceData:
+  return types_gen.DeviceData(
+      device_type="robot",
+      device_name=device_name,
+      data_type="robot-state",
+      ts=_START_TS + 10 * seq,
+      seq=seq,
+      joints=[0.1 * seq, 0.2, 0.3, 0.4, 0.5, 0.6],
+      is_robot_power_on=seq % 2 == 0,
+      robot_mode="remote")
+
+
+def _vacuum_state(seq: int) -> types_gen.DeviceData:
+  state = [types_gen.CapabilityState(pin="vacuum", int_value=seq % 2)]
+  if seq > 2:
+    state.append(types_gen.CapabilityState(pin="blowoff", int_value=1))
+  return types_gen.DeviceData(
+      device_type="vacuum",
+      data_type="output-state",
+      ts=_START_TS + 10 * seq,
+      seq=seq,
+      state=state)
+
+
+def _write_logs(directory: str, messages: List[types_gen.DeviceData]) -> None:
+  os.makedirs(os.path.join(directory, "device-data"))
+  half = len(messages) // 2
+  for index, chunk in enumerate((messages[:half], messages[half:])):
+    with open(
+        os.path.join(directory, "device-data", "%05d.json" % index), "w") as f:
+      for msg in chunk:
+        f.write(json.dumps(msg.to_json()) + "\n")
+      f.write("not json\n")
+
+
+class LogColumnsTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    self._tempdir = tempfile.TemporaryDirectory()
+    self.addCleanup(self._tempdir.cleanup)
+    self._logs = os.path.join(self._tempdir.name, "logs")
+    self._output = os.path.join(self._tempdir.name, "columns")
+    # Out of order robot-states, two arms, and a vacuum with a late pin.
+    messages = [_robot_state(seq) for seq in range(1, 101)]
+    messages[5], messages[12] = messages[12], messages[5]
+    messages += [_robot_state(seq, "right") for seq in range(1, 11)]
+    messages += [_vacuum_state(seq) for seq in range(1, 5)]
+    messages.append(
+        types_gen.DeviceData(
+            device_type="settings-engine",
+            data_type="key-value",
+            ts=_START_TS,
+            seq=1000,
+            key="calibration.json",
+            value="{}"))
+    _write_logs(self._logs, messages)
+
+  def test_export(self) -> None:
+    columns = log_columns.export(self._logs, self._output, chunk_rows=7)
+    self.assertEqual(
+        [(group.device_type, group.device_name, group.data_type, group.rows)
+         for group in columns.groups()],
+        [("robot", "", "robot-state", 100), ("robot", "right", "robot-state",
+                                             10),
+         ("settings-engine", "", "key-value", 1),
+         ("vacuum", "", "output-state", 4)])
+
+    states = columns.group("robot", "robot-state")
+    self.assertIn("joints", states.columns)
+    self.assertIn("isRobotPowerOn", states.columns)
+    self.assertNotIn("robotMode", states.columns)
+    np.testing.assert_array_equal(states.column("seq"), np.arange(1, 101))
+    np.testing.assert_array_equal(states.column("ts"),
+                                  _START_TS + 10 * np.arange(1, 101))
+    joints = states.column("joints")
+    self.assertIsInstance(joints, np.memmap)
+    self.assertEqual(joints.shape, (100, 6))
+    np.testing.assert_allclose(joints[:, 0], 0.1 * np.arange(1, 101))
+    # The rows were sorted across the chunks, and no temporary file is left.
+    files = os.listdir(os.path.join(self._output, "robot-robot-state"))
+    self.assertEqual([name for name in files if not name.endswith(".npy")],
+                     [])
+    np.testing.assert_array_equal(states.column("isRobotPowerOn")[:4],
+                                  [0.0, 1.0, 0.0, 1.0])
+
+    vacuum = columns.group("vacuum", "output-state")
+    np.testing.assert_array_equal(
+        vacuum.column("state.0.intValue"), [1.0, 0.0, 1.0, 0.0])
+    np.testing.assert_array_equal(
+        vacuum.column("state.1.intValue"), [0.0, 0.0, 1.0, 1.0])
+
+    self.assertEqual(
+        columns.group("settings-engine", "key-value").columns, ("seq", "ts"))
+    self.assertEqual(
+        [group.device_name for group in columns.find(data_type="robot-state")],
+        ["", "right"])
+
+  def test_select(self) -> None:
+    log_columns.export(self._logs, self._output)
+    states = log_columns.LogColumns(self._output).group(
+        "robot", "robot-state", "right")
+    start = (_START_TS + 30) / 1e3
+    rows = states.select(["seq", "joints"], start, start + 0.05)
+    self.assertEqual(set(rows), {"seq", "joints"})
+    np.testing.assert_array_equal(rows["seq"], [3, 4, 5, 6, 7])
+    self.assertEqual(rows["joints"].shape, (5, 6))
+    self.assertEqual(states.time_range(end_time=start), slice(0, 2))
+    self.assertEqual(states.time_range(start_time=start + 1.0), slice(10, 10))
+    self.assertEqual(set(states.select()), set(states.columns))
+
+  def test_errors(self) -> None:
+    with self.assertRaises(core.PyReachError):
+      log_columns.LogColumns(self._output)
+    columns = log_columns.export(self._logs, self._output)
+    with self.assertRaises(core.PyReachError):
+      log_columns.export(self._logs, self._output)
+    with self.assertRaises(core.PyReachError):
+      columns.group("robot", "robot-state", "left")
+    with self.assertRaises(core.PyReachError):
+      columns.group("robot", "robot-state").column("missing")
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Implementation of the PyReach Logger interface."""
+import collections
 import logging  # type: ignore
 import queue  # pylint: disable=unused-import
 import threading
@@ -28,7 +29,16 @@ from pyreach.snapshot import Snapshot
 
 
 class LoggerDevice(requester.Requester[core.PyReachStatus]):
-  """Device for logger."""
+  """Device for logger.
+
+  Snapshots are converted and sent by a background thread, in the order they
+  were given, so that send_snapshot does not delay the caller. Their
+  timestamps are taken when send_snapshot is called.
+  """
+
+  # The maximum number of snapshots waiting to be sent. When it is reached,
+  # send_snapshot blocks rather than dropping snapshots.
+  _SNAPSHOT_QUEUE_SIZE = 256
 
   _time_lock: threading.Lock
   _start_times: Dict[str, int]
@@ -39,9 +49,19 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
   _task_state: logger.TaskState
   _task_state_queue: "queue.Queue[Optional[logger.TaskState]]"
   _task_state_callback_manager: "thread_util.CallbackManager[logger.TaskState]"
+  _async_snapshots: bool
+  _snapshots: "collections.deque[Tuple[int, Snapshot]]"
+  _snapshot_condition: threading.Condition
+  _snapshots_closed: bool
+  _snapshots_queued: int
+  _snapshots_sent: int
 
-  def __init__(self) -> None:
-    """Construct a logger."""
+  def __init__(self, async_snapshots: bool = True) -> None:
+    """Construct a logger.
+
+    Args:
+      async_snapshots: if False, send snapshots on the thread of the caller.
+    """
     super().__init__()
     self._time_lock = threading.Lock()
     self._task_time_lock = threading.Lock()
@@ -52,6 +72,12 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
     self._task_state = logger.TaskState.UNKNOWN
     self._task_state_queue = queue.Queue()
     self._task_state_callback_manager = thread_util.CallbackManager()
+    self._async_snapshots = async_snapshots
+    self._snapshots = collections.deque()
+    self._snapshot_condition = threading.Condition()
+    self._snapshots_closed = False
+    self._snapshots_queued = 0
+    self._snapshots_sent = 0
 
   def _task_state_update_thread(self) -> None:
     while True:
@@ -61,6 +87,23 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
         return
       self._task_state_callback_manager.call(state)
 
+  def _snapshot_thread(self) -> None:
+    while True:
+      with self._snapshot_condition:
+        self._snapshot_condition.wait_for(
+            lambda: self._snapshots or self._snapshots_closed)
+        if not self._snapshots:
+          return
+        ts, snapshot = self._snapshots.popleft()
+        self._snapshot_condition.notify_all()
+      try:
+        self._send_snapshot(ts, snapshot)
+      except Exception:  # pylint: disable=broad-except
+        logging.exception("failed to send snapshot")
+      with self._snapshot_condition:
+        self._snapshots_sent += 1
+        self._snapshot_condition.notify_all()
+
   @property
   def task_state(self) -> logger.TaskState:
     """Get the current task state."""
@@ -93,6 +136,7 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
     """Start the logger device."""
     super().start()
     self.run(self._task_state_update_thread)
+    self.run(self._snapshot_thread)
 
   def close(self) -> None:
     """Close the logger device."""
@@ -100,6 +144,9 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
       if not self._task_state_closed:
         self._task_state_closed = True
         self._task_state_queue.put(None)
+    with self._snapshot_condition:
+      self._snapshots_closed = True
+      self._snapshot_condition.notify_all()
     super().close()
 
   def get_message_supplement(
@@ -196,6 +243,7 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
     Args:
       event_params: custom parameters of the event.
     """
+    self.flush_snapshots()
     start_ts = 0
     with self._task_time_lock:
       if self._task_state_closed:
@@ -223,6 +271,7 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
     Args:
       event_params: custom parameters of the event.
     """
+    self.flush_snapshots()
     end_ts = 0
     event_duration = 0.0
     with self._task_time_lock:
@@ -257,15 +306,50 @@ class LoggerDevice(requester.Requester[core.PyReachStatus]):
     Args:
       snapshot: The snapshot to send.
     """
+    ts = utils.timestamp_now()
+    if not self._async_snapshots:
+      self._send_snapshot(ts, snapshot)
+      return
+    with self._snapshot_condition:
+      self._snapshot_condition.wait_for(
+          lambda: (self._snapshots_closed or
+                   len(self._snapshots) < self._SNAPSHOT_QUEUE_SIZE))
+      if self._snapshots_closed:
+        return
+      self._snapshots.append((ts, snapshot))
+      self._snapshots_queued += 1
+      self._snapshot_condition.notify_all()
+
+  def _send_snapshot(self, ts: int, snapshot: Snapshot) -> None:
+    """Convert and send a snapshot.
+
+    Args:
+      ts: the timestamp of the snapshot command.
+      snapshot: The snapshot to send.
+    """
     self.send_cmd(
         types_gen.CommandData(
-            ts=utils.timestamp_now(),
+            ts=ts,
             device_type="client-annotation",
             data_type="client-annotation",
             client_annotation=types_gen.ClientAnnotation(
                 snapshot_annotation=types_gen.SnapshotAnnotation()),
             snapshot=snapshot_impl.convert_snapshot(snapshot)))
 
+  def flush_snapshots(self, timeout: Optional[float] = None) -> bool:
+    """Wait for the snapshots given so far to be sent.
+
+    Args:
+      timeout: optional timeout (in seconds) to wait for.
+
+    Returns:
+      True if the snapshots have been sent, False on timeout.
+    """
+    with self._snapshot_condition:
+      queued = self._snapshots_queued
+      return self._snapshot_condition.wait_for(
+          lambda: self._snapshots_sent >= queued, timeout)
+
 
 class LoggerImpl(logger.Logger):
   """A class for accessing logs."""
@@ -362,6 +446,17 @@ class LoggerImpl(logger.Logger):
     """
     self._device.send_snapshot(snapshot)
 
+  def flush_snapshots(self, timeout: Optional[float] = None) -> bool:
+    """Wait for the snapshots sent so far to be handed to the connection.
+
+    Args:
+      timeout: optional timeout (in seconds) to wait for.
+
+    Returns:
+      True if the snapshots have been sent, False on timeout.
+    """
+    return self._device.flush_snapshots(timeout)
+
   def start_annotation_interval(self,
                                 name: str,
                                 log_channel_id: str = "") -> core.PyReachStatus:
@@ -13,6 +13,7 @@
 # limitations under the License.
 """Test the Logger."""
 
+import threading
 from typing import List, cast
 import unittest
 
@@ -266,6 +267,7 @@ class TestPyReachLogger(unittest.TestCase):
                           text_annotation=logs_pb2.TextAnnotation(
                               category="test-category", text="test-text")),
                   ))))
+      self.assertTrue(dev.flush_snapshots(timeout=10.0))
       test_device.expect_command_data([
           types_gen.CommandData(
               device_type="client-annotation",
@@ -401,6 +403,71 @@ class TestPyReachLogger(unittest.TestCase):
       self.assertEqual(len(results), 1)
       self.assertEqual(results[0].status, "done")
 
+  def test_send_snapshots_in_background(self) -> None:
+    rdev, dev = logger_impl.LoggerDevice().get_wrapper()
+    with test_utils.TestDevice(rdev) as test_device:
+      sent: List[int] = []
+      release = threading.Event()
+
+      def callback(cmd: types_gen.CommandData) -> List[types_gen.DeviceData]:
+        release.wait()
+        assert cmd.snapshot is not None
+        sent.append(cmd.snapshot.gym_step)
+        return []
+
+      test_device.set_callback(callback)
+      for step in range(5):
+        dev.send_snapshot(
+            snapshot.Snapshot(
+                source="pyreach-test",
+                device_data_refs=(),
+                responses=(),
+                gym_server_time=0.001,
+                gym_env_id="test-env-id",
+                gym_run_id="test-run-id",
+                gym_agent_id=None,
+                gym_episode=1,
+                gym_step=step,
+                gym_reward=0.0,
+                gym_done=False,
+                gym_actions=()))
+      # The snapshots wait for the connection, not send_snapshot.
+      self.assertFalse(dev.flush_snapshots(timeout=0.01))
+      release.set()
+      self.assertTrue(dev.flush_snapshots(timeout=10.0))
+      self.assertEqual(sent, [0, 1, 2, 3, 4])
+
+  def test_send_snapshots_synchronously(self) -> None:
+    rdev, dev = logger_impl.LoggerDevice(async_snapshots=False).get_wrapper()
+    with test_utils.TestDevice(rdev) as test_device:
+      dev.send_snapshot(
+          snapshot.Snapshot(
+              source="pyreach-test",
+              device_data_refs=(),
+              responses=(),
+              gym_server_time=0.001,
+              gym_env_id="test-env-id",
+              gym_run_id="test-run-id",
+              gym_agent_id=None,
+              gym_episode=1,
+              gym_step=0,
+              gym_reward=0.0,
+              gym_done=False,
+              gym_actions=()))
+      test_device.expect_command_data([
+          types_gen.CommandData(
+              device_type="client-annotation",
+              data_type="client-annotation",
+              client_annotation=types_gen.ClientAnnotation(
+                  snapshot_annotation=types_gen.SnapshotAnnotation()),
+              snapshot=types_gen.Snapshot(
+                  source="pyreach-test",
+                  gym_server_ts=1,
+                  gym_env_id="test-env-id",
+                  gym_run_id="test-run-id",
+                  gym_episode=1))
+      ])
+
 
 if __name__ == "__main__":
   unittest.main()
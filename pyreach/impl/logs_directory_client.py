@@ -16,8 +16,10 @@
 import json
 import os
 import queue  # pylint: disable=unused-import
-from typing import Any, Dict, Optional, TextIO, Tuple, TypeVar
+import re
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple, TypeVar
 
+from pyreach import core
 from pyreach import host
 from pyreach.common.python import types_gen
 from pyreach.impl import host_impl
@@ -26,16 +28,114 @@ from pyreach.impl import utils
 
 T = TypeVar("T")
 
+# The integer value following a key of a log line.
+_HEADER_VALUE = re.compile(rb"\s*:\s*(-?\d+)")
+
+
+def read_lines(directory: str) -> Iterator[Tuple[Tuple[int, int], bytes]]:
+  """Yield the lines of the numbered files of a log directory.
+
+  Args:
+    directory: the directory, e.g. device-data, of 00000.json, 00001.json...
+
+  Yields:
+    The (file index, byte offset) and the content of each line.
+  """
+  index = 0
+  while True:
+    try:
+      f = open(os.path.join(directory, "%05d.json" % index), "rb")
+    except FileNotFoundError:
+      return
+    with f:
+      offset = 0
+      for line in f:
+        yield (index, offset), line
+        offset += len(line)
+    index += 1
+
+
+def _header_value(line: bytes, key: bytes) -> int:
+  """Return the integer value of a key of a line without nested objects.
+
+  Args:
+    line: the line.
+    key: the quoted key.
+
+  Returns:
+    The value, 0 if the key is missing as JSON omits default values.
+  """
+  start = 0
+  while True:
+    index = line.find(key, start)
+    if index < 0:
+      return 0
+    start = index + len(key)
+    before = index - 1
+    while before >= 0 and line[before] in b" \t":
+      before -= 1
+    # A key follows the start of the object or a comma, and precedes a colon.
+    if before >= 0 and line[before] in b"{,":
+      match = _HEADER_VALUE.match(line, start)
+      if match:
+        return int(match.group(1))
+
+
+def read_header(line: bytes) -> Optional[Tuple[int, int]]:
+  """Read the timestamp and sequence number of a log line.
+
+  A line without nested objects, such as a robot-state, is not parsed: since
+  JSON strings cannot hold an unescaped quote, its keys are found by searching
+  for them. Other lines are parsed, as nested objects may hold keys named "ts"
+  or "seq".
+
+  Args:
+    line: the line.
+
+  Returns:
+    The (ts, seq) of the line, or None if it is not a JSON object.
+  """
+  stripped = line.rstrip()
+  if (stripped.startswith(b"{") and stripped.endswith(b"}") and
+      stripped.count(b"{") == 1):
+    return _header_value(stripped, b'"ts"'), _header_value(stripped, b'"seq"')
+  try:
+    data = json.loads(line)
+  except json.JSONDecodeError:
+    return None
+  if not isinstance(data, dict):
+    return None
+  return int(data.get("ts", 0)), int(data.get("seq", 0))
+
+
+def index_entries(
+    directory: str) -> Iterator[Tuple[Tuple[int, int], float, int]]:
+  """Yield the entries of a playback_client.SeekIndex of a log directory.
+
+  Args:
+    directory: the directory, e.g. device-data, of 00000.json, 00001.json...
+
+  Yields:
+    The (file index, byte offset), time and sequence of each line.
+  """
+  for position, line in read_lines(directory):
+    header = read_header(line)
+    if header is not None:
+      yield position, utils.time_at_timestamp(header[0]), header[1]
+
 
 class _DirectoryReader(playback_client.Iterator[T]):
   """Read from a logged directory (e.g. command-data) in sequence."""
   _working_directory: str
-  _file: Optional[TextIO]
+  _file: Optional[BinaryIO]
   _index: int
+  _offset: int
   _overflow: bool
   _started: bool
   _closed: bool
   _value: Optional[Tuple[T, float, int]]
+  _position: Optional[Tuple[int, int]]
+  _seek_index: Optional[playback_client.SeekIndex]
 
   def valid(self) -> bool:
     """Get if the current value is valid."""
@@ -54,10 +154,13 @@ class _DirectoryReader(playback_client.Iterator[T]):
     self._working_directory = working_directory
     self._file = None
     self._index = 0
+    self._offset = 0
     self._overflow = False
     self._started = False
     self._closed = False
     self._value = None
+    self._position = None
+    self._seek_index = None
 
   def start(self) -> None:
     """Start the directory reader."""
@@ -92,6 +195,61 @@ class _DirectoryReader(playback_client.Iterator[T]):
     self._overflow = False
     return self.step()
 
+  def position(self) -> Optional[Tuple[int, int]]:
+    """Get the (file index, byte offset) of the current value."""
+    return self._position if self._value is not None else None
+
+  def seek_position(self, position: Any) -> bool:
+    """Return to a (file index, byte offset) returned by position()."""
+    assert self._started
+    assert not self._closed
+    index, offset = position
+    if self._file is not None and self._index != index:
+      self._file.close()
+      self._file = None
+    self._index = index
+    self._overflow = False
+    if self._file is None:
+      try:
+        self._file = open(self._filename(index), "rb")
+      except FileNotFoundError:
+        self._overflow = True
+        self._value = None
+        return False
+    self._file.seek(offset)
+    self._offset = offset
+    return self.step()
+
+  def seek(self, time: Optional[float], sequence: Optional[int]) -> bool:
+    """Seek the given data and output it, if available.
+
+    The first seek indexes the time and sequence of every line, so seeks do
+    not parse the lines in between.
+
+    Args:
+      time: the timestamp to seek. If sequence number is not specified, the
+        exact time will be returned.
+      sequence: the sequence number to seek. If specified, the exact sequence
+        number will be returned.
+
+    Returns:
+      Returns if the data object was found and played.
+    """
+    assert self._started
+    assert not self._closed
+    if time is None and sequence is None:
+      raise core.PyReachError("Must specify either timestamp or sequence")
+    if self._seek_index is None:
+      self._seek_index = playback_client.SeekIndex(
+          index_entries(self._working_directory))
+    position = self._seek_index.find(time, sequence, self.position())
+    if position is None:
+      return False
+    return self.seek_position(position)
+
+  def _filename(self, index: int) -> str:
+    return os.path.join(self._working_directory, "%05d.json" % index)
+
   def _next_data(self) -> Optional[Tuple[T, float, int]]:
     """Read the next data item from the stream."""
     assert self._started
@@ -101,19 +259,22 @@ class _DirectoryReader(playback_client.Iterator[T]):
         return None
       if self._file is None:
         try:
-          self._file = open(
-              os.path.join(self._working_directory, "%05d.json" % self._index))
+          self._file = open(self._filename(self._index), "rb")
+          self._offset = 0
         except FileNotFoundError:
           self._overflow = True
           return None
+      offset = self._offset
       line = self._file.readline()
+      self._offset += len(line)
       if not line:
         self._file.close()
         self._file = None
         self._index += 1
       else:
-        data = self.transform(line)
+        data = self.transform(line.decode("utf-8"))
         if data is not None:
+          self._position = (self._index, offset)
           return data
 
   def close(self) -> None:
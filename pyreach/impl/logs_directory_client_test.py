@@ -940,6 +940,30 @@ class LogsDirectoryClientTest(unittest.TestCase):
     self._test_directory_iterator(command_data,
                                   logs_directory_client._CommandDataReader)
 
+  def test_read_header(self) -> None:
+    snapshot = types_gen.CommandData(
+        ts=3000,
+        device_type="client-annotation",
+        data_type="snapshot",
+        snapshot=types_gen.Snapshot(
+            device_data_refs=[types_gen.DeviceDataRef(ts=1000, seq=7)]))
+    key_value = types_gen.DeviceData(
+        ts=4000,
+        seq=8,
+        device_type="settings-engine",
+        data_type="key-value",
+        value=json.dumps({"ts": 1, "seq": 2}))
+    for line, header in (
+        (b'{"seq": 5, "ts": 2000, "joints": [1.0, 2.0]}\n', (2000, 5)),
+        (b'{"deviceType":"robot","ts":2000}', (2000, 0)),
+        (json.dumps(snapshot.to_json()).encode("utf-8"), (3000, 0)),
+        (json.dumps(key_value.to_json()).encode("utf-8"), (4000, 8)),
+        (b'{"seq": 5, "ts": 20', None),
+        (b"not json\n", None),
+        (b"[1, 2]\n", None),
+    ):
+      self.assertEqual(logs_directory_client.read_header(line), header, line)
+
   def test_empty_data_reader(self) -> None:
 
     def factory(
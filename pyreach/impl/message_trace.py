@@ -0,0 +1,234 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Opt-in per-stage latency tracing of DeviceData through the host pipeline.
+
+Every DeviceData received by the host passes through the following stages,
+each of which is measured per (device_type, data_type) when tracing is on:
+
+* client_queue: from the socket read in the client to the ReachHost thread
+  dispatching the message to the devices. Only measured for clients that
+  stamp the receive time (LocalTCPClient, when tracing is enabled before the
+  client is created).
+* device_queue: from the ReachHost dispatch to the dequeue in the device
+  data thread of the device handling the message.
+* decode: Requester.get_message_supplement (e.g. image loading or arm state
+  conversion).
+* callbacks: the update callbacks of the Requester.
+* device: the complete processing of the message by the device.
+* total: from the receive (or dispatch) time until the device has processed
+  the message.
+
+Every device receives every message, but the stages after the dispatch are
+only recorded by the device handling the message: the Requester whose
+get_message_supplement decodes it. Messages that no device decodes are only
+measured up to the dispatch.
+
+Tracing is disabled by default, in which case the only cost is reading the
+module level tracer on each stage. It is enabled by the PYREACH_TRACE
+environment variable, by enable(), or via host.internal.start_message_trace().
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import weakref
+
+from pyreach import internal
+from pyreach.common.python import types_gen
+
+# Attribute used to carry the receive time of a DeviceData across the process
+# boundary of the LocalTCPClient reader process. It is removed when the message
+# is dispatched, so it never reaches the devices.
+RECEIVE_TIME_ATTRIBUTE = "_trace_receive_time"
+
+_PERCENTILES: Tuple[float, ...] = (50.0, 90.0, 99.0, 100.0)
+
+_StageKey = Tuple[str, str, str]
+
+
+class MessageTracer:
+  """Aggregates per-stage latencies of DeviceData messages."""
+
+  _lock: threading.Lock
+  _histograms: Dict[_StageKey, internal.LatencyHistogram]
+  # The (start, dispatch) times of each dispatched message.
+  _times: "weakref.WeakKeyDictionary[types_gen.DeviceData, Tuple[float, float]]"
+  # The message decoded by the device of the current device data thread.
+  _decoded: threading.local
+
+  def __init__(self) -> None:
+    """Init a MessageTracer."""
+    self._lock = threading.Lock()
+    self._histograms = {}
+    self._times = weakref.WeakKeyDictionary()
+    self._decoded = threading.local()
+
+  def record(self, msg: types_gen.DeviceData, stage: str,
+             duration: float) -> None:
+    """Record the latency of a stage.
+
+    Args:
+      msg: the message.
+      stage: the stage name.
+      duration: the latency in seconds.
+    """
+    key = (msg.device_type, msg.data_type, stage)
+    with self._lock:
+      histogram = self._histograms.get(key)
+      if histogram is None:
+        histogram = internal.LatencyHistogram()
+        self._histograms[key] = histogram
+      histogram.record(duration)
+
+  def on_dispatch(self, msgs: Iterable[types_gen.DeviceData]) -> None:
+    """Stamp messages when ReachHost dispatches them to the devices.
+
+    Args:
+      msgs: the messages dispatched.
+    """
+    now = time.time()
+    for msg in msgs:
+      start = msg.__dict__.pop(RECEIVE_TIME_ATTRIBUTE, None)
+      if start is not None:
+        self.record(msg, "client_queue", now - start)
+      else:
+        start = now
+      with self._lock:
+        self._times[msg] = (start, now)
+
+  def on_decode(self, msg: types_gen.DeviceData, start_time: float,
+                decode_time: float, end_time: float) -> None:
+    """Record the decoding of a message by the device handling it.
+
+    Called from the device data thread of the device, which then records the
+    device stages of the message in on_device_data().
+
+    Args:
+      msg: the message.
+      start_time: the time the decoding started.
+      decode_time: the time the decoding ended and the callbacks started.
+      end_time: the time the callbacks ended.
+    """
+    self.record(msg, "decode", decode_time - start_time)
+    self.record(msg, "callbacks", end_time - decode_time)
+    self._decoded.msg = msg
+
+  def on_device_data(self, msg: types_gen.DeviceData,
+                     dequeue_time: float) -> None:
+    """Record the latencies of a message after a device has processed it.
+
+    Nothing is recorded unless the device decoded the message, so that each
+    message is recorded once rather than once per device.
+
+    Args:
+      msg: the message.
+      dequeue_time: the time the device thread started processing it.
+    """
+    if getattr(self._decoded, "msg", None) is not msg:
+      return
+    self._decoded.msg = None
+    now = time.time()
+    self.record(msg, "device", now - dequeue_time)
+    with self._lock:
+      times = self._times.get(msg)
+    if times is not None:
+      self.record(msg, "device_queue", dequeue_time - times[1])
+      self.record(msg, "total", now - times[0])
+
+  def results(self) -> List[internal.MessageTraceStage]:
+    """Return the aggregated latencies.
+
+    Returns:
+      Returns the stages, sorted by device type, data type and stage.
+    """
+    with self._lock:
+      histograms = list(self._histograms.items())
+    stages: List[internal.MessageTraceStage] = []
+    for key, histogram in sorted(histograms):
+      p50, p90, p99, maximum = histogram.percentiles(_PERCENTILES)
+      stages.append(
+          internal.MessageTraceStage(
+              device_type=key[0],
+              data_type=key[1],
+              stage=key[2],
+              count=histogram.total,
+              p50=p50,
+              p90=p90,
+              p99=p99,
+              max=maximum))
+    return stages
+
+  def reset(self) -> None:
+    """Clear all aggregated latencies and the times of dispatched messages."""
+    with self._lock:
+      self._histograms = {}
+      self._times = weakref.WeakKeyDictionary()
+
+
+# The global tracer. None when tracing is disabled.
+_tracer: Optional[MessageTracer] = (
+    MessageTracer() if os.environ.get("PYREACH_TRACE") else None)
+
+
+def get_tracer() -> Optional[MessageTracer]:
+  """Return the global tracer, or None if tracing is disabled."""
+  return _tracer
+
+
+def enable() -> MessageTracer:
+  """Enable tracing.
+
+  Returns:
+    The global tracer.
+  """
+  global _tracer
+  tracer = _tracer
+  if tracer is None:
+    tracer = MessageTracer()
+    _tracer = tracer
+  return tracer
+
+
+def disable() -> None:
+  """Disable tracing."""
+  global _tracer
+  _tracer = None
+
+
+def format_results(stages: List[internal.MessageTraceStage]) -> str:
+  """Format tracing results as a table.
+
+  Args:
+    stages: the results of the tracing.
+
+  Returns:
+    The formatted table.
+  """
+  header = ("device_type", "data_type", "stage", "count", "p50 ms", "p90 ms",
+            "p99 ms", "max ms")
+  rows: List[Tuple[Any, ...]] = [header]
+  for stage in stages:
+    rows.append((stage.device_type, stage.data_type, stage.stage,
+                 str(stage.count), f"{stage.p50 * 1000.0:.3f}",
+                 f"{stage.p90 * 1000.0:.3f}", f"{stage.p99 * 1000.0:.3f}",
+                 f"{stage.max * 1000.0:.3f}"))
+  widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+  lines = []
+  for row in rows:
+    lines.append("  ".join(
+        value.ljust(width) if index < 3 else value.rjust(width)
+        for index, (value, width) in enumerate(zip(row, widths))))
+  return "\n".join(lines)
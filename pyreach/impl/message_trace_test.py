@@ -0,0 +1,124 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for message_trace."""
+
+import pickle
+import time
+from typing import Dict, Optional, Tuple
+import unittest
+
+from pyreach.common.python import types_gen
+from pyreach.impl import message_trace
+from pyreach.impl import requester
+
+
+class _MockRequester(requester.Requester[str]):
+
+  def get_message_supplement(self, msg: types_gen.DeviceData) -> Optional[str]:
+    time.sleep(0.01)
+    return msg.value
+
+
+class _IgnoringRequester(requester.Requester[str]):
+
+  def get_message_supplement(self, msg: types_gen.DeviceData) -> Optional[str]:
+    return None
+
+
+class MessageTraceTest(unittest.TestCase):
+
+  def tearDown(self) -> None:
+    super().tearDown()
+    message_trace.disable()
+
+  def test_tracer(self) -> None:
+    tracer = message_trace.MessageTracer()
+    msg = types_gen.DeviceData(device_type="robot", data_type="robot-state")
+    setattr(msg, message_trace.RECEIVE_TIME_ATTRIBUTE, time.time() - 0.5)
+    # The receive time survives the process boundary of the client.
+    msg = pickle.loads(pickle.dumps(msg))
+    tracer.on_dispatch([msg])
+    self.assertNotIn(message_trace.RECEIVE_TIME_ATTRIBUTE, msg.__dict__)
+    # Devices that do not decode the message record nothing.
+    tracer.on_device_data(msg, time.time())
+    self.assertEqual([stage.stage for stage in tracer.results()],
+                     ["client_queue"])
+    start_time = time.time()
+    tracer.on_decode(msg, start_time, start_time, start_time)
+    tracer.on_device_data(msg, start_time)
+    stages = {stage.stage: stage for stage in tracer.results()}
+    self.assertEqual(
+        sorted(stages), [
+            "callbacks", "client_queue", "decode", "device", "device_queue",
+            "total"
+        ])
+    for stage in stages.values():
+      self.assertEqual(stage.device_type, "robot")
+      self.assertEqual(stage.data_type, "robot-state")
+      self.assertEqual(stage.count, 1)
+    self.assertAlmostEqual(stages["client_queue"].p50, 0.5, delta=0.05)
+    self.assertGreaterEqual(stages["total"].max, stages["client_queue"].max)
+    self.assertIn("client_queue", message_trace.format_results(
+        tracer.results()))
+    tracer.reset()
+    self.assertEqual(tracer.results(), [])
+    # The dispatch time of the message was cleared as well.
+    tracer.on_decode(msg, start_time, start_time, start_time)
+    tracer.on_device_data(msg, start_time)
+    self.assertEqual([stage.stage for stage in tracer.results()],
+                     ["callbacks", "decode", "device"])
+
+  def test_requester(self) -> None:
+    self.assertIsNone(message_trace.get_tracer())
+    tracer = message_trace.enable()
+    self.assertIs(message_trace.enable(), tracer)
+    # Only the device that decodes a message records it.
+    devices = [_MockRequester(), _MockRequester(), _IgnoringRequester()]
+    devices[1]._trace_decode = False
+    for device in devices:
+      device.start()
+    try:
+      msgs = [
+          types_gen.DeviceData(
+              device_type="robot", data_type="key-value", value=str(i))
+          for i in range(3)
+      ]
+      tracer.on_dispatch(msgs)
+      for msg in msgs:
+        for device in devices:
+          device.enqueue_device_data(msg)
+      for device in devices:
+        device.flush()
+    finally:
+      for device in devices:
+        device.close()
+    stages: Dict[Tuple[str, str, str], int] = {
+        (stage.device_type, stage.data_type, stage.stage): stage.count
+        for stage in tracer.results()
+    }
+    self.assertEqual(
+        stages, {("robot", "key-value", stage): 3
+                 for stage in ("callbacks", "decode", "device", "device_queue",
+                               "total")})
+    decode = [
+        stage for stage in tracer.results() if stage.stage == "decode"
+    ][0]
+    self.assertGreaterEqual(decode.p50, 0.009)
+    message_trace.disable()
+    self.assertIsNone(message_trace.get_tracer())
+
+
+if __name__ == "__main__":
+  unittest.main()
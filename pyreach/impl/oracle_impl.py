@@ -15,7 +15,7 @@
 """Internal structure for Oracle."""
 import logging
 import threading
-from typing import Callable, Optional, Set, Tuple
+from typing import Callable, List, Optional, Set, Tuple
 from pyreach import core
 from pyreach import oracle
 from pyreach.common.python import types_gen
@@ -161,27 +161,97 @@ class OracleDevice(requester.Requester[oracle.Prediction]):
     Returns:
       The latest prediction, if available.
     """
-    robot_id = self.get_key_value(
-        device_base.KeyValueKey("settings-engine", "", "robot-name"))
-    if robot_id is None:
-      robot_id = ""
     q = self.send_tagged_request(
-        types_gen.CommandData(
-            ts=utils.timestamp_now(),
-            device_type=self._device_type,
-            device_name=self._device_name,
-            data_type="inference-request",
-            tag=utils.generate_tag(),
-            intent=intent,
-            prediction_type=prediction_type,
-            request_type=request_type,
-            task_code=task_code,
-            label=label,
-            robot_id=robot_id),
+        self._prediction_request(intent, prediction_type, request_type,
+                                 task_code, label),
+        timeout=timeout,
+        expect_messages=1,
+        expect_cmd_status=False)
+    return self._prediction_from_messages(
+        thread_util.extract_all_from_queue(q), intent, prediction_type,
+        request_type, task_code, label)
+
+  def request_prediction(
+      self, intent: str, prediction_type: str, request_type: str,
+      task_code: str, label: str, timeout: float,
+      callback: Callable[[Optional[oracle.Prediction]], None]
+  ) -> Callable[[], None]:
+    """Request a prediction without waiting for it.
+
+    Args:
+      intent: The intent for the oracle.
+      prediction_type: The prediction_type for the oracle.
+      request_type: The request_type for the oracle.
+      task_code: The task_code for the oracle.
+      label: The label for the oracle.
+      timeout: The maximum time to wait for the prediction.
+      callback: Called with the prediction, or None if the request failed. It
+        is called by the device thread with the device lock held, so it must
+        not block.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    q = self.send_tagged_request(
+        self._prediction_request(intent, prediction_type, request_type,
+                                 task_code, label),
         timeout=timeout,
         expect_messages=1,
         expect_cmd_status=False)
-    msgs = thread_util.extract_all_from_queue(q)
+    return self.queue_to_done_callback(
+        q, lambda msgs: callback(
+            self._prediction_from_messages(msgs, intent, prediction_type,
+                                           request_type, task_code, label)))
+
+  def _prediction_request(self, intent: str, prediction_type: str,
+                          request_type: str, task_code: str,
+                          label: str) -> types_gen.CommandData:
+    """Return the command requesting a prediction.
+
+    Args:
+      intent: The intent for the oracle.
+      prediction_type: The prediction_type for the oracle.
+      request_type: The request_type for the oracle.
+      task_code: The task_code for the oracle.
+      label: The label for the oracle.
+
+    Returns:
+      The tagged inference request.
+    """
+    robot_id = self.get_key_value(
+        device_base.KeyValueKey("settings-engine", "", "robot-name"))
+    if robot_id is None:
+      robot_id = ""
+    return types_gen.CommandData(
+        ts=utils.timestamp_now(),
+        device_type=self._device_type,
+        device_name=self._device_name,
+        data_type="inference-request",
+        tag=utils.generate_tag(),
+        intent=intent,
+        prediction_type=prediction_type,
+        request_type=request_type,
+        task_code=task_code,
+        label=label,
+        robot_id=robot_id)
+
+  def _prediction_from_messages(
+      self, msgs: List[Tuple[types_gen.DeviceData, Optional[oracle.Prediction]]],
+      intent: str, prediction_type: str, request_type: str, task_code: str,
+      label: str) -> Optional[oracle.Prediction]:
+    """Return the prediction from the messages of a prediction request.
+
+    Args:
+      msgs: The messages of the request.
+      intent: The intent for the oracle.
+      prediction_type: The prediction_type for the oracle.
+      request_type: The request_type for the oracle.
+      task_code: The task_code for the oracle.
+      label: The label for the oracle.
+
+    Returns:
+      The prediction, or None if the request failed.
+    """
     if not msgs:
       return None
     if (msgs[0][0].data_type == "cmd-status" and
@@ -216,23 +286,9 @@ class OracleDevice(requester.Requester[oracle.Prediction]):
       error_callback: optional callback called if there is an error.
       timeout: the timeout of the callback (default 30 seconds).
     """
-    robot_id = self.get_key_value(
-        device_base.KeyValueKey("settings-engine", "", "robot-name"))
-    if robot_id is None:
-      robot_id = ""
     q = self.send_tagged_request(
-        types_gen.CommandData(
-            ts=utils.timestamp_now(),
-            device_type=self._device_type,
-            device_name=self._device_name,
-            data_type="inference-request",
-            tag=utils.generate_tag(),
-            intent=intent,
-            prediction_type=prediction_type,
-            request_type=request_type,
-            task_code=task_code,
-            label=label,
-            robot_id=robot_id),
+        self._prediction_request(intent, prediction_type, request_type,
+                                 task_code, label),
         timeout=timeout,
         expect_messages=1,
         expect_cmd_status=False)
@@ -428,3 +484,27 @@ class OracleImpl(oracle.Oracle):
     self._device.get_prediction_callback(intent, prediction_type, request_type,
                                          task_code, label, callback,
                                          error_callback, timeout)
+
+  def request_prediction(
+      self, intent: str, prediction_type: str, request_type: str,
+      task_code: str, label: str, timeout: float,
+      callback: Callable[[Optional[oracle.Prediction]], None]
+  ) -> Callable[[], None]:
+    """Request a prediction without waiting for it.
+
+    Args:
+      intent: The intent for the oracle.
+      prediction_type: The prediction_type for the oracle.
+      request_type: The request_type for the oracle.
+      task_code: The task_code for the oracle.
+      label: The label for the oracle.
+      timeout: The maximum time to wait for the prediction.
+      callback: Called with the prediction, or None if the request failed. It
+        must not block.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    return self._device.request_prediction(intent, prediction_type,
+                                           request_type, task_code, label,
+                                           timeout, callback)
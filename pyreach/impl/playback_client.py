@@ -14,9 +14,11 @@
 
 """Shared utilities for playback clients."""
 
+import bisect
 import queue
 import threading
-from typing import Callable, Generic, Optional, Set, Tuple, TypeVar
+from typing import (Callable, Dict, Generic, Hashable, Iterable, List, Optional,
+                    Set, Tuple, TypeVar)
 
 from pyreach import core
 from pyreach.common.python import types_gen
@@ -82,11 +84,98 @@ class Iterator(Generic[T]):
       self.step()
     return False
 
+  def position(self) -> Optional[Hashable]:
+    """Get the position of the current value.
+
+    Returns:
+      An opaque position that seek_position() returns to, or None if there is
+      no current value or the iterator does not support positions.
+    """
+    return None
+
+  def seek_position(self, position: Hashable) -> bool:
+    """Return to a position previously returned by position().
+
+    Args:
+      position: the position.
+
+    Returns:
+      Returns if the value at the position was loaded.
+    """
+    raise NotImplementedError
+
   def close(self) -> None:
     """Close the object."""
     raise NotImplementedError
 
 
+class SeekIndex:
+  """Index of the time and sequence of each value of an iterator.
+
+  Resolves Iterator.seek() without reading the values: the values matching a
+  time and/or sequence are looked up by key, then the first one at or after
+  the current position is selected by bisection, wrapping to the first one in
+  the log. This is the same value the linear search of Iterator.seek() finds.
+  """
+
+  _positions: List[Hashable]
+  _ordinals: Dict[Hashable, int]
+  _times: List[float]
+  _by_time: Dict[float, List[int]]
+  _by_sequence: Dict[int, List[int]]
+
+  def __init__(self, entries: Iterable[Tuple[Hashable, float, int]]) -> None:
+    """Build the index.
+
+    Args:
+      entries: the (position, time, sequence) of each value, in log order.
+    """
+    self._positions = []
+    self._ordinals = {}
+    self._times = []
+    self._by_time = {}
+    self._by_sequence = {}
+    for position, time, sequence in entries:
+      ordinal = len(self._positions)
+      self._positions.append(position)
+      self._ordinals[position] = ordinal
+      self._times.append(time)
+      self._by_time.setdefault(time, []).append(ordinal)
+      self._by_sequence.setdefault(sequence, []).append(ordinal)
+
+  def __len__(self) -> int:
+    return len(self._positions)
+
+  def find(self, time: Optional[float], sequence: Optional[int],
+           current: Optional[Hashable]) -> Optional[Hashable]:
+    """Find the position of the value to seek.
+
+    Args:
+      time: the time to seek, or None.
+      sequence: the sequence number to seek, or None.
+      current: the current position of the iterator, None if at the end.
+
+    Returns:
+      The position of the value, or None if there is no matching value.
+    """
+    if time is None and sequence is None:
+      raise core.PyReachError("Must specify either timestamp or sequence")
+    if sequence is None:
+      candidates = self._by_time.get(time, [])
+    else:
+      candidates = self._by_sequence.get(sequence, [])
+    if not candidates:
+      return None
+    start = len(self._positions)
+    if current is not None:
+      start = self._ordinals.get(current, 0)
+    first = bisect.bisect_left(candidates, start)
+    for ordinal in candidates[first:] + candidates[:first]:
+      if time is None or self._times[ordinal] == time:
+        return self._positions[ordinal]
+    return None
+
+
 class ClientSimulator:
   """ClientSimulator filters and transforms data to simulate a client session."""
   _start: Optional[Tuple[float, int]]
@@ -261,6 +350,8 @@ class PlaybackClient(client.PlaybackClient):
   _allow_client_logs: bool
   _client_simulator: Optional[ClientSimulator]
   _gym_run_id: Optional[str]
+  _snapshot_index: Optional[List[Tuple[Snapshot, Hashable]]]
+  _snapshot_keys: Dict[Tuple[Optional[str], Optional[int], Optional[int]], int]
   _queue: "queue.Queue[Optional[types_gen.DeviceData]]"
 
   def __init__(self, lock: Optional[threading.Lock] = None) -> None:
@@ -274,6 +365,8 @@ class PlaybackClient(client.PlaybackClient):
     self._command_data_iterator = None
     self._client_simulator = None
     self._gym_run_id = None
+    self._snapshot_index = None
+    self._snapshot_keys = {}
     self._queue = queue.Queue()
     self._closed = False
     self._allow_client_logs = False
@@ -367,28 +460,63 @@ class PlaybackClient(client.PlaybackClient):
     if self._closed or not self._command_data_iterator:
       return None
     while self._command_data_iterator.valid():
-      step = self._command_data_iterator.value()
-      assert step
-      cmd: Optional[types_gen.CommandData] = step[0]
-      if self._client_simulator and cmd:
-        cmd = self._client_simulator.transform_command(cmd)
-      if cmd and cmd.snapshot and (
-          (not cmd.origin_client and self._allow_client_logs) or
-          not self._client_simulator or
-          self._client_simulator.client_id == cmd.origin_client) and (
-              self._gym_run_id is None or
-              self._gym_run_id == cmd.snapshot.gym_run_id):
-        snap = snapshot_impl.reverse_snapshot(cmd.snapshot)
-        if snap:
-          self._command_data_iterator.step()
-          return snap
+      snap = self._current_snapshot()
       self._command_data_iterator.step()
+      if snap:
+        return snap
+    return None
+
+  def _current_snapshot(self) -> Optional[Snapshot]:
+    """Get the snapshot of the current command-data, if any."""
+    assert self._command_data_iterator
+    step = self._command_data_iterator.value()
+    assert step
+    cmd: Optional[types_gen.CommandData] = step[0]
+    if self._client_simulator and cmd:
+      cmd = self._client_simulator.transform_command(cmd)
+    if cmd and cmd.snapshot and (
+        (not cmd.origin_client and self._allow_client_logs) or
+        not self._client_simulator or
+        self._client_simulator.client_id == cmd.origin_client) and (
+            self._gym_run_id is None or
+            self._gym_run_id == cmd.snapshot.gym_run_id):
+      return snapshot_impl.reverse_snapshot(cmd.snapshot)
     return None
 
+  def _build_snapshot_index(self) -> bool:
+    """Index the snapshots of the command-data by position and key.
+
+    Returns:
+      False if the command-data iterator does not support positions.
+    """
+    assert self._command_data_iterator
+    iterator = self._command_data_iterator
+    index: List[Tuple[Snapshot, Hashable]] = []
+    keys: Dict[Tuple[Optional[str], Optional[int], Optional[int]], int] = {}
+    iterator.reset()
+    while iterator.valid():
+      position = iterator.position()
+      if position is None:
+        return False
+      snap = self._current_snapshot()
+      if snap:
+        for gym_run_id in (snap.gym_run_id, None):
+          for gym_episode in (snap.gym_episode, None):
+            for gym_step in (snap.gym_step, None):
+              keys.setdefault((gym_run_id, gym_episode, gym_step), len(index))
+        index.append((snap, position))
+      iterator.step()
+    self._snapshot_index = index
+    self._snapshot_keys = keys
+    return True
+
   def seek_snapshot(self, gym_run_id: Optional[str], gym_episode: Optional[int],
                     gym_step: Optional[int]) -> Optional[Snapshot]:
     """Seek the oldest snapshot that matches the given criteria.
 
+    The first seek indexes the snapshots of the command-data, if the iterator
+    supports positions, so later seeks do not re-read the log.
+
     Args:
       gym_run_id: The gym_run_id of the snapshot to seek.
       gym_episode: The gym_episode of the snapshot to seek.
@@ -400,6 +528,20 @@ class PlaybackClient(client.PlaybackClient):
     with self._lock:
       if self._closed or not self._command_data_iterator:
         return None
+      if self._snapshot_index is not None or self._build_snapshot_index():
+        assert self._snapshot_index is not None
+        ordinal = self._snapshot_keys.get((gym_run_id, gym_episode, gym_step))
+        if ordinal is None:
+          # Like a linear search, leave no snapshot for next_snapshot().
+          if self._snapshot_index:
+            self._command_data_iterator.seek_position(
+                self._snapshot_index[-1][1])
+            self._command_data_iterator.step()
+          return None
+        snap, position = self._snapshot_index[ordinal]
+        self._command_data_iterator.seek_position(position)
+        self._command_data_iterator.step()
+        return snap
       self._command_data_iterator.reset()
       while True:
         snap = self._next_snapshot()
@@ -520,6 +520,28 @@ class PlaybackClientTest(unittest.TestCase):
                 tag="",
                 origin_client="client-1")))
 
+  def test_seek_index(self) -> None:
+    index = playback_client.SeekIndex([
+        ("a", 1.0, 1),
+        ("b", 1.0, 2),
+        ("c", 2.0, 1),
+        ("d", 3.0, 3),
+    ])
+    self.assertEqual(len(index), 4)
+    self.assertRaises(core.PyReachError, index.find, None, None, "a")
+    # Matches at or after the current position win, else the first match.
+    self.assertEqual(index.find(None, 1, "a"), "a")
+    self.assertEqual(index.find(None, 1, "b"), "c")
+    self.assertEqual(index.find(None, 1, "d"), "a")
+    self.assertEqual(index.find(None, 1, None), "a")
+    self.assertEqual(index.find(1.0, None, "b"), "b")
+    self.assertEqual(index.find(1.0, None, "c"), "a")
+    self.assertEqual(index.find(2.0, 1, "a"), "c")
+    self.assertEqual(index.find(3.0, 3, None), "d")
+    self.assertIsNone(index.find(2.0, 2, "a"))
+    self.assertIsNone(index.find(4.0, None, "a"))
+    self.assertIsNone(index.find(None, 4, "a"))
+
   def test_data_reader(self) -> None:
     """Test the simulated device-data reader."""
     device_data = [
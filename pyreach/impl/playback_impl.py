@@ -15,10 +15,12 @@
 """Implementation of the playback API."""
 import dataclasses
 import logging
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 
+from pyreach.common.python import types_gen
 from pyreach.core import PyReachStatus
 from pyreach.impl import client as cli
+from pyreach.impl import internal_impl
 from pyreach.impl import reach_host
 from pyreach.impl import utils
 from pyreach.internal import InternalPlayback
@@ -32,6 +34,8 @@ class PlaybackDevice:
   _internal: InternalPlayback
   _host: reach_host.ReachHost
   _client: cli.PlaybackClient
+  _seek: Callable[[Optional[float], Optional[int]],
+                  Optional[types_gen.DeviceData]]
 
   def __init__(self, internal: InternalPlayback, host: reach_host.ReachHost,
                client: cli.Client) -> None:
@@ -39,6 +43,16 @@ class PlaybackDevice:
     self._host = host
     assert isinstance(client, cli.PlaybackClient)
     self._client = client
+    if isinstance(internal, internal_impl.PlaybackImpl):
+      self._seek = internal.seek_typed_device_data
+    else:
+      self._seek = self._seek_proto
+
+  def _seek_proto(self, time: Optional[float],
+                  sequence: Optional[int]) -> Optional[types_gen.DeviceData]:
+    """Seek device data through the proto API of the internal playback."""
+    proto = self._internal.seek_device_data(time, sequence)
+    return utils.ImagedDeviceData.from_proto(proto) if proto else None
 
   def next_snapshot(self) -> Optional[Snapshot]:
     """Get the next command-data snapshot."""
@@ -67,16 +81,20 @@ class PlaybackDevice:
     Returns:
       The snapshot, with all of the snapshot responses loaded.
     """
-    for reference in sorted(
-        snapshot.device_data_refs, key=lambda ref: (ref.time, ref.sequence)):
-      self._internal.seek_device_data(reference.time, reference.sequence)
+    # Load the device data and response references in one sweep in log order,
+    # loading each reference once.
+    references = {(ref.time, ref.sequence) for ref in snapshot.device_data_refs}
+    for response in snapshot.responses:
+      if not isinstance(response.reference, PyReachStatus):
+        references.add((response.reference.time, response.reference.sequence))
+    loaded: Dict[Tuple[float, int], Optional[types_gen.DeviceData]] = {}
+    for time, sequence in sorted(references):
+      loaded[(time, sequence)] = self._seek(time, sequence)
     responses = []
     for response in snapshot.responses:
       if not isinstance(response.reference, PyReachStatus):
         kv = dataclasses.asdict(response)
-        proto = self._internal.seek_device_data(response.reference.time,
-                                                response.reference.sequence)
-        data = utils.ImagedDeviceData.from_proto(proto) if proto else None
+        data = loaded[(response.reference.time, response.reference.sequence)]
         if data is None:
           logging.warning("DeviceData missing for snapshot response: %s",
                           str(response))
@@ -86,7 +104,7 @@ class PlaybackDevice:
               "DeviceData has no status for snapshot response: %s: %s",
               str(response), str(data.to_json()))
           continue
-        if data.device_type != "cmd-status":
+        if data.data_type != "cmd-status":
           logging.warning(
               "DeviceData is not command status for snapshot response: %s: %s",
               str(snapshot), str(data.to_json()))
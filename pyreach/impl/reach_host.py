@@ -24,7 +24,11 @@ from pyreach.common.python import types_gen
 from pyreach.core import PyReachError
 from pyreach.impl import client as cli
 from pyreach.impl import device_base
+from pyreach.impl import key_value_registry
 from pyreach.impl import machine_interfaces
+from pyreach.impl import message_trace
+from pyreach.impl import session_recorder
+from pyreach.impl import stream_scheduler
 from pyreach.impl import thread_util
 from pyreach.impl import utils
 
@@ -404,13 +408,16 @@ class ReachHost:
   _take_control_at_start: bool
   _is_closed: bool
   _is_playback: bool
+  _stream_scheduler: stream_scheduler.StreamScheduler
+  _recorder: Optional[session_recorder.SessionRecorder]
 
   def __init__(
       self,
       client: cli.Client,
       devices: List[device_base.DeviceBase],
       take_control_at_start: bool = True,
-      initial_messages: Optional[List[Optional[types_gen.DeviceData]]] = None
+      initial_messages: Optional[List[Optional[types_gen.DeviceData]]] = None,
+      recorder: Optional[session_recorder.SessionRecorder] = None
   ) -> None:
     """Construct a ReachHost instance.
 
@@ -419,8 +426,11 @@ class ReachHost:
       devices: The list of Devices supported.
       take_control_at_start: If True, immediately take control.
       initial_messages: A list of initial request messages.
+      recorder: If set, records the messages read from and sent to the
+        client, and is closed with the host.
     """
     self._is_closed = False
+    self._recorder = recorder
     self._is_playback = isinstance(client, cli.PlaybackClient)
     self._client = client
     self._devices = devices.copy()
@@ -440,15 +450,27 @@ class ReachHost:
         device_base.KeyValueKey(
             device_type="settings-engine", device_name="", key="display-name"))
     self._devices.append(self._display_name_reader)
+    self._stream_scheduler = stream_scheduler.StreamScheduler()
     for device in self._devices:
       device.set_send_cmd(self._send_to_client)
+      device.set_stream_scheduler(self._stream_scheduler)
     self._thread = threading.Thread(
         name="host_thread", target=self._run_thread, args=(initial_messages,))
 
-  def start(self) -> None:
-    """Start the host."""
-    success = False
+  def start(self, wait: bool = True) -> None:
+    """Start the host.
+
+    Args:
+      wait: If True, also wait_started().
+    """
+    self._stream_scheduler.start()
     self._thread.start()
+    if wait:
+      self.wait_started()
+
+  def wait_started(self) -> None:
+    """Wait for control, if taken at start, and for the host names."""
+    success = False
     try:
       if self._take_control_at_start:
         self.wait_for_control()
@@ -469,6 +491,14 @@ class ReachHost:
     for device in self._devices:
       device.set_machine_interfaces(interfaces)
 
+  def request_rates(self) -> Dict[Tuple[str, str], float]:
+    """Return the measured untagged frame request rates per device.
+
+    Returns:
+      The requests per second by (device type, device name).
+    """
+    return self._stream_scheduler.request_rates()
+
   def get_ping_time(self) -> Optional[float]:
     """Return the latest ping time.
 
@@ -568,6 +598,8 @@ class ReachHost:
 
   def _send_to_client(self, msg: types_gen.CommandData) -> None:
     """Send CommandData message to client."""
+    if self._recorder is not None:
+      self._recorder.record_command_data(msg)
     self._client.send_cmd(msg)
 
   def _read_from_client(
@@ -629,9 +661,11 @@ class ReachHost:
       initial_messages: Optional[List[Optional[types_gen.DeviceData]]]) -> None:
     """Thread to run the host device processing loop."""
     active: bool = True
+    key_values = key_value_registry.KeyValueRegistry()
     for dev in self._devices:
       dev.start()
-    last_key_value_requests: Dict[device_base.KeyValueKey, float] = {}
+      if not self._is_playback:
+        key_values.register(dev.get_key_values())
     is_first = True
     tasks_to_complete = 0
     while active:
@@ -639,6 +673,9 @@ class ReachHost:
       # Get messages
       messages, active, tasks_to_complete = self._read_from_client(
           0.0 if is_first else 1.0)
+      if self._recorder is not None:
+        for message in messages:
+          self._recorder.record_device_data(message)
       if is_first:
         if initial_messages:
           tasks_to_complete += len(initial_messages)
@@ -647,26 +684,16 @@ class ReachHost:
             active = False
         is_first = False
       # Send to devices
+      tracer = message_trace.get_tracer()
+      if tracer is not None:
+        tracer.on_dispatch(messages)
       for dev in self._devices:
         for message in messages:
           dev.enqueue_device_data(message)
       # Send any key-value requests
-      request_keys: Set[device_base.KeyValueKey] = set()
-      for dev in self._devices:
-        for kv in dev.get_key_values():
-          if dev.get_key_value(kv) is None:
-            request_keys.add(kv)
-      remove_keys = set()
-      for kv, request_time in last_key_value_requests.items():
-        if time.time() > request_time + 15:
-          remove_keys.add(kv)
-      for kv in remove_keys:
-        del last_key_value_requests[kv]
-      for kv in request_keys:
-        if kv in last_key_value_requests:
-          continue
-        last_key_value_requests[kv] = time.time()
-        if not self._is_playback:
+      if key_values.unresolved:
+        key_values.resolve(messages)
+        for kv in key_values.due():
           self._send_to_client(
               types_gen.CommandData(
                   ts=utils.timestamp_now(),
@@ -676,9 +703,12 @@ class ReachHost:
                   data_type="key-value-request",
                   key=kv.key))
     self._complete_tasks(tasks_to_complete)
+    self._stream_scheduler.close()
     for dev in self._devices:
       dev.close()
     self._client.close()
+    if self._recorder is not None:
+      self._recorder.close()
     self._is_closed = True
 
   def add_host_id_callback(
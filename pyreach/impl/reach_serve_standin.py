@@ -0,0 +1,710 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A local stand-in for reach serve, and a load generator.
+
+The stand-in speaks the line-delimited JSON protocol of local_tcp_client: each
+line sent by a client is a CommandData, each line sent back is a DeviceData.
+It describes one workcell with an arm, a vacuum, a force torque sensor, a color
+camera and a depth camera, answers the startup, session, key-value, frame and
+reach-script requests of a host, and publishes the device streams at
+configurable rates. It lets connection, dispatch and request throughput be
+measured on one machine without a robot:
+
+  with reach_serve_standin.ReachServeStandin(
+      reach_serve_standin.StandinConfig(color_rate=30.0)) as server:
+    results = reach_serve_standin.run_load("localhost", server.port)
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2  # type: ignore
+import numpy as np
+from PIL import Image  # type: ignore
+
+from pyreach.common.python import types_gen
+from pyreach.impl import local_tcp_client
+from pyreach.impl import stream_scheduler
+from pyreach.impl import test_data
+from pyreach.impl import utils
+
+# The number of frame files reused in turn when unique frame files are written.
+_FRAME_FILE_RING = 64
+
+_JOINTS = [
+    1.665570735931396, -0.7995384496501465, 1.341465298329489,
+    -2.12082638363027, 4.660228729248047, 0.01271963119506836
+]
+_POSE = [
+    0.1961122234076476, -0.7146550885497088, 0.1642837633972083,
+    0.1186541477907012, -3.075739605978813, -0.01666054968029903
+]
+_FORCE_TORQUE_PINS = ("fx", "fy", "fz", "tx", "ty", "tz")
+
+
+@dataclasses.dataclass
+class StandinConfig:
+  """Configuration of a ReachServeStandin.
+
+  Rates are in messages per second. Frame requests are answered whatever the
+  rates. A rate of zero disables publishing of the stream, and the device is
+  then described to hosts as answering frame requests instead.
+
+  Attributes:
+    robot_state_rate: the publishing rate of the arm robot-state.
+    color_rate: the publishing rate of the color camera frames.
+    depth_rate: the publishing rate of the depth camera color-depth frames.
+    vacuum_rate: the publishing rate of the vacuum and blowoff output-state.
+    force_torque_rate: the publishing rate of the force torque sensor-state.
+    color_file: an existing color image file sent with every color frame. A
+      synthetic image is generated if empty.
+    depth_file: an existing 16-bit depth image file sent with every depth frame.
+      A synthetic image is generated if empty.
+    image_width: the width of the synthetic images.
+    image_height: the height of the synthetic images.
+    unique_frame_files: if True, the images are written to a new file for each
+      frame, as a camera would, instead of referring to the same files.
+    script_duration: the time in seconds between the executing and the done
+      status of reach-scripts.
+  """
+  robot_state_rate: float = 10.0
+  color_rate: float = 0.0
+  depth_rate: float = 0.0
+  vacuum_rate: float = 10.0
+  force_torque_rate: float = 0.0
+  color_file: str = ""
+  depth_file: str = ""
+  image_width: int = 640
+  image_height: int = 480
+  unique_frame_files: bool = False
+  script_duration: float = 0.0
+
+
+class _Connection:
+  """A client connected to the stand-in."""
+
+  sock: socket.socket
+  lock: threading.Lock
+  control_session_active: bool
+  closed: bool
+
+  def __init__(self, sock: socket.socket) -> None:
+    self.sock = sock
+    self.lock = threading.Lock()
+    self.control_session_active = False
+    self.closed = False
+
+  def send(self, data: bytes) -> bool:
+    """Send encoded device data, return False if the connection is closed."""
+    with self.lock:
+      if self.closed:
+        return False
+      try:
+        self.sock.sendall(data)
+      except OSError:
+        self.closed = True
+        return False
+    return True
+
+  def close(self) -> None:
+    with self.lock:
+      self.closed = True
+    try:
+      self.sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+      pass
+    self.sock.close()
+
+
+def _encode(messages: List[types_gen.DeviceData]) -> bytes:
+  """Encode device data as JSON lines."""
+  return b"".join((json.dumps(msg.to_json()) + "\n").encode("utf-8")
+                  for msg in messages)
+
+
+class ReachServeStandin:
+  """A local TCP server standing in for reach serve."""
+
+  _config: StandinConfig
+  _listener: socket.socket
+  _lock: threading.Lock
+  _connections: List[_Connection]
+  _threads: List[threading.Thread]
+  _scheduler: stream_scheduler.StreamScheduler
+  _frame_dir: tempfile.TemporaryDirectory  # type: ignore
+  _color_file: str
+  _depth_file: str
+  _seq: int
+  _vacuum_on: bool
+  _key_values: Dict[Tuple[str, str, str], str]
+  _commands_received: int
+  _messages_sent: int
+  _bytes_sent: int
+  _closed: bool
+
+  def __init__(self,
+               config: Optional[StandinConfig] = None,
+               hostname: str = "localhost",
+               port: int = 0) -> None:
+    """Init a ReachServeStandin and start listening.
+
+    Args:
+      config: the configuration, defaults to StandinConfig().
+      hostname: the address to listen on.
+      port: the TCP port to listen on, or 0 for any free port.
+    """
+    self._config = config if config is not None else StandinConfig()
+    self._lock = threading.Lock()
+    self._connections = []
+    self._threads = []
+    self._scheduler = stream_scheduler.StreamScheduler()
+    self._seq = 0
+    self._vacuum_on = False
+    self._commands_received = 0
+    self._messages_sent = 0
+    self._bytes_sent = 0
+    self._closed = False
+    self._frame_dir = tempfile.TemporaryDirectory(prefix="reach_standin_")
+    self._color_file = self._config.color_file
+    self._depth_file = self._config.depth_file
+    self._write_synthetic_images()
+    self._key_values = {
+        ("settings-engine", "", "robot-name"): "reach-serve-standin",
+        ("settings-engine", "", "display-name"): "Reach serve stand-in",
+        ("settings-engine", "", "calibration.json"):
+            test_data.get_calibration_json(),
+        ("settings-engine", "", "workcell_constraints.json"):
+            test_data.get_workcell_constraints_json(),
+        ("settings-engine", "", "workcell_io.json"):
+            test_data.get_workcell_io_json(),
+        ("settings-engine", "", "actionsets.json"):
+            test_data.get_actionsets_json(),
+        ("robot", "", "robot_constraints.json"):
+            test_data.get_robot_constraints_json(),
+    }
+    self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    self._listener.bind((hostname, port))
+    self._listener.listen(16)
+
+  @property
+  def port(self) -> int:
+    """The TCP port the stand-in listens on."""
+    port: int = self._listener.getsockname()[1]
+    return port
+
+  @property
+  def config(self) -> StandinConfig:
+    """The configuration of the stand-in."""
+    return self._config
+
+  def start(self) -> None:
+    """Start accepting clients and publishing the streams."""
+    thread = threading.Thread(
+        name="reach_standin_accept", target=self._accept, daemon=True)
+    self._threads.append(thread)
+    thread.start()
+    streams: List[Tuple[str, float]] = [
+        ("robot", self._config.robot_state_rate),
+        ("color-camera", self._config.color_rate),
+        ("depth-camera", self._config.depth_rate),
+        ("vacuum", self._config.vacuum_rate),
+        ("blowoff", self._config.vacuum_rate),
+        ("force-torque-sensor", self._config.force_torque_rate),
+    ]
+    for device_type, rate in streams:
+      if rate > 0:
+        self._scheduler.set_period(self, device_type, "", 1.0 / rate,
+                                   self._publish)
+    self._scheduler.start()
+
+  def close(self) -> None:
+    """Stop the stand-in and disconnect all clients."""
+    with self._lock:
+      if self._closed:
+        return
+      self._closed = True
+      connections = list(self._connections)
+    self._scheduler.close()
+    try:
+      self._listener.shutdown(socket.SHUT_RDWR)
+    except OSError:
+      pass
+    self._listener.close()
+    for connection in connections:
+      connection.close()
+    for thread in self._threads:
+      if thread is not threading.current_thread():
+        thread.join()
+    self._frame_dir.cleanup()
+
+  def __enter__(self) -> "ReachServeStandin":
+    self.start()
+    return self
+
+  def __exit__(self, typ: Any, value: Any, traceback: Any) -> None:
+    self.close()
+
+  def stats(self) -> Dict[str, int]:
+    """Return the counts of commands received and device data sent."""
+    with self._lock:
+      return {
+          "clients": len(self._connections),
+          "commands_received": self._commands_received,
+          "messages_sent": self._messages_sent,
+          "bytes_sent": self._bytes_sent,
+      }
+
+  def publish_rates(self) -> Dict[str, float]:
+    """Return the measured publishing rates by device type."""
+    return {
+        device_type: rate for (device_type, _), rate in
+        self._scheduler.request_rates().items()
+    }
+
+  def _write_synthetic_images(self) -> None:
+    """Generate the images that are not configured."""
+    width = self._config.image_width
+    height = self._config.image_height
+    if not self._color_file:
+      x = np.linspace(0, 255, width, dtype=np.uint8)
+      y = np.linspace(0, 255, height, dtype=np.uint8)
+      color = np.stack(
+          np.broadcast_arrays(x[None, :], y[:, None], (x[None, :] // 2 +
+                                                       y[:, None] // 2)),
+          axis=-1)
+      self._color_file = os.path.join(self._frame_dir.name, "color.jpg")
+      Image.fromarray(color).save(self._color_file, quality=90)
+    if not self._depth_file:
+      depth = np.full((height, width), 1000, dtype=np.uint16)
+      depth += np.arange(width, dtype=np.uint16)[None, :]
+      self._depth_file = os.path.join(self._frame_dir.name, "depth.png")
+      cv2.imwrite(self._depth_file, depth)
+
+  def _frame_file(self, source: str, seq: int) -> str:
+    """Return the image file of a frame.
+
+    Args:
+      source: the image file.
+      seq: the sequence number of the frame.
+
+    Returns:
+      The source, or a copy of it unique among recent frames if the stand-in
+      writes unique frame files.
+    """
+    if not self._config.unique_frame_files:
+      return source
+    base, ext = os.path.splitext(os.path.basename(source))
+    path = os.path.join(self._frame_dir.name,
+                        "%s-%d%s" % (base, seq % _FRAME_FILE_RING, ext))
+    with open(source, "rb") as f:
+      data = f.read()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+      f.write(data)
+    os.replace(tmp, path)
+    return path
+
+  def _next_seq(self) -> int:
+    with self._lock:
+      self._seq += 1
+      return self._seq
+
+  def _device_message(self, device_type: str, device_name: str,
+                      tag: str) -> Optional[types_gen.DeviceData]:
+    """Synthesize the state or frame message of a device.
+
+    Args:
+      device_type: the device type.
+      device_name: the device name.
+      tag: the tag of the request answered, or empty for a stream.
+
+    Returns:
+      The message, or None if the stand-in has no such device.
+    """
+    if device_name:
+      return None
+    ts = utils.timestamp_now()
+    seq = self._next_seq()
+    if device_type == "robot":
+      return types_gen.DeviceData(
+          device_type="robot",
+          data_type="robot-state",
+          ts=ts,
+          seq=seq,
+          tag=tag,
+          pose=_POSE,
+          joints=_JOINTS,
+          force=[0.0] * 6,
+          base_t_origin=[0.1, 0.0, 0.0, 0.0, 0.0, 0.0],
+          is_robot_power_on=True,
+          safety_message="NORMAL",
+          robot_mode="remote")
+    if device_type == "color-camera":
+      return types_gen.DeviceData(
+          device_type="color-camera",
+          data_type="color",
+          ts=ts,
+          seq=seq,
+          tag=tag,
+          color=self._frame_file(self._color_file, seq))
+    if device_type == "depth-camera":
+      return types_gen.DeviceData(
+          device_type="depth-camera",
+          data_type="color-depth",
+          ts=ts,
+          seq=seq,
+          tag=tag,
+          color=self._frame_file(self._color_file, seq),
+          depth=self._frame_file(self._depth_file, seq))
+    if device_type in ("vacuum", "blowoff"):
+      with self._lock:
+        on = self._vacuum_on if device_type == "vacuum" else False
+      return types_gen.DeviceData(
+          device_type=device_type,
+          data_type="output-state",
+          ts=ts,
+          seq=seq,
+          tag=tag,
+          state=[types_gen.CapabilityState(pin=device_type, int_value=int(on))])
+    if device_type == "force-torque-sensor":
+      return types_gen.DeviceData(
+          device_type="force-torque-sensor",
+          data_type="sensor-state",
+          ts=ts,
+          seq=seq,
+          tag=tag,
+          state=[
+              types_gen.CapabilityState(pin=pin, float_value=0.1 * i)
+              for i, pin in enumerate(_FORCE_TORQUE_PINS)
+          ])
+    return None
+
+  def _publish(self, device_type: str, device_name: str) -> bool:
+    """Publish the stream of a device to all clients.
+
+    Args:
+      device_type: the device type.
+      device_name: the device name.
+
+    Returns:
+      True to stop the stream.
+    """
+    msg = self._device_message(device_type, device_name, "")
+    if msg is None:
+      return True
+    self._broadcast(_encode([msg]))
+    return False
+
+  def _broadcast(self, data: bytes) -> None:
+    with self._lock:
+      connections = list(self._connections)
+    for connection in connections:
+      self._send(connection, data, 1)
+
+  def _send(self, connection: _Connection, data: bytes, count: int) -> None:
+    if connection.send(data):
+      with self._lock:
+        self._messages_sent += count
+        self._bytes_sent += len(data)
+
+  def _accept(self) -> None:
+    """Accept clients until the stand-in is closed."""
+    while True:
+      try:
+        sock, _ = self._listener.accept()
+      except OSError:
+        return
+      sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      connection = _Connection(sock)
+      thread = threading.Thread(
+          name="reach_standin_client",
+          target=self._serve,
+          args=(connection,),
+          daemon=True)
+      with self._lock:
+        if self._closed:
+          connection.close()
+          return
+        self._connections.append(connection)
+        self._threads.append(thread)
+      thread.start()
+
+  def _serve(self, connection: _Connection) -> None:
+    """Answer the commands of a client until it disconnects."""
+    pending = b""
+    try:
+      while True:
+        try:
+          packet = connection.sock.recv(65536)
+        except OSError:
+          break
+        if not packet:
+          break
+        lines = (pending + packet).split(b"\n")
+        pending = lines.pop()
+        replies: List[types_gen.DeviceData] = []
+        for line in lines:
+          try:
+            cmd = types_gen.CommandData.from_json(json.loads(line))
+          except ValueError as e:
+            logging.warning("command could not be decoded from JSON: %s", e)
+            continue
+          replies.extend(self._respond(connection, cmd))
+        with self._lock:
+          self._commands_received += len(lines)
+        if replies:
+          self._send(connection, _encode(replies), len(replies))
+    finally:
+      with self._lock:
+        if connection in self._connections:
+          self._connections.remove(connection)
+      connection.close()
+
+  def _cmd_status(self, cmd: types_gen.CommandData,
+                  status: str) -> types_gen.DeviceData:
+    return types_gen.DeviceData(
+        device_type=cmd.device_type,
+        device_name=cmd.device_name,
+        data_type="cmd-status",
+        ts=utils.timestamp_now(),
+        tag=cmd.tag,
+        status=status)
+
+  def _connected_clients(
+      self, connection: _Connection) -> types_gen.DeviceData:
+    return types_gen.DeviceData(
+        device_type="session-manager",
+        data_type="connected-clients",
+        ts=utils.timestamp_now(),
+        connected_clients=types_gen.ConnectedClients(clients=[
+            types_gen.ConnectedClient(
+                uid="reach-serve-standin",
+                is_current=True,
+                control_session_active=connection.control_session_active)
+        ]))
+
+  def _respond(self, connection: _Connection,
+               cmd: types_gen.CommandData) -> List[types_gen.DeviceData]:
+    """Return the replies to a command.
+
+    Args:
+      connection: the client sending the command.
+      cmd: the command.
+
+    Returns:
+      The device data to send back.
+    """
+    if cmd.data_type == "ping":
+      return [self._cmd_status(cmd, "done")]
+    if cmd.data_type == "machine-interfaces-request":
+      return [
+          types_gen.DeviceData(
+              device_type="discovery-aggregator",
+              data_type="machine-interfaces",
+              ts=utils.timestamp_now(),
+              tag=cmd.tag,
+              machine_interfaces=self._machine_interfaces())
+      ]
+    if cmd.data_type == "connected-clients-request":
+      return [self._connected_clients(connection)]
+    if cmd.data_type == "session-info":
+      connection.control_session_active = cmd.device_type == "operator"
+      return [self._connected_clients(connection)]
+    if cmd.data_type == "key-value-request":
+      value = self._key_values.get((cmd.device_type, cmd.device_name, cmd.key))
+      if value is None:
+        return [self._cmd_status(cmd, "rejected")] if cmd.tag else []
+      return [
+          types_gen.DeviceData(
+              device_type=cmd.device_type,
+              device_name=cmd.device_name,
+              data_type="key-value",
+              ts=utils.timestamp_now(),
+              tag=cmd.tag,
+              key=cmd.key,
+              value=value)
+      ]
+    if cmd.data_type == "frame-request":
+      msg = self._device_message(cmd.device_type, cmd.device_name, cmd.tag)
+      if not cmd.tag:
+        return [msg] if msg is not None else []
+      if msg is None:
+        return [self._cmd_status(cmd, "rejected")]
+      return [msg, self._cmd_status(cmd, "done")]
+    if cmd.data_type == "reach-script":
+      return self._run_script(connection, cmd)
+    if cmd.tag:
+      return [self._cmd_status(cmd, "done")]
+    return []
+
+  def _machine_interfaces(self) -> types_gen.MachineInterfaces:
+    """Return the machine interfaces of the stand-in workcell.
+
+    Devices whose streams are published are described as such; the other
+    devices are described as answering frame requests, so that hosts stream
+    them by requesting frames. Cameras always answer frame requests, which
+    hosts need to load them, and are described as publishing in addition.
+
+    Returns:
+      The machine interfaces.
+    """
+
+    def stream_type(rate: float) -> str:
+      return "publish" if rate > 0 else "frame-request"
+
+    interfaces: List[Tuple[str, str, str]] = [
+        ("robot", "robot-state", stream_type(self._config.robot_state_rate)),
+        ("robot", "reach-script", "reach-script"),
+        ("color-camera", "color", "frame-request"),
+        ("depth-camera", "color-depth", "frame-request"),
+    ]
+    if self._config.color_rate > 0:
+      interfaces.append(("color-camera", "color", "publish"))
+    if self._config.depth_rate > 0:
+      interfaces.append(("depth-camera", "color-depth", "publish"))
+    interfaces += [
+        ("vacuum", "output-state", stream_type(self._config.vacuum_rate)),
+        ("blowoff", "output-state", stream_type(self._config.vacuum_rate)),
+        ("force-torque-sensor", "sensor-state",
+         stream_type(self._config.force_torque_rate)),
+    ]
+    return types_gen.MachineInterfaces(interfaces=[
+        types_gen.MachineInterface(
+            device_type=device_type, data_type=data_type, py_type=py_type)
+        for device_type, data_type, py_type in interfaces
+    ])
+
+  def _run_script(self, connection: _Connection,
+                  cmd: types_gen.CommandData) -> List[types_gen.DeviceData]:
+    """Execute a reach-script.
+
+    Vacuum commands of the script update the vacuum state; everything else
+    completes after the configured script duration.
+
+    Args:
+      connection: the client sending the command.
+      cmd: the reach-script command.
+
+    Returns:
+      The replies to send immediately.
+    """
+    if cmd.reach_script is not None:
+      for command in cmd.reach_script.commands:
+        output = command.set_output
+        if (output is not None and output.py_type == "vacuum" and
+            output.args):
+          with self._lock:
+            self._vacuum_on = output.args[0].int_value == 1
+    if not cmd.tag:
+      return []
+    executing = self._cmd_status(cmd, "executing")
+    if self._config.script_duration <= 0:
+      return [executing, self._cmd_status(cmd, "done")]
+
+    def done() -> None:
+      self._send(connection, _encode([self._cmd_status(cmd, "done")]), 1)
+
+    timer = threading.Timer(self._config.script_duration, done)
+    timer.daemon = True
+    timer.start()
+    return [executing]
+
+
+def _rate(count: int, seconds: float) -> float:
+  return count / seconds if seconds > 0 else 0.0
+
+
+def run_load(hostname: str,
+             port: int,
+             duration: float = 5.0,
+             engine: str = "multiprocess",
+             requests: int = 100,
+             log: Callable[[str], None] = logging.info) -> Dict[str, float]:
+  """Connect a host to a stand-in and measure its throughput.
+
+  The load consists of three phases: receiving the published streams for a
+  duration, then fetching color images one at a time, then running arm
+  reach-scripts one at a time.
+
+  Args:
+    hostname: the host name of the stand-in.
+    port: the TCP port of the stand-in.
+    duration: the time in seconds to receive the published streams.
+    engine: the I/O engine of the local TCP client.
+    requests: the number of tagged requests of each kind.
+    log: the function reporting progress.
+
+  Returns:
+    The measurements by name: times in seconds and rates per second.
+  """
+  results: Dict[str, float] = {}
+  start = time.time()
+  host = local_tcp_client.connect_local_tcp(hostname, port, {}, engine)
+  try:
+    results["connect_seconds"] = time.time() - start
+    log("connected in %.3f s" % results["connect_seconds"])
+
+    counts: Dict[str, int] = {"robot": 0, "color": 0, "depth": 0}
+    lock = threading.Lock()
+
+    def counter(name: str) -> Callable[[Any], bool]:
+
+      def count(unused_msg: Any) -> bool:
+        with lock:
+          counts[name] += 1
+        return False
+
+      return count
+
+    cancels: List[Callable[[], None]] = []
+    if host.arm is not None:
+      cancels.append(host.arm.add_update_callback(counter("robot")))
+    if host.color_camera is not None:
+      cancels.append(host.color_camera.add_update_callback(counter("color")))
+    if host.depth_camera is not None:
+      cancels.append(host.depth_camera.add_update_callback(counter("depth")))
+    time.sleep(duration)
+    for cancel in cancels:
+      cancel()
+    with lock:
+      for name, count in counts.items():
+        results[name + "_dispatch_per_second"] = _rate(count, duration)
+    log("dispatched per second: " + ", ".join(
+        "%s %.1f" % (name, _rate(count, duration))
+        for name, count in counts.items()))
+
+    if host.color_camera is not None and requests > 0:
+      start = time.time()
+      for _ in range(requests):
+        host.color_camera.fetch_image()
+      results["fetch_image_per_second"] = _rate(requests, time.time() - start)
+      log("fetch_image per second: %.1f" % results["fetch_image_per_second"])
+
+    if host.arm is not None and requests > 0:
+      start = time.time()
+      for _ in range(requests):
+        host.arm.to_joints(_JOINTS)
+      results["to_joints_per_second"] = _rate(requests, time.time() - start)
+      log("to_joints per second: %.1f" % results["to_joints_per_second"])
+  finally:
+    host.close()
+  return results
@@ -0,0 +1,185 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for reach_serve_standin."""
+
+import json
+import os
+import socket
+import time
+from typing import Dict, List, Set
+import unittest
+
+from pyreach.common.python import types_gen
+from pyreach.impl import local_tcp_client
+from pyreach.impl import reach_serve_standin
+
+
+class _RawClient:
+  """Sends commands to the stand-in and reads its device data."""
+
+  def __init__(self, port: int) -> None:
+    self._sock = socket.create_connection(("localhost", port), timeout=10.0)
+    self._pending = b""
+
+  def send(self, cmd: types_gen.CommandData) -> None:
+    self._sock.sendall((json.dumps(cmd.to_json()) + "\n").encode("utf-8"))
+
+  def read_until(self, tag: str, status: str) -> List[types_gen.DeviceData]:
+    """Read device data until a cmd-status of a tag."""
+    result: List[types_gen.DeviceData] = []
+    while True:
+      while b"\n" not in self._pending:
+        packet = self._sock.recv(65536)
+        if not packet:
+          raise EOFError
+        self._pending += packet
+      line, self._pending = self._pending.split(b"\n", 1)
+      msg = types_gen.DeviceData.from_json(json.loads(line))
+      if msg.tag != tag:
+        continue
+      result.append(msg)
+      if msg.data_type == "cmd-status" and msg.status == status:
+        return result
+
+  def close(self) -> None:
+    self._sock.close()
+
+
+class ReachServeStandinTest(unittest.TestCase):
+
+  def test_protocol(self) -> None:
+    config = reach_serve_standin.StandinConfig(
+        robot_state_rate=0.0, vacuum_rate=0.0, unique_frame_files=True)
+    with reach_serve_standin.ReachServeStandin(config) as server:
+      client = _RawClient(server.port)
+      try:
+        client.send(
+            types_gen.CommandData(device_type="ping", data_type="ping", tag="p"))
+        self.assertEqual(len(client.read_until("p", "done")), 1)
+
+        client.send(
+            types_gen.CommandData(
+                device_type="settings-engine",
+                data_type="key-value-request",
+                key="calibration.json",
+                tag="kv"))
+        client.send(
+            types_gen.CommandData(
+                device_type="settings-engine",
+                data_type="key-value-request",
+                key="missing",
+                tag="kv"))
+        msgs = client.read_until("kv", "rejected")
+        self.assertEqual([msg.data_type for msg in msgs],
+                         ["key-value", "cmd-status"])
+        self.assertIn("devices", json.loads(msgs[0].value))
+
+        client.send(
+            types_gen.CommandData(
+                device_type="depth-camera",
+                data_type="frame-request",
+                tag="frame"))
+        msgs = client.read_until("frame", "done")
+        self.assertEqual(msgs[0].data_type, "color-depth")
+        self.assertTrue(os.path.exists(msgs[0].color))
+        self.assertTrue(os.path.exists(msgs[0].depth))
+
+        client.send(
+            types_gen.CommandData(
+                device_type="robot",
+                data_type="reach-script",
+                tag="script",
+                reach_script=types_gen.ReachScript(commands=[
+                    types_gen.ReachScriptCommand(
+                        set_output=types_gen.SetOutput(
+                            py_type="vacuum",
+                            args=[types_gen.CapabilityState(int_value=1)]))
+                ])))
+        msgs = client.read_until("script", "done")
+        self.assertEqual([msg.status for msg in msgs], ["executing", "done"])
+
+        client.send(
+            types_gen.CommandData(
+                device_type="vacuum",
+                data_type="frame-request",
+                tag="vacuum"))
+        msgs = client.read_until("vacuum", "done")
+        self.assertEqual(msgs[0].data_type, "output-state")
+        self.assertEqual(msgs[0].state[0].int_value, 1)
+      finally:
+        client.close()
+      # The server notices the closed connection asynchronously.
+      deadline = time.time() + 10.0
+      while server.stats()["clients"] and time.time() < deadline:
+        time.sleep(0.01)
+      stats = server.stats()
+      self.assertEqual(stats["commands_received"], 6)
+      self.assertEqual(stats["clients"], 0)
+
+  def test_machine_interfaces(self) -> None:
+    config = reach_serve_standin.StandinConfig(
+        robot_state_rate=0.0, color_rate=30.0, depth_rate=0.0)
+    with reach_serve_standin.ReachServeStandin(config) as server:
+      host = local_tcp_client.connect_local_tcp("localhost", server.port, {},
+                                                "selector")
+      host.close()
+      interfaces = server._machine_interfaces().interfaces
+    types: Dict[str, Set[str]] = {}
+    for interface in interfaces:
+      types.setdefault(interface.device_type, set()).add(interface.py_type)
+    self.assertEqual(types["robot"], {"frame-request", "reach-script"})
+    self.assertEqual(types["color-camera"], {"frame-request", "publish"})
+    self.assertEqual(types["depth-camera"], {"frame-request"})
+    self.assertIsNotNone(host.color_camera)
+
+  def test_host(self) -> None:
+    config = reach_serve_standin.StandinConfig(
+        robot_state_rate=50.0,
+        force_torque_rate=50.0,
+        image_width=64,
+        image_height=48)
+    with reach_serve_standin.ReachServeStandin(config) as server:
+      host = local_tcp_client.connect_local_tcp("localhost", server.port, {},
+                                                "selector")
+      try:
+        self.assertIsNotNone(host.arm)
+        self.assertIsNotNone(host.vacuum)
+        self.assertIsNotNone(host.force_torque_sensor)
+        assert host.color_camera is not None
+        assert host.depth_camera is not None
+        color = host.color_camera.fetch_image()
+        assert color is not None
+        self.assertEqual(color.color_image.shape, (48, 64, 3))
+        depth = host.depth_camera.fetch_image()
+        assert depth is not None
+        self.assertEqual(depth.depth_data.shape, (48, 64))
+      finally:
+        host.close()
+      self.assertIn("robot", server.publish_rates())
+      self.assertIn("force-torque-sensor", server.publish_rates())
+
+  def test_run_load(self) -> None:
+    with reach_serve_standin.ReachServeStandin() as server:
+      results = reach_serve_standin.run_load(
+          "localhost", server.port, duration=0.5, engine="selector",
+          requests=10)
+    self.assertGreater(results["connect_seconds"], 0.0)
+    self.assertGreater(results["robot_dispatch_per_second"], 0.0)
+    self.assertGreater(results["fetch_image_per_second"], 0.0)
+    self.assertGreater(results["to_joints_per_second"], 0.0)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -23,6 +23,7 @@ from pyreach import core
 from pyreach.common.python import types_gen
 from pyreach.impl import device_base
 from pyreach.impl import machine_interfaces
+from pyreach.impl import message_trace
 from pyreach.impl import thread_util
 from pyreach.impl import utils
 
@@ -45,6 +46,7 @@ class DeviceRequest(Generic[T]):
   _messages: int
   _cmd_status: Optional[Tuple[types_gen.DeviceData, Optional[T]]]
   _terminated: bool
+  _done_callbacks: List[Callable[[], None]]
 
   def __init__(self,
                device_type: str,
@@ -86,6 +88,7 @@ class DeviceRequest(Generic[T]):
     self._messages = 0
     self._cmd_status = None
     self._terminated = False
+    self._done_callbacks = []
 
   @property
   def tag(self) -> Optional[str]:
@@ -115,6 +118,26 @@ class DeviceRequest(Generic[T]):
       return
     self._queue.put(None)
     self._terminated = True
+    callbacks = self._done_callbacks
+    self._done_callbacks = []
+    for callback in callbacks:
+      callback()
+
+  def add_done_callback(self, callback: Callable[[], None]) -> bool:
+    """Add a callback called once the request is closed.
+
+    The callback is called with the requester lock held, so it must not block.
+
+    Args:
+      callback: the callback.
+
+    Returns:
+      False if the request is already closed, and the callback not added.
+    """
+    if self._terminated:
+      return False
+    self._done_callbacks.append(callback)
+    return True
 
   def flush(self) -> None:
     """Flush the request queue."""
@@ -212,6 +235,8 @@ class Requester(device_base.DeviceBase, Generic[T]):
   _untagged_request_counter: Dict[Tuple[str, str], int]
   _enable_tagged_requests: Set[Tuple[str, str]]
   _interfaces: Optional[machine_interfaces.MachineInterfaces]
+  # Whether a decoded message is traced as handled by this device.
+  _trace_decode: bool = True
 
   def __init__(self) -> None:
     """Init a Requester."""
@@ -292,13 +317,36 @@ class Requester(device_base.DeviceBase, Generic[T]):
         self._untagged_request_counter[device_pair] = (
             self._untagged_request_counter.get(device_pair, 0) + 1)
         del self._untagged_request_period[device_pair]
+      if self._stream_scheduler is not None:
+        self._stream_scheduler.set_period(self, device_type, device_name, None,
+                                          self._scheduled_frame_request)
     elif (device_pair not in self._untagged_request_period or
           self._untagged_request_period[device_pair] != period):
       self._untagged_request_period[device_pair] = period
       self._untagged_request_counter[
           device_pair] = self._untagged_request_counter.get(device_pair, 0) + 1
-      self.poll(period, self._untagged_poll, device_type, device_name,
-                self._untagged_request_counter[device_pair])
+      if self._stream_scheduler is not None:
+        self._stream_scheduler.set_period(self, device_type, device_name,
+                                          period, self._scheduled_frame_request)
+      else:
+        self.poll(period, self._untagged_poll, device_type, device_name,
+                  self._untagged_request_counter[device_pair])
+
+  def _scheduled_frame_request(self, device_type: str,
+                               device_name: str) -> bool:
+    """Send a frame request of the stream scheduler.
+
+    Args:
+      device_type: The device type as a string.
+      device_name: The device name as a string.
+
+    Returns:
+      True to stop the stream, once the Requester is closed.
+    """
+    if self.is_closed():
+      return True
+    self.send_frame_request(device_type, device_name)
+    return False
 
   def _untagged_poll(self, device_type: str, device_name: str,
                      counter: int) -> bool:
@@ -372,9 +420,19 @@ class Requester(device_base.DeviceBase, Generic[T]):
     Args:
       msg: The DeviceData message that is received.
     """
-    # pylint: disable=assignment-from-none
-    supplement = self.get_message_supplement(msg)
-    self.set_cached(supplement)
+    tracer = message_trace.get_tracer()
+    if tracer is None or not self._trace_decode:
+      # pylint: disable=assignment-from-none
+      supplement = self.get_message_supplement(msg)
+      self.set_cached(supplement)
+    else:
+      start_time = time.time()
+      # pylint: disable=assignment-from-none
+      supplement = self.get_message_supplement(msg)
+      decode_time = time.time()
+      self.set_cached(supplement)
+      if supplement is not None:
+        tracer.on_decode(msg, start_time, decode_time, time.time())
     with self._lock:
       active = []
       for req in self._requests:
@@ -508,6 +566,57 @@ class Requester(device_base.DeviceBase, Generic[T]):
     self._on_poll()
     return r.queue
 
+  def queue_to_done_callback(
+      self, q: "queue.Queue[Optional[Tuple[types_gen.DeviceData, Optional[T]]]]",
+      callback: Callable[[List[Tuple[types_gen.DeviceData, Optional[T]]]],
+                         None]
+  ) -> Callable[[], None]:
+    """Call a function with all the messages of a request once it is closed.
+
+    Unlike queue_to_callback, no thread waits for the request: the callback is
+    called by the thread closing the request, with the requester lock held, so
+    it must not block.
+
+    Args:
+      q: The queue returned by a request.
+      callback: The callback, called with the messages of the request.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+
+    def done() -> None:
+      msgs: List[Tuple[types_gen.DeviceData, Optional[T]]] = []
+      while True:
+        msg = q.get(block=False)
+        q.task_done()
+        if msg is None:
+          break
+        msgs.append(msg)
+      callback(msgs)
+
+    with self._lock:
+      for req in self._requests:
+        if req.queue is q and req.add_done_callback(done):
+          return lambda: self.cancel_request(q)
+    done()
+    return lambda: None
+
+  def cancel_request(
+      self,
+      q: "queue.Queue[Optional[Tuple[types_gen.DeviceData, Optional[T]]]]"
+  ) -> None:
+    """Close a request as if it timed out.
+
+    Args:
+      q: The queue returned by the request.
+    """
+    with self._lock:
+      for req in self._requests:
+        if req.queue is q:
+          req.close()
+    self._on_poll()
+
   def queue_to_callback(
       self,
       q: "queue.Queue[Optional[Tuple[types_gen.DeviceData, Optional[T]]]]",
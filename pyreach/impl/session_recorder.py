@@ -0,0 +1,303 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Client-side recording of a host session in the logs directory format.
+
+A recorded session directory can be played back with connect_logs_directory:
+
+* device-data/00000.json, 00001.json, ...: the DeviceData received, one JSON
+  message per line.
+* command-data/00000.json, 00001.json, ...: the CommandData sent.
+* <device-type>[-<device-name>]/: the images of the DeviceData, with the
+  image paths of the messages rewritten to these files.
+
+The host only appends messages to an in-memory buffer. A background thread
+copies the images and writes the buffered messages in batches, starting a
+new file when the current one reaches a size limit. Images are copied when
+the batch is written, so the image files of the client must outlive the
+flush interval, as the per-frame files of reach connect do. If the writer
+falls behind by more than the buffer size, messages are dropped rather than
+blocking the host.
+"""
+
+import copy
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+from pyreach import core
+from pyreach.common.python import types_gen
+
+# The environment variable of the default recording directory.
+RECORD_DIR_ENV = "PYREACH_RECORD_DIR"
+
+# The DeviceData fields that hold the path of an image file.
+_IMAGE_FIELDS = ("color", "depth", "upload_depth")
+
+_Message = Union[types_gen.DeviceData, types_gen.CommandData]
+
+
+def new_session_directory(record_dir: str) -> str:
+  """Create a new session directory in a recording directory.
+
+  Args:
+    record_dir: the recording directory, created if needed.
+
+  Returns:
+    The path of the new, empty, session directory.
+  """
+  name = time.strftime("%Y%m%d-%H%M%S", time.localtime())
+  suffix = 0
+  while True:
+    path = os.path.join(record_dir,
+                        name if not suffix else "%s-%d" % (name, suffix))
+    try:
+      os.makedirs(path)
+      return path
+    except FileExistsError:
+      suffix += 1
+
+
+class _RotatingWriter:
+  """Writes lines to numbered files of a directory, rotating them by size."""
+
+  _directory: str
+  _max_file_bytes: int
+  _index: int
+  _size: int
+  _file: Optional[BinaryIO]
+
+  def __init__(self, directory: str, max_file_bytes: int) -> None:
+    """Init a _RotatingWriter.
+
+    Args:
+      directory: the directory, created if needed.
+      max_file_bytes: the size after which a new file is started.
+    """
+    os.makedirs(directory, exist_ok=True)
+    self._directory = directory
+    self._max_file_bytes = max_file_bytes
+    self._index = 0
+    self._size = 0
+    self._file = None
+
+  def write(self, lines: List[bytes]) -> None:
+    """Write lines, with one write call per file.
+
+    Args:
+      lines: the lines, each ending with a new line.
+    """
+    chunk: List[bytes] = []
+    for line in lines:
+      if self._size and self._size + len(line) > self._max_file_bytes:
+        self._write_chunk(chunk)
+        chunk = []
+        self._rotate()
+      chunk.append(line)
+      self._size += len(line)
+    self._write_chunk(chunk)
+
+  def _write_chunk(self, chunk: List[bytes]) -> None:
+    if not chunk:
+      return
+    if self._file is None:
+      self._file = open(
+          os.path.join(self._directory, "%05d.json" % self._index), "wb")
+    self._file.write(b"".join(chunk))
+    self._file.flush()
+
+  def _rotate(self) -> None:
+    if self._file is not None:
+      self._file.close()
+      self._file = None
+    self._index += 1
+    self._size = 0
+
+  def close(self) -> None:
+    """Close the current file."""
+    if self._file is not None:
+      self._file.close()
+      self._file = None
+
+
+class SessionRecorder:
+  """Records the DeviceData and CommandData of a session to a directory."""
+
+  _directory: str
+  _flush_interval: float
+  _max_buffered: int
+  _condition: threading.Condition
+  _buffer: List[_Message]
+  _closed: bool
+  _dropped: int
+  _recorded: int
+  _image_count: int
+  _device_writer: _RotatingWriter
+  _command_writer: _RotatingWriter
+  _thread: threading.Thread
+
+  def __init__(self,
+               directory: str,
+               max_file_bytes: int = 64 << 20,
+               flush_interval: float = 0.5,
+               max_buffered: int = 100000) -> None:
+    """Init a SessionRecorder.
+
+    Args:
+      directory: the session directory, created if needed.
+      max_file_bytes: the size of a message file after which a new one is
+        started.
+      flush_interval: the time in seconds between the writes of the buffered
+        messages.
+      max_buffered: the number of buffered messages after which further
+        messages are dropped.
+
+    Raises:
+      PyReachError: if the directory already holds a recording.
+    """
+    for subdirectory in ("device-data", "command-data"):
+      if os.path.exists(os.path.join(directory, subdirectory, "00000.json")):
+        raise core.PyReachError("Directory already holds a recording: " +
+                                directory)
+    self._directory = directory
+    self._flush_interval = flush_interval
+    self._max_buffered = max_buffered
+    self._condition = threading.Condition()
+    self._buffer = []
+    self._closed = False
+    self._dropped = 0
+    self._recorded = 0
+    self._image_count = 0
+    self._device_writer = _RotatingWriter(
+        os.path.join(directory, "device-data"), max_file_bytes)
+    self._command_writer = _RotatingWriter(
+        os.path.join(directory, "command-data"), max_file_bytes)
+    self._thread = threading.Thread(
+        name="session_recorder", target=self._run, daemon=True)
+    self._thread.start()
+
+  @property
+  def directory(self) -> str:
+    """The session directory."""
+    return self._directory
+
+  def stats(self) -> Tuple[int, int]:
+    """Return the number of messages recorded and dropped so far."""
+    with self._condition:
+      return self._recorded, self._dropped
+
+  def record_device_data(self, msg: types_gen.DeviceData) -> None:
+    """Record a DeviceData received, without blocking.
+
+    Args:
+      msg: the message. It must not be modified afterwards.
+    """
+    self._append(msg)
+
+  def record_command_data(self, cmd: types_gen.CommandData) -> None:
+    """Record a CommandData sent, without blocking.
+
+    Args:
+      cmd: the message. It must not be modified afterwards.
+    """
+    self._append(cmd)
+
+  def _append(self, msg: _Message) -> None:
+    with self._condition:
+      if self._closed:
+        return
+      if len(self._buffer) >= self._max_buffered:
+        if not self._dropped:
+          logging.warning("session recorder is behind, dropping messages")
+        self._dropped += 1
+        return
+      self._buffer.append(msg)
+
+  def _run(self) -> None:
+    """Write the buffered messages until closed."""
+    closed = False
+    while not closed:
+      with self._condition:
+        if not self._closed:
+          self._condition.wait(self._flush_interval)
+        batch, self._buffer = self._buffer, []
+        closed = self._closed
+      try:
+        self._write(batch)
+      except Exception:  # pylint: disable=broad-except
+        logging.exception("failed to write the session recording")
+      with self._condition:
+        self._recorded += len(batch)
+    self._device_writer.close()
+    self._command_writer.close()
+
+  def _write(self, batch: List[_Message]) -> None:
+    """Write a batch of messages and copy their images."""
+    device_lines: List[bytes] = []
+    command_lines: List[bytes] = []
+    for msg in batch:
+      if isinstance(msg, types_gen.DeviceData):
+        device_lines.append(self._encode(self._copy_images(msg)))
+      else:
+        command_lines.append(self._encode(msg))
+    self._device_writer.write(device_lines)
+    self._command_writer.write(command_lines)
+
+  @staticmethod
+  def _encode(msg: _Message) -> bytes:
+    return (json.dumps(msg.to_json()) + "\n").encode("utf-8")
+
+  def _copy_images(self, msg: types_gen.DeviceData) -> types_gen.DeviceData:
+    """Copy the images of a message to the session directory.
+
+    Args:
+      msg: the message.
+
+    Returns:
+      The message, or a copy of it with the paths of the copied images
+      relative to the session directory.
+    """
+    if not any(getattr(msg, field) for field in _IMAGE_FIELDS):
+      return msg
+    dev_key = msg.device_type
+    if msg.device_name:
+      dev_key += "-" + msg.device_name
+    result = copy.copy(msg)
+    for field in _IMAGE_FIELDS:
+      source = getattr(msg, field)
+      if not source:
+        continue
+      # Images of successive frames may share a file name.
+      self._image_count += 1
+      filename = "%08d-%s" % (self._image_count, os.path.basename(source))
+      try:
+        os.makedirs(os.path.join(self._directory, dev_key), exist_ok=True)
+        shutil.copyfile(source,
+                        os.path.join(self._directory, dev_key, filename))
+      except OSError as e:
+        logging.warning("failed to record image %s: %s", source, e)
+        continue
+      # The reader resolves "<dev_key>/<filename>" in the session directory.
+      setattr(result, field, dev_key + "/" + filename)
+    return result
+
+  def close(self) -> None:
+    """Write the buffered messages and stop recording."""
+    with self._condition:
+      self._closed = True
+      self._condition.notify_all()
+    self._thread.join()
@@ -0,0 +1,137 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for session_recorder."""
+
+import json
+import os
+import tempfile
+from typing import List
+import unittest
+
+from pyreach.common.python import types_gen
+from pyreach.impl import local_tcp_client
+from pyreach.impl import logs_directory_client
+from pyreach.impl import reach_serve_standin
+from pyreach.impl import session_recorder
+
+
+def _read_lines(directory: str) -> List[str]:
+  lines: List[str] = []
+  index = 0
+  while os.path.exists(os.path.join(directory, "%05d.json" % index)):
+    with open(os.path.join(directory, "%05d.json" % index)) as f:
+      lines.extend(f.read().splitlines())
+    index += 1
+  return lines
+
+
+class SessionRecorderTest(unittest.TestCase):
+
+  def test_rotation_and_images(self) -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+      image = os.path.join(tempdir, "color.jpg")
+      with open(image, "wb") as f:
+        f.write(b"first")
+      session = os.path.join(tempdir, "session")
+      recorder = session_recorder.SessionRecorder(
+          session, max_file_bytes=1000, flush_interval=0.01)
+      for seq in range(1, 51):
+        recorder.record_device_data(
+            types_gen.DeviceData(
+                ts=1000 * seq,
+                seq=seq,
+                device_type="robot",
+                data_type="robot-state"))
+      msg = types_gen.DeviceData(
+          ts=60000,
+          seq=51,
+          device_type="color-camera",
+          device_name="left",
+          data_type="color",
+          color=image)
+      recorder.record_device_data(msg)
+      recorder.record_command_data(
+          types_gen.CommandData(
+              ts=61000, device_type="color-camera", data_type="frame-request"))
+      recorder.close()
+      # The image of the message was copied, and the message left unchanged.
+      with open(image, "wb") as f:
+        f.write(b"second")
+      self.assertEqual(msg.color, image)
+      self.assertEqual(recorder.stats(), (52, 0))
+
+      self.assertTrue(
+          os.path.exists(os.path.join(session, "device-data", "00001.json")))
+      lines = _read_lines(os.path.join(session, "device-data"))
+      self.assertEqual([json.loads(line)["seq"] for line in lines],
+                       list(range(1, 52)))
+      commands = _read_lines(os.path.join(session, "command-data"))
+      self.assertEqual(len(commands), 1)
+
+      reader = logs_directory_client._DeviceDataReader(
+          os.path.join(session, "device-data"), os.path.abspath(session))
+      reader.start()
+      self.assertTrue(reader.seek(None, 51))
+      value = reader.value()
+      assert value is not None
+      with open(value[0].color, "rb") as f:
+        self.assertEqual(f.read(), b"first")
+      reader.close()
+
+      with self.assertRaises(Exception):
+        session_recorder.SessionRecorder(session)
+
+  def test_record_host(self) -> None:
+    config = reach_serve_standin.StandinConfig(
+        robot_state_rate=50.0, image_width=64, image_height=48)
+    with tempfile.TemporaryDirectory() as tempdir:
+      with reach_serve_standin.ReachServeStandin(config) as server:
+        host = local_tcp_client.connect_local_tcp("localhost", server.port,
+                                                  {"record_dir": tempdir},
+                                                  "selector")
+        try:
+          assert host.color_camera is not None
+          self.assertIsNotNone(host.color_camera.fetch_image())
+        finally:
+          host.close()
+      sessions = os.listdir(tempdir)
+      self.assertEqual(len(sessions), 1)
+      session = os.path.join(tempdir, sessions[0])
+      commands = [
+          json.loads(line)
+          for line in _read_lines(os.path.join(session, "command-data"))
+      ]
+      self.assertIn("machine-interfaces-request",
+                    [cmd.get("dataType") for cmd in commands])
+
+      host = logs_directory_client.connect_logs_directory(
+          "", session, None, False, None, False, {})
+      try:
+        self.assertIsNotNone(host.playback)
+        self.assertIsNotNone(host.color_camera)
+      finally:
+        host.close()
+      frames = [
+          types_gen.DeviceData.from_json(json.loads(line))
+          for line in _read_lines(os.path.join(session, "device-data"))
+      ]
+      images = [frame.color for frame in frames if frame.color]
+      self.assertTrue(images)
+      for image in images:
+        self.assertTrue(os.path.exists(os.path.join(session, image)))
+
+
+if __name__ == "__main__":
+  unittest.main()
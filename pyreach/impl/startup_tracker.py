@@ -0,0 +1,139 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tracking of the startup phases of a host connection.
+
+At connect time a host issues all of its requests (key-values, streams and
+controller descriptions) in one burst, then waits for the responses. Each
+kind of response is a phase of the startup: the phases overlap, and the host
+is usable once every phase is ready. Each phase is timed by an
+internal.Timers timer "host.startup.<phase>" running from the start of the
+phase until it is ready, and "host.startup" times the whole startup.
+"""
+
+import threading
+from typing import Callable, Dict, List
+
+from pyreach import internal
+
+# The startup phases of a host.
+PHASES = ("session", "calibration", "constraints", "actionsets",
+          "arm_constraints", "streams", "controllers")
+
+# The names of the startup timers.
+TIMERS = {"host.startup." + phase for phase in PHASES}
+
+
+class StartupTracker:
+  """Waits for all the phases of a host startup to be ready.
+
+  A phase is started once for each of its parts, e.g. once for each stream,
+  and is ready when all of its parts are ready.
+  """
+
+  _timers: internal.Timers
+  _lock: threading.Lock
+  _pending: Dict[str, int]
+  _ready: threading.Event
+  _threads: List[threading.Thread]
+
+  def __init__(self, timers: internal.Timers) -> None:
+    """Init a StartupTracker and start the "host.startup" timer.
+
+    The "host.startup" timer stops once wait() returns with all phases ready.
+
+    Args:
+      timers: timers with the startup TIMERS.
+    """
+    self._timers = timers
+    self._lock = threading.Lock()
+    self._pending = {}
+    self._ready = threading.Event()
+    self._ready.set()
+    self._threads = []
+    self._timers["host.startup"].start()
+
+  def begin(self, phase: str) -> Callable[[], None]:
+    """Start a part of a phase.
+
+    Args:
+      phase: the phase name, one of PHASES.
+
+    Returns:
+      A function marking the part ready. Calling it more than once has no
+      further effect.
+    """
+    timer = self._timers["host.startup." + phase]
+    with self._lock:
+      self._pending[phase] = self._pending.get(phase, 0) + 1
+      self._ready.clear()
+      timer.start()
+    done = False
+
+    def ready() -> None:
+      nonlocal done
+      with self._lock:
+        if done:
+          return
+        done = True
+        self._pending[phase] -= 1
+        if self._pending[phase] > 0:
+          return
+        del self._pending[phase]
+        timer.stop()
+        if not self._pending:
+          self._ready.set()
+
+    return ready
+
+  def run(self, phase: str, wait: Callable[[], object]) -> None:
+    """Start a part of a phase that is ready when a blocking call returns.
+
+    Args:
+      phase: the phase name, one of PHASES.
+      wait: the blocking call, run on its own thread.
+    """
+    ready = self.begin(phase)
+
+    def run_thread() -> None:
+      try:
+        wait()
+      finally:
+        ready()
+
+    thread = threading.Thread(
+        name="startup_" + phase, target=run_thread, daemon=True)
+    thread.start()
+    self._threads.append(thread)
+
+  def wait(self, is_closed: Callable[[], bool]) -> bool:
+    """Wait until all started phases are ready.
+
+    Args:
+      is_closed: returns True once the host is closed.
+
+    Returns:
+      True if all phases are ready, False if the host closed first.
+    """
+    while not self._ready.wait(0.1):
+      if is_closed():
+        return False
+    for thread in self._threads:
+      thread.join()
+    self._timers["host.startup"].stop()
+    return True
+
+  def pending(self) -> List[str]:
+    """Return the phases that are not ready yet."""
+    with self._lock:
+      return sorted(self._pending)
@@ -0,0 +1,60 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for startup_tracker."""
+
+import threading
+import unittest
+
+from pyreach import internal
+from pyreach.impl import startup_tracker
+
+
+class StartupTrackerTest(unittest.TestCase):
+
+  def test_phases(self) -> None:
+    now = [100.0]
+    timers = internal.Timers(startup_tracker.TIMERS, get_time=lambda: now[0])
+    tracker = startup_tracker.StartupTracker(timers)
+    streams = [tracker.begin("streams"), tracker.begin("streams")]
+    release = threading.Event()
+    tracker.run("calibration", release.wait)
+    self.assertEqual(tracker.pending(), ["calibration", "streams"])
+    now[0] = 101.0
+    streams[0]()
+    streams[0]()
+    self.assertEqual(tracker.pending(), ["calibration", "streams"])
+    streams[1]()
+    self.assertEqual(tracker.pending(), ["calibration"])
+    now[0] = 103.0
+    release.set()
+    self.assertTrue(tracker.wait(lambda: False))
+    self.assertEqual(tracker.pending(), [])
+    results = {name: (calls, duration) for name, calls, duration
+               in timers.results()}
+    self.assertEqual(results["host.startup"], (1, 3.0))
+    self.assertEqual(results["host.startup.streams"], (1, 1.0))
+    self.assertEqual(results["host.startup.calibration"], (1, 3.0))
+    self.assertEqual(results["host.startup.session"], (0, 0.0))
+
+  def test_closed(self) -> None:
+    tracker = startup_tracker.StartupTracker(
+        internal.Timers(startup_tracker.TIMERS))
+    tracker.begin("session")
+    self.assertFalse(tracker.wait(lambda: True))
+    self.assertEqual(tracker.pending(), ["session"])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,250 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Host-level scheduler of the periodic untagged frame requests of devices."""
+
+import collections
+import dataclasses
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Send function of a stream: called with the device type and name, returns
+# True to stop the stream.
+SendFunction = Callable[[str, str], bool]
+
+
+def next_aligned_time(period: float, now: float) -> float:
+  """Return the first multiple of a period strictly after a time.
+
+  Args:
+    period: the period in seconds.
+    now: the time.
+
+  Returns:
+    The aligned time.
+  """
+  return (math.floor(now / period) + 1) * period
+
+
+@dataclasses.dataclass
+class _Stream:
+  """A periodic frame request stream."""
+  owner: Any
+  device_type: str
+  device_name: str
+  period: float
+  send: SendFunction
+  due: float
+
+
+class StreamScheduler:
+  """Sends the periodic untagged frame requests of all devices of a host.
+
+  A single thread wakes up when the earliest stream is due, and sends the frame
+  requests of all due streams together. Streams are aligned on multiples of
+  their period, so streams with the same period are due at the same instants.
+  The schedule is fixed-rate: a late wake-up skips the missed instants instead
+  of shifting the following requests.
+  """
+
+  _condition: threading.Condition
+  _streams: Dict[Tuple[int, str, str], _Stream]
+  _sent: Dict[Tuple[str, str], Deque[float]]
+  _rate_window: float
+  _thread: Optional[threading.Thread]
+  _closed: bool
+  _wakeups: int
+  _clock: Callable[[], float]
+
+  def __init__(self,
+               rate_window: float = 2.0,
+               clock: Callable[[], float] = time.time) -> None:
+    """Init a StreamScheduler.
+
+    Args:
+      rate_window: the window in seconds over which request rates are
+        measured.
+      clock: the function returning the current time.
+    """
+    self._clock = clock
+    self._condition = threading.Condition()
+    self._streams = {}
+    self._sent = {}
+    self._rate_window = rate_window
+    self._thread = None
+    self._closed = False
+    self._wakeups = 0
+
+  def start(self) -> None:
+    """Start the scheduler thread."""
+    with self._condition:
+      if self._thread is not None or self._closed:
+        return
+      self._thread = threading.Thread(
+          name="stream_scheduler", target=self._run, daemon=True)
+    self._thread.start()
+
+  def close(self) -> None:
+    """Stop the scheduler thread and remove all streams."""
+    with self._condition:
+      self._closed = True
+      self._streams.clear()
+      self._condition.notify_all()
+      thread = self._thread
+    if thread is not None and thread is not threading.current_thread():
+      thread.join()
+
+  def set_period(self, owner: Any, device_type: str, device_name: str,
+                 period: Optional[float], send: SendFunction) -> None:
+    """Set the period of a stream.
+
+    The first request of a new stream, or of a stream whose period changes, is
+    sent at the next wake-up.
+
+    Args:
+      owner: the object owning the stream, e.g. the requester.
+      device_type: the device type to request frames from.
+      device_name: the device name to request frames from.
+      period: the period in seconds, or None to stop the stream.
+      send: the function sending the frame request.
+    """
+    key = (id(owner), device_type, device_name)
+    with self._condition:
+      if period is None:
+        self._streams.pop(key, None)
+        return
+      if self._closed:
+        return
+      stream = self._streams.get(key)
+      if stream is not None and stream.period == period:
+        stream.send = send
+        return
+      self._streams[key] = _Stream(owner, device_type, device_name, period,
+                                   send, self._clock())
+      self._condition.notify_all()
+
+  @property
+  def wakeups(self) -> int:
+    """The number of wake-ups that sent frame requests."""
+    with self._condition:
+      return self._wakeups
+
+  def periods(self) -> Dict[Tuple[str, str], float]:
+    """Return the shortest active period per device.
+
+    Returns:
+      The period in seconds by (device type, device name).
+    """
+    result: Dict[Tuple[str, str], float] = {}
+    with self._condition:
+      for stream in self._streams.values():
+        device = (stream.device_type, stream.device_name)
+        result[device] = min(result.get(device, stream.period), stream.period)
+    return result
+
+  def request_rates(self, now: float = -1.0) -> Dict[Tuple[str, str], float]:
+    """Return the measured frame request rates per device.
+
+    Args:
+      now: the current time, defaults to the time of the clock.
+
+    Returns:
+      The requests per second over the rate window, by (device type, device
+      name). Devices without request during the window are omitted.
+    """
+    if now < 0:
+      now = self._clock()
+    result: Dict[Tuple[str, str], float] = {}
+    with self._condition:
+      for device, sent in list(self._sent.items()):
+        self._prune(sent, now)
+        if sent:
+          result[device] = len(sent) / self._rate_window
+        else:
+          del self._sent[device]
+    return result
+
+  def _prune(self, sent: Deque[float], now: float) -> None:
+    """Remove the send times outside of the rate window."""
+    while sent and sent[0] <= now - self._rate_window:
+      sent.popleft()
+
+  def _run(self) -> None:
+    """Run the scheduler thread."""
+    while True:
+      with self._condition:
+        if self._closed:
+          return
+        now = self._clock()
+        next_due: Optional[float] = None
+        for stream in self._streams.values():
+          if next_due is None or stream.due < next_due:
+            next_due = stream.due
+        if next_due is None or next_due > now:
+          self._condition.wait(None if next_due is None else next_due - now)
+          continue
+      self._send_due(now)
+
+  def _send_due(self, now: float) -> None:
+    """Send the frame requests of all streams due at a time.
+
+    Args:
+      now: the current time.
+    """
+    with self._condition:
+      due = [stream for stream in self._streams.values() if stream.due <= now]
+      if not due:
+        return
+      for stream in due:
+        stream.due = next_aligned_time(stream.period, now)
+      self._wakeups += 1
+    stopped = self._send(due)
+    with self._condition:
+      for stream in stopped:
+        key = (id(stream.owner), stream.device_type, stream.device_name)
+        if self._streams.get(key) is stream:
+          del self._streams[key]
+
+  def _send(self, streams: List[_Stream]) -> List[_Stream]:
+    """Send the frame requests of streams.
+
+    Args:
+      streams: the due streams.
+
+    Returns:
+      The streams to stop.
+    """
+    stopped: List[_Stream] = []
+    sent: List[Tuple[str, str]] = []
+    for stream in streams:
+      try:
+        if stream.send(stream.device_type, stream.device_name):
+          stopped.append(stream)
+        else:
+          sent.append((stream.device_type, stream.device_name))
+      except Exception:  # pylint: disable=broad-except
+        logging.exception("frame request failed for %s %s",
+                          stream.device_type, stream.device_name)
+    now = self._clock()
+    with self._condition:
+      for device in sent:
+        device_sent = self._sent.get(device)
+        if device_sent is None:
+          device_sent = collections.deque()
+          self._sent[device] = device_sent
+        device_sent.append(now)
+        self._prune(device_sent, now)
+    return stopped
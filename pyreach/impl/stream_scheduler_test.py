@@ -0,0 +1,118 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for stream_scheduler."""
+
+import time
+from typing import List, Tuple
+import unittest
+
+from pyreach.common.python import types_gen
+from pyreach.impl import requester
+from pyreach.impl import stream_scheduler
+
+
+class StreamSchedulerTest(unittest.TestCase):
+
+  def test_next_aligned_time(self) -> None:
+    self.assertAlmostEqual(stream_scheduler.next_aligned_time(0.5, 10.2), 10.5)
+    self.assertAlmostEqual(stream_scheduler.next_aligned_time(0.5, 10.5), 11.0)
+
+  def test_scheduler(self) -> None:
+    now = 10.0
+    sent: List[Tuple[float, str, str]] = []
+    stop_after = 3
+
+    def send(device_type: str, device_name: str) -> bool:
+      nonlocal stop_after
+      if device_name == "stopping":
+        stop_after -= 1
+        if stop_after < 0:
+          return True
+      sent.append((now, device_type, device_name))
+      return False
+
+    scheduler = stream_scheduler.StreamScheduler(
+        rate_window=2.0, clock=lambda: now)
+    owner = object()
+    scheduler.set_period(owner, "robot", "", 0.5, send)
+    scheduler.set_period(owner, "color-camera", "", 0.5, send)
+    scheduler.set_period(owner, "vacuum", "stopping", 0.25, send)
+    scheduler.set_period(owner, "depth-camera", "", 0.5, send)
+    scheduler.set_period(owner, "depth-camera", "", None, send)
+    self.assertEqual(
+        scheduler.periods(), {
+            ("robot", ""): 0.5,
+            ("color-camera", ""): 0.5,
+            ("vacuum", "stopping"): 0.25
+        })
+    for now in (10.0, 10.25, 10.5, 10.75, 11.0, 11.25, 11.5):
+      scheduler._send_due(now)
+    # Streams with the same period share their wake-ups, and are sent in the
+    # order they were added.
+    self.assertEqual(sent, [
+        (10.0, "robot", ""),
+        (10.0, "color-camera", ""),
+        (10.0, "vacuum", "stopping"),
+        (10.25, "vacuum", "stopping"),
+        (10.5, "robot", ""),
+        (10.5, "color-camera", ""),
+        (10.5, "vacuum", "stopping"),
+        (11.0, "robot", ""),
+        (11.0, "color-camera", ""),
+        (11.5, "robot", ""),
+        (11.5, "color-camera", ""),
+    ])
+    self.assertEqual(scheduler.wakeups, 6)
+    self.assertEqual(scheduler.request_rates(), {
+        ("robot", ""): 2.0,
+        ("color-camera", ""): 2.0,
+        ("vacuum", "stopping"): 1.5
+    })
+    self.assertEqual(scheduler.request_rates(12.5), {
+        ("robot", ""): 1.0,
+        ("color-camera", ""): 1.0
+    })
+    # A late wake-up skips the missed instants.
+    del sent[:]
+    for now in (12.7, 12.9, 13.0):
+      scheduler._send_due(now)
+    self.assertEqual([t for t, typ, _ in sent if typ == "robot"], [12.7, 13.0])
+    scheduler.close()
+    self.assertEqual(scheduler.periods(), {})
+
+  def test_requester(self) -> None:
+    cmds: List[types_gen.CommandData] = []
+    device: requester.Requester[None] = requester.Requester()
+    device.set_send_cmd(cmds.append)
+    scheduler = stream_scheduler.StreamScheduler()
+    device.set_stream_scheduler(scheduler)
+    device.start()
+    scheduler.start()
+    try:
+      device.set_untagged_request_period("robot", "", "robot-state", 0.02)
+      time.sleep(0.2)
+      self.assertEqual(scheduler.periods(), {("robot", ""): 0.02})
+      device.set_untagged_request_period("robot", "", "robot-state", None)
+      self.assertEqual(scheduler.periods(), {})
+    finally:
+      device.close()
+      scheduler.close()
+    frame_requests = [cmd for cmd in cmds if cmd.data_type == "frame-request"]
+    self.assertGreaterEqual(len(frame_requests), 5)
+    self.assertEqual({cmd.device_type for cmd in frame_requests}, {"robot"})
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -21,15 +21,12 @@ from typing import Any, Optional, Union
 import uuid
 
 import numpy as np
-import PIL  # type: ignore
-from PIL import Image  # type: ignore
 
 from google.protobuf import duration_pb2
 from google.protobuf import timestamp_pb2
 from pyreach.common.proto_gen import logs_pb2
 from pyreach import core
 from pyreach.common.python import types_gen
-import cv2  # type: ignore
 
 
 def copy_device_data(data: types_gen.DeviceData) -> types_gen.DeviceData:
@@ -163,6 +160,9 @@ def load_color_image_from_data(
   Returns:
     The image loaded into an-unwritable np.ndarray.
   """
+  # pylint: disable=g-import-not-at-top
+  import PIL  # type: ignore
+  from PIL import Image  # type: ignore
   if isinstance(msg, logs_pb2.DeviceData):
     msg_from_proto = ImagedDeviceData.from_proto(msg)
     assert msg_from_proto
@@ -202,6 +202,8 @@ def load_depth_image_from_data(
   Returns:
     The image loaded into an-unwritable np.ndarray.
   """
+  # pylint: disable=g-import-not-at-top
+  import cv2  # type: ignore
   if isinstance(msg, logs_pb2.DeviceData):
     msg_from_proto = ImagedDeviceData.from_proto(msg)
     assert msg_from_proto
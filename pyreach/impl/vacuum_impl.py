@@ -392,6 +392,37 @@ class VacuumImpl(vacuum.Vacuum):
 
     return result
 
+  def request_state(
+      self,
+      on: bool,
+      callback: Callable[[core.PyReachStatus], None],
+      intent: str = "",
+      pick_id: str = "",
+      success_type: str = "",
+      timeout: Optional[float] = None) -> Callable[[], None]:
+    """Turn the vacuum suction on or off without waiting for it.
+
+    Args:
+      on: True to turn the suction on, False to turn it off.
+      callback: Called with the final status of the command. It is called by
+        the device thread with the device lock held, so it must not block.
+      intent: The intent of the command.
+      pick_id: The pick_id of the command.
+      success_type: The success_type of the command.
+      timeout: The optional timeout of the command in seconds.
+
+    Returns:
+      A function that when called cancels the request.
+    """
+    return self._arm.request_vacuum_state(
+        arm_impl.ActionVacuumState.VACUUM
+        if on else arm_impl.ActionVacuumState.OFF,
+        callback,
+        intent=intent,
+        pick_id=pick_id,
+        success_type=success_type,
+        timeout=timeout)
+
   def blowoff(self,
               intent: str = "",
               pick_id: str = "",
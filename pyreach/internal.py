@@ -19,10 +19,14 @@ WARNING: Please do not use the internal functions in the PyReach application
          considered Reach system's internal data structure, which could be
          changed at any time without notification.
 """
+import collections
+import dataclasses
+import json
 import os
 import threading
 import time
-from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, TextIO, Tuple
+from typing import (Any, Callable, Deque, Dict, FrozenSet, List, Optional,
+                    Sequence, Set, TextIO, Tuple)
 
 import numpy as np
 
@@ -71,6 +75,127 @@ from pyreach import core
 #         # "gym"/"gym.arm" are off and "host"/"host.arm" are on.
 #         pass
 #       # "gym"/"gym.arm" are resumed and "host"/"host.arm" are off.
+#
+# In addition to the totals, each Timer records the duration of every call
+# (from start() to the final stop(), excluding the time it was paused) into
+# a LatencyHistogram, so tail latencies (e.g. the p99 of "gym.step") can be
+# queried with Timer.percentiles() and exported with Timers.export().
+#
+# The following environment variables control the periodic reports:
+#
+# * PYREACH_PERF: enables the timers. If set to a file name, the report is
+#   written to the file, otherwise it is printed.
+# * PYREACH_PERF_INTERVAL: the report interval in seconds (default 30).
+# * PYREACH_PERF_EXPORT: if set, a machine-readable report is also written to
+#   this file on every interval.
+# * PYREACH_PERF_EXPORT_FORMAT: "jsonl" (default) appends one JSON object per
+#   timer and interval, "prometheus" rewrites the file in the Prometheus text
+#   exposition format (e.g. for the node exporter textfile collector).
+
+# The percentiles reported by Timers.dump() and Timers.export().
+_REPORT_PERCENTILES: Tuple[float, ...] = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram(object):
+  """A log-linear (HDR-style) histogram of durations.
+
+  Durations are recorded in integer microseconds. Values below 2 * 2**bits
+  microseconds are recorded exactly. Larger values are recorded in
+  2**bits sub-buckets per power of two, which bounds the relative error of a
+  reported percentile to 2**-bits (about 3% for the default of 5 bits).
+
+  Recording is not locked. Timer records and copies its histogram under its
+  own lock.
+  """
+
+  # Durations longer than this (about 18 minutes) are clamped.
+  _MAX_MICROSECONDS: int = (1 << 30) - 1
+
+  def __init__(self, bits: int = 5) -> None:
+    """Init a LatencyHistogram.
+
+    Args:
+      bits: The number of sub-bucket bits per power of two.
+    """
+    self._bits: int = bits
+    self._sub_buckets: int = 1 << bits
+    self._counts: List[int] = [0] * (
+        self._index(self._MAX_MICROSECONDS) + 1)
+    self._total: int = 0
+    self._max: int = 0
+
+  def _index(self, value: int) -> int:
+    """Return the bucket index of a value in microseconds."""
+    if value < 2 * self._sub_buckets:
+      return value
+    shift: int = value.bit_length() - self._bits - 1
+    return self._sub_buckets * (shift + 1) + (value >> shift) - self._sub_buckets
+
+  def _value(self, index: int) -> int:
+    """Return the highest value in microseconds that maps to a bucket."""
+    if index < 2 * self._sub_buckets:
+      return index
+    shift: int = index // self._sub_buckets - 1
+    mantissa: int = index % self._sub_buckets + self._sub_buckets
+    return ((mantissa + 1) << shift) - 1
+
+  @property
+  def total(self) -> int:
+    """Return the number of recorded durations."""
+    return self._total
+
+  def record(self, duration: float) -> None:
+    """Record a duration.
+
+    Args:
+      duration: The duration in seconds.
+    """
+    value: int = min(max(int(duration * 1e6), 0), self._MAX_MICROSECONDS)
+    self._counts[self._index(value)] += 1
+    self._total += 1
+    if value > self._max:
+      self._max = value
+
+  def merge(self, other: "LatencyHistogram") -> None:
+    """Add the counts of another histogram with the same bits to this one."""
+    assert other._bits == self._bits
+    counts: List[int] = self._counts
+    for index, count in enumerate(list(other._counts)):
+      if count:
+        counts[index] += count
+    self._total += other._total
+    self._max = max(self._max, other._max)
+
+  def percentiles(self, percentiles: Sequence[float]) -> List[float]:
+    """Return percentiles of the recorded durations.
+
+    Args:
+      percentiles: The percentiles to compute in the range [0, 100].
+
+    Returns:
+      Returns a list with the duration in seconds of each percentile, or 0.0 if
+      nothing was recorded.
+    """
+    results: List[float] = [0.0] * len(percentiles)
+    if not self._total:
+      return results
+    order: List[int] = sorted(
+        range(len(percentiles)), key=lambda i: percentiles[i])
+    position: int = 0
+    seen: int = 0
+    for index, count in enumerate(self._counts):
+      if not count:
+        continue
+      seen += count
+      while (position < len(order) and
+             seen >= percentiles[order[position]] / 100.0 * self._total):
+        results[order[position]] = min(self._value(index), self._max) / 1e6
+        position += 1
+      if position == len(order):
+        break
+    for index in order[position:]:
+      results[index] = self._max / 1e6
+    return results
 
 
 class Timer(object):
@@ -86,6 +211,10 @@ class Timer(object):
     self._lock: threading.Lock = threading.Lock()
     self._start_time: float = 0.0
     self._get_time: Callable[[], float] = get_time
+    self._call_duration: float = 0.0
+    self._histogram: LatencyHistogram = LatencyHistogram()
+    # The number of completed calls per second, as (second, calls) pairs.
+    self._rates: Deque[Tuple[int, int]] = collections.deque(maxlen=3600)
     self.parent: Optional[Timer] = None
 
   @property
@@ -121,21 +250,75 @@ class Timer(object):
         return True
       return False
 
-  def stop(self) -> bool:
+  def stop(self, pause: bool = False) -> bool:
     """Stop a timer.
 
+    Args:
+      pause: Optional argument that is set to True to indicate that the timer
+        will be resumed.  This means that the call is not yet recorded in the
+        latency histogram.
+
     Returns:
       Returns True if the counter transitions from running to stopped and
        False otherwise.
 
     """
     with self._lock:
-      if self._start_time > 0.0:
-        now: float = self._get_time()
-        self._duration += now - self._start_time
-        self._start_time = 0.0
+      if self._start_time <= 0.0:
+        return False
+      now: float = self._get_time()
+      self._duration += now - self._start_time
+      self._call_duration += now - self._start_time
+      self._start_time = 0.0
+      if pause:
         return True
-      return False
+      self._histogram.record(self._call_duration)
+      self._call_duration = 0.0
+      second: int = int(now)
+      rates: Deque[Tuple[int, int]] = self._rates
+      if rates and rates[-1][0] == second:
+        rates[-1] = (second, rates[-1][1] + 1)
+      else:
+        rates.append((second, 1))
+    return True
+
+  def histogram(self) -> LatencyHistogram:
+    """Return a copy of the latency histogram of all calls."""
+    copy: LatencyHistogram = LatencyHistogram()
+    with self._lock:
+      copy.merge(self._histogram)
+    return copy
+
+  def percentiles(self, percentiles: Sequence[float]) -> List[float]:
+    """Return call duration percentiles.
+
+    Args:
+      percentiles: The percentiles to compute in the range [0, 100].
+
+    Returns:
+      Returns a list with the duration in seconds of each percentile.
+    """
+    return self.histogram().percentiles(percentiles)
+
+  def rate(self, window: float, now: float = -1.0) -> float:
+    """Return the number of completed calls per second over a time window.
+
+    Args:
+      window: The window in seconds, ending now (at most one hour.)
+      now: The current time. (Default is to use the timer clock.)
+
+    Returns:
+      Returns the average calls per second.
+    """
+    if window <= 0.0:
+      raise core.PyReachError(f"invalid rate window {window}")
+    if now < 0.0:
+      now = self._get_time()
+    start: float = now - window
+    with self._lock:
+      calls: int = sum(
+          count for second, count in self._rates if second + 1 > start)
+    return calls / window
 
   def result(self, now: float) -> Tuple[str, int, float]:
     """Return a result tuple.
@@ -185,7 +368,7 @@ class TimersSet(object):
       else:
         if trace:
           print(f"{trace}:stop({timer.name})")
-        if timer.stop():
+        if timer.stop(pause=True):
           restore.append((timer, False))
     if trace:
       print(f"{trace}:<=__enter__()")
@@ -215,7 +398,10 @@ class Timers(object):
 
   def __init__(self,
                names: Set[str],
-               get_time: Callable[[], float] = time.time) -> None:
+               get_time: Callable[[], float] = time.time,
+               interval: Optional[float] = None,
+               export_file: Optional[str] = None,
+               export_format: Optional[str] = None) -> None:
     """Initialize a set of timers.
 
     Args:
@@ -226,6 +412,15 @@ class Timers(object):
         names set specifies a the leaf nodes specifies the leaf nodes of all of
         the timers in the tree.  All interior tree nodes are automatically
         created.
+      interval: The report interval in seconds.  (Default: PYREACH_PERF_INTERVAL
+        or 30 seconds).
+      export_file: The file for machine-readable reports.  (Default:
+        PYREACH_PERF_EXPORT or none).
+      export_format: Either "jsonl" or "prometheus".  (Default:
+        PYREACH_PERF_EXPORT_FORMAT or "jsonl").
+
+    Raises:
+      PyReachError: if the export format is not valid.
     """
     # Flesh out the timer tree and ensure each timer has a parent.
     counter_timers: Dict[str, Timer] = {}
@@ -255,10 +450,24 @@ class Timers(object):
     self._last_results_time: float = get_time()
     self._names: Set[str] = names
     self._start_time: float = get_time()
+    if interval is None:
+      interval = float(os.environ.get("PYREACH_PERF_INTERVAL", "30"))
+    self._interval: float = interval
+    if export_file is None:
+      export_file = os.environ.get("PYREACH_PERF_EXPORT", "")
+    self._export_file: str = export_file
+    if export_format is None:
+      export_format = os.environ.get("PYREACH_PERF_EXPORT_FORMAT", "jsonl")
+    if export_format not in {"jsonl", "prometheus"}:
+      raise core.PyReachError(f"invalid timers export format {export_format}")
+    self._export_format: str = export_format
 
   def __getitem__(self, name: str) -> Timer:
     return self._counter_timers[name]
 
+  def __contains__(self, name: str) -> bool:
+    return name in self._counter_timers
+
   def enabled(self) -> Set[str]:
     """Return the currently enabled timers."""
     return set([
@@ -285,11 +494,13 @@ class Timers(object):
     if not self._enabled:
       return self._empty_counter_timers_set
 
-    # Dump every 30 seconds if enabled.
+    # Report every interval if enabled.
     now: float = self._get_time()
-    if now - self._last_results_time > 30.0:
-      self.dump()
+    if now - self._last_results_time > self._interval:
       self._last_results_time = now
+      self.dump()
+      if self._export_file:
+        self.export_to_file(self._export_file, now)
 
     timer_patterns: FrozenSet[str] = frozenset(timers_patterns)
     if timer_patterns in self._cache:
@@ -369,6 +580,99 @@ class Timers(object):
     ])
     return sorted(results)
 
+  def percentiles(self, name: str,
+                  percentiles: Sequence[float]) -> List[float]:
+    """Return call duration percentiles of a timer.
+
+    Args:
+      name: The timer name.
+      percentiles: The percentiles to compute in the range [0, 100].
+
+    Returns:
+      Returns a list with the duration in seconds of each percentile.
+    """
+    return self._counter_timers[name].percentiles(percentiles)
+
+  def export(self, now: float = -1.0, export_format: str = "") -> str:
+    """Return a machine-readable report of all timers.
+
+    Args:
+      now: The current time to use for timers that are still running.
+      export_format: Either "jsonl" or "prometheus". (Default is the format
+        the timers were created with.)
+
+    Raises:
+      PyReachError: if the export format is not valid.
+
+    Returns:
+      For "jsonl", one JSON object per line and timer with the name, calls,
+      total duration, the call rates over the last 1 and 60 seconds, and the
+      call duration percentiles.  For "prometheus", a summary metric with the
+      call duration quantiles and a gauge of the call rate per timer.
+    """
+    if now < 0.0:
+      now = self._get_time()
+    export_format = export_format or self._export_format
+    lines: List[str] = []
+    if export_format == "prometheus":
+      lines.append("# HELP pyreach_timer_seconds PyReach timer call duration.")
+      lines.append("# TYPE pyreach_timer_seconds summary")
+    elif export_format != "jsonl":
+      raise core.PyReachError(f"invalid timers export format {export_format}")
+    rate_lines: List[str] = []
+    for name, calls, duration in self.results(now):
+      timer: Timer = self._counter_timers[name]
+      values: List[float] = timer.percentiles(_REPORT_PERCENTILES)
+      if export_format == "jsonl":
+        record: Dict[str, Any] = {
+            "time": now,
+            "name": name,
+            "calls": calls,
+            "duration": duration,
+            "rate_1s": timer.rate(1.0, now),
+            "rate_60s": timer.rate(60.0, now),
+        }
+        for percentile, value in zip(_REPORT_PERCENTILES, values):
+          record[f"p{percentile:g}"] = value
+        lines.append(json.dumps(record, sort_keys=True))
+      else:
+        label: str = f'name="{name}"'
+        for percentile, value in zip(_REPORT_PERCENTILES, values):
+          lines.append(f'pyreach_timer_seconds{{{label},'
+                       f'quantile="{percentile / 100.0:g}"}} {value:.9f}')
+        lines.append(f"pyreach_timer_seconds_sum{{{label}}} {duration:.9f}")
+        lines.append(f"pyreach_timer_seconds_count{{{label}}} {calls}")
+        rate_lines.append(f"pyreach_timer_rate{{{label}}} "
+                          f"{timer.rate(60.0, now):.6f}")
+    if rate_lines:
+      lines.append("# HELP pyreach_timer_rate PyReach timer calls per second "
+                   "over the last minute.")
+      lines.append("# TYPE pyreach_timer_rate gauge")
+      lines.extend(rate_lines)
+    lines.append("")
+    return "\n".join(lines)
+
+  def export_to_file(self, filename: str, now: float = -1.0) -> None:
+    """Write a machine-readable report of all timers to a file.
+
+    JSON lines reports are appended to the file, Prometheus reports replace the
+    file atomically.
+
+    Args:
+      filename: The file to write.
+      now: The current time to use for timers that are still running.
+    """
+    text: str = self.export(now)
+    export_file: TextIO
+    if self._export_format == "jsonl":
+      with open(filename, "a") as export_file:
+        export_file.write(text)
+    else:
+      temporary_filename: str = filename + ".tmp"
+      with open(temporary_filename, "w") as export_file:
+        export_file.write(text)
+      os.replace(temporary_filename, filename)
+
   def dump(self) -> None:
     """Dump the current results."""
 
@@ -421,9 +725,11 @@ class Timers(object):
         delta_calls_text: str = f"        {delta_calls}"[-6:]
         delta_duration_text: str = f"        {delta_duration:.9f} sec"[-17:]
 
+        p50, p99 = self._counter_timers[name].percentiles((50.0, 99.0))
         lines.append(f"{name_text} {percentage_text} "
                      f"{calls_text} => {duration_text} "
-                     f"{delta_calls_text} => {delta_duration_text}")
+                     f"{delta_calls_text} => {delta_duration_text} "
+                     f"p50={p50:.6f} p99={p99:.6f}")
       self._last_results = results
 
       lines.append("")
@@ -436,6 +742,30 @@ class Timers(object):
         print(performance_text)
 
 
+@dataclasses.dataclass(frozen=True)
+class MessageTraceStage:
+  """Latency of a DeviceData pipeline stage, see Internal.message_trace().
+
+  Attributes:
+    device_type: The device type of the messages.
+    data_type: The data type of the messages.
+    stage: The pipeline stage.
+    count: The number of messages measured.
+    p50: The median latency in seconds.
+    p90: The 90th percentile latency in seconds.
+    p99: The 99th percentile latency in seconds.
+    max: The maximum latency in seconds.
+  """
+  device_type: str
+  data_type: str
+  stage: str
+  count: int
+  p50: float
+  p90: float
+  p99: float
+  max: float
+
+
 class InternalPlayback:
   """Playback is a playback object that manages playback of data."""
 
@@ -598,6 +928,37 @@ class Internal(object):
     """
     raise NotImplementedError
 
+  def start_message_trace(self) -> None:
+    """Start tracing the latency of DeviceData through the host pipeline.
+
+    Tracing applies to all hosts of the process.
+    """
+    raise NotImplementedError
+
+  def stop_message_trace(self) -> None:
+    """Stop tracing and discard the collected latencies."""
+    raise NotImplementedError
+
+  def message_trace(self) -> List[MessageTraceStage]:
+    """Return the latencies collected since tracing was started.
+
+    Returns:
+      The latency of each stage per device type and data type. Empty if
+      tracing is not started.
+    """
+    raise NotImplementedError
+
+  def request_rates(self) -> Dict[Tuple[str, str], float]:
+    """Return the measured rates of the streaming frame requests of the host.
+
+    The periodic frame requests of all the streaming devices of the host are
+    sent together by a single scheduler.
+
+    Returns:
+      The frame requests per second by (device type, device name).
+    """
+    raise NotImplementedError
+
   def add_device_data_callback(
       self,
       callback: Callable[[logs_pb2.DeviceData], bool],
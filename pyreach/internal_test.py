@@ -14,8 +14,11 @@
 
 """Tests of Pyreach Internal and Timers."""
 
+import json
 import math
 import os
+import tempfile
+import threading
 from typing import Tuple
 import unittest
 from pyreach import internal
@@ -81,6 +84,62 @@ class TimersTest(unittest.TestCase):
     # Nesting test:
     timers = internal.Timers({"gym.arm", "gym.color", "host.arm", "host.color"})
     assert timers.enabled() == set(), timers.enabled()
+
+  def test_latency_histogram(self) -> None:
+    """Test the latency histogram percentiles."""
+    histogram = internal.LatencyHistogram()
+    self.assertEqual(histogram.percentiles((50.0, 99.0)), [0.0, 0.0])
+    for index in range(1, 1001):
+      histogram.record(index / 1000.0)
+    self.assertEqual(histogram.total, 1000)
+    p99, p50, p100 = histogram.percentiles((99.0, 50.0, 100.0))
+    self.assertAlmostEqual(p50, 0.5, delta=0.5 * 0.04)
+    self.assertAlmostEqual(p99, 0.99, delta=0.99 * 0.04)
+    self.assertAlmostEqual(p100, 1.0)
+    other = internal.LatencyHistogram()
+    other.record(0.000010)
+    histogram.merge(other)
+    self.assertEqual(histogram.total, 1001)
+    self.assertEqual(histogram.percentiles((0.0,)), [0.00001])
+
+  def test_timer_percentiles(self) -> None:
+    """Test that paused timers record one duration per call."""
+    os.environ["PYREACH_PERF"] = ""
+    clock = FakeClock()
+    timers = internal.Timers({"gym.step", "host.arm"},
+                             get_time=clock.get_time,
+                             interval=1e9)
+    for _ in range(10):
+      with timers.select({"gym.step"}):
+        with timers.select({"!gym*", "host.arm"}):
+          pass
+    self.assertEqual(timers["gym.step"].calls, 10)
+    self.assertEqual(timers["gym.step"].histogram().total, 10)
+    self.assertEqual(timers["host.arm"].histogram().total, 10)
+    # Every call takes the same number of clock ticks.
+    duration = [r[2] for r in timers.results() if r[0] == "gym.step"][0]
+    self.assertAlmostEqual(
+        timers.percentiles("gym.step", (50.0,))[0],
+        duration / 10,
+        delta=duration / 10 * 0.04)
+    self.assertAlmostEqual(timers["gym.step"].rate(1000.0), 10 / 1000.0)
+
+    jsonl = [json.loads(line) for line in timers.export().splitlines()]
+    step = [record for record in jsonl if record["name"] == "gym.step"][0]
+    self.assertEqual(step["calls"], 10)
+    self.assertIn("p99", step)
+    prometheus = timers.export(export_format="prometheus")
+    self.assertIn('pyreach_timer_seconds_count{name="gym.step"} 10',
+                  prometheus)
+    self.assertIn('pyreach_timer_seconds{name="gym.step",quantile="0.99"}',
+                  prometheus)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+      filename = os.path.join(tempdir, "timers.jsonl")
+      timers.export_to_file(filename)
+      timers.export_to_file(filename)
+      with open(filename) as f:
+        self.assertEqual(len(f.readlines()), 2 * len(timers.results()))
     with timers.select({"gym"}):
       assert timers.enabled() == {"gym"}, f"got:{timers.enabled()}"
       with timers.select({"gym.arm"}):
@@ -94,6 +153,80 @@ class TimersTest(unittest.TestCase):
       assert timers.enabled() == {"gym"}, timers.enabled()
     assert timers.enabled() == set(), timers.enabled()
 
+  def test_latency_histogram(self) -> None:
+    """Test the latency histogram percentiles."""
+    histogram = internal.LatencyHistogram()
+    self.assertEqual(histogram.percentiles((50.0, 99.0)), [0.0, 0.0])
+    for index in range(1, 1001):
+      histogram.record(index / 1000.0)
+    self.assertEqual(histogram.total, 1000)
+    p99, p50, p100 = histogram.percentiles((99.0, 50.0, 100.0))
+    self.assertAlmostEqual(p50, 0.5, delta=0.5 * 0.04)
+    self.assertAlmostEqual(p99, 0.99, delta=0.99 * 0.04)
+    self.assertAlmostEqual(p100, 1.0)
+    other = internal.LatencyHistogram()
+    other.record(0.000010)
+    histogram.merge(other)
+    self.assertEqual(histogram.total, 1001)
+    self.assertEqual(histogram.percentiles((0.0,)), [0.00001])
+
+  def test_timer_percentiles(self) -> None:
+    """Test that paused timers record one duration per call."""
+    os.environ["PYREACH_PERF"] = ""
+    clock = FakeClock()
+    timers = internal.Timers({"gym.step", "host.arm"},
+                             get_time=clock.get_time,
+                             interval=1e9)
+    for _ in range(10):
+      with timers.select({"gym.step"}):
+        with timers.select({"!gym*", "host.arm"}):
+          pass
+    self.assertEqual(timers["gym.step"].calls, 10)
+    self.assertEqual(timers["gym.step"].histogram().total, 10)
+    self.assertEqual(timers["host.arm"].histogram().total, 10)
+    # Every call takes the same number of clock ticks.
+    duration = [r[2] for r in timers.results() if r[0] == "gym.step"][0]
+    self.assertAlmostEqual(
+        timers.percentiles("gym.step", (50.0,))[0],
+        duration / 10,
+        delta=duration / 10 * 0.04)
+    self.assertAlmostEqual(timers["gym.step"].rate(1000.0), 10 / 1000.0)
+
+    jsonl = [json.loads(line) for line in timers.export().splitlines()]
+    step = [record for record in jsonl if record["name"] == "gym.step"][0]
+    self.assertEqual(step["calls"], 10)
+    self.assertIn("p99", step)
+    prometheus = timers.export(export_format="prometheus")
+    self.assertIn('pyreach_timer_seconds_count{name="gym.step"} 10',
+                  prometheus)
+    self.assertIn('pyreach_timer_seconds{name="gym.step",quantile="0.99"}',
+                  prometheus)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+      filename = os.path.join(tempdir, "timers.jsonl")
+      timers.export_to_file(filename)
+      timers.export_to_file(filename)
+      with open(filename) as f:
+        self.assertEqual(len(f.readlines()), 2 * len(timers.results()))
+
+  def test_timer_threads(self) -> None:
+    """Test that the calls of every thread are recorded in one histogram."""
+    timer = internal.Timer("host.arm")
+
+    def run() -> None:
+      for _ in range(100):
+        timer.start()
+        timer.stop()
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    # Overlapping calls of other threads are not counted, as for one thread.
+    self.assertGreater(timer.calls, 0)
+    self.assertEqual(timer.histogram().total, timer.calls)
+
 
 if __name__ == "__main__":
   unittest.main()
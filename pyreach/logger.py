@@ -93,11 +93,28 @@ class Logger(object):
   def send_snapshot(self, snapshot: snapshot_lib.Snapshot) -> None:
     """Send a snapshot.
 
+    The snapshot may be sent asynchronously, see flush_snapshots().
+
     Args:
       snapshot: The snapshot to send.
     """
     raise NotImplementedError
 
+  # pylint: disable=unused-argument
+  def flush_snapshots(self, timeout: Optional[float] = None) -> bool:
+    """Wait for the snapshots sent so far to be handed to the connection.
+
+    Loggers that send snapshots synchronously have nothing to wait for, and
+    need not override this method.
+
+    Args:
+      timeout: optional timeout (in seconds) to wait for.
+
+    Returns:
+      True if the snapshots have been sent, False on timeout.
+    """
+    return True
+
   def start_annotation_interval(self,
                                 name: str,
                                 log_channel_id: str = "") -> core.PyReachStatus:
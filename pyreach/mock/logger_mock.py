@@ -93,6 +93,17 @@ class LoggerMock(logger.Logger):
     """
     pass
 
+  def flush_snapshots(self, timeout: Optional[float] = None) -> bool:
+    """Wait for the snapshots sent so far to be handed to the connection.
+
+    Args:
+      timeout: optional timeout (in seconds) to wait for.
+
+    Returns:
+      True if the snapshots have been sent, False on timeout.
+    """
+    return True
+
   def start_annotation_interval(self,
                                 name: str,
                                 log_channel_id: str = "") -> core.PyReachStatus:
@@ -0,0 +1,208 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""An array of poses, for operations on many poses at once."""
+
+from typing import Iterable, Iterator, List, Tuple, Union, overload
+
+import numpy as np
+
+from pyreach import core
+from pyreach.common.base import transform_util
+
+
+class PoseArray(object):
+  """An immutable array of poses backed by a numpy array.
+
+  Each pose is a row (x, y, z, rx, ry, rz) of an (N, 6) float64 array, as in
+  Pose.as_list(). The operations apply to all the poses at once, and accept
+  either a PoseArray of the same length or a single Pose as the other operand.
+  """
+
+  _poses: np.ndarray
+
+  def __init__(self, poses: Union[np.ndarray, List[List[float]]]) -> None:
+    """Create an array of poses.
+
+    Args:
+      poses: the poses, of shape (N, 6).
+
+    Raises:
+      ValueError: if the poses are not of shape (N, 6).
+    """
+    array = np.array(poses, dtype=np.float64)
+    if array.ndim != 2 or array.shape[1] != 6:
+      raise ValueError("PoseArray must be of shape (N, 6), not %s" %
+                       (array.shape,))
+    array.flags.writeable = False
+    self._poses = array
+
+  @classmethod
+  def from_poses(cls, poses: Iterable[core.Pose]) -> "PoseArray":
+    """Return an array of poses from Pose objects."""
+    return cls(np.array([pose.as_list() for pose in poses],
+                        dtype=np.float64).reshape(-1, 6))
+
+  @classmethod
+  def from_quaternions(cls, poses: np.ndarray) -> "PoseArray":
+    """Return an array of poses from positions and quaternions.
+
+    Args:
+      poses: the poses as (x, y, z, qx, qy, qz, qw), of shape (N, 7).
+
+    Raises:
+      ValueError: if the poses are not of shape (N, 7).
+
+    Returns:
+      The array of poses.
+    """
+    array = np.asarray(poses, dtype=np.float64)
+    if array.ndim != 2 or array.shape[1] != 7:
+      raise ValueError("Poses must be of shape (N, 7), not %s" %
+                       (array.shape,))
+    return cls(
+        np.concatenate(
+            (array[:, :3],
+             transform_util.quaternions_to_axis_angles(array[:, 3:])),
+            axis=1))
+
+  def as_array(self) -> np.ndarray:
+    """Return the read-only (N, 6) array of the poses."""
+    return self._poses
+
+  def as_quaternions(self) -> np.ndarray:
+    """Return the poses as (x, y, z, qx, qy, qz, qw), of shape (N, 7)."""
+    return np.concatenate(
+        (self._poses[:, :3],
+         transform_util.matrices_to_quaternions(
+             transform_util.axis_angles_to_matrices(self._poses[:, 3:]))),
+        axis=1)
+
+  def as_matrices(self) -> np.ndarray:
+    """Return the homogeneous transformation matrices, of shape (N, 4, 4)."""
+    return transform_util.pose_to_matrix(self._poses)
+
+  def to_poses(self) -> List[core.Pose]:
+    """Return the poses as Pose objects."""
+    return [core.Pose.from_list(pose) for pose in self._poses.tolist()]
+
+  def __len__(self) -> int:
+    return len(self._poses)
+
+  def __iter__(self) -> Iterator[core.Pose]:
+    return iter(self.to_poses())
+
+  @overload
+  def __getitem__(self, index: int) -> core.Pose:
+    ...
+
+  @overload
+  def __getitem__(self, index: slice) -> "PoseArray":
+    ...
+
+  def __getitem__(self, index: Union[int,
+                                     slice]) -> Union[core.Pose, "PoseArray"]:
+    if isinstance(index, slice):
+      return PoseArray(self._poses[index])
+    return core.Pose.from_list(self._poses[index].tolist())
+
+  def __repr__(self) -> str:
+    return "PoseArray(%r)" % self._poses.tolist()
+
+  def _other(self, other: Union["PoseArray", core.Pose]) -> np.ndarray:
+    """Return the array of the other operand of an operation."""
+    if isinstance(other, core.Pose):
+      return np.array([other.as_list()], dtype=np.float64)
+    if len(other) != len(self) and len(other) != 1:
+      raise ValueError("PoseArray lengths differ: %d and %d" %
+                       (len(self), len(other)))
+    return other.as_array()
+
+  def compose(self, other: Union["PoseArray", core.Pose]) -> "PoseArray":
+    """Return each pose composed with the other pose.
+
+    Args:
+      other: the base poses, as in transform_util.multiply_pose(pose, other).
+
+    Returns:
+      The composed poses.
+    """
+    return PoseArray(
+        transform_util.multiply_pose(self._poses, self._other(other)))
+
+  def inverse(self) -> "PoseArray":
+    """Return the inverse of each pose."""
+    return PoseArray(transform_util.inverse_pose(self._poses))
+
+  def interpolate(self, other: Union["PoseArray", core.Pose],
+                  fraction: Union[float, np.ndarray]) -> "PoseArray":
+    """Return poses between each pose and the other pose.
+
+    The position is interpolated linearly, the rotation spherically.
+
+    Args:
+      other: the end poses.
+      fraction: the fraction of the way to the end poses, a number or an array
+        of shape (N,). 0 returns the poses, 1 the end poses.
+
+    Returns:
+      The interpolated poses.
+    """
+    end = self._other(other)
+    t = np.asarray(fraction, dtype=np.float64).reshape(-1, 1)
+    start_rotations = transform_util.axis_angles_to_matrices(self._poses[:, 3:])
+    end_rotations = transform_util.axis_angles_to_matrices(end[:, 3:])
+    relative = transform_util.matrices_to_axis_angles(
+        np.matmul(np.transpose(start_rotations, (0, 2, 1)), end_rotations))
+    rotations = np.matmul(start_rotations,
+                          transform_util.axis_angles_to_matrices(relative * t))
+    positions = self._poses[:, :3] + (end[:, :3] - self._poses[:, :3]) * t
+    return PoseArray(
+        np.concatenate(
+            (positions, transform_util.matrices_to_axis_angles(rotations)),
+            axis=1))
+
+  def distance(
+      self, other: Union["PoseArray",
+                         core.Pose]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the distances between each pose and the other pose.
+
+    Args:
+      other: the other poses.
+
+    Returns:
+      The translation distances in meters and the rotation angles in radians
+      between the poses, each of shape (N,).
+    """
+    end = self._other(other)
+    translation = np.linalg.norm(end[:, :3] - self._poses[:, :3], axis=1)
+    relative = transform_util.matrices_to_axis_angles(
+        np.matmul(
+            np.transpose(
+                transform_util.axis_angles_to_matrices(self._poses[:, 3:]),
+                (0, 2, 1)), transform_util.axis_angles_to_matrices(end[:, 3:])))
+    return translation, np.linalg.norm(relative, axis=1)
+
+  def transform_points(self, points: np.ndarray) -> np.ndarray:
+    """Return points transformed by each pose.
+
+    Args:
+      points: the points, of shape (M, 3).
+
+    Returns:
+      The points transformed by each pose, of shape (N, M, 3).
+    """
+    return np.transpose(
+        transform_util.transform_by_pose(
+            np.asarray(points, dtype=np.float64).reshape(-1, 3).T,
+            self._poses), (0, 2, 1))
@@ -0,0 +1,136 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for pose_array."""
+
+import math
+import unittest
+
+import numpy as np
+
+from pyreach import core
+from pyreach import pose_array
+from pyreach.common.base import transform_util
+
+
+class PoseArrayTest(unittest.TestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    rng = np.random.default_rng(1)
+    self.poses = np.concatenate(
+        (rng.normal(size=(20, 3)), rng.normal(size=(20, 3))), axis=1)
+    self.poses[0, 3:] = [math.pi, 0.0, 0.0]
+    self.poses[1, 3:] = [0.0, 0.0, 0.0]
+    self.poses[2, 3:] = [1e-6, 0.0, -2e-6]
+    self.others = np.concatenate(
+        (rng.normal(size=(20, 3)), rng.normal(size=(20, 3))), axis=1)
+
+  def assert_same_poses(self, a: np.ndarray, b: np.ndarray) -> None:
+    np.testing.assert_allclose(
+        transform_util.pose_to_matrix(a),
+        transform_util.pose_to_matrix(b),
+        atol=1e-9)
+
+  def test_shape(self) -> None:
+    with self.assertRaises(ValueError):
+      pose_array.PoseArray(np.zeros((3, 7)))
+    with self.assertRaises(ValueError):
+      pose_array.PoseArray(np.zeros(6))
+    array = pose_array.PoseArray(self.poses)
+    self.assertEqual(len(array), 20)
+    self.assertFalse(array.as_array().flags.writeable)
+    self.assertEqual(len(array[2:5]), 3)
+    with self.assertRaises(ValueError):
+      array.compose(array[2:5])
+
+  def test_pose_conversion(self) -> None:
+    poses = [
+        core.Pose.from_list([1.0, 2.0, 3.0, 0.1, 0.2, 0.3]),
+        core.Pose.from_list([-1.0, 0.0, 0.5, 0.0, 0.0, 0.0]),
+    ]
+    array = pose_array.PoseArray.from_poses(poses)
+    expected = [pose.as_list() for pose in poses]
+    self.assertEqual([pose.as_list() for pose in array.to_poses()], expected)
+    self.assertEqual(array[1].as_list(), expected[1])
+    self.assertEqual([pose.as_list() for pose in array], expected)
+    self.assertEqual(len(pose_array.PoseArray.from_poses([])), 0)
+
+  def test_quaternions(self) -> None:
+    array = pose_array.PoseArray(self.poses)
+    quaternions = array.as_quaternions()
+    self.assertEqual(quaternions.shape, (20, 7))
+    for pose, quaternion in zip(self.poses, quaternions):
+      expected = transform_util.axis_angle_to_quaternion(pose[3:])
+      if expected[3] < 0:
+        expected = -expected
+      if abs(expected[3]) < 1e-12:
+        # At an angle of pi, q and -q are both valid.
+        expected *= np.sign(np.dot(expected, quaternion[3:]))
+      np.testing.assert_allclose(quaternion[3:], expected, atol=1e-9)
+    self.assert_same_poses(
+        pose_array.PoseArray.from_quaternions(quaternions).as_array(),
+        self.poses)
+
+  def test_compose_and_inverse(self) -> None:
+    array = pose_array.PoseArray(self.poses)
+    composed = array.compose(pose_array.PoseArray(self.others))
+    for i in range(len(array)):
+      self.assert_same_poses(
+          composed.as_array()[i],
+          transform_util.multiply_pose(self.poses[i], self.others[i]))
+    base = core.Pose.from_list(list(self.others[0]))
+    composed = array.compose(base)
+    self.assert_same_poses(
+        composed.as_array()[3],
+        transform_util.multiply_pose(self.poses[3], self.others[0]))
+    inverse = array.inverse()
+    np.testing.assert_allclose(
+        transform_util.pose_to_matrix(inverse.as_array()),
+        np.linalg.inv(transform_util.pose_to_matrix(self.poses)),
+        atol=1e-9)
+    self.assert_same_poses(
+        array.compose(inverse).as_array(), np.zeros((20, 6)))
+
+  def test_interpolate_and_distance(self) -> None:
+    array = pose_array.PoseArray(self.poses)
+    others = pose_array.PoseArray(self.others)
+    self.assert_same_poses(array.interpolate(others, 0.0).as_array(),
+                           self.poses)
+    self.assert_same_poses(array.interpolate(others, 1.0).as_array(),
+                           self.others)
+    translation, rotation = array.distance(others)
+    half = array.interpolate(others, np.full(20, 0.5))
+    half_translation, half_rotation = array.distance(half)
+    np.testing.assert_allclose(half_translation, translation / 2)
+    np.testing.assert_allclose(half_rotation, rotation / 2, atol=1e-9)
+    self.assertTrue(np.all(rotation <= math.pi + 1e-9))
+    zero_translation, zero_rotation = array.distance(array)
+    np.testing.assert_allclose(zero_translation, 0.0)
+    np.testing.assert_allclose(zero_rotation, 0.0, atol=1e-7)
+
+  def test_transform_points(self) -> None:
+    array = pose_array.PoseArray(self.poses)
+    points = np.array([[0.0, 0.0, 0.0], [1.0, 2.0, 3.0]])
+    transformed = array.transform_points(points)
+    self.assertEqual(transformed.shape, (20, 2, 3))
+    for i in range(len(array)):
+      np.testing.assert_allclose(
+          transformed[i],
+          transform_util.transform_by_pose(points.T, self.poses[i]).T,
+          atol=1e-12)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -70,6 +70,12 @@ def main() -> None:
       default=1280,
       help="Width of unified window. If 0, will draw images on separate windows."
   )
+  parser.add_argument(
+      "--display_fps",
+      type=float,
+      default=30.0,
+      help="Maximum refresh rate of the unified window, independent of the "
+      "camera rates. If 0, refreshes on every image.")
   parser.add_argument(
       "--force_unified",
       default=False,
@@ -118,7 +124,8 @@ def main() -> None:
       show_crosshair=not args.disable_crosshair,
       request_oracles=args.request_oracles,
       connection_string=args.connection_string,
-      user_uid=args.user_uid)
+      user_uid=args.user_uid,
+      display_fps=args.display_fps)
   control.run()
 
 
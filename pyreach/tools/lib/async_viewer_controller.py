@@ -86,7 +86,8 @@ class Controller:
                show_crosshair: bool = True,
                request_oracles: bool = False,
                connection_string: str = "",
-               user_uid: Optional[str] = None) -> None:
+               user_uid: Optional[str] = None,
+               display_fps: float = 30.0) -> None:
     """Instantiate a controller for multiple cameras.
 
     Args:
@@ -103,6 +104,8 @@ class Controller:
       request_oracles: If true, will send requests to the oracles.
       connection_string: The PyReach connection string.
       user_uid: The user UID for the connection.
+      display_fps: The maximum refresh rate of the unified window. If zero,
+        refresh on every image.
     """
     # If true, will render the undistortion field as red / green arrows.
     self._show_undistortion = show_undistortion
@@ -125,7 +128,7 @@ class Controller:
 
     # Image displayer using OpenCV windows.
     self._image_display = image_display.ImageDisplay(
-        show_crosshair=show_crosshair, uwidth=uwidth)
+        show_crosshair=show_crosshair, uwidth=uwidth, max_fps=display_fps)
     self._image_display.add_click_listener(self._on_mouse)
 
     # These "windows" variables hold the names of the windows for each camera to
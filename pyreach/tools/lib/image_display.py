@@ -18,8 +18,9 @@ Can show in a single unified window, or in multiple windows.
 """
 import math
 import os
+import threading
 import time
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import cv2  # type: ignore  # type: ignore
 import numpy as np
@@ -34,6 +35,9 @@ _SNAPSHOT_DIR = "snapshots"
 # Aspect ratio used for the unified window.
 _UNIFIED_ASPECT_RATIO = 16 / 9
 
+# Default maximum refresh rate of the unified window.
+_UNIFIED_MAX_FPS = 30.0
+
 # Color in which the crosshair is drawn, in the form (B, G, R).
 _CROSSHAIR_COLOR = (255, 0, 255)
 
@@ -120,13 +124,18 @@ def _get_image_to_show(img: Optional[np.ndarray],
 class ImageDisplay:
   """ImageDisplay displays images."""
 
-  def __init__(self, uwidth: int = 0, show_crosshair: bool = True) -> None:
+  def __init__(self,
+               uwidth: int = 0,
+               show_crosshair: bool = True,
+               max_fps: float = _UNIFIED_MAX_FPS) -> None:
     """Initialize the image display.
 
     Args:
       uwidth: the width of the display, if zero, will autoscale.
       show_crosshair: if true, the crosshair at the centre of each image will be
         displayed.
+      max_fps: the maximum refresh rate of the unified window, independent of
+        the rate of the cameras. If zero, refresh on every image.
     """
     # Threadsafe cv2.
     self._cv2e = cv2_eventloop.get_instance()
@@ -134,6 +143,9 @@ class ImageDisplay:
     self._last_shown: Dict[str, Tuple[np.ndarray, Optional[np.ndarray],
                                       bool]] = {}
     self._last_detected_objects: Dict[str, List[NamedPolygonT]] = {}
+    # The undistortion field per window, rendered for the last calibration.
+    self._undistortion_overlays: Dict[
+        str, undistortion_field.UndistortionOverlay] = {}
     # Counts number of frames per window.
     self._frames: Dict[str, frame_counter.FrameCounter] = {}
     # If true, will draw everything in one window.
@@ -152,6 +164,24 @@ class ImageDisplay:
     # Last known window boundaries.
     self._window_rects: List[Tuple[str, Tuple[int, int, int, int],
                                    Tuple[int, int]]] = []
+    # Persistent unified image, only the updated tiles are redrawn.
+    self._unified_image = np.zeros(
+        (self._unified_shape[0], self._unified_shape[1], 3), np.uint8)
+    # Window names in the current unified grid layout.
+    self._unified_layout: Tuple[str, ...] = ()
+    # Windows with tiles that must be redrawn.
+    self._dirty_windows: Set[str] = set()
+    # Window boundaries, per window.
+    self._tile_rects: Dict[str, Tuple[str, Tuple[int, int, int, int],
+                                      Tuple[int, int]]] = {}
+    # Guards the unified image, layout and refresh state.
+    self._unified_lock = threading.Lock()
+    # Minimum time between refreshes of the unified window.
+    self._min_refresh_period = 1.0 / max_fps if max_fps > 0 else 0.0
+    # Time of the last refresh of the unified window.
+    self._last_refresh_time = 0.0
+    # True if a refresh is scheduled but not yet shown.
+    self._refresh_pending = False
     # Unified window name.
     self._unified_window_name = "Unified View"
     if self._is_unified():
@@ -226,6 +256,9 @@ class ImageDisplay:
       target_extent: the size (width, height) tuple to paste the image to.
       window_name: the name of the window.
     """
+    # Clear the tile, in case the previous image had another aspect ratio.
+    target_img[target_start[0]:target_start[0] + target_extent[0],
+               target_start[1]:target_start[1] + target_extent[1]] = 0
     # TODO: Height / width and x / y are swapped in this method. Should
     # be corrected.
     width, height = target_extent
@@ -249,37 +282,70 @@ class ImageDisplay:
       target_img[x1:x2, y1:y2] = img
     # Store the window mapping so that we can retrieve original coordinates on
     # click.
-    self._window_rects.append(
-        (window_name, (y1, x1, y2, x2), (oheight, owidth)))
-
-  def _draw_unified_view(self) -> None:
-    """Draw unified view draws a unified view."""
-    # Create a grid of number of images.
-    n = len(self._last_shown)
-    h = int(math.ceil(math.sqrt(n)))
-    w = int(math.ceil(n / h))
-    resize_to = (self._unified_shape[1] // w, self._unified_shape[0] // h)
-    unified_image = np.zeros(
-        (self._unified_shape[0], self._unified_shape[1], 3), np.uint8)
-    self._window_rects = []
-    for index, window_tuple in enumerate(sorted(self._last_shown.items())):
-      wname, images_tuple = window_tuple
-      raw_img, raw_ovl, _ = images_tuple
-      img = _get_image_to_show(raw_img, raw_ovl, self._show_crosshair)
-      if img is None:
-        continue
-      grid_j = index // h
-      grid_i = index % h
-      start_y = int(grid_i * self._unified_shape[0] / h)
-      start_x = int(grid_j * self._unified_shape[1] / w)
-      texts = [
-          f"{wname} ({raw_img.shape[1]} x {raw_img.shape[0]})",
-          f"Client fps: {self._frames[wname].fps:0.2f} "
-          f"[{self._frames[wname].frames}]",
-      ]
-      self._resize_image_to(texts, img, unified_image, (start_y, start_x),
-                            (resize_to[1], resize_to[0]), wname)
-    self._cv2e.call(cv2.imshow, self._unified_window_name, unified_image)
+    self._tile_rects[window_name] = (window_name, (y1, x1, y2, x2), (oheight,
+                                                                     owidth))
+
+  def _draw_unified_view(self, window_name: str) -> None:
+    """Draw the updated tile of the unified view, and refresh the window.
+
+    Args:
+      window_name: the name of the window that was updated.
+    """
+    with self._unified_lock:
+      layout = tuple(sorted(self._last_shown))
+      if layout != self._unified_layout:
+        # The grid changed, redraw all tiles.
+        self._unified_layout = layout
+        self._unified_image[:] = 0
+        self._tile_rects = {}
+        self._dirty_windows = set(layout)
+      else:
+        self._dirty_windows.add(window_name)
+      # Create a grid of number of images.
+      n = len(layout)
+      h = int(math.ceil(math.sqrt(n)))
+      w = int(math.ceil(n / h))
+      resize_to = (self._unified_shape[1] // w, self._unified_shape[0] // h)
+      for index, wname in enumerate(layout):
+        if wname not in self._dirty_windows:
+          continue
+        raw_img, raw_ovl, _ = self._last_shown[wname]
+        img = _get_image_to_show(raw_img, raw_ovl, self._show_crosshair)
+        if img is None:
+          continue
+        grid_j = index // h
+        grid_i = index % h
+        start_y = int(grid_i * self._unified_shape[0] / h)
+        start_x = int(grid_j * self._unified_shape[1] / w)
+        texts = [
+            f"{wname} ({raw_img.shape[1]} x {raw_img.shape[0]})",
+            f"Client fps: {self._frames[wname].fps:0.2f} "
+            f"[{self._frames[wname].frames}]",
+        ]
+        self._resize_image_to(texts, img, self._unified_image,
+                              (start_y, start_x), (resize_to[1], resize_to[0]),
+                              wname)
+      self._dirty_windows = set()
+      self._window_rects = list(self._tile_rects.values())
+      if self._refresh_pending:
+        # The pending refresh will show this update.
+        return
+      self._refresh_pending = True
+      delay = self._last_refresh_time + self._min_refresh_period - time.time()
+    if delay > 0:
+      timer = threading.Timer(delay, self._cv2e.call,
+                              (self._show_unified_view,))
+      timer.daemon = True
+      timer.start()
+    else:
+      self._cv2e.call(self._show_unified_view)
+
+  def _show_unified_view(self) -> None:
+    """Show the unified image, called from the cv2 event loop."""
+    with self._unified_lock:
+      self._refresh_pending = False
+      self._last_refresh_time = time.time()
+      cv2.imshow(self._unified_window_name, self._unified_image)
 
   def update_host_name(self, host: str) -> None:
     if not host or self._host_name == host:
@@ -294,7 +360,7 @@ class ImageDisplay:
 
   def _render(self, window_name: str, img: Any) -> None:
     if self._is_unified():
-      self._draw_unified_view()
+      self._draw_unified_view(window_name)
     else:
       if img is not None:
         self._cv2e.call(cv2.imshow, window_name, img)
@@ -360,9 +426,16 @@ class ImageDisplay:
       ovl = img_input
     else:
       img = img_input
-    if intrinsics is not None and distortion is not None and img is not None:
-      # Render undistortion field.
-      undistortion_field.render_onto(img, intrinsics, distortion)
+    if (intrinsics is not None and distortion is not None and
+        img is not None and not overlay):
+      # Render undistortion field, re-rendering the cached field only when the
+      # calibration or the image size changes.
+      field = self._undistortion_overlays.get(window_name)
+      if field is None or not field.matches(img.shape, intrinsics, distortion):
+        field = undistortion_field.UndistortionOverlay(
+            img.shape[:2], intrinsics, distortion)
+        self._undistortion_overlays[window_name] = field
+      field.render_onto(img)
     if img is None:
       return
     self._last_shown[window_name] = (img, ovl, depth)
@@ -14,7 +14,7 @@
 
 """Compute undistortion fields for images."""
 
-from typing import Tuple
+from typing import Optional, Tuple
 
 import cv2  # type: ignore  # type: ignore
 import numpy as np
@@ -55,8 +55,11 @@ def _get_undistortion_shifts(
   return x_and_y.T, diff
 
 
-def _draw_arrow(image: np.ndarray, center: np.ndarray, uv: np.ndarray,
-                delta: float) -> None:
+def _draw_arrow(image: np.ndarray,
+                center: np.ndarray,
+                uv: np.ndarray,
+                delta: float,
+                color: Optional[Tuple[int, int, int]] = None) -> None:
   """Draw an arrow on an image.
 
   Args:
@@ -64,34 +67,113 @@ def _draw_arrow(image: np.ndarray, center: np.ndarray, uv: np.ndarray,
     center: the center point of the image.
     uv: the direction of the arrow.
     delta: the length of the arrow.
+    color: the color of the arrow. If None, green for outward arrows and red
+      for inward arrows.
   """
   if np.abs(delta).max() < 1:
     return
-  original_rad = np.linalg.norm(uv - center)
-  new_rad = np.linalg.norm(uv + delta - center)
+  if color is None:
+    original_rad = np.linalg.norm(uv - center)
+    new_rad = np.linalg.norm(uv + delta - center)
+    color = (0, 255, 0) if new_rad > original_rad else (0, 0, 255)
   cv2.arrowedLine(
       image,
       tuple(uv.astype(int).tolist()),
       tuple((uv + delta).astype(int).tolist()),
-      color=(0, 255, 0) if new_rad > original_rad else (0, 0, 255),
+      color=color,
       thickness=2,
       tipLength=0.2)
 
 
+class UndistortionOverlay:
+  """A precomputed undistortion field, blended onto images of one size.
+
+  The field only depends on the intrinsics, the distortion and the image
+  size, so the arrows are rendered once into an RGBA layer. Only the pixels
+  covered by the arrows are blended onto each image.
+  """
+
+  _key: Tuple[Tuple[int, int], Tuple[float, ...], Tuple[float, ...]]
+  _layer: np.ndarray
+  _rows: np.ndarray
+  _cols: np.ndarray
+  _colors: np.ndarray
+
+  def __init__(self, shape: Tuple[int, int], intrinsics: Tuple[float, ...],
+               distortion: Tuple[float, ...]) -> None:
+    """Render an undistortion field into an RGBA layer.
+
+    Args:
+      shape: the (height, width) of the images.
+      intrinsics: the intrinsics for undistortion.
+      distortion: the distortion field.
+    """
+    self._key = ((int(shape[0]), int(shape[1])), tuple(intrinsics),
+                 tuple(distortion))
+    arrows = np.zeros((shape[0], shape[1], 3), dtype=np.uint8)
+    # The arrows are drawn twice: in color, and as a white mask that captures
+    # the pixels covered by the arrows, even when drawn in black.
+    mask = np.zeros((shape[0], shape[1], 3), dtype=np.uint8)
+    uv_coords, deltas = _get_undistortion_shifts(arrows, intrinsics,
+                                                 distortion)
+    center = np.array(intrinsics[2:4], dtype=float)
+    for index in range(uv_coords.shape[0]):
+      uv = uv_coords[index, :]
+      delta = deltas[index, :]
+      _draw_arrow(arrows, center, uv, delta)
+      _draw_arrow(mask, center, uv, delta, color=(255, 255, 255))
+    self._rows, self._cols = np.nonzero(mask[:, :, 0])
+    self._colors = arrows[self._rows, self._cols]
+    self._layer = np.zeros((shape[0], shape[1], 4), dtype=np.uint8)
+    self._layer[:, :, :3] = arrows
+    self._layer[self._rows, self._cols, 3] = 128
+
+  def matches(self, shape: Tuple[int, ...], intrinsics: Tuple[float, ...],
+              distortion: Tuple[float, ...]) -> bool:
+    """Return True if the overlay was rendered for the given parameters.
+
+    Args:
+      shape: the shape of the image.
+      intrinsics: the intrinsics for undistortion.
+      distortion: the distortion field.
+
+    Returns:
+      True if the overlay can be rendered on the image.
+    """
+    return self._key == ((int(shape[0]), int(shape[1])), tuple(intrinsics),
+                         tuple(distortion))
+
+  @property
+  def layer(self) -> np.ndarray:
+    """The RGBA layer (in OpenCV channel order) of the field."""
+    return self._layer
+
+  def render_onto(self, image: np.ndarray) -> None:
+    """Alpha-blend the field onto an image.
+
+    Args:
+      image: the image to render the field onto, with the size of the overlay.
+    """
+    if self._rows.shape[0] == 0:
+      return
+    colors = self._colors
+    if image.ndim == 2:
+      colors = colors[:, 0]
+    pixels = image[self._rows, self._cols]
+    image[self._rows, self._cols] = cv2.addWeighted(
+        pixels, 0.5, colors.astype(image.dtype), 0.5, 0).reshape(pixels.shape)
+
+
 def render_onto(orig_image: np.ndarray, intrinsics: Tuple[float, ...],
                 distortion: Tuple[float, ...]) -> None:
   """Render an undistortion field onto an image.
 
+  Prefer UndistortionOverlay when rendering onto multiple images.
+
   Args:
     orig_image: the image to render the field onto.
     intrinsics: the intrinsics for undistortion.
     distortion: the distrortion field.
   """
-  image = orig_image.copy()
-  uv_coords, deltas = _get_undistortion_shifts(image, intrinsics, distortion)
-  center = np.array(intrinsics[2:4], dtype=float)
-  for index in range(uv_coords.shape[0]):
-    uv = uv_coords[index, :]
-    delta = deltas[index, :]
-    _draw_arrow(image, center, uv, delta)
-  cv2.addWeighted(orig_image, 0.5, image, 0.5, 0, dst=orig_image)
+  UndistortionOverlay(orig_image.shape[:2], intrinsics,
+                      distortion).render_onto(orig_image)
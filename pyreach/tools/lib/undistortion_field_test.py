@@ -0,0 +1,58 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for undistortion_field."""
+
+import unittest
+
+import numpy as np
+
+from pyreach.tools.lib import undistortion_field
+
+_INTRINSICS = (600.0, 600.0, 320.0, 240.0)
+_DISTORTION = (0.1, -0.2, 0.001, 0.002, 0.05)
+
+
+class UndistortionFieldTest(unittest.TestCase):
+
+  def test_overlay(self) -> None:
+    overlay = undistortion_field.UndistortionOverlay((480, 640), _INTRINSICS,
+                                                     _DISTORTION)
+    self.assertEqual(overlay.layer.shape, (480, 640, 4))
+    self.assertTrue(overlay.matches((480, 640, 3), _INTRINSICS, _DISTORTION))
+    self.assertFalse(overlay.matches((480, 640, 3), _INTRINSICS, (0.0,) * 5))
+    self.assertFalse(overlay.matches((240, 320), _INTRINSICS, _DISTORTION))
+
+    image = np.full((480, 640, 3), 100, dtype=np.uint8)
+    overlay.render_onto(image)
+    blended = overlay.layer[:, :, 3] > 0
+    self.assertTrue(blended.any())
+    self.assertTrue((image[~blended] == 100).all())
+    expected = (overlay.layer[:, :, :3][blended].astype(int) + 100) / 2
+    self.assertLessEqual(
+        np.abs(image[blended].astype(int) - expected).max(), 1)
+
+    depth = np.full((480, 640), 1000, dtype=np.uint16)
+    overlay.render_onto(depth)
+    self.assertTrue((depth[~blended] == 1000).all())
+    self.assertTrue((depth[blended] == 500).all())
+
+  def test_no_distortion(self) -> None:
+    image = np.full((480, 640, 3), 100, dtype=np.uint8)
+    undistortion_field.render_onto(image, _INTRINSICS, (0.0,) * 5)
+    self.assertTrue((image == 100).all())
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,103 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Log columns exports a logs directory to columns, and queries them.
+
+Without --data_type, the groups of messages and their columns are listed.
+With --data_type, the selected columns of a group are printed as CSV.
+
+Sample commands:
+  python3 log_columns.py --logs_dir=/path/to/logs --columns_dir=/tmp/columns
+  python3 log_columns.py --columns_dir=/tmp/columns --device_type=robot \
+      --data_type=robot-state --columns=ts,joints --start_time=1600000000
+"""
+
+import csv
+import sys
+from typing import List, Optional
+
+from absl import app  # type: ignore
+from absl import flags  # type: ignore
+
+from pyreach.impl import log_columns
+
+flags.DEFINE_string("logs_dir", "",
+                    "If set, the logs directory to export to --columns_dir.")
+flags.DEFINE_string("columns_dir", "", "The directory of the columns.")
+flags.DEFINE_string("device_type", "", "The device type of the query.")
+flags.DEFINE_string("device_name", "", "The device name of the query.")
+flags.DEFINE_string("data_type", "", "The data type of the query.")
+flags.DEFINE_list("columns", [], "The columns of the query, all if empty.")
+flags.DEFINE_float("start_time", None,
+                   "If set, the start time of the query in seconds.")
+flags.DEFINE_float("end_time", None,
+                   "If set, the end time (excluded) of the query in seconds.")
+
+
+def _print_groups(columns: log_columns.LogColumns) -> None:
+  """Print the groups and their columns."""
+  for group in columns.groups():
+    print("%s %s %s: %d rows" % (group.device_type, group.device_name or "-",
+                                 group.data_type, group.rows))
+    for name in group.columns:
+      print("  %s %s" % (name, group.column(name).shape[1:]))
+
+
+def _print_query(group: log_columns.ColumnGroup, names: List[str],
+                 start_time: Optional[float],
+                 end_time: Optional[float]) -> None:
+  """Print the selected rows of a group as CSV."""
+  selected = group.select(names or None, start_time, end_time)
+  header: List[str] = []
+  for name, column in selected.items():
+    if column.ndim == 1:
+      header.append(name)
+    else:
+      header.extend("%s.%d" % (name, index) for index in range(column.shape[1]))
+  writer = csv.writer(sys.stdout)
+  writer.writerow(header)
+  rows = len(next(iter(selected.values()))) if selected else 0
+  for row in range(rows):
+    values: List[object] = []
+    for column in selected.values():
+      if column.ndim == 1:
+        values.append(column[row])
+      else:
+        values.extend(column[row])
+    writer.writerow(values)
+
+
+def _main(argv: List[str]) -> None:
+  """Run the main for log columns."""
+  if len(argv) > 1:
+    raise app.UsageError("Too many command-line arguments.")
+  if not flags.FLAGS.columns_dir:
+    raise app.UsageError("--columns_dir is required.")
+
+  if flags.FLAGS.logs_dir:
+    columns = log_columns.export(flags.FLAGS.logs_dir,
+                                 flags.FLAGS.columns_dir)
+  else:
+    columns = log_columns.LogColumns(flags.FLAGS.columns_dir)
+  if not flags.FLAGS.data_type:
+    _print_groups(columns)
+    return
+  group = columns.group(flags.FLAGS.device_type, flags.FLAGS.data_type,
+                        flags.FLAGS.device_name)
+  _print_query(group, flags.FLAGS.columns, flags.FLAGS.start_time,
+               flags.FLAGS.end_time)
+
+
+if __name__ == "__main__":
+  app.run(_main)
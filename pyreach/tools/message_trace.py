@@ -0,0 +1,61 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Message trace prints the latency of DeviceData through the host pipeline.
+
+Sample command:
+  python3 message_trace.py --connection_string="connection-type=local" \
+      --duration=30
+"""
+
+import time
+from typing import List
+
+from absl import app  # type: ignore
+from absl import flags  # type: ignore
+
+from pyreach.factory import ConnectionFactory
+from pyreach.impl import message_trace
+
+flags.DEFINE_string(
+    "connection_string", "", "Connect using a PyReach connection string (see "
+    "connection_string.md for examples and documentation).")
+flags.DEFINE_float("duration", 10.0, "The tracing duration in seconds.")
+flags.DEFINE_float("interval", 0.0,
+                   "If non-zero, print intermediate results every interval.")
+
+
+def _main(argv: List[str]) -> None:
+  """Run the main for the message trace."""
+  if len(argv) > 1:
+    raise app.UsageError("Too many command-line arguments.")
+
+  # Enabled before connecting, so the client stamps the receive time.
+  message_trace.enable()
+  with ConnectionFactory(
+      connection_string=flags.FLAGS.connection_string).connect() as host:
+    end_time = time.time() + flags.FLAGS.duration
+    while time.time() < end_time:
+      wait = end_time - time.time()
+      if flags.FLAGS.interval > 0:
+        wait = min(wait, flags.FLAGS.interval)
+      time.sleep(max(wait, 0.0))
+      if flags.FLAGS.interval > 0 and time.time() < end_time:
+        print(message_trace.format_results(host.internal.message_trace()))
+        print()
+    print(message_trace.format_results(host.internal.message_trace()))
+
+
+if __name__ == "__main__":
+  app.run(_main)
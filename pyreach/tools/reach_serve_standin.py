@@ -0,0 +1,107 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Run a local stand-in for reach serve, optionally with a load generator.
+
+Serve a stand-in workcell to local TCP clients:
+  python3 reach_serve_standin.py --port=50008 --color_rate=30
+  python3 message_trace.py --connection_string="connection-type=local-tcp"
+
+Measure the throughput of a host connected to the stand-in:
+  python3 reach_serve_standin.py --load --engine=selector --color_rate=30
+"""
+
+import json
+import time
+from typing import List
+
+from absl import app  # type: ignore
+from absl import flags  # type: ignore
+
+from pyreach.impl import reach_serve_standin
+
+flags.DEFINE_string("hostname", "localhost", "The address to listen on.")
+flags.DEFINE_integer("port", 50008,
+                     "The TCP port to listen on, 0 for any free port.")
+flags.DEFINE_float("robot_state_rate", 10.0,
+                   "The arm robot-state publishing rate, 0 to disable.")
+flags.DEFINE_float("color_rate", 0.0,
+                   "The color frame publishing rate, 0 to disable.")
+flags.DEFINE_float("depth_rate", 0.0,
+                   "The depth frame publishing rate, 0 to disable.")
+flags.DEFINE_float("vacuum_rate", 10.0,
+                   "The vacuum state publishing rate, 0 to disable.")
+flags.DEFINE_float("force_torque_rate", 0.0,
+                   "The force torque sensor publishing rate, 0 to disable.")
+flags.DEFINE_string("color_file", "",
+                    "The color image file, a synthetic image if empty.")
+flags.DEFINE_string("depth_file", "",
+                    "The 16-bit depth image file, a synthetic image if empty.")
+flags.DEFINE_integer("image_width", 640, "The width of synthetic images.")
+flags.DEFINE_integer("image_height", 480, "The height of synthetic images.")
+flags.DEFINE_bool("unique_frame_files", False,
+                  "Write the images of each frame to a new file.")
+flags.DEFINE_float("script_duration", 0.0,
+                   "The execution time in seconds of reach-scripts.")
+flags.DEFINE_bool(
+    "load", False, "Connect a host to the stand-in, print its throughput as "
+    "JSON and exit.")
+flags.DEFINE_string("engine", "multiprocess",
+                    "The local TCP client engine of the load generator.")
+flags.DEFINE_float("duration", 5.0,
+                   "The time in seconds the load generator receives streams.")
+flags.DEFINE_integer(
+    "requests", 100,
+    "The number of tagged requests of each kind of the load generator.")
+
+
+def _main(argv: List[str]) -> None:
+  """Run the main for the reach serve stand-in."""
+  if len(argv) > 1:
+    raise app.UsageError("Too many command-line arguments.")
+
+  config = reach_serve_standin.StandinConfig(
+      robot_state_rate=flags.FLAGS.robot_state_rate,
+      color_rate=flags.FLAGS.color_rate,
+      depth_rate=flags.FLAGS.depth_rate,
+      vacuum_rate=flags.FLAGS.vacuum_rate,
+      force_torque_rate=flags.FLAGS.force_torque_rate,
+      color_file=flags.FLAGS.color_file,
+      depth_file=flags.FLAGS.depth_file,
+      image_width=flags.FLAGS.image_width,
+      image_height=flags.FLAGS.image_height,
+      unique_frame_files=flags.FLAGS.unique_frame_files,
+      script_duration=flags.FLAGS.script_duration)
+  with reach_serve_standin.ReachServeStandin(config, flags.FLAGS.hostname,
+                                             flags.FLAGS.port) as server:
+    if flags.FLAGS.load:
+      results = reach_serve_standin.run_load(
+          flags.FLAGS.hostname,
+          server.port,
+          duration=flags.FLAGS.duration,
+          engine=flags.FLAGS.engine,
+          requests=flags.FLAGS.requests)
+      print(json.dumps(results, indent=2, sort_keys=True))
+      return
+    print("Serving on %s:%d" % (flags.FLAGS.hostname, server.port))
+    try:
+      while True:
+        time.sleep(10.0)
+        print(json.dumps(server.stats(), sort_keys=True))
+    except KeyboardInterrupt:
+      pass
+
+
+if __name__ == "__main__":
+  app.run(_main)